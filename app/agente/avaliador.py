@@ -4,7 +4,10 @@ Avaliador de confianca para resultados de pesquisa
 Calcula confidence scores usando multiplos fatores
 """
 import re
+import math
 import asyncio
+from heapq import heappop, heappush
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
 
@@ -50,6 +53,110 @@ def extrair_palavras_chave(texto: str, min_length: int = 3) -> List[str]:
     return list(dict.fromkeys(palavras_chave))
 
 
+class PontuadorRelevancia:
+    """
+    Score de relevância de palavras-chave compilado para uma query
+
+    Extrai as palavras-chave da query uma única vez e indexa todas as suas
+    substrings. Um token do texto só conta como match parcial de uma
+    palavra-chave ausente se for substring dela (a palavra-chave inteira já
+    não aparece no texto), então uma passada pelos tokens do texto no índice
+    resolve todos os matches parciais. Os scores são idênticos aos de
+    calcular_score_relevancia.
+    """
+
+    def __init__(self, query: str):
+        """
+        Args:
+            query: Query/pergunta original (em português)
+        """
+        self.query = query
+        self.query_lower = query.lower() if query else ""
+        self.palavras = tuple(extrair_palavras_chave(query))
+
+        # substring -> bitmask das palavras-chave que a contêm
+        self._substrings: Dict[str, int] = {}
+        for i, palavra in enumerate(self.palavras):
+            bit = 1 << i
+            for inicio in range(len(palavra)):
+                for fim in range(inicio + 1, len(palavra) + 1):
+                    sub = palavra[inicio:fim]
+                    self._substrings[sub] = self._substrings.get(sub, 0) | bit
+
+    def pontuar(self, resultado: str, resultado_traduzido: Optional[str] = None) -> float:
+        """
+        Calcula o score de relevância de um texto (mesma regra de calcular_score_relevancia)
+
+        Args:
+            resultado: Texto do resultado (idioma original)
+            resultado_traduzido: Texto traduzido para português (opcional)
+
+        Returns:
+            Score de relevancia entre 0.0 e 1.0
+        """
+        if not resultado or not self.query or not self.palavras:
+            return 0.0
+
+        texto_para_avaliar = resultado_traduzido if resultado_traduzido else resultado
+        texto_lower = texto_para_avaliar.lower()
+        total = len(self.palavras)
+
+        matches = 0
+        ausentes = 0
+        for i, palavra in enumerate(self.palavras):
+            if palavra in texto_lower:
+                matches += 1
+            else:
+                ausentes |= 1 << i
+
+        # Matches parciais: tokens do texto que são parte de uma palavra ausente
+        matches_parciais = 0
+        if ausentes:
+            encontrados = 0
+            for token in set(texto_lower.split()):
+                encontrados |= self._substrings.get(token, 0)
+            matches_parciais = bin(encontrados & ausentes).count("1")
+
+        # Score base: proporcao de palavras encontradas (0-0.75)
+        score_base = (matches / total) * 0.75
+
+        # Bonus para matches parciais (max 0.10)
+        bonus_parcial = (matches_parciais / total) * 0.10
+
+        # Bonus se query completa aparece como phrase (0-0.25)
+        bonus_phrase = 0.0
+        if self.query_lower in texto_lower:
+            bonus_phrase = 0.25
+        elif matches == total:
+            bonus_phrase = 0.15
+
+        score = score_base + bonus_parcial + bonus_phrase
+
+        return min(1.0, score)
+
+    def pontuar_lote(self, textos: List[Tuple[str, Optional[str]]]) -> List[float]:
+        """
+        Pontua vários textos contra a query
+
+        Args:
+            textos: Pares (resultado, resultado_traduzido)
+
+        Returns:
+            Scores na mesma ordem
+        """
+        return [self.pontuar(resultado, traduzido) for resultado, traduzido in textos]
+
+    def matches_titulo(self, titulo: str) -> int:
+        """Número de palavras-chave da query contidas no título"""
+        return sum(1 for p in self.palavras if p in titulo)
+
+
+@lru_cache(maxsize=256)
+def obter_pontuador(query: str) -> PontuadorRelevancia:
+    """Pontuador compilado para a query (reutilizado entre chamadas)"""
+    return PontuadorRelevancia(query)
+
+
 async def calcular_score_relevancia(
     resultado: str,
     query: str,
@@ -73,52 +180,7 @@ async def calcular_score_relevancia(
     if not resultado or not query:
         return 0.0
 
-    # Se temos tradução, usar ela para calcular relevância
-    # Isso garante que resultados em outros idiomas sejam avaliados de forma justa
-    texto_para_avaliar = resultado_traduzido if resultado_traduzido else resultado
-
-    # Extrair palavras-chave da query
-    palavras_query = extrair_palavras_chave(query)
-    if not palavras_query:
-        return 0.0
-
-    # Converter texto para minusculas para matching
-    texto_lower = texto_para_avaliar.lower()
-    query_lower = query.lower()
-
-    # Contar quantas palavras-chave aparecem no texto
-    matches = 0
-    matches_parciais = 0  # Contar matches parciais (ex: "educação" em "educacional")
-    for palavra in palavras_query:
-        if palavra in texto_lower:
-            matches += 1
-        else:
-            # Verificar match parcial (palavra é parte de outra palavra)
-            palavras_texto = texto_lower.split()
-            for palavra_texto in palavras_texto:
-                if palavra in palavra_texto or palavra_texto in palavra:
-                    matches_parciais += 1
-                    break
-
-    # Score base: proporcao de palavras encontradas (0-0.75)
-    # MUDANÇA: Agora usa escala mais alta (0.75 vs 0.8 anterior) mas com bonus maiores
-    score_base = (matches / len(palavras_query)) * 0.75
-
-    # Bonus para matches parciais (max 0.10)
-    bonus_parcial = (matches_parciais / len(palavras_query)) * 0.10
-
-    # Bonus se query completa aparece como phrase (0-0.25)
-    # MUDANÇA: Bonus aumentado de 0.15 para 0.25
-    bonus_phrase = 0.0
-    if query_lower in texto_lower:
-        bonus_phrase = 0.25  # Excelente: encontrou a query inteira
-    elif matches == len(palavras_query):
-        # Se todas as palavras estao presentes mas nao em sequencia
-        bonus_phrase = 0.15  # Muito bom: encontrou todas as palavras
-
-    score = score_base + bonus_parcial + bonus_phrase
-
-    return min(1.0, score)
+    return obter_pontuador(query).pontuar(resultado, resultado_traduzido)
 
 
 def detectar_brasil(resultado: Dict[str, Any]) -> bool:
@@ -297,14 +359,14 @@ def calcular_score_ponderado(
 
     # Fator 4: Match no titulo (10%) - MANTIDO
     peso_titulo = 0.10
-    titulo = resultado.get("titulo", "").lower()
-    titulo_pt = resultado.get("titulo_pt", "").lower()  # Também considerar tradução
+    titulo = (resultado.get("titulo") or "").lower()
+    titulo_pt = (resultado.get("titulo_pt") or "").lower()  # Também considerar tradução
     titulo_completo = f"{titulo} {titulo_pt}"
 
-    palavras_query = extrair_palavras_chave(query)
-    if palavras_query:
-        titulo_matches = sum(1 for p in palavras_query if p in titulo_completo)
-        valor_titulo = min(1.0, titulo_matches / len(palavras_query))
+    pontuador = obter_pontuador(query)
+    if pontuador.palavras:
+        titulo_matches = pontuador.matches_titulo(titulo_completo)
+        valor_titulo = min(1.0, titulo_matches / len(pontuador.palavras))
     else:
         valor_titulo = 0.0
 
@@ -715,7 +777,114 @@ class Avaliador:
             - recomendacao: "parar", "continuar" ou "talvez"
             - motivo: Explicação da recomendação
         """
+        conjunto = self.novo_conjunto(query)
+        await conjunto.adicionar(resultados)
+        return conjunto.avaliar()
+
+    def novo_conjunto(self, query: str) -> "ConjuntoAvaliado":
+        """Cria um conjunto para avaliação incremental (busca adaptativa)"""
+        return ConjuntoAvaliado(self, query)
+
+
+class _SomaExata:
+    """
+    Soma exata de floats mantida incrementalmente
+
+    Guarda os parciais não sobrepostos de Shewchuk (o mesmo algoritmo de
+    math.fsum): a soma real é exatamente a soma dos parciais, então valor()
+    arredonda uma única vez, sem depender da ordem de chegada. Aceita
+    valores negativos (remoção exata). Para scores em [0, 1] a lista de
+    parciais fica com poucos elementos.
+    """
+
+    __slots__ = ("_parciais",)
+
+    def __init__(self):
+        self._parciais: List[float] = []
+
+    def adicionar(self, x: float):
+        parciais = self._parciais
+        i = 0
+        for y in parciais:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                parciais[i] = lo
+                i += 1
+            x = hi
+        parciais[i:] = [x]
+
+    def valor(self) -> float:
+        return math.fsum(self._parciais)
+
+
+class ConjuntoAvaliado:
+    """
+    Estado incremental de avaliar_qualidade_conjunto
+
+    Só os resultados novos são avaliados (avaliar_batch); mínimo, máximo,
+    soma exata dos scores, o terço inferior (heap de máximo, com sua soma) e
+    o resto (heap de mínimo), fontes e URLs são mantidos entre chamadas.
+    adicionar() custa O(log n) por score e avaliar() não percorre os scores.
+    avaliar() retorna o que avaliar_qualidade_conjunto retornaria para todos
+    os resultados adicionados.
+    """
+
+    def __init__(self, avaliador: Avaliador, query: str):
+        self.avaliador = avaliador
+        self.query = query
+        self.num_resultados = 0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+        self._soma = _SomaExata()
+        self._inferior: List[float] = []  # Terço inferior, negado (heap de máximo)
+        self._superior: List[float] = []  # Demais scores (heap de mínimo)
+        self._soma_inferior = _SomaExata()
+        self._fontes = set()
+        self._urls = set()
+
+    def _inserir_score(self, score: float):
+        """Põe o score no heap certo e rebalanceia para max(1, n // 3) no terço inferior"""
+        if self._inferior and score < -self._inferior[0]:
+            heappush(self._inferior, -score)
+            self._soma_inferior.adicionar(score)
+        else:
+            heappush(self._superior, score)
+
+        tamanho = max(1, self.num_resultados // 3)
+        while len(self._inferior) > tamanho:
+            maior = -heappop(self._inferior)
+            self._soma_inferior.adicionar(-maior)
+            heappush(self._superior, maior)
+        while len(self._inferior) < tamanho:
+            menor = heappop(self._superior)
+            heappush(self._inferior, -menor)
+            self._soma_inferior.adicionar(menor)
+
+    async def adicionar(self, resultados: List[Dict[str, Any]]):
+        """Avalia e acumula resultados novos"""
         if not resultados:
+            return
+        scores = await self.avaliador.avaliar_batch(resultados, self.query)
+        for resultado, score in zip(resultados, scores):
+            self.num_resultados += 1
+            self._min = score if self._min is None else min(self._min, score)
+            self._max = score if self._max is None else max(self._max, score)
+            self._soma.adicionar(score)
+            self._inserir_score(score)
+            self._fontes.add(resultado.get("fonte", "unknown"))
+            self._urls.add(resultado.get("url", ""))
+
+    def avaliar(self) -> Dict[str, Any]:
+        """
+        Avalia a qualidade do conjunto acumulado
+
+        Returns:
+            Mesmo formato de Avaliador.avaliar_qualidade_conjunto
+        """
+        if not self.num_resultados:
             return {
                 "qualidade_geral": 0.0,
                 "confianca": 0.0,
@@ -724,24 +893,22 @@ class Avaliador:
                 "motivo": "Nenhum resultado encontrado ainda"
             }
 
-        # Avaliar todos os resultados
-        scores = await self.avaliar_batch(resultados, query)
+        n = self.num_resultados
 
         # Calcular métricas
-        qualidade_geral = sum(scores) / len(scores) if scores else 0.0
-        melhor_score = max(scores) if scores else 0.0
-        piores_scores = sorted(scores)[:max(1, len(scores)//3)]
-        media_piores = sum(piores_scores) / len(piores_scores)
+        # Somas exatas (independem da ordem em que os scores chegaram)
+        qualidade_geral = self._soma.valor() / n
+        melhor_score = self._max
+        media_piores = self._soma_inferior.valor() / len(self._inferior)
 
         # Diversidade de fontes
-        fontes = [r.get("fonte", "unknown") for r in resultados]
-        fontes_unicas = len(set(fontes))
+        fontes_unicas = len(self._fontes)
         diversidade = min(1.0, fontes_unicas / 5.0)  # Max 5 fontes é 100% diversidade
 
         # Confiança: baseada em qualidade geral + consistência
         # Se todos os scores são altos e altos, alta confiança
         # Se há muito spread, baixa confiança
-        score_spread = max(scores) - min(scores) if scores else 0.0
+        score_spread = self._max - self._min
         consistencia = 1.0 - min(1.0, score_spread)  # Menos spread = mais consistência
         confianca = (qualidade_geral * 0.7) + (consistencia * 0.3)
 
@@ -770,8 +937,8 @@ class Avaliador:
             recomendacao = "continuar"
 
         # Verificação de redundância: se muitos resultados similares, pode parar antes
-        duplicatas = len(resultados) - len(set(r.get("url", "") for r in resultados))
-        if duplicatas > len(resultados) * 0.5:
+        duplicatas = n - len(self._urls)
+        if duplicatas > n * 0.5:
             motivos.append("Alta redundância entre resultados")
             if recomendacao == "continuar" and qualidade_geral >= 0.50:
                 recomendacao = "talvez"
@@ -783,7 +950,7 @@ class Avaliador:
             "confianca": round(confianca, 3),
             "diversidade": round(diversidade, 3),
             "consistencia": round(consistencia, 3),
-            "num_resultados": len(resultados),
+            "num_resultados": n,
             "fontes_unicas": fontes_unicas,
             "recomendacao": recomendacao,
             "motivo": motivo_final,
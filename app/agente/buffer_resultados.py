@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Buffer write-behind para resultados de pesquisa
+
+Os workers do Processador enfileiram resultados aqui em vez de fazer um
+INSERT + commit por linha. O buffer grava tudo de uma vez
+(inserir_resultados_lote: executemany numa transação) quando atinge
+`max_itens` ou quando o item mais antigo espera `intervalo` segundos.
+
+Quem enfileira recebe um future resolvido após a gravação (True se a linha
+foi inserida, False se ignorada por hash duplicado), então uma entrada da
+fila só é marcada como completa depois que seus resultados estão no banco.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.database import inserir_resultados_lote
+
+
+class BufferResultados:
+    """Acumula resultados de todos os workers e grava em lote"""
+
+    def __init__(self, max_itens: Optional[int] = None, intervalo: Optional[float] = None):
+        """
+        Args:
+            max_itens: Tamanho que dispara a gravação imediata
+            intervalo: Espera máxima (s) de um resultado no buffer
+        """
+        self.max_itens = max_itens or settings.RESULTADOS_BUFFER_MAX
+        self.intervalo = intervalo if intervalo is not None else settings.RESULTADOS_BUFFER_INTERVALO
+        self._pendentes: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._agendado: Optional[asyncio.Task] = None
+        self._gravacoes_em_curso: set = set()
+        self._lock: Optional[asyncio.Lock] = None
+        self.stats = {
+            "enfileirados": 0,
+            "inseridos": 0,
+            "duplicados": 0,
+            "gravacoes": 0,
+            "falhas_gravacao": 0,
+            "tempo_gravacao": 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._pendentes)
+
+    def adicionar(self, dados: Dict[str, Any]) -> asyncio.Future:
+        """
+        Enfileira um resultado (no formato de insert_resultado)
+
+        Returns:
+            Future com True se inserido, False se ignorado
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes.append((dados, futuro))
+        self.stats["enfileirados"] += 1
+
+        if len(self._pendentes) >= self.max_itens:
+            tarefa = asyncio.create_task(self.descarregar())
+            self._gravacoes_em_curso.add(tarefa)
+            tarefa.add_done_callback(self._gravacoes_em_curso.discard)
+        elif self._agendado is None or self._agendado.done():
+            self._agendado = asyncio.create_task(self._descarregar_apos_intervalo())
+        return futuro
+
+    async def salvar(self, dados: Dict[str, Any]) -> bool:
+        """Enfileira e aguarda a gravação do resultado"""
+        # shield: cancelar o worker não descarta o resultado já enfileirado
+        return await asyncio.shield(self.adicionar(dados))
+
+    async def _descarregar_apos_intervalo(self):
+        await asyncio.sleep(self.intervalo)
+        # shield: cancelar o agendamento não interrompe uma gravação em curso
+        await asyncio.shield(self.descarregar())
+
+    def _cancelar_agendamento(self):
+        if self._agendado is not None and not self._agendado.done():
+            self._agendado.cancel()
+        self._agendado = None
+
+    async def descarregar(self) -> int:
+        """
+        Grava todos os resultados pendentes numa transação
+
+        Returns:
+            Número de resultados inseridos
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            lote, self._pendentes = self._pendentes, []
+            if not lote:
+                return 0
+            # O buffer foi esvaziado: o agendamento por tempo não é mais necessário
+            self._cancelar_agendamento()
+
+            inicio = time.perf_counter()
+            try:
+                inseridos = await inserir_resultados_lote([dados for dados, _ in lote])
+            except Exception as e:
+                print(f"[BUFFER] Erro gravando lote de {len(lote)} resultados: {e}")
+                self.stats["falhas_gravacao"] += 1
+                inseridos = [False] * len(lote)
+
+            self.stats["gravacoes"] += 1
+            self.stats["tempo_gravacao"] += time.perf_counter() - inicio
+            total = sum(inseridos)
+            self.stats["inseridos"] += total
+            self.stats["duplicados"] += len(lote) - total
+
+            for (_, futuro), ok in zip(lote, inseridos):
+                if not futuro.done():
+                    futuro.set_result(ok)
+            return total
+
+    async def fechar(self) -> int:
+        """
+        Cancela o agendamento e grava o que estiver pendente (shutdown/pausa)
+
+        Returns:
+            Número de resultados inseridos
+        """
+        self._cancelar_agendamento()
+        return await self.descarregar()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do buffer"""
+        return {
+            **self.stats,
+            "pendentes": len(self._pendentes),
+            "media_por_gravacao": (
+                (self.stats["inseridos"] + self.stats["duplicados"]) / self.stats["gravacoes"]
+                if self.stats["gravacoes"] else 0.0
+            )
+        }
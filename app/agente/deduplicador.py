@@ -6,8 +6,9 @@ Detecta e remove duplicados usando hash e similaridade (Jaccard e semântica)
 import hashlib
 import re
 import asyncio
-from typing import Dict, List, Any, Set, Tuple, Optional
+from typing import Dict, FrozenSet, List, Any, Set, Tuple, Optional
 from app.config import settings
+from app.utils.minhash_lsh import IndiceMinHashLSH
 
 
 def normalizar_para_hash(texto: str) -> str:
@@ -109,6 +110,11 @@ class Deduplicador:
         # Flag para usar deduplicacao semantica
         self.usar_semantica = vector_store is not None and settings.RAG_ENABLED
 
+        # Índice MinHash/LSH dos conteúdos vistos (tokens normalizados em cache):
+        # a busca por similares verifica Jaccard só nos candidatos do índice
+        self._indice = IndiceMinHashLSH(threshold)
+        self._ordem: Dict[str, int] = {}  # hash -> ordem de registro
+
     def _extrair_conteudo_relevante(self, resultado: Dict[str, Any]) -> str:
         """
         Extrai conteudo relevante de um resultado para deduplicacao
@@ -126,6 +132,41 @@ class Deduplicador:
         conteudo = f"{titulo} {descricao}"
         return conteudo
 
+    def _tokens(self, resultado: Dict[str, Any]) -> FrozenSet[str]:
+        """Conjunto de palavras normalizadas do conteúdo (como em calcular_similaridade)"""
+        return frozenset(normalizar_para_hash(self._extrair_conteudo_relevante(resultado)).split())
+
+    def _registrar(self, hash_conteudo: str, resultado: Dict[str, Any], tokens: FrozenSet[str]):
+        """Registra um resultado novo no cache de hashes e no índice"""
+        self.hashes_vistos[hash_conteudo] = resultado
+        self.contador_hashes[hash_conteudo] = 1
+        self._ordem[hash_conteudo] = len(self._ordem)
+        self._indice.adicionar(hash_conteudo, tokens)
+
+    def _buscar_similar(self, tokens: FrozenSet[str]) -> Optional[str]:
+        """
+        Hash do primeiro resultado registrado com Jaccard >= threshold
+
+        Equivale à varredura linear em hashes_vistos, mas só compara os
+        candidatos do LSH (a chance de perder um par no limiar é < 1e-6).
+        """
+        if self._indice.threshold != self.threshold:
+            self._reconstruir_indice()
+
+        similares = self._indice.consultar(tokens)
+        if not similares:
+            return None
+        return min((hash_existente for hash_existente, _ in similares), key=self._ordem.__getitem__)
+
+    def _reconstruir_indice(self):
+        """Recria o índice (ex.: threshold alterado após a criação)"""
+        antigo = self._indice
+        self._indice = IndiceMinHashLSH(self.threshold)
+        for hash_existente in self.hashes_vistos:
+            tokens = antigo.tokens(hash_existente)
+            if tokens:
+                self._indice.adicionar(hash_existente, tokens)
+
     async def _encontrar_duplicata_semantica(
         self,
         resultado: Dict[str, Any]
@@ -242,19 +283,13 @@ class Deduplicador:
         if hash_conteudo in self.hashes_vistos:
             return False
 
-        # Verificar similaridade com outros hashes
-        for hash_existente in self.hashes_vistos:
-            resultado_existente = self.hashes_vistos[hash_existente]
-            conteudo_existente = self._extrair_conteudo_relevante(resultado_existente)
-
-            similaridade = calcular_similaridade(conteudo, conteudo_existente)
-
-            if similaridade >= self.threshold:
-                return False
+        # Verificar similaridade com outros hashes (candidatos do índice LSH)
+        tokens = self._tokens(resultado)
+        if self._buscar_similar(tokens) is not None:
+            return False
 
         # Eh novo
-        self.hashes_vistos[hash_conteudo] = resultado
-        self.contador_hashes[hash_conteudo] = 1
+        self._registrar(hash_conteudo, resultado, tokens)
 
         return True
 
@@ -285,27 +320,23 @@ class Deduplicador:
 
             return resultado_copia
 
-        # Verificar similaridade
-        for hash_existente in self.hashes_vistos:
-            resultado_existente = self.hashes_vistos[hash_existente]
-            conteudo_existente = self._extrair_conteudo_relevante(resultado_existente)
-
-            similaridade = calcular_similaridade(conteudo, conteudo_existente)
+        # Verificar similaridade (candidatos do índice LSH)
+        tokens = self._tokens(resultado)
+        hash_existente = self._buscar_similar(tokens)
 
-            if similaridade >= self.threshold:
-                # Duplicado similar encontrado
-                self.contador_hashes[hash_existente] += 1
+        if hash_existente is not None:
+            # Duplicado similar encontrado
+            self.contador_hashes[hash_existente] += 1
 
-                # Incrementar score
-                score_atual = resultado_copia.get("score", 0.5)
-                incremento = min(0.3, self.contador_hashes[hash_existente] * 0.05)
-                resultado_copia["score"] = min(1.0, score_atual + incremento)
+            # Incrementar score
+            score_atual = resultado_copia.get("score", 0.5)
+            incremento = min(0.3, self.contador_hashes[hash_existente] * 0.05)
+            resultado_copia["score"] = min(1.0, score_atual + incremento)
 
-                return resultado_copia
+            return resultado_copia
 
         # Eh novo, registrar
-        self.hashes_vistos[hash_conteudo] = resultado_copia
-        self.contador_hashes[hash_conteudo] = 1
+        self._registrar(hash_conteudo, resultado_copia, tokens)
 
         return resultado_copia
 
@@ -342,6 +373,8 @@ class Deduplicador:
         """Limpa o cache de hashes vistos"""
         self.hashes_vistos = {}
         self.contador_hashes = {}
+        self._ordem = {}
+        self._indice.limpar()
 
     def get_estatisticas(self) -> Dict[str, Any]:
         """
@@ -354,5 +387,6 @@ class Deduplicador:
             "total_hashes_vistos": len(self.hashes_vistos),
             "total_ocorrencias": sum(self.contador_hashes.values()),
             "duplicados_detectados": sum(1 for c in self.contador_hashes.values() if c > 1),
-            "threshold": self.threshold
+            "threshold": self.threshold,
+            "indice_lsh": self._indice.get_stats()
         }
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+Jobs persistentes da Fase II em lote (boas práticas das falhas priorizadas)
+
+- O job é criado com a lista de falhas destacadas (tabela fase2_jobs_falhas)
+  e roda em background, com no máximo FASE2_FALHAS_SIMULTANEAS falhas em
+  análise ao mesmo tempo (busca de conteúdo + LLM).
+- Cada falha concluída grava suas práticas, o fingerprint das fontes e o
+  status da falha no job; após um reinício o job é retomado a partir das
+  falhas ainda pendentes.
+- Com reprocessar=False, falhas cujas fontes não mudaram desde a última
+  análise (mesmo fingerprint dos hashes das fontes), feita com o mesmo
+  modelo, são reaproveitadas sem chamar o LLM.
+- O progresso por falha é publicado para os assinantes do job (SSE).
+"""
+import asyncio
+import hashlib
+import uuid
+from typing import Any, Dict, List, Optional, Set
+
+from app.agente.analisador_boas_praticas import AnalisadorBoasPraticas
+from app.agente.jobs_persistentes import JobsPersistentes, calcular_progresso
+from app.database import (
+    db,
+    gerar_hash_fonte,
+    get_falhas_mercado,
+    get_resultados_by_falha,
+    listar_boas_praticas_por_falha,
+    listar_priorizacoes,
+    obter_analise_fase2,
+    obter_fontes_por_falha,
+    salvar_analise_fase2
+)
+from app.config import settings
+from app.utils.content_fetcher import enrich_sources_with_full_content
+from app.utils.logger import logger
+
+MODELO_PADRAO = "google/gemini-2.0-flash-exp:free"
+
+_assinantes: Dict[str, Set[asyncio.Queue]] = {}
+_analisador: Optional[AnalisadorBoasPraticas] = None
+
+_STATUS_FINAIS_FALHA = ("concluida", "reaproveitada", "erro")
+
+_SQL_GRAVAR_FALHA = """
+UPDATE fase2_jobs_falhas
+SET status = ?, total_praticas = ?, erro = ?, atualizado_em = CURRENT_TIMESTAMP
+WHERE job_id = ? AND falha_id = ?
+"""
+
+
+def _get_analisador() -> AnalisadorBoasPraticas:
+    global _analisador
+    if _analisador is None:
+        _analisador = AnalisadorBoasPraticas()
+    return _analisador
+
+
+async def coletar_fontes(falha_id: int) -> List[Dict[str, Any]]:
+    """
+    Todas as fontes da falha: resultados de pesquisa + documentos da base
+
+    Diferente de obter_fontes_por_falha(), que retorna apenas fontes salvas
+    em priorizacoes_fontes.
+    """
+    resultados_pesquisa = await get_resultados_by_falha(falha_id)
+    documentos_base = await obter_fontes_por_falha(falha_id)
+
+    fontes = [
+        {
+            'fonte_tipo': 'pesquisa',
+            'fonte_id': resultado.get('id'),
+            'fonte_titulo': resultado.get('titulo'),
+            'fonte_descricao': resultado.get('descricao'),
+            'fonte_url': resultado.get('fonte_url'),
+            'fonte_conteudo': resultado.get('conteudo_completo'),
+            'confidence_score': resultado.get('confidence_score', 0.5),
+            'pais_origem': resultado.get('pais_origem'),
+            'idioma': resultado.get('idioma'),
+            'titulo_pt': resultado.get('titulo_pt'),
+            'descricao_pt': resultado.get('descricao_pt')
+        }
+        for resultado in resultados_pesquisa
+    ]
+    fontes.extend(doc for doc in documentos_base if doc.get('fonte_tipo') == 'documento')
+    return fontes
+
+
+async def calcular_fingerprint(fontes: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint do conjunto de fontes (independe da ordem)
+
+    SHA-256 dos hashes das fontes (gerar_hash_fonte) ordenados.
+    """
+    hashes = sorted([
+        await gerar_hash_fonte(
+            fonte.get('fonte_titulo'), fonte.get('fonte_descricao'), fonte.get('fonte_url')
+        )
+        for fonte in fontes
+    ])
+    return hashlib.sha256("\n".join(hashes).encode()).hexdigest()
+
+
+async def analisar_falha(
+    falha: Dict[str, Any],
+    modelo: Optional[str] = None,
+    reprocessar: bool = False,
+    reaproveitar: bool = False
+) -> Dict[str, Any]:
+    """
+    FASE II de uma falha: fontes -> conteúdo completo -> LLM -> práticas salvas
+
+    Args:
+        falha: Falha de mercado (id, titulo, pilar, descricao)
+        modelo: Modelo LLM (None = padrão do analisador)
+        reprocessar: Se True, substitui as práticas da Fase II existentes
+        reaproveitar: Se True e a última análise usou as mesmas fontes (mesmo
+            fingerprint) e o mesmo modelo, devolve as práticas salvas sem
+            chamar o LLM; se as fontes ou o modelo mudaram, substitui as
+            práticas dessa análise. Práticas sem análise registrada em
+            fase2_analises nunca são apagadas
+
+    Returns:
+        Dict com praticas, total_praticas, num_fontes e reaproveitada
+    """
+    falha_id = falha['id']
+    fontes = await coletar_fontes(falha_id)
+    logger.info(f"Fase II: {len(fontes)} fontes para a falha {falha_id}")
+
+    if not fontes:
+        logger.warning(f"Nenhuma fonte disponível para falha {falha_id}")
+        return {"praticas": [], "total_praticas": 0, "num_fontes": 0, "reaproveitada": False}
+
+    fingerprint = await calcular_fingerprint(fontes)
+    modelo_usado = modelo or MODELO_PADRAO
+
+    anterior = await obter_analise_fase2(falha_id) if reaproveitar and not reprocessar else None
+    if anterior:
+        # Análises antigas sem modelo registrado usaram o padrão
+        if (
+            anterior["fingerprint"] == fingerprint
+            and (anterior["modelo"] or MODELO_PADRAO) == modelo_usado
+        ):
+            salvas = await listar_boas_praticas_por_falha(falha_id, 'fase_2')
+            logger.info(f"Fase II: fontes da falha {falha_id} inalteradas, reaproveitando {len(salvas)} práticas")
+            return {
+                "praticas": [
+                    {
+                        'titulo': p['titulo'],
+                        'descricao': p['descricao'],
+                        'is_sebrae': bool(p['is_sebrae']),
+                        'fonte': p['fonte_referencia']
+                    }
+                    for p in salvas
+                ],
+                "total_praticas": len(salvas),
+                "num_fontes": len(fontes),
+                "reaproveitada": True
+            }
+
+    fontes_enriquecidas = await enrich_sources_with_full_content(fontes)
+
+    praticas = await _get_analisador().analisar_boas_praticas(
+        falha=falha,
+        fontes=fontes_enriquecidas,
+        modelo=modelo,
+        usar_openrouter=True
+    )
+
+    # Em lote (reaproveitar) só são substituídas práticas de uma análise registrada
+    # (fontes ou modelo mudaram); sem registro, as existentes são mantidas
+    await salvar_analise_fase2(
+        falha_id,
+        praticas,
+        fingerprint=fingerprint,
+        num_fontes=len(fontes),
+        modelo=modelo_usado,
+        substituir=reprocessar or anterior is not None
+    )
+    logger.info(f"Fase II: falha {falha_id} concluída com {len(praticas)} práticas")
+
+    return {
+        "praticas": praticas,
+        "total_praticas": len(praticas),
+        "num_fontes": len(fontes),
+        "reaproveitada": False
+    }
+
+
+def _publicar(job_id: str, evento: Dict[str, Any]):
+    """Entrega o evento a todos os assinantes do job (SSE)"""
+    for fila in _assinantes.get(job_id, ()):
+        fila.put_nowait(evento)
+
+
+def assinar(job_id: str) -> asyncio.Queue:
+    """Fila que recebe os eventos do job (use cancelar_assinatura ao sair)"""
+    fila: asyncio.Queue = asyncio.Queue()
+    _assinantes.setdefault(job_id, set()).add(fila)
+    return fila
+
+
+def cancelar_assinatura(job_id: str, fila: asyncio.Queue):
+    assinantes = _assinantes.get(job_id)
+    if assinantes is not None:
+        assinantes.discard(fila)
+        if not assinantes:
+            _assinantes.pop(job_id, None)
+
+
+def _feitas(estado: Dict[str, Any]) -> int:
+    return estado["processadas"] + estado["reaproveitadas"] + estado["com_erro"]
+
+
+def _estado_de_linha(linha: Dict[str, Any], falhas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Estado do job (formato do status) a partir das linhas de fase2_jobs/fase2_jobs_falhas"""
+    estado = {
+        "job_id": linha["job_id"],
+        "status": linha["status"],
+        "modelo": linha["modelo"] or MODELO_PADRAO,
+        "reprocessar": bool(linha["reprocessar"]),
+        "total": linha["total"] or 0,
+        "processadas": linha["processadas"] or 0,
+        "reaproveitadas": linha["reaproveitadas"] or 0,
+        "com_erro": linha["com_erro"] or 0,
+        "iniciado_em": linha["iniciado_em"],
+        "falhas": {
+            falha["falha_id"]: {
+                "falha_id": falha["falha_id"],
+                "titulo": falha["titulo"],
+                "status": falha["status"],
+                "total_praticas": falha["total_praticas"] or 0,
+                **({"erro": falha["erro"]} if falha.get("erro") else {})
+            }
+            for falha in falhas
+        },
+        **{campo: linha[campo] for campo in ("mensagem", "erro", "concluido_em") if linha.get(campo)}
+    }
+    estado["progresso"] = calcular_progresso(estado["status"], _feitas(estado), estado["total"])
+    return estado
+
+
+async def _carregar_estado(job_id: str) -> Optional[Dict[str, Any]]:
+    linha = await db.fetch_one("SELECT * FROM fase2_jobs WHERE job_id = ?", (job_id,))
+    if not linha:
+        return None
+    falhas = await db.fetch_all(
+        "SELECT * FROM fase2_jobs_falhas WHERE job_id = ? ORDER BY rowid", (job_id,)
+    )
+    return _estado_de_linha(linha, falhas)
+
+
+async def _analisar_pendentes(job_id: str, estado: Dict[str, Any]):
+    """Analisa as falhas do job ainda pendentes"""
+    pendentes = [
+        item for item in estado["falhas"].values()
+        if item["status"] not in _STATUS_FINAIS_FALHA
+    ]
+    retomado = len(pendentes) < estado["total"]
+    logger.info(
+        f"[FASE2 {job_id}] {'Retomando' if retomado else 'Iniciando'} análise em lote: "
+        f"{len(pendentes)}/{estado['total']} falhas pendentes"
+    )
+    jobs.iniciar_execucao(estado, estado["total"])
+
+    falhas_por_id = {falha['id']: falha for falha in await get_falhas_mercado()}
+    modelo = None if estado["modelo"] == MODELO_PADRAO else estado["modelo"]
+    semaforo = asyncio.Semaphore(max(1, settings.FASE2_FALHAS_SIMULTANEAS))
+
+    async def processar(item: Dict[str, Any]):
+        async with semaforo:
+            item["status"] = "processando"
+            _publicar(job_id, {"tipo": "falha", **item, "progresso": estado["progresso"]})
+            try:
+                falha = falhas_por_id.get(item["falha_id"])
+                if falha is None:
+                    raise ValueError("Falha não encontrada")
+                resultado = await analisar_falha(
+                    falha,
+                    modelo=modelo,
+                    reprocessar=estado["reprocessar"],
+                    reaproveitar=not estado["reprocessar"]
+                )
+                item["total_praticas"] = resultado["total_praticas"]
+                if resultado["reaproveitada"]:
+                    item["status"] = "reaproveitada"
+                    estado["reaproveitadas"] += 1
+                else:
+                    item["status"] = "concluida"
+                    estado["processadas"] += 1
+            except Exception as e:
+                logger.error(f"[FASE2 {job_id}] Erro ao processar falha {item['falha_id']}: {e}")
+                item.update({"status": "erro", "erro": str(e)})
+                estado["com_erro"] += 1
+
+            jobs.registrar_avanco(estado, 1)
+            # Status da falha e contadores do job na mesma transação
+            await jobs.gravar_checkpoint(
+                job_id, estado, ("processadas", "reaproveitadas", "com_erro"),
+                [(_SQL_GRAVAR_FALHA, [
+                    (item["status"], item["total_praticas"], item.get("erro"), job_id, item["falha_id"])
+                ])]
+            )
+            _publicar(job_id, {"tipo": "falha", **item, "progresso": estado["progresso"]})
+
+    await asyncio.gather(*[processar(item) for item in pendentes])
+
+    await jobs.finalizar(
+        job_id,
+        "concluido",
+        f"Análise em lote concluída! {estado['processadas']} falhas processadas, "
+        f"{estado['reaproveitadas']} reaproveitadas, {estado['com_erro']} erros."
+    )
+    logger.info(
+        f"[FASE2 {job_id}] Concluído: {estado['processadas']} processadas, "
+        f"{estado['reaproveitadas']} reaproveitadas, {estado['com_erro']} erros"
+    )
+
+
+def _exportar(estado: Dict[str, Any]) -> Dict[str, Any]:
+    """Status com as falhas como lista"""
+    return {**estado, "falhas": list(estado["falhas"].values())}
+
+
+def _publicar_fim(job_id: str):
+    _publicar(job_id, {"tipo": "fim", **obter_status_memoria(job_id)})
+
+
+jobs = JobsPersistentes(
+    "fase2_jobs",
+    "FASE2",
+    _analisar_pendentes,
+    feitos=_feitas,
+    carregar_estado=_carregar_estado,
+    ao_finalizar=_publicar_fim,
+    exportar=_exportar
+)
+job_ativo = jobs.ativo
+retomar_jobs = jobs.retomar
+obter_status = jobs.obter_status
+# Status em memória (falhas como lista), ou None
+obter_status_memoria = jobs.status_em_memoria
+encerrar = jobs.encerrar
+
+
+async def criar_job(modelo: Optional[str] = None, reprocessar: bool = False) -> Optional[str]:
+    """
+    Registra um job com as falhas priorizadas (destacadas) e o inicia em background
+
+    Returns:
+        ID do job, ou None se não há falhas priorizadas
+    """
+    priorizacoes = await listar_priorizacoes(com_analise=False)
+    falhas = [p for p in priorizacoes if p.get('destacada')]
+    if not falhas:
+        return None
+
+    job_id = str(uuid.uuid4())
+    async with db.get_connection() as conn:
+        await conn.execute(
+            "INSERT INTO fase2_jobs (job_id, modelo, reprocessar, total) VALUES (?, ?, ?, ?)",
+            (job_id, modelo or MODELO_PADRAO, 1 if reprocessar else 0, len(falhas))
+        )
+        await conn.executemany(
+            "INSERT OR IGNORE INTO fase2_jobs_falhas (job_id, falha_id, titulo) VALUES (?, ?, ?)",
+            [(job_id, p['falha_id'], p.get('titulo')) for p in falhas]
+        )
+        await conn.commit()
+
+    jobs.agendar(job_id)
+    return job_id
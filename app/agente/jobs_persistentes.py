@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Infraestrutura dos jobs persistentes em background
+
+Cada tipo de job (reanálise, tradução em lote, Fase II) tem uma tabela de
+checkpoint com, no mínimo: job_id, status, total, mensagem, erro,
+iniciado_em, concluido_em e atualizado_em. JobsPersistentes cuida do que é
+comum a todos:
+
+- agendamento (uma asyncio.Task por job) e estado em memória, usado para o
+  status em tempo real; o banco guarda o checkpoint
+- gravação do checkpoint na mesma transação que os dados do lote
+- retomada dos jobs 'iniciado'/'processando' no startup
+- status com vazão e ETA da execução atual
+- shutdown: as tarefas são canceladas e o checkpoint fica como
+  'processando', para ser retomado
+
+O módulo de cada job fornece só `processar(job_id, estado)` (e, se o estado
+não vier de uma única linha, `carregar_estado`). Jobs que percorrem uma
+tabela por id usam `percorrer_tabela`.
+"""
+import asyncio
+import time
+from contextlib import aclosing
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.database import db
+from app.utils.logger import logger
+
+# Campos do estado em memória que não aparecem no status
+_CAMPOS_INTERNOS = ("inicio_execucao", "processados_na_execucao")
+
+
+def calcular_progresso(status: str, feitos: int, total: int) -> int:
+    """Progresso (0-100) de um job"""
+    if status == "concluido":
+        return 100
+    return min(100, int(feitos / total * 100)) if total else 0
+
+
+class JobsPersistentes:
+    """Jobs de um tipo, com checkpoint na tabela `tabela`"""
+
+    def __init__(
+        self,
+        tabela: str,
+        nome: str,
+        processar: Callable[[str, Dict[str, Any]], Awaitable[None]],
+        estado_de_linha: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        feitos: Callable[[Dict[str, Any]], int] = lambda estado: estado["processados"],
+        carregar_estado: Optional[Callable[[str], Awaitable[Optional[Dict[str, Any]]]]] = None,
+        ao_finalizar: Optional[Callable[[str], None]] = None,
+        exportar: Callable[[Dict[str, Any]], Dict[str, Any]] = dict
+    ):
+        """
+        Args:
+            tabela: Tabela de checkpoint
+            nome: Prefixo dos logs (ex.: "REANALISE")
+            processar: Corpo do job; recebe o estado já carregado
+            estado_de_linha: Linha da tabela -> estado (formato do status);
+                dispensável se `carregar_estado` for informado
+            feitos: Itens concluídos (para progresso e ETA)
+            carregar_estado: Estado a partir do banco (padrão: estado_de_linha
+                da linha do job)
+            ao_finalizar: Chamado depois que o job termina (concluido/erro)
+            exportar: Estado em memória -> status devolvido pela API
+        """
+        self.tabela = tabela
+        self.nome = nome
+        self.processar = processar
+        self.estado_de_linha = estado_de_linha
+        self.feitos = feitos
+        self._carregar_estado = carregar_estado
+        self.ao_finalizar = ao_finalizar
+        self.exportar = exportar
+        # Estado em memória dos jobs (status em tempo real; o banco guarda o checkpoint)
+        self.jobs: Dict[str, dict] = {}
+        self.tarefas: Dict[str, asyncio.Task] = {}
+
+    async def carregar_estado(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado do job a partir do checkpoint, ou None se não existe"""
+        if self._carregar_estado is not None:
+            return await self._carregar_estado(job_id)
+        linha = await db.fetch_one(f"SELECT * FROM {self.tabela} WHERE job_id = ?", (job_id,))
+        return self.estado_de_linha(linha) if linha else None
+
+    def agendar(self, job_id: str) -> asyncio.Task:
+        """Inicia o job (já registrado na tabela) em background"""
+        tarefa = asyncio.create_task(self.executar(job_id))
+        self.tarefas[job_id] = tarefa
+        tarefa.add_done_callback(lambda _: self.tarefas.pop(job_id, None))
+        return tarefa
+
+    def ativo(self, job_id: str) -> bool:
+        """Se o job está rodando neste processo"""
+        return job_id in self.tarefas
+
+    async def executar(self, job_id: str):
+        """Executa (ou retoma, a partir do checkpoint) um job"""
+        carregado = await self.carregar_estado(job_id)
+        if carregado is None:
+            raise ValueError(f"Job {job_id} não encontrado")
+        estado = self.jobs.setdefault(job_id, carregado)
+        estado.update(carregado)
+
+        try:
+            await self.processar(job_id, estado)
+
+        except asyncio.CancelledError:
+            # Shutdown: o checkpoint fica como 'processando' para ser retomado
+            logger.info(
+                f"[{self.nome} {job_id}] Interrompido em {self.feitos(estado)}/{estado.get('total', 0)}"
+            )
+            raise
+
+        except Exception as e:
+            logger.error(f"[{self.nome} {job_id}] Erro fatal: {e}")
+            await self.finalizar(job_id, "erro", erro=str(e))
+
+    def iniciar_execucao(self, estado: Dict[str, Any], total: int):
+        """Marca o início desta execução (base da vazão e do ETA)"""
+        estado.update({
+            "status": "processando",
+            "total": total,
+            "inicio_execucao": time.monotonic(),
+            "processados_na_execucao": 0
+        })
+
+    def registrar_avanco(self, estado: Dict[str, Any], quantidade: int):
+        """Atualiza vazão e progresso depois que `quantidade` itens terminaram"""
+        estado["processados_na_execucao"] = estado.get("processados_na_execucao", 0) + quantidade
+        estado["total"] = max(estado["total"], self.feitos(estado))
+        estado["progresso"] = calcular_progresso(estado["status"], self.feitos(estado), estado["total"])
+
+    async def gravar_checkpoint(
+        self,
+        job_id: str,
+        estado: Dict[str, Any],
+        campos: Sequence[str],
+        comandos: Sequence[Tuple[str, List[tuple]]] = ()
+    ):
+        """
+        Grava os dados do lote (`comandos`: SQL + lista de parâmetros, via
+        executemany) e os `campos` do estado na tabela do job, numa única transação
+        """
+        atribuicoes = ", ".join(f"{campo} = ?" for campo in campos)
+        async with db.get_connection() as conn:
+            for sql, parametros in comandos:
+                if parametros:
+                    await conn.executemany(sql, parametros)
+            await conn.execute(
+                f"""
+                UPDATE {self.tabela}
+                SET status = 'processando', {atribuicoes}, atualizado_em = CURRENT_TIMESTAMP
+                WHERE job_id = ?
+                """,
+                (*(estado[campo] for campo in campos), job_id)
+            )
+            await conn.commit()
+
+    async def finalizar(self, job_id: str, status: str, mensagem: Optional[str] = None, erro: Optional[str] = None):
+        """Marca o job como concluído ou com erro (memória e banco)"""
+        estado = self.jobs[job_id]
+        estado.update({
+            "status": status,
+            "concluido_em": datetime.now().isoformat()
+        })
+        if mensagem is not None:
+            estado["mensagem"] = mensagem
+        if erro is not None:
+            estado["erro"] = erro
+        estado["progresso"] = calcular_progresso(status, self.feitos(estado), estado.get("total", 0))
+        await db.execute(
+            f"""
+            UPDATE {self.tabela}
+            SET status = ?, mensagem = ?, erro = ?, concluido_em = CURRENT_TIMESTAMP,
+                atualizado_em = CURRENT_TIMESTAMP
+            WHERE job_id = ?
+            """,
+            (status, mensagem, erro, job_id)
+        )
+        if self.ao_finalizar is not None:
+            self.ao_finalizar(job_id)
+
+    async def retomar(self) -> List[str]:
+        """
+        Retoma jobs interrompidos (chamado no startup)
+
+        Returns:
+            IDs dos jobs retomados
+        """
+        pendentes = await db.fetch_all(
+            f"SELECT job_id FROM {self.tabela} WHERE status IN ('iniciado', 'processando') ORDER BY iniciado_em"
+        )
+        retomados = []
+        for linha in pendentes:
+            if linha["job_id"] not in self.tarefas:
+                self.agendar(linha["job_id"])
+                retomados.append(linha["job_id"])
+        if retomados:
+            logger.info(f"[{self.nome}] Retomando {len(retomados)} job(s) interrompido(s)")
+        return retomados
+
+    def status_em_memoria(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status do job em memória, com vazão (itens/s) e ETA da execução atual
+
+        Returns:
+            Status, ou None se o job não está em memória
+        """
+        estado = self.jobs.get(job_id)
+        if estado is None:
+            return None
+        status = {k: v for k, v in estado.items() if k not in _CAMPOS_INTERNOS}
+        if estado.get("status") == "processando" and "inicio_execucao" in estado:
+            decorrido = time.monotonic() - estado["inicio_execucao"]
+            vazao = estado["processados_na_execucao"] / decorrido if decorrido > 0 else 0.0
+            restantes = max(0, estado["total"] - self.feitos(estado))
+            status["linhas_por_segundo"] = round(vazao, 2)
+            status["eta_segundos"] = round(restantes / vazao, 1) if vazao > 0 else None
+        return self.exportar(status)
+
+    async def obter_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status do job (ver status_em_memoria)
+
+        Jobs que não estão em memória (ex.: após reinício) vêm do checkpoint.
+        """
+        if job_id in self.jobs:
+            return self.status_em_memoria(job_id)
+        estado = await self.carregar_estado(job_id)
+        return self.exportar(estado) if estado else None
+
+    async def encerrar(self):
+        """Interrompe os jobs em execução (ficam para retomar)"""
+        tarefas = list(self.tarefas.values())
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+    async def percorrer_tabela(
+        self,
+        job_id: str,
+        estado: Dict[str, Any],
+        sql_pagina: str,
+        tamanho_pagina: int,
+        processar_pagina: Callable[[List[Dict[str, Any]]], Awaitable[List[tuple]]],
+        sql_gravar: str,
+        campos: Sequence[str]
+    ):
+        """
+        Percorre a tabela a partir de estado["ultimo_id"], com checkpoint por página
+
+        `processar_pagina` devolve os parâmetros de `sql_gravar` (executemany)
+        da página; eles são gravados junto com o checkpoint (`campos`,
+        incluindo processados e ultimo_id).
+        """
+        async with aclosing(percorrer_paginas(sql_pagina, estado["ultimo_id"], tamanho_pagina)) as paginas:
+            async for pagina in paginas:
+                atualizacoes = await processar_pagina(pagina)
+                estado["processados"] += len(pagina)
+                estado["ultimo_id"] = pagina[-1]["id"]
+                self.registrar_avanco(estado, len(pagina))
+                await self.gravar_checkpoint(job_id, estado, campos, [(sql_gravar, atualizacoes)])
+
+
+async def percorrer_paginas(sql_pagina: str, ultimo_id: int, tamanho_pagina: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Páginas por id (keyset: `sql_pagina` recebe (último id, limite)), sem
+    carregar a tabela em memória; a próxima página é lida enquanto a atual é
+    processada. Use com contextlib.aclosing para cancelar a leitura pendente.
+    """
+    proxima = asyncio.create_task(db.fetch_all(sql_pagina, (ultimo_id, tamanho_pagina)))
+    try:
+        while True:
+            pagina = await proxima
+            proxima = None
+            if not pagina:
+                return
+            proxima = asyncio.create_task(db.fetch_all(sql_pagina, (pagina[-1]["id"], tamanho_pagina)))
+            yield pagina
+    finally:
+        if proxima is not None and not proxima.done():
+            proxima.cancel()
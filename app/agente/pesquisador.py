@@ -4,20 +4,21 @@ Agente pesquisador IA
 Orquestra pesquisas multilingues usando multiplas ferramentas
 """
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import os
 
 from app.config import settings
 from app.database import (
     get_falhas_mercado,
-    inserir_fila_pesquisa,
+    inserir_fila_pesquisas_lote,
+    listar_chaves_fila,
     listar_fila_pesquisas,
     deletar_fila_pesquisa,
     contar_fila_pesquisas
 )
 from app.utils.idiomas import gerar_queries_multilingues
-from app.agente.avaliador import Avaliador
+from app.agente.avaliador import Avaliador, ConjuntoAvaliado
 from app.agente.deduplicador import Deduplicador
 from app.integracao.perplexity_api import PerplexityClient
 from app.integracao.jina_api import JinaClient
@@ -25,6 +26,18 @@ from app.integracao.deep_research_mcp import DeepResearchClient
 from app.integracao.tavily_api import TavilyClient
 from app.integracao.serper_api import SerperClient
 from app.integracao.exa_api import ExaClient
+from app.utils import metricas
+from app.utils.limitador_taxa import obter_limitador
+
+_HIST_CANAL = metricas.histograma(
+    "sebrae_busca_canal_segundos", "Duração das buscas por canal (sem a espera do limitador)", ("canal",)
+)
+_BUSCAS_CANAL = metricas.contador(
+    "sebrae_busca_canal_total", "Buscas por canal e resultado (ok/erro/cancelada)", ("canal", "resultado")
+)
+_RESULTADOS_CANAL = metricas.contador(
+    "sebrae_busca_canal_resultados_total", "Resultados devolvidos por canal", ("canal",)
+)
 
 
 class AgentePesquisador:
@@ -107,19 +120,45 @@ class AgentePesquisador:
 
         self.deep_research_client = DeepResearchClient()
 
-    async def gerar_queries(self, falha: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def gerar_queries(
+        self,
+        falha: Dict[str, Any],
+        idiomas: Optional[List[str]] = None,
+        semaforo: Optional[asyncio.Semaphore] = None
+    ) -> List[Dict[str, Any]]:
         """
         Gera queries multilingues para uma falha de mercado
 
         Args:
             falha: Dicionario com id, titulo, descricao, dica_busca
+            idiomas: Idiomas alvo (padrão: todos)
+            semaforo: Orçamento de traduções simultâneas compartilhado
 
         Returns:
             Lista de queries geradas
         """
-        queries = await gerar_queries_multilingues(falha)
+        queries = await gerar_queries_multilingues(falha, idiomas=idiomas, semaforo=semaforo)
         return queries
 
+    async def gerar_queries_lote(
+        self,
+        falhas: List[Dict[str, Any]],
+        idiomas: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Gera as queries de várias falhas em paralelo
+
+        Todas as falhas dividem um orçamento de FILA_TRADUCOES_SIMULTANEAS
+        traduções simultâneas.
+
+        Returns:
+            Queries de cada falha, na ordem de `falhas`
+        """
+        semaforo = asyncio.Semaphore(settings.FILA_TRADUCOES_SIMULTANEAS)
+        return list(await asyncio.gather(*[
+            self.gerar_queries(falha, idiomas=idiomas, semaforo=semaforo) for falha in falhas
+        ]))
+
     async def popular_fila(
         self,
         falhas: Optional[List[Dict[str, Any]]] = None,
@@ -138,7 +177,8 @@ class AgentePesquisador:
             falhas_ids: IDs especificas de falhas (alternativa)
             ferramentas_filtro: Listar apenas ferramentas especificas
             idiomas_filtro: Limitar a idiomas especificos
-            limite_queries: Limitar número máximo de FILA ENTRIES a criar (não queries originais)
+            limite_queries: Limitar número máximo de FILA ENTRIES novas a criar (não queries
+                originais); entradas que já estão na fila não contam
 
         Returns:
             Total de queries adicionadas a fila
@@ -169,71 +209,56 @@ class AgentePesquisador:
         # Idiomas para usar
         idiomas = idiomas_filtro or self.idiomas
 
-        total_adicionado = 0
-        ferramenta_index = 0  # Indice para rotacionar ferramentas entre queries
-
-        # Coletar todas as queries com suas metadata antes de inserir
-        # Isso permite melhor controle na rotacao
-        queries_para_inserir = []
-
-        # Para cada falha
-        for falha in falhas:
-            # Gerar queries
-            queries = await self.gerar_queries(falha)
-
-            # Filtrar por idioma se necessario
-            if idiomas_filtro or ferramentas_filtro:
-                queries = [
-                    q for q in queries
-                    if (not idiomas_filtro or q["idioma"] in idiomas_filtro)
-                ]
-
-            # Coletar queries com metadata da falha
-            for query in queries:
-                queries_para_inserir.append({
-                    "falha_id": falha["id"],
-                    "query": query["query"],
-                    "idioma": query["idioma"],
-                })
+        # Gerar as queries de todas as falhas em paralelo (orçamento de traduções
+        # compartilhado), traduzindo só para os idiomas pedidos
+        queries_por_falha = await self.gerar_queries_lote(falhas, idiomas=idiomas)
 
-        # Agora inserir na fila
-        # PARA CADA query: inserir uma entrada para CADA ferramenta ativada
+        # Montar todas as entradas e inserir de uma vez
+        # PARA CADA query: uma entrada para CADA ferramenta ativada
         # ROTACIONAR a ordem das ferramentas entre queries para diversidade
         # SE limite_queries for definido, parar após atingir o limite
-        for query_index, query_data in enumerate(queries_para_inserir):
-            # Para esta query, determinar a ordem rotacionada de ferramentas
-            # Cada query tem uma ordem diferente das ferramentas
-            ferramentas_rotacionadas = ferramentas[ferramenta_index:] + ferramentas[:ferramenta_index]
-
-            # Para cada ferramenta ativada
-            for ferramenta in ferramentas_rotacionadas:
-                # Se limite está definido e foi atingido, parar
-                if limite_queries and total_adicionado >= limite_queries:
-                    print(f"[FILA] Limite de {limite_queries} queries atingido. Parando população da fila.")
-                    print(f"[FILA] Total de {total_adicionado} entradas criadas")
-                    print(f"[FILA] Ferramentas usadas: {ferramentas}")
-                    return total_adicionado
-
-                entrada_fila = {
-                    "falha_id": query_data["falha_id"],
-                    "query": query_data["query"],
-                    "idioma": query_data["idioma"],
-                    "ferramenta": ferramenta,
-                    "status": "pendente",
-                    "criado_em": datetime.now().isoformat()
-                }
-
-                # Inserir na fila
-                await inserir_fila_pesquisa(entrada_fila)
-                total_adicionado += 1
-
-                # Rate limiting
-                await asyncio.sleep(0.01)
+        entradas = []
+        ferramenta_index = 0  # Indice para rotacionar ferramentas entre queries
+        criado_em = datetime.now().isoformat()
 
-            # Rotacionar para proxima query
-            ferramenta_index = (ferramenta_index + 1) % len(ferramentas)
+        for falha, queries in zip(falhas, queries_por_falha):
+            for query in queries:
+                ferramentas_rotacionadas = ferramentas[ferramenta_index:] + ferramentas[:ferramenta_index]
+                for ferramenta in ferramentas_rotacionadas:
+                    entradas.append({
+                        "falha_id": falha["id"],
+                        "query": query["query"],
+                        "idioma": query["idioma"],
+                        "ferramenta": ferramenta,
+                        "status": "pendente",
+                        "criado_em": criado_em
+                    })
+                # Rotacionar para proxima query
+                ferramenta_index = (ferramenta_index + 1) % len(ferramentas)
+
+        if limite_queries:
+            # O limite vale para entradas novas: descartar antes as que já estão na fila
+            # (ou repetidas no lote), que o INSERT OR IGNORE não inseriria
+            chaves_por_falha: Dict[int, set] = {}
+            novas = []
+            for entrada in entradas:
+                chaves = chaves_por_falha.get(entrada["falha_id"])
+                if chaves is None:
+                    chaves = chaves_por_falha[entrada["falha_id"]] = await listar_chaves_fila(entrada["falha_id"])
+                chave = (entrada["query"], entrada["ferramenta"])
+                if chave not in chaves:
+                    chaves.add(chave)
+                    novas.append(entrada)
+            if len(novas) > limite_queries:
+                print(f"[FILA] Limite de {limite_queries} queries atingido. Parando população da fila.")
+            entradas = novas[:limite_queries]
+
+        # Uma transação; (falha_id, query, ferramenta) já na fila é ignorado
+        total_adicionado = await inserir_fila_pesquisas_lote(entradas)
 
         print(f"[FILA] Total de {total_adicionado} entradas criadas")
+        if total_adicionado < len(entradas):
+            print(f"[FILA] {len(entradas) - total_adicionado} entradas já existiam na fila")
         print(f"[FILA] Ferramentas usadas: {ferramentas}")
 
         return total_adicionado
@@ -273,36 +298,40 @@ class AgentePesquisador:
         queries = await self.gerar_queries(falha)
 
         # Adicionar quantidade desejada de entradas
-        total_adicionado = 0
         ferramenta_index = 0
 
-        # Limitar quantidade de queries
-        queries_para_usar = queries[:quantidade] if len(queries) >= quantidade else queries
+        # Usar as primeiras queries que ainda não estão na fila para todas as
+        # ferramentas (entradas repetidas seriam ignoradas pelo índice único)
+        existentes = await listar_chaves_fila(falha_id)
+        queries_para_usar = [
+            q for q in queries
+            if any((q["query"], ferramenta) not in existentes for ferramenta in ferramentas)
+        ][:quantidade]
 
+        entradas = []
+        criado_em = datetime.now().isoformat()
         for query in queries_para_usar:
             # Rotacionar ferramentas
             ferramentas_rotacionadas = ferramentas[ferramenta_index:] + ferramentas[:ferramenta_index]
 
             for ferramenta in ferramentas_rotacionadas:
-                entrada_fila = {
+                if (query["query"], ferramenta) in existentes:
+                    continue
+                entradas.append({
                     "falha_id": falha_id,
                     "query": query["query"],
                     "idioma": query["idioma"],
                     "ferramenta": ferramenta,
                     "status": "pendente",
-                    "criado_em": datetime.now().isoformat()
-                }
-
-                # Inserir na fila
-                await inserir_fila_pesquisa(entrada_fila)
-                total_adicionado += 1
-
-                # Rate limiting
-                await asyncio.sleep(0.01)
+                    "criado_em": criado_em
+                })
 
             # Rotacionar para proxima query
             ferramenta_index = (ferramenta_index + 1) % len(ferramentas)
 
+        # Inserir na fila (entradas já existentes são ignoradas)
+        total_adicionado = await inserir_fila_pesquisas_lote(entradas)
+
         print(f"[FILA] {total_adicionado} entradas adicionadas para falha #{falha_id}")
         return total_adicionado
 
@@ -357,55 +386,12 @@ class AgentePesquisador:
                     print(f"Canal {ferramenta} desabilitado, pulando...")
                     continue
 
-                if ferramenta == "perplexity" and self.perplexity_client:
-                    resultado = await self.perplexity_client.pesquisar(
-                        query=query,
-                        idioma=idioma,
-                        max_resultados=5
-                    )
-                    resultados.extend(resultado)
-
-                elif ferramenta == "jina" and self.jina_client:
-                    resultado, _ = await self.jina_client.search_web(
-                        query=query,
-                        idioma=idioma,
-                        max_resultados=10
-                    )
-                    resultados.extend(resultado)
-
-                elif ferramenta == "tavily" and self.tavily_client:
-                    resultado = await self.tavily_client.pesquisar(
-                        query=query,
-                        idioma=idioma,
-                        max_resultados=5
-                    )
-                    resultados.extend(resultado)
-
-                elif ferramenta == "serper" and self.serper_client:
-                    resultado = await self.serper_client.pesquisar(
-                        query=query,
-                        idioma=idioma,
-                        max_resultados=5
-                    )
-                    resultados.extend(resultado)
-
-                elif ferramenta == "exa" and self.exa_client:
-                    resultado = await self.exa_client.pesquisar(
-                        query=query,
-                        idioma=idioma,
-                        max_resultados=5
-                    )
-                    resultados.extend(resultado)
-
-                elif ferramenta == "deep_research":
-                    resultado = await self.deep_research_client.pesquisar(
-                        query=query,
-                        sources="both"
-                    )
-                    resultados.extend(resultado)
+                if self._cliente_canal(ferramenta) is None:
+                    continue
 
-                # Rate limiting entre ferramentas
-                await asyncio.sleep(1.0)
+                # O limitador do provedor controla taxa e concorrência
+                # (sem atraso fixo entre ferramentas)
+                resultados.extend(await self._buscar_canal(ferramenta, query, idioma))
 
             except Exception as e:
                 print(f"Erro executando pesquisa com {ferramenta}: {e}")
@@ -449,8 +435,6 @@ class AgentePesquisador:
             }
 
         ferramentas = ferramentas or self.ferramentas
-        resultados = []
-        num_buscas = 0
         min_buscas = settings.MIN_BUSCAS_POR_FALHA
         max_buscas = settings.MAX_BUSCAS_POR_FALHA
         qualidade_minima = settings.QUALIDADE_MINIMA_PARA_PARAR
@@ -458,72 +442,169 @@ class AgentePesquisador:
         print(f"\n[BUSCA ADAPTATIVA] Query: {query[:60]}...")
         print(f"[BUSCA ADAPTATIVA] Limites: min={min_buscas}, max={max_buscas}, qualidade_min={qualidade_minima}")
 
-        # Executar buscas em loop adaptativo
+        # Avaliação incremental: cada resultado é avaliado uma única vez
+        conjunto = self.avaliador.novo_conjunto(query)
+
+        if settings.BUSCA_ESPECULATIVA:
+            resultados, num_buscas, motivo_parada = await self._busca_especulativa(
+                query, idioma, ferramentas, conjunto, min_buscas, max_buscas, qualidade_minima
+            )
+        else:
+            resultados, num_buscas, motivo_parada = await self._busca_sequencial(
+                query, idioma, ferramentas, conjunto, min_buscas, max_buscas, qualidade_minima
+            )
+
+        # Avaliação final
+        avaliacao_final = conjunto.avaliar()
+
+        self.queries_executadas += 1
+        self.resultados_encontrados += len(resultados)
+
+        resultado_adaptativo = {
+            "resultados": resultados,
+            "num_buscas": num_buscas,
+            "qualidade": avaliacao_final["qualidade_geral"],
+            "confianca": avaliacao_final["confianca"],
+            "diversidade": avaliacao_final["diversidade"],
+            "motivo_parada": motivo_parada,
+            "modo": "adaptativo",
+            "avaliacao_completa": avaliacao_final
+        }
+
+        print(f"\n[BUSCA ADAPTATIVA] Finalizado: {num_buscas} buscas, "
+              f"qualidade={avaliacao_final['qualidade_geral']:.3f}")
+
+        return resultado_adaptativo
+
+    def _canal_disponivel(self, ferramenta: str) -> bool:
+        """Verifica se o canal está habilitado e tem cliente na busca adaptativa"""
+        if not settings.SEARCH_CHANNELS_ENABLED.get(ferramenta, False):
+            print(f"[BUSCA ADAPTATIVA] Canal {ferramenta} desabilitado, pulando...")
+            return False
+        return self._cliente_canal(ferramenta) is not None
+
+    def _cliente_canal(self, ferramenta: str):
+        """Cliente da ferramenta (None se não inicializado ou desconhecido)"""
+        return {
+            "perplexity": self.perplexity_client,
+            "jina": self.jina_client,
+            "tavily": self.tavily_client,
+            "serper": self.serper_client,
+            "exa": self.exa_client,
+            "deep_research": self.deep_research_client
+        }.get(ferramenta)
+
+    async def _buscar_canal(self, ferramenta: str, query: str, idioma: str) -> List[Dict[str, Any]]:
+        """Executa uma busca num canal, respeitando o limitador do provedor"""
+        async with obter_limitador(ferramenta).reservar():
+            try:
+                with _HIST_CANAL.rotulada(ferramenta).medir():
+                    resultados = await self._chamar_canal(ferramenta, query, idioma)
+            except asyncio.CancelledError:
+                _BUSCAS_CANAL.rotulada(ferramenta, "cancelada").inc()
+                raise
+            except Exception:
+                _BUSCAS_CANAL.rotulada(ferramenta, "erro").inc()
+                raise
+        _BUSCAS_CANAL.rotulada(ferramenta, "ok").inc()
+        _RESULTADOS_CANAL.rotulada(ferramenta).inc(len(resultados or ()))
+        return resultados
+
+    async def _chamar_canal(self, ferramenta: str, query: str, idioma: str) -> List[Dict[str, Any]]:
+        if ferramenta == "perplexity":
+            return await self.perplexity_client.pesquisar(
+                query=query, idioma=idioma, max_resultados=5
+            )
+        if ferramenta == "jina":
+            resultado, _ = await self.jina_client.search_web(
+                query=query, idioma=idioma, max_resultados=10
+            )
+            return resultado
+        if ferramenta == "tavily":
+            return await self.tavily_client.pesquisar(
+                query=query, idioma=idioma, max_resultados=5
+            )
+        if ferramenta == "serper":
+            return await self.serper_client.pesquisar(
+                query=query, idioma=idioma, max_resultados=5
+            )
+        if ferramenta == "exa":
+            return await self.exa_client.pesquisar(
+                query=query, idioma=idioma, max_resultados=5
+            )
+        return await self.deep_research_client.pesquisar(
+            query=query, sources="both"
+        )
+
+    def _avaliar_parada(
+        self,
+        conjunto: ConjuntoAvaliado,
+        num_buscas: int,
+        min_buscas: int,
+        qualidade_minima: float
+    ) -> Optional[str]:
+        """
+        Avalia os resultados acumulados e decide se a busca pode parar
+
+        Returns:
+            Motivo da parada, ou None para continuar buscando
+        """
+        avaliacao = conjunto.avaliar()
+
+        print(f"[BUSCA ADAPTATIVA] Qualidade: {avaliacao['qualidade_geral']:.3f} | "
+              f"Confiança: {avaliacao['confianca']:.3f} | "
+              f"Diversidade: {avaliacao['diversidade']:.3f}")
+        print(f"[BUSCA ADAPTATIVA] Recomendação: {avaliacao['recomendacao']}")
+        print(f"[BUSCA ADAPTATIVA] Motivo: {avaliacao['motivo']}")
+
+        # Decisão adaptativa
+        if avaliacao["qualidade_geral"] >= qualidade_minima:
+            if avaliacao["recomendacao"] == "parar":
+                print(f"[BUSCA ADAPTATIVA] Qualidade suficiente! Parando.")
+                return f"Qualidade suficiente ({avaliacao['qualidade_geral']:.3f})"
+            if avaliacao["recomendacao"] == "talvez" and num_buscas >= min_buscas + 1:
+                # Se "talvez" e já fez mais que o mínimo, pode parar
+                print(f"[BUSCA ADAPTATIVA] Qualidade adequada e mínimo excedido. Parando.")
+                return f"Qualidade adequada ({avaliacao['qualidade_geral']:.3f}) e mínimo excedido"
+        return None
+
+    async def _busca_sequencial(
+        self,
+        query: str,
+        idioma: str,
+        ferramentas: List[str],
+        conjunto: ConjuntoAvaliado,
+        min_buscas: int,
+        max_buscas: int,
+        qualidade_minima: float
+    ) -> Tuple[List[Dict[str, Any]], int, str]:
+        """Um canal por vez, avaliando a qualidade entre as buscas"""
+        resultados = []
+        num_buscas = 0
+
         for ferramenta in ferramentas:
             # Verificar limite máximo
             if num_buscas >= max_buscas:
                 print(f"[BUSCA ADAPTATIVA] Limite máximo de {max_buscas} buscas atingido")
-                motivo_parada = f"Limite máximo ({max_buscas} buscas) atingido"
-                break
+                return resultados, num_buscas, f"Limite máximo ({max_buscas} buscas) atingido"
 
-            # Verificar se canal está habilitado
-            if not settings.SEARCH_CHANNELS_ENABLED.get(ferramenta, False):
-                print(f"[BUSCA ADAPTATIVA] Canal {ferramenta} desabilitado, pulando...")
+            if not self._canal_disponivel(ferramenta):
                 continue
 
             try:
                 print(f"\n[BUSCA ADAPTATIVA] Buscando com {ferramenta} ({num_buscas + 1}/{max_buscas})...")
-
-                # Executar busca
-                if ferramenta == "perplexity" and self.perplexity_client:
-                    resultado = await self.perplexity_client.pesquisar(
-                        query=query, idioma=idioma, max_resultados=5
-                    )
-                elif ferramenta == "jina" and self.jina_client:
-                    resultado, _ = await self.jina_client.search_web(
-                        query=query, idioma=idioma, max_resultados=10
-                    )
-                elif ferramenta == "tavily" and self.tavily_client:
-                    resultado = await self.tavily_client.pesquisar(
-                        query=query, idioma=idioma, max_resultados=5
-                    )
-                elif ferramenta == "serper" and self.serper_client:
-                    resultado = await self.serper_client.pesquisar(
-                        query=query, idioma=idioma, max_resultados=5
-                    )
-                elif ferramenta == "deep_research":
-                    resultado = await self.deep_research_client.pesquisar(
-                        query=query, sources="both"
-                    )
-                else:
-                    continue
-
+                resultado = await self._buscar_canal(ferramenta, query, idioma)
                 resultados.extend(resultado)
                 num_buscas += 1
+                await conjunto.adicionar(resultado)
 
                 # Avaliar qualidade a cada busca (após mínimo)
                 if num_buscas >= min_buscas:
-                    avaliacao = await self.avaliador.avaliar_qualidade_conjunto(
-                        resultados, query
+                    motivo_parada = self._avaliar_parada(
+                        conjunto, num_buscas, min_buscas, qualidade_minima
                     )
-
-                    print(f"[BUSCA ADAPTATIVA] Qualidade: {avaliacao['qualidade_geral']:.3f} | "
-                          f"Confiança: {avaliacao['confianca']:.3f} | "
-                          f"Diversidade: {avaliacao['diversidade']:.3f}")
-                    print(f"[BUSCA ADAPTATIVA] Recomendação: {avaliacao['recomendacao']}")
-                    print(f"[BUSCA ADAPTATIVA] Motivo: {avaliacao['motivo']}")
-
-                    # Decisão adaptativa
-                    if avaliacao["qualidade_geral"] >= qualidade_minima:
-                        if avaliacao["recomendacao"] == "parar":
-                            print(f"[BUSCA ADAPTATIVA] Qualidade suficiente! Parando.")
-                            motivo_parada = f"Qualidade suficiente ({avaliacao['qualidade_geral']:.3f})"
-                            break
-                        elif avaliacao["recomendacao"] == "talvez" and num_buscas >= min_buscas + 1:
-                            # Se "talvez" e já fez mais que o mínimo, pode parar
-                            print(f"[BUSCA ADAPTATIVA] Qualidade adequada e mínimo excedido. Parando.")
-                            motivo_parada = f"Qualidade adequada ({avaliacao['qualidade_geral']:.3f}) e mínimo excedido"
-                            break
+                    if motivo_parada:
+                        return resultados, num_buscas, motivo_parada
 
                 # Rate limiting
                 await asyncio.sleep(1.0)
@@ -531,31 +612,79 @@ class AgentePesquisador:
             except Exception as e:
                 print(f"[BUSCA ADAPTATIVA] Erro com {ferramenta}: {e}")
                 continue
-        else:
-            # Loop completou sem break
-            motivo_parada = f"Todas as {num_buscas} ferramentas foram executadas"
 
-        # Avaliação final
-        avaliacao_final = await self.avaliador.avaliar_qualidade_conjunto(resultados, query)
+        return resultados, num_buscas, f"Todas as {num_buscas} ferramentas foram executadas"
 
-        self.queries_executadas += 1
-        self.resultados_encontrados += len(resultados)
+    async def _busca_especulativa(
+        self,
+        query: str,
+        idioma: str,
+        ferramentas: List[str],
+        conjunto: ConjuntoAvaliado,
+        min_buscas: int,
+        max_buscas: int,
+        qualidade_minima: float
+    ) -> Tuple[List[Dict[str, Any]], int, str]:
+        """
+        Até BUSCA_ESPECULATIVA_CANAIS canais em paralelo
 
-        resultado_adaptativo = {
-            "resultados": resultados,
-            "num_buscas": num_buscas,
-            "qualidade": avaliacao_final["qualidade_geral"],
-            "confianca": avaliacao_final["confianca"],
-            "diversidade": avaliacao_final["diversidade"],
-            "motivo_parada": motivo_parada,
-            "modo": "adaptativo",
-            "avaliacao_completa": avaliacao_final
-        }
+        Cada resultado é avaliado assim que chega (após o mínimo); quando a
+        qualidade basta, as buscas já concluídas no mesmo lote ainda são
+        aproveitadas e só as que estão em andamento são canceladas. Buscas em
+        voo + concluídas nunca passam de max_buscas, e um canal que falha
+        libera a vaga para o próximo, como na busca sequencial.
+        """
+        pendentes = [f for f in ferramentas if self._canal_disponivel(f)]
+        paralelos = max(1, settings.BUSCA_ESPECULATIVA_CANAIS)
+        em_voo: Dict[asyncio.Task, str] = {}
+        resultados = []
+        num_buscas = 0
+        motivo_parada = None
 
-        print(f"\n[BUSCA ADAPTATIVA] Finalizado: {num_buscas} buscas, "
-              f"qualidade={avaliacao_final['qualidade_geral']:.3f}")
+        def lancar():
+            while pendentes and len(em_voo) < paralelos and num_buscas + len(em_voo) < max_buscas:
+                ferramenta = pendentes.pop(0)
+                print(f"\n[BUSCA ADAPTATIVA] Buscando com {ferramenta} "
+                      f"({num_buscas + len(em_voo) + 1}/{max_buscas}, especulativa)...")
+                em_voo[asyncio.create_task(self._buscar_canal(ferramenta, query, idioma))] = ferramenta
 
-        return resultado_adaptativo
+        try:
+            lancar()
+            while em_voo and motivo_parada is None:
+                concluidas, _ = await asyncio.wait(em_voo, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in concluidas:
+                    ferramenta = em_voo.pop(tarefa)
+                    try:
+                        resultado = tarefa.result()
+                    except Exception as e:
+                        print(f"[BUSCA ADAPTATIVA] Erro com {ferramenta}: {e}")
+                        continue
+
+                    resultados.extend(resultado)
+                    await conjunto.adicionar(resultado)
+                    num_buscas += 1
+
+                    # Já decidido parar: as demais do lote já foram pagas, então entram também
+                    if motivo_parada is None and num_buscas >= min_buscas:
+                        motivo_parada = self._avaliar_parada(
+                            conjunto, num_buscas, min_buscas, qualidade_minima
+                        )
+                if motivo_parada is None:
+                    lancar()
+        finally:
+            if em_voo:
+                print(f"[BUSCA ADAPTATIVA] Cancelando {len(em_voo)} busca(s) pendente(s): "
+                      f"{', '.join(em_voo.values())}")
+                for tarefa in em_voo:
+                    tarefa.cancel()
+                await asyncio.gather(*em_voo, return_exceptions=True)
+
+        if motivo_parada:
+            return resultados, num_buscas, motivo_parada
+        if pendentes:
+            print(f"[BUSCA ADAPTATIVA] Limite máximo de {max_buscas} buscas atingido")
+            return resultados, num_buscas, f"Limite máximo ({max_buscas} buscas) atingido"
+        return resultados, num_buscas, f"Todas as {num_buscas} ferramentas foram executadas"
 
     async def limpar_fila(self):
         """Limpa toda a fila de pesquisas"""
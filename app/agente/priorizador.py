@@ -16,7 +16,9 @@ from app.database import (
     inserir_fonte_priorizacao,
     limpar_fontes_priorizacao
 )
+from app.integracao.clientes_http import obter_sessao_http
 from app.integracao.openrouter_api import consultar_openrouter
+from app.utils.metricas import medir_chamada_llm
 from app.utils.logger import logger
 
 class AgentePriorizador:
@@ -304,7 +306,8 @@ EXEMPLOS DE POLÍTICAS RELACIONADAS:
                 "response_format": {"type": "json_object"}
             }
 
-            async with aiohttp.ClientSession() as session:
+            session = obter_sessao_http("openrouter")
+            with medir_chamada_llm(modelo):
                 async with session.post(
                     "https://openrouter.ai/api/v1/chat/completions",
                     json=data,
@@ -4,22 +4,49 @@ Worker assincrono que processa fila de pesquisas
 Consome entradas da fila, executa pesquisas e armazena resultados
 """
 import asyncio
+import os
+import socket
 import time
+import uuid
+from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from app.database import (
-    listar_fila_pesquisas,
     atualizar_status_fila,
-    insert_resultado,
-    contar_fila_pesquisas
+    contar_fila_pesquisas,
+    finalizar_entrada_fila,
+    liberar_entradas_fila,
+    renovar_leases_fila,
+    reservar_entradas_fila
 )
+from app.agente.buffer_resultados import BufferResultados
 from app.agente.pesquisador import AgentePesquisador
 from app.agente.avaliador import Avaliador
 from app.agente.deduplicador import Deduplicador
+from app.utils import metricas
 from app.utils.hash_utils import gerar_hash_conteudo
+from app.utils.limitador_taxa import LimitadorProvedor, get_stats_limitadores
 from app.config import settings
 
+_HIST_ENTRADA = metricas.histograma(
+    "sebrae_fila_entrada_segundos", "Duração do processamento de uma entrada da fila"
+).rotulada()
+_ENTRADAS = metricas.contador(
+    "sebrae_fila_entradas_total", "Entradas da fila processadas por resultado (sucesso/erro)", ("resultado",)
+)
+_ENTRADAS_SUCESSO = _ENTRADAS.rotulada("sucesso")
+_ENTRADAS_ERRO = _ENTRADAS.rotulada("erro")
+_RESERVADAS = metricas.contador(
+    "sebrae_fila_reservadas_total", "Entradas reservadas da fila do banco"
+).rotulada()
+_EM_PROCESSAMENTO = metricas.medidor(
+    "sebrae_fila_em_processamento", "Entradas sendo processadas agora"
+).rotulada()
+_FILA_LOCAL = metricas.medidor(
+    "sebrae_fila_local_tamanho", "Entradas reservadas aguardando um worker do pool"
+).rotulada()
+
 
 class Processador:
     """Worker que processa fila de pesquisas"""
@@ -34,15 +61,22 @@ class Processador:
         self.max_workers = max_workers
         self.ativo = True
 
+        # Identifica as entradas reservadas por este processador na fila
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
         # Modulos de IA
         self.agente_pesquisador = AgentePesquisador()
         self.avaliador = Avaliador()
         self.deduplicador = Deduplicador(threshold=0.8)
 
-        # Rate limiting
+        # Gravação em lote dos resultados de todos os workers
+        self.buffer_resultados = BufferResultados()
+
+        # Rate limiting de entradas iniciadas; as cotas de cada API externa
+        # ficam nos limitadores por provedor (app.utils.limitador_taxa)
         self.rate_limit_delay = 1.0  # segundos entre requests
         self.max_requests_por_minuto = 60
-        self.requests_ultimo_minuto = []
+        self.limitador = self._criar_limitador()
 
         # Retry logic
         self.max_retries = 3
@@ -55,6 +89,16 @@ class Processador:
         self.erros = 0
         self.tempo_inicio = None
 
+        # Modo pool contínuo (executar_pool)
+        self._fila_local: Optional[asyncio.Queue] = None
+        self._vaga: Optional[asyncio.Event] = None
+        self._reservadas: set = set()
+        self._pool_ocupados = 0
+        self._pool_inicio: Optional[float] = None
+        self._pool_ultima_mudanca = 0.0
+        self._pool_tempo_ocupado = 0.0
+        self._pool_esperas_fila_vazia = 0
+
     def configurar_rate_limiting(
         self,
         delay_minimo: float = 1.0,
@@ -63,6 +107,19 @@ class Processador:
         """Configura rate limiting"""
         self.rate_limit_delay = delay_minimo
         self.max_requests_por_minuto = max_requests_por_minuto
+        self.limitador = self._criar_limitador()
+
+    def _criar_limitador(self) -> LimitadorProvedor:
+        """Token bucket com a menor taxa entre delay_minimo e max_requests_por_minuto"""
+        por_minuto = self.max_requests_por_minuto
+        if self.rate_limit_delay > 0:
+            por_minuto = min(por_minuto, 60.0 / self.rate_limit_delay)
+        return LimitadorProvedor(
+            "processador",
+            requisicoes_por_minuto=por_minuto,
+            rajada=self.max_workers,
+            concorrencia=self.max_workers
+        )
 
     def validar_entrada(self, entrada: Dict[str, Any]) -> bool:
         """
@@ -83,26 +140,13 @@ class Processador:
         return True
 
     async def aplicar_rate_limiting(self):
-        """Aplica rate limiting baseado em tempo"""
-        agora = time.time()
-
-        # Remover requests antigos (> 60 segundos)
-        self.requests_ultimo_minuto = [
-            ts for ts in self.requests_ultimo_minuto
-            if agora - ts < 60
-        ]
-
-        # Se ja atingiu limite, esperar
-        if len(self.requests_ultimo_minuto) >= self.max_requests_por_minuto:
-            tempo_espera = 60 - (agora - self.requests_ultimo_minuto[0])
-            if tempo_espera > 0:
-                await asyncio.sleep(tempo_espera)
-
-        # Adicionar timestamp atual
-        self.requests_ultimo_minuto.append(agora)
+        """
+        Espera a vez de iniciar uma entrada (token bucket, sem atraso fixo)
 
-        # Delay minimo entre requests
-        await asyncio.sleep(self.rate_limit_delay)
+        Até max_workers entradas começam de imediato; depois o ritmo segue a
+        taxa configurada. Cada busca ainda passa pelo limitador do provedor.
+        """
+        await self.limitador.aguardar_token()
 
     async def obter_proxima_entrada_fila(self) -> Optional[Dict[str, Any]]:
         """
@@ -110,22 +154,59 @@ class Processador:
 
         Se TEST_MODE está ativado, limita a TEST_MODE_LIMIT queries para testes
 
+        A entrada é reservada (status 'processando' com lease deste worker).
+
         Returns:
             Primeira entrada pendente ou None
         """
-        entradas = await listar_fila_pesquisas(status="pendente")
-
-        if entradas:
-            # Se modo teste está ativado, contar quantas já foram processadas em modo teste
-            if settings.TEST_MODE:
-                # Limite: retorna None se já processamos TEST_MODE_LIMIT entradas
-                if self.processadas >= settings.TEST_MODE_LIMIT:
-                    print(f"[TESTE MODE] Limite de {settings.TEST_MODE_LIMIT} queries atingido. Parando.")
-                    return None
+        # Se modo teste está ativado, contar quantas já foram processadas em modo teste
+        if settings.TEST_MODE:
+            # Limite: retorna None se já processamos TEST_MODE_LIMIT entradas
+            if self.processadas >= settings.TEST_MODE_LIMIT:
+                print(f"[TESTE MODE] Limite de {settings.TEST_MODE_LIMIT} queries atingido. Parando.")
+                return None
+
+        entradas = await reservar_entradas_fila(self.worker_id, 1)
+        return entradas[0] if entradas else None
+
+    async def reservar_entradas(self, quantidade: int) -> List[Dict[str, Any]]:
+        """Reserva até `quantidade` entradas pendentes para este processador"""
+        try:
+            entradas = await reservar_entradas_fila(self.worker_id, quantidade)
+        except Exception as e:
+            print(f"Erro reservando entradas da fila: {e}")
+            return []
+        _RESERVADAS.inc(len(entradas))
+        return entradas
+
+    @asynccontextmanager
+    async def _manter_leases(self, entradas: List[Dict[str, Any]]):
+        """Renova periodicamente o lease das entradas enquanto são processadas"""
+        ids = [entrada["id"] for entrada in entradas]
+        intervalo = max(1.0, settings.FILA_LEASE_SEGUNDOS / 3)
+
+        async def renovar():
+            while True:
+                await asyncio.sleep(intervalo)
+                try:
+                    await renovar_leases_fila(ids, self.worker_id)
+                except Exception as e:
+                    print(f"Erro renovando leases da fila: {e}")
 
-            return entradas[0]
+        tarefa = asyncio.create_task(renovar()) if ids else None
+        try:
+            yield
+        finally:
+            if tarefa is not None:
+                tarefa.cancel()
 
-        return None
+    async def liberar_reservas(self) -> int:
+        """Devolve à fila as entradas ainda reservadas por este processador"""
+        try:
+            return await liberar_entradas_fila(self.worker_id)
+        except Exception as e:
+            print(f"Erro liberando entradas reservadas: {e}")
+            return 0
 
     async def marcar_como_processando(self, entrada_id: int) -> bool:
         """Marca entrada como em processamento"""
@@ -137,9 +218,10 @@ class Processador:
             return False
 
     async def marcar_como_processada(self, entrada_id: int) -> bool:
-        """Marca entrada como completa"""
+        """Marca entrada como completa (e libera o lease)"""
         try:
-            await atualizar_status_fila(entrada_id, "completa")
+            if not await finalizar_entrada_fila(entrada_id, "completa", self.worker_id):
+                print(f"[PROCESSADOR] Entrada {entrada_id} foi reservada por outro worker após o lease expirar")
             self._incrementar_processadas()
             return True
         except Exception as e:
@@ -151,9 +233,9 @@ class Processador:
         entrada_id: int,
         erro_msg: str
     ) -> bool:
-        """Marca entrada com erro"""
+        """Marca entrada com erro (e libera o lease)"""
         try:
-            await atualizar_status_fila(entrada_id, "erro")
+            await finalizar_entrada_fila(entrada_id, "erro", self.worker_id)
             self._incrementar_erros()
             return True
         except Exception as e:
@@ -170,7 +252,7 @@ class Processador:
 
     async def processar_entrada(self, entrada: Dict[str, Any]) -> bool:
         """
-        Processa uma entrada da fila
+        Processa uma entrada da fila (com tempo e resultado no /api/metrics)
 
         Args:
             entrada: Entrada para processar
@@ -178,14 +260,28 @@ class Processador:
         Returns:
             True se processada com sucesso
         """
+        sucesso = False
+        _EM_PROCESSAMENTO.inc()
+        inicio = time.perf_counter()
+        try:
+            sucesso = await self._processar_entrada(entrada)
+            return sucesso
+        finally:
+            _HIST_ENTRADA.registrar(time.perf_counter() - inicio)
+            _EM_PROCESSAMENTO.dec()
+            (_ENTRADAS_SUCESSO if sucesso else _ENTRADAS_ERRO).inc()
+
+    async def _processar_entrada(self, entrada: Dict[str, Any]) -> bool:
         # Validar
         if not self.validar_entrada(entrada):
             print(f"Entrada invalida: {entrada}")
             await self.marcar_como_erro(entrada["id"], "Entrada invalida")
             return False
 
-        # Marcar como em processamento (para que apareça no dashboard como "em andamento")
-        await self.marcar_como_processando(entrada["id"])
+        # Marcar como em processamento (para que apareça no dashboard como "em andamento");
+        # entradas reservadas por este worker já estão em 'processando'
+        if entrada.get("worker_id") != self.worker_id:
+            await self.marcar_como_processando(entrada["id"])
 
         try:
             # Garantir que a query está no idioma correto
@@ -248,9 +344,10 @@ class Processador:
 
                 resultados_processados.append(resultado_dedup)
 
-            # Salvar resultados
-            for resultado in resultados_processados:
-                await self.salvar_resultado(resultado)
+            # Salvar resultados (traduções em paralelo; gravação em lote pelo buffer)
+            await asyncio.gather(*[
+                self.salvar_resultado(resultado) for resultado in resultados_processados
+            ])
 
             # Marcar entrada como completa
             await self.marcar_como_processada(entrada["id"])
@@ -265,11 +362,14 @@ class Processador:
         """
         Salva resultado no banco de dados
 
+        A gravação passa pelo buffer write-behind (um executemany por lote,
+        compartilhado entre workers); retorna após o lote ser gravado.
+
         Args:
             resultado: Resultado para salvar
 
         Returns:
-            True se salvo com sucesso
+            True se salvo com sucesso (False se descartado ou hash duplicado)
         """
         try:
             # Validar idioma antes de salvar
@@ -321,23 +421,29 @@ class Processador:
                     titulo = dados.get("titulo", "")
                     descricao = dados.get("descricao", "")
 
+                    # Traduções independentes: disparadas em paralelo
+                    traducoes = {}
+
                     # Traduzir para português
                     if titulo:
-                        dados["titulo_pt"] = await traduzir_query(titulo, idioma_original, "pt")
+                        traducoes["titulo_pt"] = traduzir_query(titulo, idioma_original, "pt")
                     if descricao:
-                        dados["descricao_pt"] = await traduzir_query(descricao, idioma_original, "pt")
+                        traducoes["descricao_pt"] = traduzir_query(descricao, idioma_original, "pt")
 
                     # Traduzir para inglês (apenas para idiomas que não são PT e EN)
                     if titulo and idioma_original != "en" and idioma_original != "pt":
-                        dados["titulo_en"] = await traduzir_query(titulo, idioma_original, "en")
+                        traducoes["titulo_en"] = traduzir_query(titulo, idioma_original, "en")
                     elif titulo and idioma_original == "en":
                         dados["titulo_en"] = titulo
 
                     if descricao and idioma_original != "en" and idioma_original != "pt":
-                        dados["descricao_en"] = await traduzir_query(descricao, idioma_original, "en")
+                        traducoes["descricao_en"] = traduzir_query(descricao, idioma_original, "en")
                     elif descricao and idioma_original == "en":
                         dados["descricao_en"] = descricao
 
+                    traduzidos = await asyncio.gather(*traducoes.values())
+                    dados.update(zip(traducoes.keys(), traduzidos))
+
                 except Exception as e:
                     print(f"[TRADUÇÃO] Aviso: Falha ao traduzir resultado: {str(e)[:100]}")
             else:
@@ -345,14 +451,23 @@ class Processador:
                 # Pular tradução para inglês (otimização)
                 pass
 
-            # Salvar no banco
-            await insert_resultado(dados)
-            return True
+            # Salvar no banco (em lote, via buffer)
+            return await self.buffer_resultados.salvar(dados)
 
         except Exception as e:
             print(f"Erro salvando resultado: {e}")
             return False
 
+    async def descarregar_resultados(self) -> int:
+        """
+        Grava imediatamente os resultados pendentes no buffer
+        (usado ao pausar e no encerramento)
+
+        Returns:
+            Número de resultados inseridos
+        """
+        return await self.buffer_resultados.fechar()
+
     async def obter_estatisticas(self) -> Dict[str, Any]:
         """
         Obtem estatisticas de processamento
@@ -378,7 +493,43 @@ class Processador:
                 self.processadas / (self.processadas + self.erros)
                 if (self.processadas + self.erros) > 0 else 0
             ),
-            "ativo": self.ativo
+            "ativo": self.ativo,
+            "buffer_resultados": self.buffer_resultados.get_stats(),
+            "pool": self.get_metricas_pool(),
+            "limitadores": {"processador": self.limitador.get_stats(), **get_stats_limitadores()}
+        }
+
+    def _registrar_ocupacao(self, delta: int):
+        """Acumula slots ocupados x tempo antes de mudar a ocupação"""
+        agora = time.monotonic()
+        self._pool_tempo_ocupado += self._pool_ocupados * (agora - self._pool_ultima_mudanca)
+        self._pool_ultima_mudanca = agora
+        self._pool_ocupados += delta
+
+    def get_metricas_pool(self) -> Dict[str, Any]:
+        """
+        Métricas do modo pool
+
+        - utilizacao: fração dos workers processando agora
+        - utilizacao_media: média ponderada pelo tempo desde o início do pool
+        - fila_local: entradas reservadas aguardando um worker
+        """
+        if self._pool_inicio is None:
+            return {"em_execucao": False, "workers": self.max_workers}
+
+        agora = time.monotonic()
+        decorrido = agora - self._pool_inicio
+        tempo_ocupado = self._pool_tempo_ocupado + self._pool_ocupados * (agora - self._pool_ultima_mudanca)
+        return {
+            "em_execucao": self._fila_local is not None,
+            "workers": self.max_workers,
+            "ocupados": self._pool_ocupados,
+            "utilizacao": round(self._pool_ocupados / self.max_workers, 3),
+            "utilizacao_media": round(tempo_ocupado / (decorrido * self.max_workers), 3) if decorrido > 0 else 0.0,
+            "fila_local": self._fila_local.qsize() if self._fila_local is not None else 0,
+            "capacidade_fila_local": self._fila_local.maxsize if self._fila_local is not None else 0,
+            "reservadas": len(self._reservadas),
+            "esperas_fila_vazia": self._pool_esperas_fila_vazia
         }
 
     def resetar_stats(self):
@@ -399,20 +550,23 @@ class Processador:
         """
         self.tempo_inicio = time.time()
 
-        entradas = await listar_fila_pesquisas(status="pendente")
-        entradas = entradas[:max_por_lote]
-
         total = 0
 
-        for entrada in entradas:
+        for _ in range(max_por_lote):
             if not self.ativo:
                 break
 
             # Aplicar rate limiting
             await self.aplicar_rate_limiting()
 
+            # Reservar só a entrada que será processada agora
+            entradas = await self.reservar_entradas(1)
+            if not entradas:
+                break
+
             # Processar
-            sucesso = await self.processar_entrada(entrada)
+            async with self._manter_leases(entradas):
+                sucesso = await self.processar_entrada(entradas[0])
 
             if sucesso:
                 total += 1
@@ -431,24 +585,22 @@ class Processador:
         """
         self.tempo_inicio = time.time()
 
-        entradas = await listar_fila_pesquisas(status="pendente")
-        entradas = entradas[:max_por_lote]
-
-        # Agrupar em chunks para processar com workers
-        chunks = [
-            entradas[i:i + self.max_workers]
-            for i in range(0, len(entradas), self.max_workers)
-        ]
-
         total = 0
-
-        for chunk in chunks:
-            if not self.ativo:
+        reservadas = 0
+
+        while self.ativo and reservadas < max_por_lote:
+            # Reservar um chunk por vez: o lease só começa quando o chunk
+            # vai ser processado e as demais entradas ficam livres para
+            # outros processos
+            chunk = await self.reservar_entradas(min(self.max_workers, max_por_lote - reservadas))
+            if not chunk:
                 break
+            reservadas += len(chunk)
 
             # Processar chunk em paralelo
             tarefas = [self.processar_entrada(e) for e in chunk]
-            resultados = await asyncio.gather(*tarefas, return_exceptions=True)
+            async with self._manter_leases(chunk):
+                resultados = await asyncio.gather(*tarefas, return_exceptions=True)
 
             # Contar sucessos
             for resultado in resultados:
@@ -460,6 +612,148 @@ class Processador:
 
         return total
 
+    async def _worker_pool(self, sucessos: List[int]):
+        """Consumidor do pool: processa entradas da fila local uma a uma"""
+        while True:
+            entrada = await self._fila_local.get()
+            _FILA_LOCAL.definir(self._fila_local.qsize())
+            self._vaga.set()
+            try:
+                if not self.ativo:
+                    # Pausado: devolve à fila a entrada reservada que não começou
+                    await finalizar_entrada_fila(entrada["id"], "pendente", self.worker_id)
+                    continue
+
+                await self.aplicar_rate_limiting()
+                self._registrar_ocupacao(+1)
+                try:
+                    if await self.processar_entrada(entrada):
+                        sucessos[0] += 1
+                finally:
+                    self._registrar_ocupacao(-1)
+            except Exception as e:
+                print(f"[POOL] Erro processando entrada {entrada.get('id')}: {e}")
+            finally:
+                self._reservadas.discard(entrada["id"])
+                self._fila_local.task_done()
+                self._vaga.set()
+
+    async def liberar_fila_local(self) -> int:
+        """
+        Devolve à fila do banco as entradas reservadas que ainda aguardam um
+        worker do pool (usado ao pausar)
+
+        As que já estão em processamento terminam sob o próprio lease.
+
+        Returns:
+            Número de entradas liberadas
+        """
+        if self._fila_local is None:
+            return 0
+        ids = []
+        while not self._fila_local.empty():
+            entrada = self._fila_local.get_nowait()
+            ids.append(entrada["id"])
+            self._reservadas.discard(entrada["id"])
+            self._fila_local.task_done()
+        _FILA_LOCAL.definir(self._fila_local.qsize())
+        self._vaga.set()
+        try:
+            return await liberar_entradas_fila(self.worker_id, ids)
+        except Exception as e:
+            print(f"Erro liberando entradas da fila local: {e}")
+            return 0
+
+    async def _renovar_reservas(self):
+        """Renova o lease de todas as entradas reservadas pelo pool"""
+        intervalo = max(1.0, settings.FILA_LEASE_SEGUNDOS / 3)
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await renovar_leases_fila(list(self._reservadas), self.worker_id)
+            except Exception as e:
+                print(f"Erro renovando leases da fila: {e}")
+
+    async def executar_pool(
+        self,
+        intervalo_fila_vazia: Optional[float] = None,
+        parar_quando_vazia: bool = False
+    ) -> int:
+        """
+        Modo contínuo: `max_workers` consumidores retiram entradas de uma
+        fila local abastecida por um prefetcher
+
+        O prefetcher reserva entradas assim que um worker libera uma vaga,
+        então uma busca lenta ocupa só o seu slot. Só há espera quando a
+        fila do banco não tem entradas pendentes. Com `ativo = False` o
+        pool fica ocioso (sem reservar) até ser retomado.
+
+        Args:
+            intervalo_fila_vazia: Espera (s) entre consultas com a fila vazia
+            parar_quando_vazia: Encerrar quando a fila esvaziar e os workers terminarem
+
+        Returns:
+            Entradas processadas com sucesso
+        """
+        intervalo = intervalo_fila_vazia if intervalo_fila_vazia is not None else settings.PROCESSADOR_INTERVALO_FILA_VAZIA
+        capacidade = settings.PROCESSADOR_PREFETCH or self.max_workers
+
+        self._fila_local = asyncio.Queue(maxsize=capacidade)
+        self._vaga = asyncio.Event()
+        self._pool_inicio = self._pool_ultima_mudanca = time.monotonic()
+        self._pool_tempo_ocupado = 0.0
+        self.tempo_inicio = self.tempo_inicio or time.time()
+
+        sucessos = [0]
+        tarefas = [asyncio.create_task(self._worker_pool(sucessos)) for _ in range(self.max_workers)]
+        tarefas.append(asyncio.create_task(self._renovar_reservas()))
+
+        try:
+            while True:
+                if not self.ativo:
+                    if parar_quando_vazia:
+                        break
+                    await asyncio.sleep(min(intervalo, 1.0))
+                    continue
+
+                vagas = self._fila_local.maxsize - self._fila_local.qsize()
+                if vagas <= 0:
+                    self._vaga.clear()
+                    await self._vaga.wait()
+                    continue
+
+                entradas = await self.reservar_entradas(vagas)
+                if not entradas:
+                    if parar_quando_vazia:
+                        # Encerrar só depois que as entradas reservadas terminarem
+                        self._vaga.clear()
+                        if not self._reservadas:
+                            break
+                        await self._vaga.wait()
+                        continue
+                    self._pool_esperas_fila_vazia += 1
+                    await asyncio.sleep(intervalo)
+                    continue
+
+                for entrada in entradas:
+                    self._reservadas.add(entrada["id"])
+                    self._fila_local.put_nowait(entrada)
+                _FILA_LOCAL.definir(self._fila_local.qsize())
+
+            await self._fila_local.join()
+            return sucessos[0]
+
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            self._fila_local = None
+            _FILA_LOCAL.definir(0)
+            if self._reservadas:
+                # Entradas reservadas que não chegaram a ser concluídas
+                self._reservadas.clear()
+                await self.liberar_reservas()
+
     async def loop_processador(self, intervalo_minutos: int = 5):
         """
         Loop infinito que processa fila periodicamente
@@ -490,6 +784,8 @@ class Processador:
             print(f"Erro no loop do processador: {e}")
         finally:
             self.ativo = False
+            await self.descarregar_resultados()
+            await self.liberar_reservas()
             stats = await self.obter_estatisticas()
             print(f"Processador finalizado. Stats finais: {stats}")
 
@@ -504,26 +800,12 @@ class Processador:
         self.tempo_inicio = time.time()
 
         try:
-            while self.ativo:
-                fila_pendente = await contar_fila_pesquisas(status="pendente")
-
-                if fila_pendente == 0:
-                    print("Fila vazia! Processamento concluido.")
-                    break
-
-                # Processar lote
-                total = await self.processar_em_paralelo(max_por_lote=20)
-
-                if total == 0:
-                    # Se nao processou nada, esperar um pouco
-                    await asyncio.sleep(intervalo_verificacao)
-                else:
-                    stats = await self.obter_estatisticas()
-                    print(
-                        f"Processadas {total} entradas. "
-                        f"Pendentes: {fila_pendente}. "
-                        f"Taxa: {stats['taxa_sucesso']:.1%}"
-                    )
+            # Pool contínuo: cada worker pega a próxima entrada assim que termina
+            total = await self.executar_pool(
+                intervalo_fila_vazia=intervalo_verificacao,
+                parar_quando_vazia=True
+            )
+            print(f"Fila vazia! Processamento concluido ({total} entradas processadas).")
 
         except KeyboardInterrupt:
             print("Processamento interrompido pelo usuario")
@@ -531,6 +813,8 @@ class Processador:
             print(f"Erro processando tudo: {e}")
         finally:
             self.ativo = False
+            await self.descarregar_resultados()
+            await self.liberar_reservas()
             stats = await self.obter_estatisticas()
             print(f"Processamento finalizado. Stats: {stats}")
 
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Job de reanálise (re-scoring) de resultados_pesquisa
+
+A tabela é percorrida em páginas por id (keyset: id > último id), sem
+carregar tudo em memória; a próxima página é lida enquanto a atual é
+pontuada.
+
+- Modo heurístico: a página é dividida entre processos (ProcessPoolExecutor),
+  já que a avaliação é CPU-bound.
+- Modo profundo (LLM/RAG): avaliações assíncronas com concorrência limitada.
+
+Os scores alterados de cada página são gravados com um executemany na mesma
+transação que o checkpoint do job (tabela reanalise_jobs: último id e
+contadores). Se o processo cair, o job é retomado do último checkpoint na
+próxima inicialização (agendamento, checkpoint e retomada: jobs_persistentes).
+"""
+import asyncio
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from app.agente.avaliador import Avaliador
+from app.agente.jobs_persistentes import JobsPersistentes, calcular_progresso
+from app.config import settings
+from app.database import db
+from app.utils.logger import logger
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+_SQL_PAGINA = """
+SELECT
+    r.id,
+    r.falha_id,
+    r.titulo,
+    r.descricao,
+    r.titulo_pt,
+    r.descricao_pt,
+    r.fonte_url,
+    r.fonte_url as url,  -- chave do cache do Avaliador (sem ela, a query inteira dividiria um score)
+    r.ferramenta_origem as fonte,
+    r.idioma,
+    r.query,
+    r.num_ocorrencias,
+    r.confidence_score as score_anterior
+FROM resultados_pesquisa r
+WHERE r.id > ?
+ORDER BY r.id
+LIMIT ?
+"""
+
+_SQL_ATUALIZAR_SCORE = """
+UPDATE resultados_pesquisa
+SET confidence_score = ?,
+    atualizado_em = CURRENT_TIMESTAMP
+WHERE id = ?
+"""
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Retorna o pool de processos da avaliação heurística (criado sob demanda)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.REANALISE_PROCESSOS)
+    return _executor
+
+
+def _pontuar_heuristica(linhas: List[Dict[str, Any]]) -> List[Optional[float]]:
+    """
+    Avaliação heurística de um lote de linhas (roda num processo do pool)
+
+    Returns:
+        Score de cada linha, ou None se a avaliação falhou
+    """
+    avaliador = Avaliador()
+
+    async def pontuar():
+        scores = []
+        for linha in linhas:
+            try:
+                scores.append(await avaliador.avaliar(
+                    resultado=linha,
+                    query=linha.get("query") or "",
+                    num_ocorrencias=linha.get("num_ocorrencias") or 1,
+                    usar_rag=False
+                ))
+            except Exception as e:
+                print(f"[REANALISE] Erro ao avaliar resultado {linha.get('id')}: {e}")
+                scores.append(None)
+        return scores
+
+    return asyncio.run(pontuar())
+
+
+async def _pontuar_pagina_heuristica(linhas: List[Dict[str, Any]]) -> List[Optional[float]]:
+    """Divide a página entre os processos do pool"""
+    global _executor
+    partes = max(1, settings.REANALISE_PROCESSOS)
+    tamanho = -(-len(linhas) // partes)
+    lotes = [linhas[i:i + tamanho] for i in range(0, len(linhas), tamanho)]
+
+    loop = asyncio.get_running_loop()
+    try:
+        executor = _get_executor()
+        resultados = await asyncio.gather(*[
+            loop.run_in_executor(executor, _pontuar_heuristica, lote) for lote in lotes
+        ])
+    except BrokenProcessPool:
+        # Processo filho morreu: recria o pool na próxima página e conclui esta numa thread
+        logger.warning("[REANALISE] Pool de processos indisponível, usando thread")
+        _executor = None
+        resultados = [await asyncio.to_thread(_pontuar_heuristica, lote) for lote in lotes]
+
+    return [score for lote in resultados for score in lote]
+
+
+async def _pontuar_pagina_profunda(avaliador: Avaliador, linhas: List[Dict[str, Any]]) -> List[Optional[float]]:
+    """Avaliação profunda (RAG) com no máximo REANALISE_CONCORRENCIA_LLM simultâneas"""
+    semaforo = asyncio.Semaphore(max(1, settings.REANALISE_CONCORRENCIA_LLM))
+
+    async def pontuar(linha):
+        async with semaforo:
+            try:
+                return await avaliador.avaliar(
+                    resultado=linha,
+                    query=linha.get("query") or "",
+                    num_ocorrencias=linha.get("num_ocorrencias") or 1,
+                    usar_rag=True
+                )
+            except Exception as e:
+                logger.error(f"[REANALISE] Erro ao avaliar resultado {linha.get('id')}: {e}")
+                return None
+
+    return await asyncio.gather(*[pontuar(linha) for linha in linhas])
+
+
+def _estado_de_linha(linha: Dict[str, Any]) -> Dict[str, Any]:
+    """Estado do job (formato do status) a partir da linha de reanalise_jobs"""
+    total = linha["total"] or 0
+    processados = linha["processados"] or 0
+    return {
+        "job_id": linha["job_id"],
+        "status": linha["status"],
+        "progresso": calcular_progresso(linha["status"], processados, total),
+        "total": total,
+        "processados": processados,
+        "scores_atualizados": linha["scores_atualizados"] or 0,
+        "erros": linha["erros"] or 0,
+        "ultimo_id": linha["ultimo_id"] or 0,
+        "modo_avaliacao": linha["modo_avaliacao"],
+        "avaliar_profundamente": bool(linha["avaliar_profundamente"]),
+        "iniciado_em": linha["iniciado_em"],
+        **{campo: linha[campo] for campo in ("mensagem", "erro", "concluido_em") if linha.get(campo)}
+    }
+
+
+async def _reanalisar(job_id: str, estado: Dict[str, Any]):
+    """Pontua as páginas restantes do job a partir do checkpoint"""
+    profundo = estado["avaliar_profundamente"] and estado["modo_avaliacao"] != "gratuito"
+    retomado = estado["ultimo_id"] > 0
+    logger.info(f"[JOB {job_id}] {'Retomando' if retomado else 'Iniciando'} reanálise em background")
+
+    restantes = await db.fetch_one(
+        "SELECT COUNT(*) AS total FROM resultados_pesquisa WHERE id > ?",
+        (estado["ultimo_id"],)
+    )
+    total = estado["processados"] + restantes["total"]
+
+    if total == 0:
+        estado.update({"total_reanalisadas": 0, "scores_atualizados": 0})
+        await jobs.finalizar(job_id, "concluido", "Nenhum resultado encontrado")
+        return
+
+    jobs.iniciar_execucao(estado, total)
+    avaliador = Avaliador() if profundo else None
+
+    async def pontuar_pagina(pagina: List[Dict[str, Any]]) -> List[tuple]:
+        if profundo:
+            scores = await _pontuar_pagina_profunda(avaliador, pagina)
+        else:
+            scores = await _pontuar_pagina_heuristica(pagina)
+
+        # Atualizar só scores que mudaram significativamente (diferença > 0.01)
+        atualizacoes = []
+        for resultado, novo_score in zip(pagina, scores):
+            if novo_score is None:
+                estado["erros"] += 1
+                continue
+            score_anterior = resultado.get("score_anterior")
+            if score_anterior is None or abs(novo_score - score_anterior) > 0.01:
+                atualizacoes.append((novo_score, resultado["id"]))
+        estado["scores_atualizados"] += len(atualizacoes)
+        return atualizacoes
+
+    await jobs.percorrer_tabela(
+        job_id, estado, _SQL_PAGINA, max(1, settings.REANALISE_PAGINA), pontuar_pagina,
+        _SQL_ATUALIZAR_SCORE, ("total", "processados", "scores_atualizados", "erros", "ultimo_id")
+    )
+
+    estado["total_reanalisadas"] = estado["processados"]
+    await jobs.finalizar(
+        job_id,
+        "concluido",
+        f"Reanálise concluída! {estado['scores_atualizados']} scores atualizados, {estado['erros']} erros."
+    )
+    logger.info(
+        f"[JOB {job_id}] Reanálise concluída: {estado['scores_atualizados']}/{estado['processados']} scores atualizados"
+    )
+
+
+jobs = JobsPersistentes("reanalise_jobs", "REANALISE", _reanalisar, _estado_de_linha)
+retomar_jobs = jobs.retomar
+obter_status = jobs.obter_status
+
+
+async def criar_job(avaliar_profundamente: bool, modo_avaliacao: str) -> str:
+    """
+    Registra um job de reanálise e o inicia em background
+
+    Returns:
+        ID do job
+    """
+    job_id = str(uuid.uuid4())
+    await db.execute(
+        "INSERT INTO reanalise_jobs (job_id, modo_avaliacao, avaliar_profundamente) VALUES (?, ?, ?)",
+        (job_id, modo_avaliacao, 1 if avaliar_profundamente else 0)
+    )
+    jobs.agendar(job_id)
+    return job_id
+
+
+async def encerrar():
+    """Interrompe os jobs em execução (ficam para retomar) e encerra o pool de processos"""
+    global _executor
+    await jobs.encerrar()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Jobs persistentes de tradução em lote de resultados_pesquisa
+
+- Um OpenRouterClient (sessão HTTP compartilhada da aplicação) para o job
+  inteiro, com no máximo `max_concurrent` requisições simultâneas.
+- Título e descrição vão numa só requisição (traduzir_titulo_descricao).
+- Linhas com o mesmo texto de origem (título, descrição, idioma) geram uma
+  única tradução, reaproveitada entre páginas (memo limitado).
+- A tabela é percorrida em páginas por id; as traduções de cada página são
+  gravadas com um executemany na mesma transação que o checkpoint do job
+  (tabela traducao_jobs), que é retomado após um reinício.
+
+Tipos de job:
+- "pendentes": resultados não-PT ainda sem tradução
+- "reprocessar": traduções em lowercase (corrige capitalização)
+"""
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agente.jobs_persistentes import JobsPersistentes, calcular_progresso
+from app.config import settings
+from app.database import db
+from app.integracao.openrouter_api import OpenRouterClient
+from app.utils.logger import logger
+
+_FILTROS = {
+    "pendentes": "AND (titulo_pt IS NULL OR titulo_pt = '')",
+    "reprocessar": "AND titulo_pt IS NOT NULL AND titulo_pt != '' AND titulo_pt = LOWER(titulo_pt)",
+}
+
+_MENSAGENS_VAZIO = {
+    "pendentes": "Nenhum resultado para traduzir",
+    "reprocessar": "Nenhuma tradução para reprocessar",
+}
+
+_SQL_ATUALIZAR = """
+UPDATE resultados_pesquisa
+SET titulo_pt = ?, descricao_pt = ?, atualizado_em = CURRENT_TIMESTAMP
+WHERE id = ?
+"""
+
+
+def _sql_selecao(tipo: str, contar: bool = False) -> str:
+    colunas = "COUNT(*) AS total" if contar else "id, titulo, descricao, idioma"
+    sql = f"""
+    SELECT {colunas}
+    FROM resultados_pesquisa
+    WHERE idioma != 'pt'
+    {_FILTROS[tipo]}
+    AND id > ?
+    """
+    return sql if contar else sql + "ORDER BY id LIMIT ?"
+
+
+class _TradutorDeduplicado:
+    """Traduz pares (título, descrição, idioma) uma única vez por job"""
+
+    def __init__(self, cliente: OpenRouterClient, max_concurrent: int, tamanho_memo: int):
+        self.cliente = cliente
+        self.semaforo = asyncio.Semaphore(max(1, max_concurrent))
+        self.tamanho_memo = tamanho_memo
+        self._memo: "OrderedDict[Tuple[str, str, str], Dict[str, str]]" = OrderedDict()
+        self.requisicoes = 0
+        self.reaproveitadas = 0
+
+    async def _traduzir(self, chave: Tuple[str, str, str]) -> Optional[Dict[str, str]]:
+        titulo, descricao, idioma = chave
+        async with self.semaforo:
+            try:
+                self.requisicoes += 1
+                return await self.cliente.traduzir_titulo_descricao(
+                    titulo=titulo,
+                    descricao=descricao,
+                    idioma_alvo="pt",
+                    idioma_origem=idioma
+                )
+            except Exception as e:
+                logger.error(f"[TRADUCAO LOTE] Erro ao traduzir '{titulo[:50]}': {e}")
+                return None
+
+    async def traduzir_pagina(self, linhas: List[Dict[str, Any]]) -> List[Optional[Dict[str, str]]]:
+        """Tradução de cada linha (None se falhou), na ordem recebida"""
+        chaves = [
+            (linha["titulo"] or "", linha["descricao"] or "", linha["idioma"] or "en")
+            for linha in linhas
+        ]
+        novas = [c for c in dict.fromkeys(chaves) if c not in self._memo]
+        self.reaproveitadas += len(chaves) - len(novas)
+
+        traducoes = await asyncio.gather(*[self._traduzir(chave) for chave in novas])
+        resultado_novas = dict(zip(novas, traducoes))
+
+        for chave, traducao in resultado_novas.items():
+            if traducao is not None:
+                self._memo[chave] = traducao
+                if len(self._memo) > self.tamanho_memo:
+                    self._memo.popitem(last=False)
+
+        saida = []
+        for chave in chaves:
+            if chave in resultado_novas:
+                saida.append(resultado_novas[chave])
+            else:
+                self._memo.move_to_end(chave)
+                saida.append(self._memo[chave])
+        return saida
+
+
+def _estado_de_linha(linha: Dict[str, Any]) -> Dict[str, Any]:
+    """Estado do job (formato do status) a partir da linha de traducao_jobs"""
+    total = linha["total"] or 0
+    processados = linha["processados"] or 0
+    return {
+        "job_id": linha["job_id"],
+        "tipo": linha["tipo"],
+        "status": linha["status"],
+        "progresso": calcular_progresso(linha["status"], processados, total),
+        "total": total,
+        "processados": processados,
+        "traduzidas": linha["traduzidas"] or 0,
+        "erros": linha["erros"] or 0,
+        "ultimo_id": linha["ultimo_id"] or 0,
+        "max_concurrent": linha["max_concurrent"],
+        "iniciado_em": linha["iniciado_em"],
+        **{campo: linha[campo] for campo in ("mensagem", "erro", "concluido_em") if linha.get(campo)}
+    }
+
+
+async def _traduzir(job_id: str, estado: Dict[str, Any]):
+    """Traduz as páginas restantes do job a partir do checkpoint"""
+    tipo = estado["tipo"]
+    retomado = estado["ultimo_id"] > 0
+    logger.info(f"[JOB {job_id}] {'Retomando' if retomado else 'Iniciando'} traduções em background ({tipo})")
+
+    restantes = await db.fetch_one(_sql_selecao(tipo, contar=True), (estado["ultimo_id"],))
+    total = estado["processados"] + restantes["total"]
+
+    if total == 0:
+        estado["total_traduzidas"] = 0
+        await jobs.finalizar(job_id, "concluido", _MENSAGENS_VAZIO[tipo])
+        return
+
+    jobs.iniciar_execucao(estado, total)
+
+    async with OpenRouterClient() as cliente:
+        tradutor = _TradutorDeduplicado(cliente, estado["max_concurrent"] or 10, settings.TRADUCAO_LOTE_MEMO)
+
+        async def traduzir_pagina(pagina: List[Dict[str, Any]]) -> List[tuple]:
+            traducoes = await tradutor.traduzir_pagina(pagina)
+
+            atualizacoes = []
+            for resultado, traducao in zip(pagina, traducoes):
+                titulo_pt = (traducao or {}).get("titulo", "").strip()
+                descricao_pt = (traducao or {}).get("descricao", "").strip()
+                # Descrição vazia só é aceita se a original também for vazia
+                if titulo_pt and (descricao_pt or not resultado["descricao"]):
+                    atualizacoes.append((titulo_pt, descricao_pt, resultado["id"]))
+                else:
+                    estado["erros"] += 1
+
+            estado["traduzidas"] += len(atualizacoes)
+            estado["requisicoes"] = tradutor.requisicoes
+            estado["reaproveitadas"] = tradutor.reaproveitadas
+            return atualizacoes
+
+        await jobs.percorrer_tabela(
+            job_id, estado, _sql_selecao(tipo), max(1, settings.TRADUCAO_LOTE_PAGINA), traduzir_pagina,
+            _SQL_ATUALIZAR, ("total", "processados", "traduzidas", "erros", "ultimo_id")
+        )
+
+    estado.update({
+        "total_traduzidas": estado["traduzidas"],
+        "total_erros": estado["erros"]
+    })
+    await jobs.finalizar(
+        job_id,
+        "concluido",
+        f"Tradução concluída! {estado['traduzidas']} resultados traduzidos, {estado['erros']} erros."
+    )
+    logger.info(f"[JOB {job_id}] Tradução concluída: {estado['traduzidas']}/{estado['processados']} resultados traduzidos")
+
+
+jobs = JobsPersistentes("traducao_jobs", "TRADUCAO LOTE", _traduzir, _estado_de_linha)
+# Também guarda os jobs só em memória de app/api/traducao_lote (refazer_todas)
+traducao_jobs = jobs.jobs
+retomar_jobs = jobs.retomar
+obter_status = jobs.obter_status
+encerrar = jobs.encerrar
+
+
+async def criar_job(tipo: str = "pendentes", max_concurrent: int = 10) -> str:
+    """
+    Registra um job de tradução em lote e o inicia em background
+
+    Args:
+        tipo: "pendentes" ou "reprocessar"
+        max_concurrent: Máximo de requisições de tradução simultâneas
+
+    Returns:
+        ID do job
+    """
+    if tipo not in _FILTROS:
+        raise ValueError(f"Tipo de job inválido: {tipo}")
+
+    job_id = str(uuid.uuid4())
+    await db.execute(
+        "INSERT INTO traducao_jobs (job_id, tipo, max_concurrent) VALUES (?, ?, ?)",
+        (job_id, tipo, max_concurrent)
+    )
+    jobs.agendar(job_id)
+    return job_id
@@ -3,6 +3,7 @@
 Router FastAPI para endpoints de boas práticas
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import json
@@ -12,8 +13,6 @@ from app.database import (
     listar_priorizacoes,
     obter_fontes_por_falha,
     listar_boas_praticas_por_falha,
-    salvar_boa_pratica,
-    limpar_boas_praticas_fase,
     get_resultados_by_falha,
     gerar_hash_fonte,
     obter_analise_fonte_cache,
@@ -21,7 +20,8 @@ from app.database import (
     obter_analises_fontes_lote
 )
 from app.agente.analisador_boas_praticas import AnalisadorBoasPraticas
-from app.utils.content_fetcher import enrich_sources_with_full_content
+from app.agente import fase2_lote
+from app.config import settings
 from app.utils.logger import logger
 from app.integracao.openrouter_api import OpenRouterClient
 import asyncio
@@ -114,7 +114,7 @@ async def enriquecer_fontes_com_analises(fontes: List[Dict[str, Any]], limpar_ca
     # 2. Buscar análises em cache (batch) - pula se limpar_cache=True
     analises_cache = {}
     if not limpar_cache:
-        analises_cache = await obter_analises_fontes_lote(list(fonte_hashes.keys()))
+        analises_cache = await obter_analises_fontes_lote(list(fonte_hashes.keys()), com_analise_llm=False)
         logger.info(f"Encontradas {len(analises_cache)} análises em cache")
     else:
         logger.info(f"Cache ignorado - forçando nova análise de todas as fontes")
@@ -211,7 +211,7 @@ async def listar_falhas_fase1(
         logger.info("Fase I: Listando falhas priorizadas")
 
         # Obter falhas priorizadas (apenas destacadas)
-        todas_priorizacoes = await listar_priorizacoes()
+        todas_priorizacoes = await listar_priorizacoes(com_analise=False)
         priorizacoes = [p for p in todas_priorizacoes if p.get('destacada')]
 
         if not priorizacoes:
@@ -393,78 +393,10 @@ async def analisar_falha_fase2(
         if not falha:
             raise HTTPException(status_code=404, detail="Falha não encontrada")
 
-        # Se reprocessar, limpar práticas existentes
-        if reprocessar:
-            await limpar_boas_praticas_fase(falha_id, 'fase_2')
-            logger.info(f"Práticas existentes limpas para reprocessamento")
-
-        # 1. Obter TODAS as fontes disponíveis (resultados de pesquisa + documentos)
-        # Diferente de obter_fontes_por_falha() que retorna apenas fontes salvas em priorizacoes_fontes
-        resultados_pesquisa = await get_resultados_by_falha(falha_id)
-        documentos_base = await obter_fontes_por_falha(falha_id)
-
-        # Formatar fontes para análise
-        fontes = []
-
-        # Adicionar resultados de pesquisa
-        for resultado in resultados_pesquisa:
-            fontes.append({
-                'fonte_tipo': 'pesquisa',
-                'fonte_id': resultado.get('id'),
-                'fonte_titulo': resultado.get('titulo'),
-                'fonte_descricao': resultado.get('descricao'),
-                'fonte_url': resultado.get('fonte_url'),
-                'fonte_conteudo': resultado.get('conteudo_completo'),
-                'confidence_score': resultado.get('confidence_score', 0.5),
-                'pais_origem': resultado.get('pais_origem'),
-                'idioma': resultado.get('idioma'),
-                'titulo_pt': resultado.get('titulo_pt'),
-                'descricao_pt': resultado.get('descricao_pt')
-            })
-
-        # Adicionar documentos da base (se houver)
-        for doc in documentos_base:
-            if doc.get('fonte_tipo') == 'documento':
-                fontes.append(doc)
-
-        logger.info(f"Obtidas {len(fontes)} fontes para análise ({len(resultados_pesquisa)} resultados + {len([d for d in documentos_base if d.get('fonte_tipo') == 'documento'])} documentos)")
-
-        if not fontes:
-            logger.warning(f"Nenhuma fonte disponível para falha {falha_id}")
-            return AnalisarFase2Response(
-                falha_id=falha_id,
-                titulo=falha['titulo'],
-                pilar=falha['pilar'],
-                praticas=[],
-                total_praticas=0
-            )
-
-        # 2. Enriquecer fontes com conteúdo completo
-        logger.info("Enriquecendo fontes com conteúdo completo...")
-        fontes_enriquecidas = await enrich_sources_with_full_content(fontes)
-
-        # 3. Analisar com LLM (usando modelo configurável)
-        logger.info("Executando análise com IA...")
-        praticas_extraidas = await analisador.analisar_boas_praticas(
-            falha=falha,
-            fontes=fontes_enriquecidas,
-            modelo=modelo,
-            usar_openrouter=True
-        )
-
-        # 4. Salvar no banco (incluindo confidence_score)
-        for pratica in praticas_extraidas:
-            await salvar_boa_pratica(
-                falha_id=falha_id,
-                titulo=pratica.get('titulo'),
-                descricao=pratica.get('descricao'),
-                is_sebrae=pratica.get('is_sebrae', False),
-                fonte_referencia=pratica.get('fonte'),
-                fase='fase_2',
-                confidence_score=pratica.get('confidence_score', 50)
-            )
-
-        logger.info(f"Análise concluída: {len(praticas_extraidas)} práticas identificadas")
+        # Fontes -> conteúdo completo (Jina) -> LLM -> práticas salvas com o
+        # fingerprint das fontes (reaproveitado pelo job em lote)
+        resultado = await fase2_lote.analisar_falha(falha, modelo=modelo, reprocessar=reprocessar)
+        praticas_extraidas = resultado["praticas"]
 
         # Converter para Pydantic models
         praticas_models = [
@@ -911,7 +843,7 @@ async def estimar_custo_analise_fase1(
                     fonte_hashes.append(hash_fonte)
 
                 # Verificar cache em lote
-                analises_cache = await obter_analises_fontes_lote(fonte_hashes)
+                analises_cache = await obter_analises_fontes_lote(fonte_hashes, com_analise_llm=False)
                 fontes_em_cache = len(analises_cache)
                 fontes_a_analisar = len(fontes_filtradas) - fontes_em_cache
 
@@ -1315,73 +1247,42 @@ async def analisar_todas_falhas_fase2(
     reprocessar: bool = False
 ):
     """
-    Analisa TODAS as falhas priorizadas em lote
+    Inicia a análise de TODAS as falhas priorizadas em background
+
+    As falhas são analisadas em paralelo (FASE2_FALHAS_SIMULTANEAS) e o
+    estado de cada uma é gravado no banco; se a aplicação reiniciar, o job é
+    retomado a partir das falhas pendentes. Acompanhe o progresso por
+    /fase2/analisar-tudo/{job_id}/eventos (SSE) ou /fase2/analisar-tudo/{job_id}.
 
     Args:
         modelo: Modelo LLM a usar (usa padrão se não especificado)
-        reprocessar: Se True, reanalisa mesmo falhas já processadas
+        reprocessar: Se True, reanalisa todas (substitui as práticas da
+            Fase II); se False, reaproveita falhas cujas fontes e modelo não
+            mudaram desde a última análise. Nesse modo, falhas sem análise
+            registrada mantêm as práticas existentes e recebem as novas
 
     Returns:
-        Resumo do processamento em lote
+        Job ID para acompanhamento do progresso
     """
     try:
         logger.info(f"Fase II: Iniciando análise em lote com modelo {modelo or 'padrão'}")
 
-        # Obter falhas priorizadas (destacadas)
-        priorizacoes = await listar_priorizacoes()
-        falhas_priorizadas = [p for p in priorizacoes if p.get('destacada')]
+        job_id = await fase2_lote.criar_job(modelo=modelo, reprocessar=reprocessar)
 
-        if not falhas_priorizadas:
+        if job_id is None:
             return {
+                "job_id": None,
                 "total_falhas": 0,
-                "processadas": 0,
-                "com_erro": 0,
                 "mensagem": "Nenhuma falha priorizada encontrada"
             }
 
-        # Processar cada falha
-        resultados = []
-        processadas = 0
-        com_erro = 0
-
-        for prio in falhas_priorizadas:
-            falha_id = prio['falha_id']
-
-            try:
-                # Analisar falha
-                resultado = await analisar_falha_fase2(
-                    falha_id=falha_id,
-                    reprocessar=reprocessar,
-                    modelo=modelo
-                )
-
-                resultados.append({
-                    "falha_id": falha_id,
-                    "titulo": prio['titulo'],
-                    "sucesso": True,
-                    "total_praticas": resultado.total_praticas
-                })
-                processadas += 1
-
-            except Exception as e:
-                logger.error(f"Erro ao processar falha {falha_id}: {str(e)}")
-                resultados.append({
-                    "falha_id": falha_id,
-                    "titulo": prio['titulo'],
-                    "sucesso": False,
-                    "erro": str(e)
-                })
-                com_erro += 1
-
-        logger.info(f"Análise em lote concluída: {processadas}/{len(falhas_priorizadas)} processadas")
-
+        status = await fase2_lote.obter_status(job_id)
         return {
-            "total_falhas": len(falhas_priorizadas),
-            "processadas": processadas,
-            "com_erro": com_erro,
-            "modelo_usado": modelo or "google/gemini-2.0-flash-exp:free",
-            "resultados": resultados,
-            "mensagem": f"Análise em lote concluída! {processadas} falhas processadas, {com_erro} erros."
+            "job_id": job_id,
+            "status": "iniciado",
+            "total_falhas": status["total"],
+            "modelo_usado": status["modelo"],
+            "mensagem": "Análise em lote iniciada. Use o job_id para acompanhar o progresso."
         }
 
     except Exception as e:
@@ -1389,6 +1290,63 @@ async def analisar_todas_falhas_fase2(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/fase2/analisar-tudo/{job_id}")
+async def obter_status_analise_tudo_fase2(job_id: str):
+    """
+    Status de um job da Fase II em lote, com o estado de cada falha
+    """
+    status = await fase2_lote.obter_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return status
+
+
+@router.get("/fase2/analisar-tudo/{job_id}/eventos")
+async def eventos_analise_tudo_fase2(job_id: str):
+    """
+    Progresso por falha de um job da Fase II via Server-Sent Events (SSE)
+
+    Eventos: 'estado' (snapshot ao conectar), 'falha' (falha iniciada ou
+    concluída) e 'fim' (job concluído ou com erro).
+    """
+    status = await fase2_lote.obter_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    async def event_generator():
+        # Assinar antes do snapshot para não perder eventos entre os dois
+        fila = fase2_lote.assinar(job_id)
+        try:
+            snapshot = await fase2_lote.obter_status(job_id)
+            yield f"data: {json.dumps({'tipo': 'estado', **snapshot})}\n\n"
+
+            if not fase2_lote.job_ativo(job_id) and snapshot["status"] not in ("iniciado", "processando"):
+                yield f"data: {json.dumps({'tipo': 'fim', **snapshot})}\n\n"
+                return
+
+            while True:
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=settings.FASE2_SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(evento)}\n\n"
+                if evento["tipo"] == "fim":
+                    return
+        finally:
+            fase2_lote.cancelar_assinatura(job_id, fila)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/fase2/estimar-custo-tudo")
 async def estimar_custo_analise_tudo_fase2(modelo: Optional[str] = None):
     """
@@ -1402,7 +1360,7 @@ async def estimar_custo_analise_tudo_fase2(modelo: Optional[str] = None):
     """
     try:
         # Obter falhas priorizadas
-        priorizacoes = await listar_priorizacoes()
+        priorizacoes = await listar_priorizacoes(com_analise=False)
         falhas_priorizadas = [p for p in priorizacoes if p.get('destacada')]
 
         if not falhas_priorizadas:
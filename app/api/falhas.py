@@ -10,6 +10,7 @@ from app.database import (
     get_falha_by_id,
     get_resultados_by_falha,
     get_estatisticas_falha,
+    listar_falhas_resumo,
     db
 )
 from app.schemas import FalhaResponse, FalhaComResultados, EstatisticasFalhaResponse
@@ -45,62 +46,10 @@ async def listar_falhas(
       (0 para falhas nao iniciadas, cresce conforme buscas sao executadas)
     """
     from app.config import settings
-    import statistics
 
-    query = """
-    SELECT
-        f.id,
-        f.titulo,
-        f.pilar,
-        f.descricao,
-        f.dica_busca,
-        COUNT(DISTINCT r.id) as total_resultados,
-        COALESCE(SUM(CASE WHEN fp.status IN ('completa', 'erro') THEN 1 ELSE 0 END), 0) as searches_completed,
-        COALESCE(SUM(CASE WHEN fp.status = 'processando' THEN 1 ELSE 0 END), 0) as searches_in_progress,
-        COALESCE(SUM(CASE WHEN fp.status = 'pendente' THEN 1 ELSE 0 END), 0) as searches_pending,
-        COALESCE(SUM(CASE WHEN fp.status IN ('completa', 'erro', 'processando', 'pendente') THEN 1 ELSE 0 END), 0) as total_buscas_enfileiradas,
-        (SELECT COUNT(*) FROM (
-            SELECT DISTINCT ferramenta_origem FROM resultados_pesquisa WHERE falha_id = f.id
-            UNION
-            SELECT DISTINCT ferramenta FROM fila_pesquisas WHERE falha_id = f.id
-        )) as num_ferramentas,
-        COUNT(DISTINCT CASE WHEN r.id IS NOT NULL THEN r.idioma END) as num_idiomas,
-        (SELECT COUNT(DISTINCT query) FROM fila_pesquisas WHERE falha_id = f.id AND status IN ('completa', 'erro', 'processando', 'pendente')) as num_queries_processadas
-    FROM falhas_mercado f
-    LEFT JOIN resultados_pesquisa r ON f.id = r.falha_id
-    LEFT JOIN fila_pesquisas fp ON f.id = fp.falha_id
-    """
-
-    if pilar:
-        query += f" WHERE f.pilar LIKE '%{pilar}%'"
-
-    query += " GROUP BY f.id ORDER BY f.id"
-    query += f" LIMIT {limit} OFFSET {skip}"
-
-    falhas = await db.fetch_all(query)
-
-    # Calcular mediana de confidence_score para cada falha
-    result = []
-    for falha in falhas:
-        falha_dict = dict(falha)
-        falha_dict['max_searches'] = settings.MAX_BUSCAS_POR_FALHA
-
-        # Buscar scores para calcular mediana
-        scores_query = """
-        SELECT confidence_score
-        FROM resultados_pesquisa
-        WHERE falha_id = ?
-        AND confidence_score IS NOT NULL
-        """
-        scores_result = await db.fetch_all(scores_query, (falha['id'],))
-
-        if scores_result and len(scores_result) > 0:
-            scores = [float(row['confidence_score']) for row in scores_result]
-            falha_dict['confidence_medio'] = round(statistics.median(scores), 3)
-        else:
-            falha_dict['confidence_medio'] = 0.0
-
-        result.append(falha_dict)
+    result = await listar_falhas_resumo(skip=skip, limit=limit, pilar=pilar)
+    for falha in result:
+        falha['max_searches'] = settings.MAX_BUSCAS_POR_FALHA
 
     # Retornar wrapped em "dados" para compatibilidade com frontend
     return {"dados": result}
@@ -5,6 +5,7 @@ Testa a saúde de todos os serviços e APIs
 """
 import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
 from typing import Dict, List, Any
 from datetime import datetime
 
@@ -15,6 +16,7 @@ from app.integracao.deep_research_mcp import DeepResearchClient
 from app.integracao.tavily_api import TavilyClient
 from app.integracao.serper_api import SerperClient
 from app.integracao.exa_api import ExaClient
+from app.utils import metricas
 
 router = APIRouter(tags=["Health Check"])
 
@@ -447,6 +449,40 @@ async def health_check_completo():
     return resultado
 
 
+@router.get("/health/database")
+async def get_database_metrics():
+    """
+    Métricas do pool de conexões do SQLite
+    (tempo de espera por conexão e latência das queries, em ms)
+    """
+    from app.database import db
+
+    return db.get_metricas()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics_prometheus():
+    """
+    Métricas em processo no formato texto do Prometheus
+
+    Latência (histogramas) de queries do SQLite, canais de busca, embeddings,
+    chamadas de LLM por modelo, consultas vetoriais e entradas da fila, além
+    de contadores de vazão e medidores (limitadores, pool, fila local).
+    """
+    return PlainTextResponse(
+        metricas.registro.exportar_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get("/metrics/resumo")
+async def get_metrics_resumo():
+    """
+    As mesmas métricas em JSON, com percentis (p50/p90/p99) em ms
+    """
+    return metricas.registro.resumo()
+
+
 @router.get("/health/status")
 async def get_health_status():
     """
@@ -5,30 +5,21 @@ Gerencia upload de DOCX/PDF e armazenamento em vector database
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse, StreamingResponse
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
-import io
 import os
 import json
 import asyncio
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from docx import Document as DocxDocument
-except ImportError:
-    DocxDocument = None
-
-try:
-    import PyPDF2
-except ImportError:
-    PyPDF2 = None
-
 from app.config import settings, get_database_path
 from app.database import db
 from app.vector.vector_store import get_vector_store
 from app.vector.embeddings import EmbeddingClient
-from app.utils.text_chunker import create_smart_chunks, clean_text
+from app.vector.indexacao_kb import PipelineIndexacao, extrair_texto_async, hash_conteudo
+from app.utils.extracao_texto import extrair_docx, extrair_pdf, extrair_utf8
+from app.utils.text_chunker import clean_text
 
 router = APIRouter(prefix="/api/knowledge-base", tags=["Knowledge Base"])
 
@@ -70,111 +61,111 @@ class ChatRequest(BaseModel):
 
 def extract_text_from_docx(file_content: bytes) -> str:
     """Extrai texto de arquivo DOCX"""
-    if DocxDocument is None:
-        raise HTTPException(status_code=400, detail="python-docx não instalado")
-
     try:
-        doc = DocxDocument(io.BytesIO(file_content))
-        text = "\n".join([para.text for para in doc.paragraphs])
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao extrair DOCX: {str(e)}")
+        return extrair_docx(file_content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 def extract_text_from_pdf(file_content: bytes) -> str:
     """Extrai texto de arquivo PDF"""
-    if PyPDF2 is None:
-        raise HTTPException(status_code=400, detail="PyPDF2 não instalado")
-
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao extrair PDF: {str(e)}")
+        return extrair_pdf(file_content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 def extract_text_from_csv(file_content: bytes) -> str:
     """Extrai texto de arquivo CSV"""
     try:
-        text = file_content.decode('utf-8')
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao extrair CSV: {str(e)}")
+        return extrair_utf8(file_content, "CSV")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 def extract_text_from_markdown(file_content: bytes) -> str:
     """Extrai texto de arquivo Markdown"""
     try:
-        text = file_content.decode('utf-8')
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao extrair Markdown: {str(e)}")
+        return extrair_utf8(file_content, "Markdown")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
+def registrar_indice(file_name: str, content_hash: str, chunk_id: str):
+    """Guarda nos metadados o hash do conteúdo indexado e um chunk de referência"""
+    metadata = load_metadata()
+    metadata.setdefault(file_name, {})["indice"] = {
+        "content_hash": content_hash,
+        "chunk_id": chunk_id
+    }
+    save_metadata(metadata)
+
+
+def reservar_nome_arquivo(filename: str) -> str:
+    """
+    Cria vazio (O_EXCL, atômico) DOCS_DIR/filename ou a primeira cópia livre
+    "nome (n).ext" e devolve o nome reservado
+    """
+    base_name = filename.rsplit('.', 1)[0]
+    extension = filename.rsplit('.', 1)[1] if '.' in filename else ''
+    candidato, counter = filename, 0
+    while True:
+        try:
+            os.close(os.open(DOCS_DIR / candidato, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return candidato
+        except FileExistsError:
+            counter += 1
+            candidato = f"{base_name} ({counter}).{extension}"
+
+
+def documento_inalterado(vector_store, file_name: str, content_hash: str) -> bool:
+    """
+    Verifica se o arquivo já está indexado com exatamente este conteúdo
+
+    Exige que o hash registrado nos metadados e o do chunk no vector store
+    coincidam (o vector store pode ter sido recriado desde o registro).
+    """
+    indice = load_metadata().get(file_name, {}).get("indice")
+    if not indice or indice.get("content_hash") != content_hash:
+        return False
+    return vector_store.documento_indexado(indice["chunk_id"], content_hash)
+
 
 async def store_document_in_vector_db(
     file_name: str,
     text_content: str,
     file_type: str,
-    progress_callback=None
+    progress_callback=None,
+    content_hash: Optional[str] = None,
+    pipeline: Optional[PipelineIndexacao] = None
 ) -> bool:
     """
-    Armazena documento em ChromaDB com embeddings
+    Armazena documento no vector store com embeddings
+
+    Os chunks são embedados em lotes pelos workers do pipeline (ver
+    app.vector.indexacao_kb); sem pipeline, um é criado só para este arquivo.
     progress_callback: função opcional para reportar progresso de indexação
+    content_hash: hash do arquivo, registrado para pular reenvios inalterados
     """
     try:
         # Obter vector store global (singleton já inicializado no startup)
         vector_store = await get_vector_store()
 
-        # Dividir texto em chunks inteligentes (otimizado para RAG de alta qualidade)
-        # - Limpa espaços extras entre letras (problema OCR)
-        # - Respeita limites de frases completas
-        # - Chunks maiores (1500 chars) para melhor contexto
-        # - Overlap de 300 chars para continuidade semântica
-        chunks = create_smart_chunks(
-            text=text_content,
-            chunk_size=1500,  # Chunks maiores para melhor qualidade
-            overlap=300,       # Overlap maior para não perder contexto
-            clean=True         # Limpa espaços extras e caracteres estranhos
-        )
-
-        total_chunks = len(chunks)
-
-        # Adicionar cada chunk ao vector store com progresso incremental
-        # Otimização: salvar apenas no final do documento (batch save)
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():
-                doc_id = f"{file_name}_chunk_{i}"
-                metadata = {
-                    "source": file_name,
-                    "type": file_type,
-                    "chunk": i,
-                    "uploaded_at": datetime.now().isoformat()
-                }
-
-                # Reportar progresso durante indexação (60% a 90%)
-                # Cada chunk representa uma fração do progresso total
-                if progress_callback:
-                    # Progresso de 60% a 90% dividido pelos chunks
-                    chunk_progress = 60 + int(((i + 1) / total_chunks) * 30)
-                    await progress_callback({
-                        "phase": "indexing",
-                        "progress": chunk_progress,
-                        "detail": f"Indexando chunk {i+1}/{total_chunks}"
-                    })
-
-                # Add to vector store (sem salvar a cada chunk - performance)
-                is_last_chunk = (i == total_chunks - 1)
-                await vector_store.add_texts(
-                    texts=[chunk],
-                    metadatas=[metadata],
-                    ids=[doc_id],
-                    save=is_last_chunk  # Salvar apenas no último chunk do documento
+        if pipeline is None:
+            async with PipelineIndexacao(vector_store) as pipeline_local:
+                ids = await pipeline_local.indexar(
+                    file_name, text_content, file_type, content_hash, progress_callback
                 )
+        else:
+            ids = await pipeline.indexar(
+                file_name, text_content, file_type, content_hash, progress_callback
+            )
+
+        if ids is None:
+            return False
 
+        if content_hash and ids:
+            registrar_indice(file_name, content_hash, ids[0])
         return True
     except Exception as e:
         print(f"Erro ao armazenar documento em vector DB: {e}")
@@ -213,11 +204,17 @@ async def check_duplicates(files: List[UploadFile] = File(...)):
 async def process_single_file(
     file: UploadFile,
     overwrite: str,
-    progress_callback=None
+    progress_callback=None,
+    pipeline: Optional[PipelineIndexacao] = None
 ) -> dict:
     """
     Processa um único arquivo e retorna resultado
     progress_callback: função opcional para enviar atualizações de progresso
+    pipeline: workers de embedding compartilhados entre arquivos (opcional)
+
+    A extração roda num pool de processos e o chunking numa thread, sem
+    bloquear o event loop. Um arquivo reenviado com o mesmo conteúdo
+    (mesmo hash) não é reindexado.
     """
     try:
         # Validar tipo baseado na extensão do arquivo
@@ -243,85 +240,112 @@ async def process_single_file(
             await progress_callback({"phase": "reading", "filename": file.filename, "progress": 10})
 
         # Verificar se arquivo já existe
-        file_path = DOCS_DIR / file.filename
-        file_exists = file_path.exists()
-        final_filename = file.filename
-
-        if file_exists:
-            if overwrite == "skip":
-                return {"status": "skipped", "filename": file.filename}
-            elif overwrite == "copy":
-                base_name = file.filename.rsplit('.', 1)[0]
-                extension = file.filename.rsplit('.', 1)[1] if '.' in file.filename else ''
-                counter = 1
-                while (DOCS_DIR / f"{base_name} ({counter}).{extension}").exists():
-                    counter += 1
-                final_filename = f"{base_name} ({counter}).{extension}"
+        file_exists = (DOCS_DIR / file.filename).exists()
+        if file_exists and overwrite == "skip":
+            return {"status": "skipped", "filename": file.filename}
+
+        # Modo cópia: o nome é reservado já criando o arquivo, para que uploads
+        # simultâneos com o mesmo nome não escolham o mesmo "nome (n).ext"
+        reservado = None
+        if overwrite == "copy":
+            reservado = await asyncio.to_thread(reservar_nome_arquivo, file.filename)
+        final_filename = reservado or file.filename
+
+        sucesso = False
+        try:
+            resultado = await _indexar_e_salvar(file, final_filename, reservado is not None, progress_callback, pipeline)
+            sucesso = resultado["status"] == "success"
+            return resultado
+        finally:
+            if reservado and not sucesso:
+                (DOCS_DIR / reservado).unlink(missing_ok=True)
 
-        if progress_callback:
-            await progress_callback({"phase": "extracting", "filename": file.filename, "progress": 30})
-
-        # Ler conteúdo
-        file_content = await file.read()
-
-        if len(file_content) > MAX_FILE_SIZE:
-            return {"status": "error", "filename": file.filename, "error": "Arquivo excede 25MB"}
-
-        # Extrair texto baseado no tipo
-        if file.filename.endswith('.docx'):
-            text = extract_text_from_docx(file_content)
-            file_type = 'docx'
-        elif file.filename.endswith('.pdf'):
-            text = extract_text_from_pdf(file_content)
-            file_type = 'pdf'
-        elif file.filename.endswith('.csv'):
-            text = extract_text_from_csv(file_content)
-            file_type = 'csv'
-        elif file.filename.endswith('.md'):
-            text = extract_text_from_markdown(file_content)
-            file_type = 'md'
-        elif file.filename.endswith('.txt'):
-            text = extract_text_from_markdown(file_content)
-            file_type = 'txt'
-        else:
-            return {"status": "error", "filename": file.filename, "error": "Extensão não reconhecida"}
-
-        # Armazenar em vector DB com callback de progresso
-        # A indexação vai de 60% a 90% (dividido pelos chunks)
-        success = await store_document_in_vector_db(
-            file_name=final_filename,
-            text_content=text,
-            file_type=file_type,
-            progress_callback=progress_callback
-        )
+    except Exception as e:
+        print(f"[KB] Erro ao processar {file.filename}: {str(e)}")
+        return {"status": "error", "filename": file.filename, "error": str(e)}
 
-        if not success:
-            return {"status": "error", "filename": file.filename, "error": "Falha ao indexar"}
 
-        if progress_callback:
-            await progress_callback({"phase": "saving", "filename": file.filename, "progress": 92})
+async def _indexar_e_salvar(
+    file: UploadFile,
+    final_filename: str,
+    nome_reservado: bool,
+    progress_callback=None,
+    pipeline: Optional[PipelineIndexacao] = None
+) -> dict:
+    """Lê, extrai, indexa e grava o arquivo com o nome final (ver process_single_file)"""
+    if progress_callback:
+        await progress_callback({"phase": "extracting", "filename": file.filename, "progress": 30})
 
-        # Salvar arquivo localmente
-        file_path = DOCS_DIR / final_filename
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
+    # Ler conteúdo
+    file_content = await file.read()
+
+    if len(file_content) > MAX_FILE_SIZE:
+        return {"status": "error", "filename": file.filename, "error": "Arquivo excede 25MB"}
 
+    file_type = file.filename.rsplit('.', 1)[-1].lower()
+    content_hash = await asyncio.to_thread(hash_conteudo, file_content)
+
+    # Mesmo nome e mesmo conteúdo já indexado: não extrair nem gerar embeddings
+    vector_store = await get_vector_store()
+    if documento_inalterado(vector_store, final_filename, content_hash):
+        file_path = DOCS_DIR / final_filename
+        if nome_reservado or not file_path.exists():
+            with open(file_path, 'wb') as f:
+                f.write(file_content)
+        print(f"[KB] {final_filename} inalterado (hash {content_hash[:12]}) - reindexação ignorada")
         if progress_callback:
             await progress_callback({"phase": "complete", "filename": file.filename, "progress": 100})
-
         return {
             "status": "success",
             "nome": final_filename,
             "nome_original": file.filename if final_filename != file.filename else None,
             "tamanho": len(file_content),
             "tipo": file_type,
+            "reindexado": False,
             "upload_em": datetime.now().isoformat()
         }
 
-    except Exception as e:
-        print(f"[KB] Erro ao processar {file.filename}: {str(e)}")
+    # Extrair texto fora do event loop (PDF/DOCX em pool de processos)
+    try:
+        text = await extrair_texto_async(file_content, file_type)
+    except ValueError as e:
         return {"status": "error", "filename": file.filename, "error": str(e)}
 
+    # Armazenar em vector DB com callback de progresso
+    # A indexação vai de 60% a 90% (conforme os lotes de chunks terminam)
+    success = await store_document_in_vector_db(
+        file_name=final_filename,
+        text_content=text,
+        file_type=file_type,
+        progress_callback=progress_callback,
+        content_hash=content_hash,
+        pipeline=pipeline
+    )
+
+    if not success:
+        return {"status": "error", "filename": file.filename, "error": "Falha ao indexar"}
+
+    if progress_callback:
+        await progress_callback({"phase": "saving", "filename": file.filename, "progress": 92})
+
+    # Salvar arquivo localmente
+    file_path = DOCS_DIR / final_filename
+    with open(file_path, 'wb') as f:
+        f.write(file_content)
+
+    if progress_callback:
+        await progress_callback({"phase": "complete", "filename": file.filename, "progress": 100})
+
+    return {
+        "status": "success",
+        "nome": final_filename,
+        "nome_original": file.filename if final_filename != file.filename else None,
+        "tamanho": len(file_content),
+        "tipo": file_type,
+        "reindexado": True,
+        "upload_em": datetime.now().isoformat()
+    }
+
 
 @router.post("/upload-stream")
 async def upload_documents_stream(
@@ -330,8 +354,13 @@ async def upload_documents_stream(
 ):
     """
     Upload de documentos com progresso em tempo real via SSE
+
+    Até KB_ARQUIVOS_SIMULTANEOS arquivos são processados em paralelo,
+    compartilhando os workers de embedding; os eventos de progresso de cada
+    arquivo (identificados por file_index) são enviados assim que ocorrem.
     """
     async def event_generator():
+        tarefas = []
         try:
             total_files = len(files)
 
@@ -339,38 +368,39 @@ async def upload_documents_stream(
             yield f"data: {json.dumps({'type': 'start', 'total': total_files})}\n\n"
             await asyncio.sleep(0)  # Força flush
 
-            uploaded_files = []
-            skipped_files = []
-
-            for index, file in enumerate(files):
-                # Lista para coletar eventos de progresso
-                progress_events = []
-
-                # Callback que coleta eventos ao invés de enviá-los
-                async def collect_progress(data):
-                    progress_events.append({
-                        'type': 'progress',
-                        'file_index': index,
-                        'file_name': file.filename,
-                        **data
-                    })
-
-                # Processar arquivo
-                result = await process_single_file(file, overwrite, collect_progress)
+            eventos = asyncio.Queue()
+            semaforo = asyncio.Semaphore(settings.KB_ARQUIVOS_SIMULTANEOS)
+            resultados = [None] * total_files
+            vector_store = await get_vector_store()
 
-                # Enviar todos os eventos de progresso coletados
-                for event in progress_events:
-                    yield f"data: {json.dumps(event)}\n\n"
+            async with PipelineIndexacao(vector_store) as pipeline:
+
+                async def processar(index: int, file: UploadFile):
+                    async def reportar_progresso(data):
+                        await eventos.put({
+                            'type': 'progress',
+                            'file_index': index,
+                            'file_name': file.filename,
+                            **data
+                        })
+
+                    async with semaforo:
+                        result = await process_single_file(file, overwrite, reportar_progresso, pipeline)
+                    resultados[index] = result
+                    await eventos.put({'type': 'file_complete', 'file_index': index, 'result': result})
+
+                tarefas = [asyncio.create_task(processar(i, f)) for i, f in enumerate(files)]
+
+                pendentes = total_files
+                while pendentes:
+                    evento = await eventos.get()
+                    if evento['type'] == 'file_complete':
+                        pendentes -= 1
+                    yield f"data: {json.dumps(evento)}\n\n"
                     await asyncio.sleep(0)
 
-                if result["status"] == "success":
-                    uploaded_files.append(result)
-                elif result["status"] == "skipped":
-                    skipped_files.append(result["filename"])
-
-                # Enviar resultado do arquivo
-                yield f"data: {json.dumps({'type': 'file_complete', 'file_index': index, 'result': result})}\n\n"
-                await asyncio.sleep(0)
+            uploaded_files = [r for r in resultados if r["status"] == "success"]
+            skipped_files = [r["filename"] for r in resultados if r["status"] == "skipped"]
 
             # Enviar evento de conclusão
             final_result = {
@@ -388,6 +418,10 @@ async def upload_documents_stream(
             traceback.print_exc()
             error_data = {'type': 'error', 'message': str(e)}
             yield f"data: {json.dumps(error_data)}\n\n"
+        finally:
+            # Cliente desconectou ou erro: não deixar arquivos sendo processados
+            for tarefa in tarefas:
+                tarefa.cancel()
 
     return StreamingResponse(
         event_generator(),
@@ -499,7 +533,8 @@ async def upload_documents(
                 success = await store_document_in_vector_db(
                     file_name=final_filename,
                     text_content=text,
-                    file_type=file_type
+                    file_type=file_type,
+                    content_hash=hash_conteudo(file_content)
                 )
 
                 if success:
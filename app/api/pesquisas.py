@@ -6,8 +6,9 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Optional
 import uuid
 
-from app.database import db
+from app.database import db, liberar_entradas_fila
 from app.schemas import PesquisaIniciar, PesquisaCustom, StatusPesquisa, JobResponse
+from app.utils.limitador_taxa import get_stats_limitadores
 
 router = APIRouter(tags=["Pesquisas"])
 
@@ -322,6 +323,39 @@ async def status_pesquisa():
         }
 
 
+@router.get("/pesquisas/pool")
+async def metricas_pool():
+    """
+    Métricas do pool de workers: utilização atual e média, entradas
+    reservadas à espera de um worker e entradas pendentes na fila
+    """
+    from app.main import processador_global
+
+    pendentes = await db.fetch_one(
+        "SELECT COUNT(*) as total FROM fila_pesquisas WHERE status = 'pendente'"
+    )
+    metricas = processador_global.get_metricas_pool() if processador_global else {"em_execucao": False}
+    return {
+        **metricas,
+        "ativo": processador_global.ativo if processador_global else False,
+        "fila_pendente": pendentes["total"] if pendentes else 0
+    }
+
+
+@router.get("/pesquisas/limites")
+async def metricas_limites():
+    """
+    Limitadores por provedor: configuração, chamadas em curso, 429 recebidos,
+    pausa restante e histograma do tempo de espera
+    """
+    from app.main import processador_global
+
+    limitadores = get_stats_limitadores()
+    if processador_global:
+        limitadores["processador"] = processador_global.limitador.get_stats()
+    return limitadores
+
+
 @router.post("/pesquisas/pausar")
 async def pausar_pesquisa():
     """
@@ -333,14 +367,17 @@ async def pausar_pesquisa():
 
         if processador_global:
             processador_global.ativo = False
+            # Devolver para 'pendente' só as entradas reservadas que ainda não
+            # começaram; as em processamento terminam sob o próprio lease (se
+            # fossem liberadas, outro worker poderia processá-las de novo)
+            await processador_global.liberar_fila_local()
+            # Gravar já os resultados que estão no buffer de escrita
+            await processador_global.descarregar_resultados()
             print("[PAUSA] Processador pausado")
         else:
             print("[PAUSA] Aviso: Processador global não inicializado")
-
-        # Atualizar todos os itens 'processando' de volta para 'pendente'
-        await db.execute(
-            "UPDATE fila_pesquisas SET status = 'pendente' WHERE status = 'processando'"
-        )
+            # Entradas sem lease (versões antigas) não têm dono para concluí-las
+            await liberar_entradas_fila(None)
 
         return {
             "status": "sucesso",
@@ -437,21 +474,13 @@ async def repopular_fila_com_ferramenta(ferramenta: str):
         # Obter todas as falhas
         falhas = await db.fetch_all("SELECT * FROM falhas_mercado")
 
-        # Popular fila apenas com a ferramenta específica
-        total = 0
-        for falha in falhas:
-            # Gerar queries para esta falha (converter para dict se necessário)
-            falha_dict = dict(falha) if not isinstance(falha, dict) else falha
-            queries = await agente.gerar_queries(falha_dict)
-
-            # As queries já vêm com idioma e conteúdo traduzido
-            for query_item in queries:
-                # Adicionar entrada para esta ferramenta específica
-                await db.execute("""
-                    INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta, status)
-                    VALUES (?, ?, ?, ?, 'pendente')
-                """, (query_item["falha_id"], query_item["query"], query_item["idioma"], ferramenta))
-                total += 1
+        # Popular fila apenas com a ferramenta específica: queries de todas as
+        # falhas geradas em paralelo e inseridas numa transação (entradas
+        # já existentes para a ferramenta são ignoradas)
+        total = await agente.popular_fila(
+            falhas=[dict(falha) for falha in falhas],
+            ferramentas_filtro=[ferramenta]
+        )
 
         return {
             "status": "sucesso",
@@ -4,188 +4,40 @@ Endpoints para tradução em lote com background processing
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
-from typing import Dict
 import uuid
 from datetime import datetime
 import asyncio
 
+from app.agente import traducao_lote
+from app.agente.traducao_lote import traducao_jobs
 from app.database import db
 from app.integracao.openrouter_api import OpenRouterClient
 from app.utils.logger import logger
 
 router = APIRouter(tags=["Tradução em Lote"])
 
-# Dicionário global para rastrear jobs de tradução em background
-traducao_jobs: Dict[str, dict] = {}
-
 
 class TraduzirLoteRequest(BaseModel):
     """Schema para solicitar tradução em lote"""
     max_concurrent: int = 10  # Máximo de traduções simultâneas
 
 
-async def processar_traducoes_background(job_id: str, max_concurrent: int = 10):
-    """
-    Processa traduções em background com atualização de progresso
-
-    Args:
-        job_id: ID único do job
-        max_concurrent: Número máximo de traduções simultâneas
-    """
-    try:
-        logger.info(f"[JOB {job_id}] Iniciando traduções em background")
-
-        # Buscar resultados sem tradução
-        query = """
-        SELECT id, falha_id, titulo, descricao, idioma
-        FROM resultados_pesquisa
-        WHERE idioma != 'pt'
-        AND (titulo_pt IS NULL OR titulo_pt = '')
-        ORDER BY id
-        """
-
-        resultados = await db.fetch_all(query)
-        total = len(resultados)
-
-        if total == 0:
-            traducao_jobs[job_id].update({
-                "status": "concluido",
-                "progresso": 100,
-                "total_traduzidas": 0,
-                "erros": 0,
-                "mensagem": "Nenhum resultado para traduzir",
-                "concluido_em": datetime.now().isoformat()
-            })
-            return
-
-        # Atualizar status
-        traducao_jobs[job_id].update({
-            "status": "processando",
-            "total": total,
-            "processados": 0,
-            "progresso": 0,
-            "traduzidas": 0,
-            "erros": 0
-        })
-
-        traduzidas = 0
-        erros = 0
-        processados = 0
-
-        # Criar semáforo para controlar concorrência
-        semaphore = asyncio.Semaphore(max_concurrent)
-
-        async def traduzir_um_resultado(resultado):
-            """Traduz um resultado individualmente"""
-            nonlocal traduzidas, erros, processados
-
-            async with semaphore:
-                try:
-                    resultado_dict = dict(resultado)
-                    idioma_origem = resultado_dict.get('idioma', 'en')
-
-                    # Traduzir com OpenRouterClient
-                    async with OpenRouterClient() as client:
-                        titulo_pt = await client.traduzir_texto(
-                            texto=resultado_dict['titulo'],
-                            idioma_alvo="pt",
-                            idioma_origem=idioma_origem
-                        )
-
-                        descricao_pt = await client.traduzir_texto(
-                            texto=resultado_dict['descricao'],
-                            idioma_alvo="pt",
-                            idioma_origem=idioma_origem
-                        )
-
-                    # Atualizar no banco
-                    if titulo_pt and descricao_pt:
-                        await db.execute(
-                            """
-                            UPDATE resultados_pesquisa
-                            SET titulo_pt = ?, descricao_pt = ?, atualizado_em = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                            """,
-                            (titulo_pt.strip(), descricao_pt.strip(), resultado_dict['id'])
-                        )
-                        traduzidas += 1
-                    else:
-                        erros += 1
-
-                except Exception as e:
-                    erros += 1
-                    logger.error(f"[JOB {job_id}] Erro ao traduzir resultado {resultado_dict.get('id')}: {e}")
-
-                finally:
-                    processados += 1
-                    # Atualizar progresso
-                    progresso = int((processados / total) * 100)
-                    traducao_jobs[job_id].update({
-                        "processados": processados,
-                        "progresso": progresso,
-                        "traduzidas": traduzidas,
-                        "erros": erros
-                    })
-
-        # Processar todos os resultados em paralelo (controlado pelo semáforo)
-        await asyncio.gather(*[traduzir_um_resultado(r) for r in resultados])
-
-        # Finalizar job
-        traducao_jobs[job_id].update({
-            "status": "concluido",
-            "progresso": 100,
-            "total_traduzidas": traduzidas,
-            "total_erros": erros,
-            "mensagem": f"Tradução concluída! {traduzidas} resultados traduzidos, {erros} erros.",
-            "concluido_em": datetime.now().isoformat()
-        })
-
-        logger.info(f"[JOB {job_id}] Tradução concluída: {traduzidas}/{total} resultados traduzidos")
-
-    except Exception as e:
-        logger.error(f"[JOB {job_id}] Erro fatal na tradução: {e}")
-        traducao_jobs[job_id].update({
-            "status": "erro",
-            "erro": str(e),
-            "concluido_em": datetime.now().isoformat()
-        })
-
-
 @router.post("/api/traducao/lote/iniciar")
-async def iniciar_traducao_lote(request: TraduzirLoteRequest, background_tasks: BackgroundTasks):
+async def iniciar_traducao_lote(request: TraduzirLoteRequest):
     """
     Inicia tradução em lote de todos os resultados sem tradução
 
+    O job é persistido (tabela traducao_jobs) e retomado do último
+    checkpoint se a aplicação reiniciar.
+
     Args:
         request: Configurações de tradução (max_concurrent)
-        background_tasks: FastAPI background tasks
 
     Returns:
         Job ID para acompanhamento do progresso
     """
     try:
-        # Gerar job ID único
-        job_id = str(uuid.uuid4())
-
-        # Criar registro do job
-        traducao_jobs[job_id] = {
-            "job_id": job_id,
-            "status": "iniciado",
-            "progresso": 0,
-            "total": 0,
-            "processados": 0,
-            "traduzidas": 0,
-            "erros": 0,
-            "max_concurrent": request.max_concurrent,
-            "iniciado_em": datetime.now().isoformat()
-        }
-
-        # Adicionar tarefa em background
-        background_tasks.add_task(
-            processar_traducoes_background,
-            job_id,
-            request.max_concurrent
-        )
+        job_id = await traducao_lote.criar_job("pendentes", request.max_concurrent)
 
         logger.info(f"[JOB {job_id}] Tradução em lote iniciada (max_concurrent={request.max_concurrent})")
 
@@ -211,12 +63,14 @@ async def obter_status_traducao(job_id: str):
         job_id: ID do job de tradução
 
     Returns:
-        Status atual do job
+        Status atual do job (com linhas_por_segundo e eta_segundos
+        enquanto processa)
     """
-    if job_id not in traducao_jobs:
+    status = await traducao_lote.obter_status(job_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Job não encontrado")
 
-    return traducao_jobs[job_id]
+    return status
 
 
 class EstimarTraducaoRequest(BaseModel):
@@ -345,7 +199,7 @@ async def refazer_todas_traducoes(background_tasks: BackgroundTasks):
 
 
 @router.post("/api/traducao/lote/reprocessar")
-async def reprocessar_traducoes(background_tasks: BackgroundTasks):
+async def reprocessar_traducoes():
     """
     Reprocessa todas as traduções existentes que estão em lowercase
     para corrigir problemas de capitalização.
@@ -354,27 +208,8 @@ async def reprocessar_traducoes(background_tasks: BackgroundTasks):
         Job ID para acompanhamento do progresso
     """
     try:
-        # Gerar job ID único
-        job_id = str(uuid.uuid4())
-
-        # Criar registro do job
-        traducao_jobs[job_id] = {
-            "job_id": job_id,
-            "status": "iniciado",
-            "progresso": 0,
-            "total": 0,
-            "processados": 0,
-            "traduzidas": 0,
-            "erros": 0,
-            "max_concurrent": 5,
-            "iniciado_em": datetime.now().isoformat()
-        }
-
-        # Adicionar tarefa em background
-        background_tasks.add_task(
-            reprocessar_traducoes_background,
-            job_id
-        )
+        # Mais conservador para reprocessamento
+        job_id = await traducao_lote.criar_job("reprocessar", max_concurrent=5)
 
         logger.info(f"[JOB {job_id}] Reprocessamento de traduções iniciado")
 
@@ -455,20 +290,19 @@ async def refazer_todas_traducoes_background(job_id: str):
                     idioma_assumido = resultado_dict.get('idioma', 'en')
 
                     # Usar novo método que detecta idioma E traduz
-                    async with OpenRouterClient() as client:
-                        # Traduzir título com detecção
-                        resultado_titulo = await client.traduzir_texto_com_deteccao(
-                            texto=resultado_dict['titulo'],
-                            idioma_alvo="pt",
-                            idioma_origem=idioma_assumido
-                        )
-
-                        # Traduzir descrição com detecção
-                        resultado_descricao = await client.traduzir_texto_com_deteccao(
-                            texto=resultado_dict['descricao'],
-                            idioma_alvo="pt",
-                            idioma_origem=idioma_assumido
-                        )
+                    # Traduzir título com detecção
+                    resultado_titulo = await client.traduzir_texto_com_deteccao(
+                        texto=resultado_dict['titulo'],
+                        idioma_alvo="pt",
+                        idioma_origem=idioma_assumido
+                    )
+
+                    # Traduzir descrição com detecção
+                    resultado_descricao = await client.traduzir_texto_com_deteccao(
+                        texto=resultado_dict['descricao'],
+                        idioma_alvo="pt",
+                        idioma_origem=idioma_assumido
+                    )
 
                     titulo_pt = resultado_titulo.get("traducao")
                     idioma_real_titulo = resultado_titulo.get("idioma_real", idioma_assumido)
@@ -530,8 +364,10 @@ async def refazer_todas_traducoes_background(job_id: str):
                         "erros": erros
                     })
 
-        # Processar todos os resultados em paralelo (controlado pelo semáforo)
-        await asyncio.gather(*[refazer_traducao_resultado(r) for r in resultados])
+        # Processar todos os resultados em paralelo (controlado pelo semáforo),
+        # compartilhando uma única sessão HTTP
+        async with OpenRouterClient() as client:
+            await asyncio.gather(*[refazer_traducao_resultado(r) for r in resultados])
 
         # Finalizar job
         traducao_jobs[job_id].update({
@@ -556,129 +392,3 @@ async def refazer_todas_traducoes_background(job_id: str):
             "erro": str(e),
             "concluido_em": datetime.now().isoformat()
         })
-
-
-async def reprocessar_traducoes_background(job_id: str):
-    """
-    Reprocessa traduções em background para corrigir capitalização
-    """
-    try:
-        logger.info(f"[JOB {job_id}] Iniciando reprocessamento de traduções")
-
-        # Buscar resultados com traduções em lowercase (heurística: sem maiúsculas)
-        query = """
-        SELECT id, falha_id, titulo, descricao, idioma, titulo_pt, descricao_pt
-        FROM resultados_pesquisa
-        WHERE idioma != 'pt'
-        AND titulo_pt IS NOT NULL
-        AND titulo_pt != ''
-        AND titulo_pt = LOWER(titulo_pt)
-        ORDER BY id
-        """
-
-        resultados = await db.fetch_all(query)
-        total = len(resultados)
-
-        if total == 0:
-            traducao_jobs[job_id].update({
-                "status": "concluido",
-                "progresso": 100,
-                "total_traduzidas": 0,
-                "erros": 0,
-                "mensagem": "Nenhuma tradução para reprocessar",
-                "concluido_em": datetime.now().isoformat()
-            })
-            return
-
-        # Atualizar status
-        traducao_jobs[job_id].update({
-            "status": "processando",
-            "total": total,
-            "processados": 0,
-            "progresso": 0,
-            "traduzidas": 0,
-            "erros": 0
-        })
-
-        traduzidas = 0
-        erros = 0
-        processados = 0
-
-        # Criar semáforo para controlar concorrência
-        semaphore = asyncio.Semaphore(5)  # Mais conservador para reprocessamento
-
-        async def retraduzir_um_resultado(resultado):
-            """Retraduz um resultado individualmente"""
-            nonlocal traduzidas, erros, processados
-
-            async with semaphore:
-                try:
-                    resultado_dict = dict(resultado)
-                    idioma_origem = resultado_dict.get('idioma', 'en')
-
-                    # Retraduzir com OpenRouterClient (agora com prompt corrigido)
-                    async with OpenRouterClient() as client:
-                        titulo_pt = await client.traduzir_texto(
-                            texto=resultado_dict['titulo'],
-                            idioma_alvo="pt",
-                            idioma_origem=idioma_origem
-                        )
-
-                        descricao_pt = await client.traduzir_texto(
-                            texto=resultado_dict['descricao'],
-                            idioma_alvo="pt",
-                            idioma_origem=idioma_origem
-                        )
-
-                    # Atualizar no banco
-                    if titulo_pt and descricao_pt:
-                        await db.execute(
-                            """
-                            UPDATE resultados_pesquisa
-                            SET titulo_pt = ?, descricao_pt = ?, atualizado_em = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                            """,
-                            (titulo_pt.strip(), descricao_pt.strip(), resultado_dict['id'])
-                        )
-                        traduzidas += 1
-                        logger.info(f"[JOB {job_id}] Retraduzido resultado {resultado_dict['id']}: '{resultado_dict['titulo_pt'][:50]}' -> '{titulo_pt[:50]}'")
-                    else:
-                        erros += 1
-
-                except Exception as e:
-                    erros += 1
-                    logger.error(f"[JOB {job_id}] Erro ao retraduzir resultado {resultado_dict.get('id')}: {e}")
-
-                finally:
-                    processados += 1
-                    # Atualizar progresso
-                    progresso = int((processados / total) * 100)
-                    traducao_jobs[job_id].update({
-                        "processados": processados,
-                        "progresso": progresso,
-                        "traduzidas": traduzidas,
-                        "erros": erros
-                    })
-
-        # Processar todos os resultados em paralelo (controlado pelo semáforo)
-        await asyncio.gather(*[retraduzir_um_resultado(r) for r in resultados])
-
-        # Finalizar job
-        traducao_jobs[job_id].update({
-            "status": "concluido",
-            "progresso": 100,
-            "total_traduzidas": traduzidas,
-            "total_erros": erros,
-            "mensagem": f"Reprocessamento concluído! {traduzidas} traduções corrigidas, {erros} erros.",
-            "concluido_em": datetime.now().isoformat()
-        })
-
-        logger.info(f"[JOB {job_id}] Reprocessamento concluído: {traduzidas}/{total} traduções corrigidas")
-
-    except Exception as e:
-        logger.error(f"[JOB {job_id}] Erro fatal no reprocessamento: {e}")
-        traducao_jobs[job_id].update({
-            "status": "erro",
-            "erro": str(e),
-            "concluido_em": datetime.now().isoformat()
-        })
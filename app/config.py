@@ -30,6 +30,14 @@ class Settings(BaseSettings):
 
     # Banco de dados
     DATABASE_PATH: str = "falhas_mercado_v1.db"
+    DB_POOL_ENABLED: bool = True  # Conexões de longa duração (False = uma conexão por query)
+    DB_POOL_TAMANHO: int = 4  # Conexões de leitura (a escrita usa uma conexão dedicada)
+    DB_CACHE_SIZE_KB: int = 20000  # PRAGMA cache_size por conexão
+    DB_MMAP_SIZE_MB: int = 256  # PRAGMA mmap_size
+    DB_BUSY_TIMEOUT_MS: int = 5000  # Espera por locks antes de "database is locked"
+    DB_CACHED_STATEMENTS: int = 256  # Statements preparados em cache por conexão
+    RESULTADOS_BUFFER_MAX: int = 50  # Resultados que disparam a gravação em lote
+    RESULTADOS_BUFFER_INTERVALO: float = 1.0  # Espera máxima (s) de um resultado no buffer
 
     # APIs externas
     JINA_API_KEY: str
@@ -58,6 +66,33 @@ class Settings(BaseSettings):
     RATE_LIMIT_DELAY: float = 1.0  # segundos entre requests
     MAX_RETRIES: int = 3
 
+    # Limites por provedor (token bucket + chamadas simultâneas)
+    # requisicoes_por_minuto: taxa sustentada; rajada: chamadas seguidas sem espera
+    LIMITES_PROVEDORES: dict = {
+        "perplexity": {"requisicoes_por_minuto": 50, "rajada": 5, "concorrencia": 3},
+        "jina": {"requisicoes_por_minuto": 100, "rajada": 10, "concorrencia": 5},
+        "tavily": {"requisicoes_por_minuto": 100, "rajada": 10, "concorrencia": 5},
+        "serper": {"requisicoes_por_minuto": 300, "rajada": 20, "concorrencia": 5},
+        "exa": {"requisicoes_por_minuto": 60, "rajada": 5, "concorrencia": 3},
+        "deep_research": {"requisicoes_por_minuto": 10, "rajada": 1, "concorrencia": 1},
+        # openrouter: análises/avaliações por LLM. As traduções (por resultado e o
+        # job em lote, com até 10 simultâneas) ficam num limitador separado para
+        # não serem travadas por ele: cada tentativa de modelo consome um token
+        "openrouter": {"requisicoes_por_minuto": 20, "rajada": 5, "concorrencia": 5},
+        "openrouter_traducao": {"requisicoes_por_minuto": 600, "rajada": 20, "concorrencia": 10},
+        "embeddings": {"requisicoes_por_minuto": 500, "rajada": 20, "concorrencia": 8},
+    }
+    LIMITE_PROVEDOR_PADRAO: dict = {"requisicoes_por_minuto": 60, "rajada": 5, "concorrencia": 3}
+    LIMITE_RETRY_AFTER_PADRAO: float = 30.0  # Pausa (s) após 429 sem Retry-After
+    LIMITE_RETRY_AFTER_MAX: float = 300.0  # Teto da pausa pedida por Retry-After
+
+    # Clientes HTTP compartilhados (app/integracao/clientes_http.py)
+    HTTP_CONEXOES_POR_HOST: int = 20  # Conexões simultâneas por serviço/host
+    HTTP_CONEXOES_KEEPALIVE: int = 10  # Conexões ociosas mantidas abertas por host
+    HTTP_KEEPALIVE_SEGUNDOS: float = 30.0  # Tempo que uma conexão ociosa fica aberta
+    HTTP_DNS_CACHE_SEGUNDOS: int = 300  # Cache de DNS das sessões aiohttp
+    HTTP_HTTP2: bool = True  # HTTP/2 nos clientes httpx (se o pacote h2 estiver instalado)
+
     # Pesquisa
     MIN_CONFIDENCE_THRESHOLD: float = 0.3
     QUERIES_PER_FALHA: int = 5
@@ -71,6 +106,8 @@ class Settings(BaseSettings):
     MAX_BUSCAS_POR_FALHA: int = 8  # Máximo permitido
     QUALIDADE_MINIMA_PARA_PARAR: float = 0.75  # Score mínimo para parar (0-1)
     USAR_BUSCA_ADAPTATIVA: bool = False  # Ativar/desativar busca inteligente [DESATIVADO para acelerar]
+    BUSCA_ESPECULATIVA: bool = True  # Canais da busca adaptativa em paralelo, cancelando os pendentes ao parar
+    BUSCA_ESPECULATIVA_CANAIS: int = 3  # Canais simultâneos na busca especulativa
 
     # Idiomas suportados
     IDIOMAS: list[str] = [
@@ -85,8 +122,59 @@ class Settings(BaseSettings):
     CHROMA_PERSIST_PATH: str = "chroma_db"  # Diretório para salvar dados
     EMBEDDING_MODEL: str = "text-embedding-3-small"  # Modelo OpenAI
     EMBEDDING_DIMENSION: int = 1536  # Dimensão dos embeddings
+    EMBEDDING_CACHE_PATH: str = "embedding_cache.db"  # Cache persistente de embeddings (SQLite)
+    EMBEDDING_CACHE_MAX_MB: int = 512  # Orçamento do cache em disco (LRU)
+    EMBEDDING_CACHE_MEMORIA_MB: int = 64  # Orçamento do nível em memória (LRU)
     USAR_VECTOR_DB: bool = True  # Ativar/desativar banco vetorial
 
+    # Índice aproximado (IVF) para a coleção de documentos da KB
+    VECTOR_ANN_ENABLED: bool = False  # Desativado = busca exata sempre
+    VECTOR_ANN_NPROBE: int = 8  # Células visitadas por busca (maior = mais recall, mais lento)
+    VECTOR_ANN_MIN_DOCS: int = 5000  # Abaixo disso usa busca exata
+
+    # Pipeline de indexação da base de conhecimento (upload de documentos)
+    KB_EXTRACAO_PROCESSOS: int = 2  # Processos para extrair PDF/DOCX
+    KB_EMBEDDING_WORKERS: int = 4  # Lotes de chunks embedados simultaneamente
+    KB_CHUNKS_POR_LOTE: int = 64  # Chunks por chamada de embeddings
+    KB_LOTES_PENDENTES: int = 8  # Capacidade da fila de lotes (backpressure)
+    KB_ARQUIVOS_SIMULTANEOS: int = 3  # Arquivos processados em paralelo no upload
+
+    # Reanálise (re-scoring) de resultados
+    REANALISE_PAGINA: int = 500  # Linhas lidas, pontuadas e gravadas por vez (checkpoint)
+    REANALISE_PROCESSOS: int = 2  # Processos para a avaliação heurística
+    REANALISE_CONCORRENCIA_LLM: int = 4  # Avaliações profundas simultâneas
+
+    # Fila de pesquisas (reserva com lease)
+    FILA_LEASE_SEGUNDOS: int = 600  # Entrada reservada volta à fila se o worker não concluir/renovar
+    PROCESSADOR_PREFETCH: int = 0  # Entradas reservadas à espera de um worker (0 = max_workers)
+    PROCESSADOR_INTERVALO_FILA_VAZIA: float = 5.0  # Espera (s) entre consultas com a fila vazia
+    FILA_TRADUCOES_SIMULTANEAS: int = 8  # Traduções de queries em paralelo ao popular a fila
+
+    # Tradução em lote de resultados
+    TRADUCAO_LOTE_PAGINA: int = 100  # Linhas lidas, traduzidas e gravadas por vez (checkpoint)
+    TRADUCAO_LOTE_MEMO: int = 5000  # Traduções (título + descrição) reaproveitadas dentro do job
+
+    # Busca do conteúdo completo das fontes (Jina Reader) e cache em url_content_cache
+    CONTEUDO_BUSCAS_SIMULTANEAS: int = 16  # URLs buscadas ao mesmo tempo (total)
+    CONTEUDO_BUSCAS_POR_DOMINIO: int = 2  # URLs do mesmo domínio ao mesmo tempo
+    CONTEUDO_TIMEOUT: float = 30.0  # Timeout (s) de cada busca
+    CONTEUDO_CACHE_TTL_DIAS: int = 30  # Validade do conteúdo em cache (depois é buscado de novo)
+    CONTEUDO_CACHE_RETENCAO_DIAS: int = 90  # Conteúdo vencido há mais tempo que isso é apagado
+    CONTEUDO_ERRO_BACKOFF_MIN: float = 15.0  # Espera (min) antes de repetir uma URL que falhou (dobra a cada falha)
+    CONTEUDO_ERRO_BACKOFF_MAX_HORAS: float = 168.0  # Teto da espera entre tentativas
+
+    # Compressão de colunas de texto grande (app/utils/compressao.py)
+    COMPRESSAO_NIVEL: int = 6  # Nível zlib dos textos grandes gravados no banco
+    COMPRESSAO_MIN_BYTES: int = 128  # Textos menores ficam como TEXT
+
+    # Fase II em lote (boas práticas das falhas priorizadas)
+    FASE2_FALHAS_SIMULTANEAS: int = 3  # Falhas analisadas em paralelo pelo job
+    FASE2_SSE_KEEPALIVE: float = 15.0  # Intervalo (s) do comentário keep-alive do stream de eventos
+
+    # Memória de traduções (SQLite com LRU em processo)
+    TRADUCAO_MEMORIA_ATIVA: bool = True  # Consultar/gravar a memória antes de chamar o LLM
+    TRADUCAO_MEMORIA_LRU: int = 20000  # Traduções mantidas em memória no processo
+
     # RAG - Configurações de busca semântica
     RAG_ENABLED: bool = True  # Ativar/desativar RAG
     RAG_SIMILARITY_THRESHOLD: float = 0.7  # Threshold para resultados similares
@@ -223,6 +311,12 @@ def get_chroma_path() -> Path:
     return base_dir / settings.CHROMA_PERSIST_PATH
 
 
+def get_embedding_cache_path() -> Path:
+    """Retorna o caminho absoluto do cache persistente de embeddings"""
+    base_dir = Path(__file__).parent.parent
+    return base_dir / settings.EMBEDDING_CACHE_PATH
+
+
 def get_ferramentas_ativas() -> list[str]:
     """
     Retorna lista de ferramentas que estão habilitadas em SEARCH_CHANNELS_ENABLED
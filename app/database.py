@@ -2,24 +2,217 @@
 """
 Gerenciador de conexao e operacoes com banco de dados SQLite
 """
+import asyncio
 import sqlite3
+import time
 import aiosqlite
+from collections import deque
 from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 from app.config import get_database_path, settings
+from app.utils import metricas
+from app.utils.compressao import comprimir_texto, descomprimir_texto
+
+
+# Comandos que só leem: vão para o pool de leitura; o resto usa o escritor
+_PREFIXOS_LEITURA = ("SELECT", "WITH", "PRAGMA", "EXPLAIN")
+
+# Memória de traduções (também criada pelos scripts, fora do app)
+SQL_TABELA_MEMORIA_TRADUCAO = """
+CREATE TABLE IF NOT EXISTS memoria_traducao (
+    idioma_origem TEXT NOT NULL,
+    idioma_alvo TEXT NOT NULL,
+    hash_texto TEXT NOT NULL,
+    texto_origem TEXT NOT NULL,
+    traducao TEXT NOT NULL,
+    criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (idioma_origem, idioma_alvo, hash_texto)
+) WITHOUT ROWID;
+"""
+
+
+def _eh_leitura(query: str) -> bool:
+    """Se a query é somente leitura (pelo primeiro comando)"""
+    return query.lstrip().lstrip("(").upper().startswith(_PREFIXOS_LEITURA)
+
+
+# Histogramas globais (GET /api/metrics); valem também para o modo sem pool
+_HIST_CONSULTA = metricas.histograma(
+    "sebrae_db_consulta_segundos", "Duração das queries no SQLite (conexão em mãos)", ("tipo",)
+)
+_HIST_ESPERA = metricas.histograma(
+    "sebrae_db_espera_conexao_segundos", "Espera por conexão do pool do SQLite", ("tipo",)
+)
+_CONSULTA_LEITURA = _HIST_CONSULTA.rotulada("leitura")
+_CONSULTA_ESCRITA = _HIST_CONSULTA.rotulada("escrita")
+_ESPERA_LEITURA = _HIST_ESPERA.rotulada("leitura")
+_ESPERA_ESCRITA = _HIST_ESPERA.rotulada("escrita")
+
+
+class MetricaTempo:
+    """Contagem, soma, máximo e histograma (ms) de uma medida de tempo"""
+
+    LIMITES_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    def __init__(self):
+        self.contagem = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.buckets = [0] * (len(self.LIMITES_MS) + 1)
+
+    def registrar(self, segundos: float):
+        ms = segundos * 1000
+        self.contagem += 1
+        self.total += ms
+        if ms > self.maximo:
+            self.maximo = ms
+        for i, limite in enumerate(self.LIMITES_MS):
+            if ms <= limite:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def resumo(self) -> Dict[str, Any]:
+        rotulos = [f"<={limite}ms" for limite in self.LIMITES_MS] + [f">{self.LIMITES_MS[-1]}ms"]
+        return {
+            "contagem": self.contagem,
+            "media_ms": round(self.total / self.contagem, 3) if self.contagem else 0.0,
+            "max_ms": round(self.maximo, 3),
+            "histograma": dict(zip(rotulos, self.buckets))
+        }
+
+
+class PoolConexoes:
+    """
+    Conexões aiosqlite de longa duração
+
+    - N conexões de leitura, emprestadas sob demanda (criadas até o limite)
+    - 1 conexão de escrita exclusiva, serializada por um lock: com WAL os
+      leitores não bloqueiam o escritor, e um único escritor evita
+      "database is locked" entre escritas concorrentes
+
+    Conexões longas também reaproveitam os statements preparados (cache de
+    statements do sqlite3 por conexão). As primitivas asyncio são recriadas
+    se o event loop mudar (ex.: scripts com vários asyncio.run, testes).
+    """
+
+    def __init__(self, db_path: Path, tamanho_leitura: int):
+        self.db_path = db_path
+        self.tamanho_leitura = tamanho_leitura
+        self._livres: deque = deque()
+        self._todas: List[aiosqlite.Connection] = []
+        self._escritor: Optional[aiosqlite.Connection] = None
+        self._loop = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._lock_escrita: Optional[asyncio.Lock] = None
+        self._lock_abertura: Optional[asyncio.Lock] = None
+        self.metricas = {
+            "espera_leitura": MetricaTempo(),
+            "espera_escrita": MetricaTempo(),
+            "consulta_leitura": MetricaTempo(),
+            "consulta_escrita": MetricaTempo()
+        }
+
+    def _garantir_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaforo = asyncio.Semaphore(self.tamanho_leitura)
+            self._lock_escrita = asyncio.Lock()
+            self._lock_abertura = asyncio.Lock()
+
+    async def _abrir(self) -> aiosqlite.Connection:
+        """Abre uma conexão com os PRAGMAs de desempenho"""
+        conn = aiosqlite.connect(self.db_path, cached_statements=settings.DB_CACHED_STATEMENTS)
+        conn.daemon = True  # Não impedir o encerramento do processo
+        await conn
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA busy_timeout={settings.DB_BUSY_TIMEOUT_MS}")
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute(f"PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB}")
+        await conn.execute(f"PRAGMA mmap_size={settings.DB_MMAP_SIZE_MB * 1024 * 1024}")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        self._todas.append(conn)
+        return conn
+
+    @asynccontextmanager
+    async def leitura(self):
+        """Empresta uma conexão de leitura"""
+        self._garantir_loop()
+        inicio = time.perf_counter()
+        async with self._semaforo:
+            espera = time.perf_counter() - inicio
+            self.metricas["espera_leitura"].registrar(espera)
+            _ESPERA_LEITURA.registrar(espera)
+            conn = self._livres.pop() if self._livres else await self._abrir()
+            try:
+                yield conn
+            finally:
+                self._livres.append(conn)
+
+    @asynccontextmanager
+    async def escrita(self):
+        """Acesso exclusivo à conexão de escrita"""
+        self._garantir_loop()
+        inicio = time.perf_counter()
+        async with self._lock_escrita:
+            espera = time.perf_counter() - inicio
+            self.metricas["espera_escrita"].registrar(espera)
+            _ESPERA_ESCRITA.registrar(espera)
+            if self._escritor is None:
+                self._escritor = await self._abrir()
+            try:
+                yield self._escritor
+            except (Exception, asyncio.CancelledError):
+                # Não deixar transação pela metade na conexão compartilhada
+                if self._escritor.in_transaction:
+                    await self._escritor.rollback()
+                raise
+
+    async def fechar(self):
+        """Fecha todas as conexões"""
+        conexoes, self._todas = self._todas, []
+        self._livres.clear()
+        self._escritor = None
+        for conn in conexoes:
+            try:
+                await conn.close()
+            except Exception as e:
+                print(f"[DB] Erro ao fechar conexão: {e}")
+
+    def get_metricas(self) -> Dict[str, Any]:
+        return {
+            "conexoes_leitura_abertas": len(self._todas) - (1 if self._escritor is not None else 0),
+            "conexoes_leitura_livres": len(self._livres),
+            "tamanho_pool_leitura": self.tamanho_leitura,
+            **{nome: metrica.resumo() for nome, metrica in self.metricas.items()}
+        }
 
 
 class Database:
     """Classe para gerenciar conexoes e operacoes no SQLite"""
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, usar_pool: Optional[bool] = None):
         self.db_path = db_path or get_database_path()
+        self.usar_pool = settings.DB_POOL_ENABLED if usar_pool is None else usar_pool
+        self.pool = PoolConexoes(self.db_path, settings.DB_POOL_TAMANHO) if self.usar_pool else None
 
     @asynccontextmanager
     async def get_connection(self):
-        """Context manager para conexoes assincronas"""
+        """
+        Context manager para conexoes assincronas
+
+        No modo pool, entrega a conexão de escrita (exclusiva até o fim do
+        bloco), já que quem usa este método costuma gravar e dar commit.
+        """
+        if self.pool is not None:
+            async with self.pool.escrita() as conn:
+                yield conn
+            return
+
         conn = await aiosqlite.connect(self.db_path)
         conn.row_factory = aiosqlite.Row  # Retornar dicts ao inves de tuplas
         try:
@@ -27,31 +220,115 @@ class Database:
         finally:
             await conn.close()
 
+    @asynccontextmanager
+    async def _conexao_para(self, query: str):
+        """Conexão adequada à query: leitura do pool, escritor ou avulsa"""
+        leitura = _eh_leitura(query)
+        if self.pool is None:
+            async with self.get_connection() as conn:
+                with (_CONSULTA_LEITURA if leitura else _CONSULTA_ESCRITA).medir():
+                    yield conn
+            return
+
+        contexto = self.pool.leitura() if leitura else self.pool.escrita()
+        async with contexto as conn:
+            inicio = time.perf_counter()
+            try:
+                yield conn
+            finally:
+                duracao = time.perf_counter() - inicio
+                if leitura:
+                    self.pool.metricas["consulta_leitura"].registrar(duracao)
+                    _CONSULTA_LEITURA.registrar(duracao)
+                else:
+                    self.pool.metricas["consulta_escrita"].registrar(duracao)
+                    _CONSULTA_ESCRITA.registrar(duracao)
+
     async def execute(self, query: str, params: tuple = ()) -> None:
         """Executa uma query (INSERT, UPDATE, DELETE)"""
-        async with self.get_connection() as conn:
+        async with self._conexao_para(query) as conn:
             await conn.execute(query, params)
             await conn.commit()
 
     async def execute_many(self, query: str, params_list: List[tuple]) -> None:
         """Executa multiplas queries (batch insert)"""
-        async with self.get_connection() as conn:
+        async with self._conexao_para(query) as conn:
             await conn.executemany(query, params_list)
             await conn.commit()
 
     async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
         """Retorna um unico registro"""
-        async with self.get_connection() as conn:
+        async with self._conexao_para(query) as conn:
             async with conn.execute(query, params) as cursor:
                 row = await cursor.fetchone()
-                return dict(row) if row else None
+            if conn.in_transaction:
+                await conn.commit()  # Ex.: UPDATE/INSERT ... RETURNING
+            return dict(row) if row else None
 
     async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """Retorna todos os registros"""
-        async with self.get_connection() as conn:
+        async with self._conexao_para(query) as conn:
             async with conn.execute(query, params) as cursor:
                 rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+            if conn.in_transaction:
+                await conn.commit()  # Ex.: UPDATE/INSERT ... RETURNING
+            return [dict(row) for row in rows]
+
+    async def fechar(self):
+        """Fecha as conexões do pool (shutdown da aplicação)"""
+        if self.pool is not None:
+            await self.pool.fechar()
+
+    def get_metricas(self) -> Dict[str, Any]:
+        """Métricas do pool: espera por conexão e latência das queries"""
+        if self.pool is None:
+            return {"pool": False}
+        return {"pool": True, **self.pool.get_metricas()}
+
+    # Colunas novas em tabelas já existentes (CREATE TABLE IF NOT EXISTS não as cria)
+    _COLUNAS_ADICIONADAS = {
+        "fila_pesquisas": (
+            ("worker_id", "TEXT"),
+            ("lease_expira_em", "DATETIME"),
+        ),
+        "boas_praticas": (
+            ("confidence_score", "REAL DEFAULT 0"),
+        ),
+        "url_content_cache": (
+            ("tentativas_erro", "INTEGER DEFAULT 0"),
+        ),
+    }
+
+    async def _adicionar_colunas(self, conn):
+        """Adiciona as colunas de _COLUNAS_ADICIONADAS que faltam em bancos antigos"""
+        for tabela, colunas in self._COLUNAS_ADICIONADAS.items():
+            async with conn.execute(f"PRAGMA table_info({tabela})") as cursor:
+                existentes = {linha[1] for linha in await cursor.fetchall()}
+            if not existentes:
+                continue  # Tabela ainda não existe: será criada completa
+            for nome, tipo in colunas:
+                if nome not in existentes:
+                    await conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {nome} {tipo}")
+
+    async def _deduplicar_fila(self, conn):
+        """
+        Remove entradas repetidas (falha_id, query, ferramenta) da fila
+        antes de criar idx_fila_unica num banco antigo (mantém a mais antiga)
+        """
+        async with conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fila_pesquisas'"
+        ) as cursor:
+            tabela = await cursor.fetchone()
+        async with conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_fila_unica'"
+        ) as cursor:
+            indice = await cursor.fetchone()
+        if tabela and not indice:
+            await conn.execute("""
+                DELETE FROM fila_pesquisas WHERE id NOT IN (
+                    SELECT MIN(id) FROM fila_pesquisas GROUP BY falha_id, query, ferramenta
+                )
+            """)
 
     async def init_tables(self):
         """Cria as novas tabelas necessarias para o sistema"""
@@ -104,6 +381,8 @@ class Database:
             tentativas INTEGER DEFAULT 0,
             max_tentativas INTEGER DEFAULT 3,
             status TEXT DEFAULT 'pendente',
+            worker_id TEXT,  -- Processo que reservou a entrada (lease)
+            lease_expira_em DATETIME,  -- Após expirar, a entrada volta para 'pendente'
             criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (falha_id) REFERENCES falhas_mercado(id)
         );
@@ -144,6 +423,7 @@ class Database:
             content TEXT,
             title TEXT,
             error TEXT,
+            tentativas_erro INTEGER DEFAULT 0,  -- Falhas seguidas (backoff do cache negativo)
             cached_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             expires_at DATETIME DEFAULT (datetime('now', '+30 days'))
         );
@@ -181,11 +461,89 @@ class Database:
             is_sebrae BOOLEAN DEFAULT 0,
             fonte_referencia TEXT,
             fase TEXT DEFAULT 'fase_1',
+            confidence_score REAL DEFAULT 0,
             criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
             atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (falha_id) REFERENCES falhas_mercado(id)
         );
 
+        -- Jobs de reanálise (checkpoint para retomar após reinício)
+        CREATE TABLE IF NOT EXISTS reanalise_jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'iniciado',
+            modo_avaliacao TEXT NOT NULL,
+            avaliar_profundamente BOOLEAN DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            processados INTEGER DEFAULT 0,
+            scores_atualizados INTEGER DEFAULT 0,
+            erros INTEGER DEFAULT 0,
+            ultimo_id INTEGER DEFAULT 0,
+            mensagem TEXT,
+            erro TEXT,
+            iniciado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            concluido_em DATETIME
+        );
+
+        -- Jobs de tradução em lote (checkpoint para retomar após reinício)
+        CREATE TABLE IF NOT EXISTS traducao_jobs (
+            job_id TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL DEFAULT 'pendentes',
+            status TEXT NOT NULL DEFAULT 'iniciado',
+            max_concurrent INTEGER DEFAULT 10,
+            total INTEGER DEFAULT 0,
+            processados INTEGER DEFAULT 0,
+            traduzidas INTEGER DEFAULT 0,
+            erros INTEGER DEFAULT 0,
+            ultimo_id INTEGER DEFAULT 0,
+            mensagem TEXT,
+            erro TEXT,
+            iniciado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            concluido_em DATETIME
+        );
+
+        -- Jobs da Fase II em lote (checkpoint por falha para retomar após reinício)
+        CREATE TABLE IF NOT EXISTS fase2_jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'iniciado',
+            modelo TEXT,
+            reprocessar BOOLEAN DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            processadas INTEGER DEFAULT 0,
+            reaproveitadas INTEGER DEFAULT 0,
+            com_erro INTEGER DEFAULT 0,
+            mensagem TEXT,
+            erro TEXT,
+            iniciado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            concluido_em DATETIME
+        );
+
+        CREATE TABLE IF NOT EXISTS fase2_jobs_falhas (
+            job_id TEXT NOT NULL,
+            falha_id INTEGER NOT NULL,
+            titulo TEXT,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            total_praticas INTEGER DEFAULT 0,
+            erro TEXT,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, falha_id)
+        );
+
+        -- Última análise da Fase II por falha (fingerprint dos hashes das fontes)
+        CREATE TABLE IF NOT EXISTS fase2_analises (
+            falha_id INTEGER PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            modelo TEXT,
+            num_fontes INTEGER DEFAULT 0,
+            total_praticas INTEGER DEFAULT 0,
+            analisado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Memória de traduções (chave: idiomas + hash do texto normalizado)
+        """ + SQL_TABELA_MEMORIA_TRADUCAO + """
+
         -- Indices para performance
         CREATE INDEX IF NOT EXISTS idx_resultados_falha
             ON resultados_pesquisa(falha_id);
@@ -193,11 +551,22 @@ class Database:
         CREATE INDEX IF NOT EXISTS idx_resultados_score
             ON resultados_pesquisa(confidence_score DESC);
 
+        CREATE INDEX IF NOT EXISTS idx_resultados_falha_score
+            ON resultados_pesquisa(falha_id, confidence_score);
+
         CREATE INDEX IF NOT EXISTS idx_historico_falha
             ON historico_pesquisas(falha_id);
 
-        CREATE INDEX IF NOT EXISTS idx_fila_status
-            ON fila_pesquisas(status, prioridade DESC);
+        -- Reserva de entradas (status, prioridade, id) e expiração de leases
+        DROP INDEX IF EXISTS idx_fila_status;
+        CREATE INDEX IF NOT EXISTS idx_fila_reserva
+            ON fila_pesquisas(status, prioridade DESC, id);
+
+        CREATE INDEX IF NOT EXISTS idx_fila_falha_status
+            ON fila_pesquisas(falha_id, status);
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_fila_unica
+            ON fila_pesquisas(falha_id, query, ferramenta);
 
         CREATE INDEX IF NOT EXISTS idx_priorizacoes_impacto
             ON priorizacoes_falhas(impacto DESC);
@@ -225,6 +594,8 @@ class Database:
         """
 
         async with self.get_connection() as conn:
+            await self._adicionar_colunas(conn)
+            await self._deduplicar_fila(conn)
             await conn.executescript(create_tables_sql)
             await conn.commit()
 
@@ -234,6 +605,22 @@ class Database:
 # Instancia global do banco de dados
 db = Database()
 
+_CONEXOES = metricas.medidor(
+    "sebrae_db_conexoes_leitura", "Conexões de leitura do pool (abertas/livres)", ("estado",)
+)
+
+
+def _coletar_metricas_banco():
+    """Conexões do pool do banco global no /api/metrics"""
+    if db.pool is None:
+        return
+    pool = db.pool
+    _CONEXOES.rotulada("abertas").definir(len(pool._todas) - (1 if pool._escritor is not None else 0))
+    _CONEXOES.rotulada("livres").definir(len(pool._livres))
+
+
+metricas.registrar_coletor(_coletar_metricas_banco)
+
 
 # Funcoes auxiliares para operacoes comuns
 
@@ -262,39 +649,102 @@ async def get_resultados_by_falha(falha_id: int) -> List[Dict[str, Any]]:
     )
 
 
-async def insert_resultado(resultado: Dict[str, Any]) -> int:
-    """Insere um novo resultado de pesquisa com suporte a traduções multilíngues"""
-    query = """
+_SQL_INSERIR_RESULTADO = """
     INSERT INTO resultados_pesquisa (
         falha_id, titulo, descricao, fonte_url, fonte_tipo,
         pais_origem, idioma, query, confidence_score, ferramenta_origem,
         hash_conteudo, url_valida, titulo_pt, descricao_pt, titulo_en, descricao_en
     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
+"""
+
+
+def _valores_resultado(resultado: Dict[str, Any]) -> tuple:
+    """Parâmetros de _SQL_INSERIR_RESULTADO para um resultado"""
+    return (
+        resultado['falha_id'],
+        resultado['titulo'],
+        resultado.get('descricao'),
+        resultado['fonte_url'],
+        resultado.get('fonte_tipo'),
+        resultado.get('pais_origem'),
+        resultado['idioma'],
+        resultado.get('query'),
+        resultado['confidence_score'],
+        resultado['ferramenta_origem'],
+        resultado['hash_conteudo'],
+        resultado.get('url_valida', True),
+        resultado.get('titulo_pt'),
+        resultado.get('descricao_pt'),
+        resultado.get('titulo_en'),
+        resultado.get('descricao_en')
+    )
 
+
+async def insert_resultado(resultado: Dict[str, Any]) -> int:
+    """Insere um novo resultado de pesquisa com suporte a traduções multilíngues"""
     async with db.get_connection() as conn:
-        cursor = await conn.execute(query, (
-            resultado['falha_id'],
-            resultado['titulo'],
-            resultado.get('descricao'),
-            resultado['fonte_url'],
-            resultado.get('fonte_tipo'),
-            resultado.get('pais_origem'),
-            resultado['idioma'],
-            resultado.get('query'),
-            resultado['confidence_score'],
-            resultado['ferramenta_origem'],
-            resultado['hash_conteudo'],
-            resultado.get('url_valida', True),
-            resultado.get('titulo_pt'),
-            resultado.get('descricao_pt'),
-            resultado.get('titulo_en'),
-            resultado.get('descricao_en')
-        ))
+        cursor = await conn.execute(_SQL_INSERIR_RESULTADO, _valores_resultado(resultado))
         await conn.commit()
         return cursor.lastrowid
 
 
+async def inserir_resultados_lote(resultados: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Insere vários resultados numa única transação (executemany)
+
+    Mantém a semântica de insert_resultado: hash_conteudo é único e o
+    primeiro registro vence; duplicados (no banco ou no próprio lote) e
+    linhas inválidas são ignorados sem afetar as demais.
+
+    Returns:
+        Para cada resultado, True se foi inserido
+    """
+    if not resultados:
+        return []
+
+    inseridos = [False] * len(resultados)
+    async with db.get_connection() as conn:
+        # Hashes já existentes no banco
+        hashes = list({r['hash_conteudo'] for r in resultados})
+        existentes = set()
+        for inicio in range(0, len(hashes), 500):
+            parte = hashes[inicio:inicio + 500]
+            placeholders = ",".join("?" for _ in parte)
+            async with conn.execute(
+                f"SELECT hash_conteudo FROM resultados_pesquisa WHERE hash_conteudo IN ({placeholders})",
+                parte
+            ) as cursor:
+                existentes.update(row[0] for row in await cursor.fetchall())
+
+        novos = []
+        for i, resultado in enumerate(resultados):
+            if resultado['hash_conteudo'] not in existentes:
+                existentes.add(resultado['hash_conteudo'])
+                novos.append(i)
+
+        try:
+            await conn.executemany(
+                _SQL_INSERIR_RESULTADO,
+                [_valores_resultado(resultados[i]) for i in novos]
+            )
+            await conn.commit()
+            for i in novos:
+                inseridos[i] = True
+        except (sqlite3.Error, KeyError) as e:
+            # Alguma linha inválida: refazer uma a uma para não perder o lote
+            await conn.rollback()
+            print(f"[DB] Lote de resultados falhou ({e}), inserindo individualmente")
+            for i in novos:
+                try:
+                    await conn.execute(_SQL_INSERIR_RESULTADO, _valores_resultado(resultados[i]))
+                    inseridos[i] = True
+                except (sqlite3.Error, KeyError) as erro_linha:
+                    print(f"Erro salvando resultado: {erro_linha}")
+            await conn.commit()
+
+    return inseridos
+
+
 async def update_resultado_score(resultado_id: int, novo_score: float) -> None:
     """Atualiza o confidence score de um resultado"""
     await db.execute(
@@ -440,14 +890,122 @@ async def get_estatisticas_falha(falha_id: int) -> Dict[str, Any]:
     return stats
 
 
-async def inserir_fila_pesquisa(entrada: Dict[str, Any]) -> int:
-    """Insere uma entrada na fila de pesquisas"""
-    query = """
-    INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta, status, criado_em)
-    VALUES (?, ?, ?, ?, ?, ?)
+_SQL_RESUMO_FALHAS = """
+WITH pagina AS (
+    SELECT id, titulo, pilar, descricao, dica_busca
+    FROM falhas_mercado
+    {filtro}
+    ORDER BY id
+    LIMIT ? OFFSET ?
+),
+res AS (
+    SELECT
+        falha_id,
+        COUNT(*) AS total_resultados,
+        COUNT(DISTINCT idioma) AS num_idiomas
+    FROM resultados_pesquisa
+    WHERE falha_id IN (SELECT id FROM pagina)
+    GROUP BY falha_id
+),
+scores AS (
+    SELECT
+        falha_id,
+        confidence_score,
+        ROW_NUMBER() OVER (PARTITION BY falha_id ORDER BY confidence_score) AS posicao,
+        COUNT(*) OVER (PARTITION BY falha_id) AS n
+    FROM resultados_pesquisa
+    WHERE falha_id IN (SELECT id FROM pagina) AND confidence_score IS NOT NULL
+),
+mediana AS (
+    -- Elemento central (n impar) ou media dos dois centrais (n par)
+    SELECT falha_id, AVG(confidence_score) AS mediana
+    FROM scores
+    WHERE posicao IN ((n + 1) / 2, (n + 2) / 2)
+    GROUP BY falha_id
+),
+fila AS (
+    SELECT
+        falha_id,
+        SUM(CASE WHEN status IN ('completa', 'erro') THEN 1 ELSE 0 END) AS searches_completed,
+        SUM(CASE WHEN status = 'processando' THEN 1 ELSE 0 END) AS searches_in_progress,
+        SUM(CASE WHEN status = 'pendente' THEN 1 ELSE 0 END) AS searches_pending,
+        SUM(CASE WHEN status IN ('completa', 'erro', 'processando', 'pendente') THEN 1 ELSE 0 END) AS total_buscas_enfileiradas,
+        COUNT(DISTINCT CASE WHEN status IN ('completa', 'erro', 'processando', 'pendente') THEN query END) AS num_queries_processadas
+    FROM fila_pesquisas
+    WHERE falha_id IN (SELECT id FROM pagina)
+    GROUP BY falha_id
+),
+ferramentas AS (
+    SELECT falha_id, COUNT(*) AS num_ferramentas
+    FROM (
+        SELECT falha_id, ferramenta_origem AS ferramenta FROM resultados_pesquisa
+        WHERE falha_id IN (SELECT id FROM pagina)
+        UNION
+        SELECT falha_id, ferramenta FROM fila_pesquisas
+        WHERE falha_id IN (SELECT id FROM pagina)
+    )
+    GROUP BY falha_id
+)
+SELECT
+    p.id,
+    p.titulo,
+    p.pilar,
+    p.descricao,
+    p.dica_busca,
+    COALESCE(res.total_resultados, 0) AS total_resultados,
+    mediana.mediana AS mediana_confidence,
+    COALESCE(fila.searches_completed, 0) AS searches_completed,
+    COALESCE(fila.searches_in_progress, 0) AS searches_in_progress,
+    COALESCE(fila.searches_pending, 0) AS searches_pending,
+    COALESCE(fila.total_buscas_enfileiradas, 0) AS total_buscas_enfileiradas,
+    COALESCE(ferramentas.num_ferramentas, 0) AS num_ferramentas,
+    COALESCE(res.num_idiomas, 0) AS num_idiomas,
+    COALESCE(fila.num_queries_processadas, 0) AS num_queries_processadas
+FROM pagina p
+LEFT JOIN res ON res.falha_id = p.id
+LEFT JOIN mediana ON mediana.falha_id = p.id
+LEFT JOIN fila ON fila.falha_id = p.id
+LEFT JOIN ferramentas ON ferramentas.falha_id = p.id
+ORDER BY p.id
+"""
+
+
+async def listar_falhas_resumo(skip: int = 0, limit: int = 50, pilar: Optional[str] = None) -> List[Dict[str, Any]]:
     """
+    Retorna uma pagina de falhas com os agregados de resultados e da fila
+    numa unica consulta
+
+    Cada tabela e agregada separadamente (so para as falhas da pagina, via
+    indices por falha_id), sem o produto resultados x fila de um JOIN
+    direto. A mediana de confidence_score vem de funcoes de janela.
+    """
+    params: List[Any] = []
+    filtro = ""
+    if pilar:
+        filtro = "WHERE pilar LIKE ?"
+        params.append(f"%{pilar}%")
+    params.extend([limit, skip])
+
+    falhas = await db.fetch_all(_SQL_RESUMO_FALHAS.format(filtro=filtro), tuple(params))
+
+    resultado = []
+    for falha in falhas:
+        falha = dict(falha)
+        mediana = falha.pop('mediana_confidence')
+        falha['confidence_medio'] = round(float(mediana), 3) if mediana is not None else 0.0
+        resultado.append(falha)
+    return resultado
+
+
+# (falha_id, query, ferramenta) é único (idx_fila_unica): entradas repetidas são ignoradas
+_SQL_INSERIR_FILA = """
+INSERT OR IGNORE INTO fila_pesquisas (falha_id, query, idioma, ferramenta, status, criado_em)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 
-    params = (
+def _valores_fila(entrada: Dict[str, Any]) -> tuple:
+    return (
         entrada.get("falha_id"),
         entrada.get("query"),
         entrada.get("idioma"),
@@ -456,8 +1014,37 @@ async def inserir_fila_pesquisa(entrada: Dict[str, Any]) -> int:
         entrada.get("criado_em")
     )
 
-    await db.execute(query, params)
-    return 1
+
+async def inserir_fila_pesquisa(entrada: Dict[str, Any]) -> int:
+    """Insere uma entrada na fila de pesquisas (ignorada se já existir)"""
+    return await inserir_fila_pesquisas_lote([entrada])
+
+
+async def inserir_fila_pesquisas_lote(entradas: List[Dict[str, Any]]) -> int:
+    """
+    Insere várias entradas na fila numa única transação (executemany)
+
+    Entradas com (falha_id, query, ferramenta) já presentes na fila, ou
+    repetidas no próprio lote, são ignoradas.
+
+    Returns:
+        Número de entradas inseridas
+    """
+    if not entradas:
+        return 0
+    async with db.get_connection() as conn:
+        cursor = await conn.executemany(_SQL_INSERIR_FILA, [_valores_fila(e) for e in entradas])
+        inseridas = cursor.rowcount
+        await conn.commit()
+    return inseridas
+
+
+async def listar_chaves_fila(falha_id: int) -> set:
+    """Pares (query, ferramenta) já presentes na fila para a falha"""
+    linhas = await db.fetch_all(
+        "SELECT query, ferramenta FROM fila_pesquisas WHERE falha_id = ?", (falha_id,)
+    )
+    return {(linha["query"], linha["ferramenta"]) for linha in linhas}
 
 
 async def listar_fila_pesquisas(status: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -494,6 +1081,147 @@ async def atualizar_status_fila(entrada_id: int, novo_status: str) -> None:
     await db.execute(query, (novo_status, entrada_id))
 
 
+# Leases vencidos voltam para 'pendente' (ou 'erro' se esgotaram as tentativas)
+_SQL_EXPIRAR_LEASES = """
+UPDATE fila_pesquisas
+SET status = CASE WHEN tentativas >= max_tentativas THEN 'erro' ELSE 'pendente' END,
+    worker_id = NULL,
+    lease_expira_em = NULL
+WHERE status = 'processando'
+AND lease_expira_em IS NOT NULL
+AND lease_expira_em < datetime('now')
+"""
+
+_SQL_RESERVAR_FILA = """
+UPDATE fila_pesquisas
+SET status = 'processando',
+    worker_id = ?,
+    lease_expira_em = datetime('now', ?),
+    tentativas = tentativas + 1
+WHERE id IN (
+    SELECT id FROM fila_pesquisas
+    WHERE status = 'pendente'
+    ORDER BY prioridade DESC, id
+    LIMIT ?
+)
+RETURNING *
+"""
+
+
+async def reservar_entradas_fila(
+    worker_id: str,
+    quantidade: int,
+    lease_segundos: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Reserva atomicamente até `quantidade` entradas pendentes para um worker
+
+    Um único UPDATE ... RETURNING muda as entradas para 'processando' com
+    o worker_id e a expiração do lease, então processos diferentes nunca
+    recebem a mesma entrada. Antes, na mesma transação, leases vencidos
+    são devolvidos à fila.
+
+    Args:
+        worker_id: Identificador do processo/worker
+        quantidade: Máximo de entradas a reservar
+        lease_segundos: Duração do lease (padrão: settings.FILA_LEASE_SEGUNDOS)
+
+    Returns:
+        Entradas reservadas, por prioridade (maior primeiro) e id
+    """
+    if quantidade <= 0:
+        return []
+    lease = lease_segundos or settings.FILA_LEASE_SEGUNDOS
+    async with db.get_connection() as conn:
+        await conn.execute(_SQL_EXPIRAR_LEASES)
+        async with conn.execute(_SQL_RESERVAR_FILA, (worker_id, f"+{int(lease)} seconds", quantidade)) as cursor:
+            linhas = [dict(linha) for linha in await cursor.fetchall()]
+        await conn.commit()
+    # A ordem do RETURNING não é garantida
+    linhas.sort(key=lambda linha: (-(linha["prioridade"] or 0), linha["id"]))
+    return linhas
+
+
+async def renovar_leases_fila(
+    entrada_ids: List[int],
+    worker_id: str,
+    lease_segundos: Optional[int] = None
+) -> int:
+    """
+    Estende o lease das entradas ainda reservadas pelo worker
+
+    Returns:
+        Número de entradas renovadas
+    """
+    if not entrada_ids:
+        return 0
+    lease = lease_segundos or settings.FILA_LEASE_SEGUNDOS
+    marcadores = ", ".join("?" * len(entrada_ids))
+    linhas = await db.fetch_all(
+        f"""
+        UPDATE fila_pesquisas SET lease_expira_em = datetime('now', ?)
+        WHERE worker_id = ? AND status = 'processando' AND id IN ({marcadores})
+        RETURNING id
+        """,
+        (f"+{int(lease)} seconds", worker_id, *entrada_ids)
+    )
+    return len(linhas)
+
+
+async def finalizar_entrada_fila(entrada_id: int, novo_status: str, worker_id: str) -> bool:
+    """
+    Conclui uma entrada reservada ('completa' ou 'erro') e libera o lease
+
+    Se o lease venceu e a entrada foi reservada por outro worker, nada é
+    alterado.
+
+    Returns:
+        True se a entrada foi atualizada
+    """
+    linha = await db.fetch_one(
+        """
+        UPDATE fila_pesquisas
+        SET status = ?, worker_id = NULL, lease_expira_em = NULL
+        WHERE id = ? AND (worker_id = ? OR worker_id IS NULL)
+        RETURNING id
+        """,
+        (novo_status, entrada_id, worker_id)
+    )
+    return linha is not None
+
+
+async def liberar_entradas_fila(worker_id: Optional[str] = None, entrada_ids: Optional[List[int]] = None) -> int:
+    """
+    Devolve para 'pendente' as entradas em processamento de um worker
+    (e as sem lease, de versões antigas), por exemplo no encerramento
+
+    Args:
+        worker_id: Identificador do processo/worker
+        entrada_ids: Se informado, libera só essas entradas (do worker)
+
+    Returns:
+        Número de entradas liberadas
+    """
+    if entrada_ids is not None:
+        if not entrada_ids:
+            return 0
+        marcadores = ",".join("?" * len(entrada_ids))
+        filtro, parametros = f"worker_id = ? AND id IN ({marcadores})", (worker_id, *entrada_ids)
+    else:
+        filtro, parametros = "(worker_id IS NULL OR worker_id = ?)", (worker_id,)
+    linhas = await db.fetch_all(
+        f"""
+        UPDATE fila_pesquisas
+        SET status = 'pendente', worker_id = NULL, lease_expira_em = NULL,
+            tentativas = MAX(tentativas - 1, 0)
+        WHERE status = 'processando' AND {filtro}
+        RETURNING id
+        """,
+        parametros
+    )
+    return len(linhas)
+
+
 async def validar_url(url: str) -> bool:
     """
     Valida se a URL é válida e acessível.
@@ -880,6 +1608,12 @@ async def traduzir_todos_resultados() -> Dict[str, Any]:
     }
 
 
+def _descomprimir_analise_ia(linha: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if linha and "analise_ia" in linha:
+        linha["analise_ia"] = descomprimir_texto(linha["analise_ia"])
+    return linha
+
+
 async def obter_priorizacao(falha_id: int) -> Optional[Dict[str, Any]]:
     """Obtém a priorização de uma falha específica com dados da falha"""
     query = """
@@ -892,7 +1626,7 @@ async def obter_priorizacao(falha_id: int) -> Optional[Dict[str, Any]]:
     JOIN falhas_mercado fm ON pf.falha_id = fm.id
     WHERE pf.falha_id = ?
     """
-    return await db.fetch_one(query, (falha_id,))
+    return _descomprimir_analise_ia(await db.fetch_one(query, (falha_id,)))
 
 
 async def criar_priorizacao(falha_id: int, impacto: int = 5, esforco: int = 5,
@@ -903,7 +1637,9 @@ async def criar_priorizacao(falha_id: int, impacto: int = 5, esforco: int = 5,
     VALUES (?, ?, ?, ?, ?)
     """
     async with db.get_connection() as conn:
-        cursor = await conn.execute(query, (falha_id, impacto, esforco, analise_ia, 'ia' if analise_ia else 'manual'))
+        cursor = await conn.execute(
+            query, (falha_id, impacto, esforco, comprimir_texto(analise_ia), 'ia' if analise_ia else 'manual')
+        )
         await conn.commit()
         return cursor.lastrowid
 
@@ -916,14 +1652,22 @@ async def atualizar_priorizacao(falha_id: int, impacto: int, esforco: int,
     SET impacto = ?, esforco = ?, analise_ia = ?, priorizado_por = ?, atualizado_em = CURRENT_TIMESTAMP
     WHERE falha_id = ?
     """
-    await db.execute(query, (impacto, esforco, analise_ia, 'ia' if analise_ia else 'manual', falha_id))
+    await db.execute(
+        query, (impacto, esforco, comprimir_texto(analise_ia), 'ia' if analise_ia else 'manual', falha_id)
+    )
 
 
-async def listar_priorizacoes() -> List[Dict[str, Any]]:
-    """Lista todas as priorizações com dados das falhas e score calculado"""
-    query = """
+async def listar_priorizacoes(com_analise: bool = True) -> List[Dict[str, Any]]:
+    """
+    Lista todas as priorizações com dados das falhas e score calculado
+
+    Args:
+        com_analise: Se False, não lê nem descomprime analise_ia (listagens
+            que só precisam de ids, títulos e destaque)
+    """
+    query = f"""
     SELECT
-        pf.id, pf.falha_id, pf.impacto, pf.esforco, pf.analise_ia, pf.priorizado_por,
+        pf.id, pf.falha_id, pf.impacto, pf.esforco,{' pf.analise_ia,' if com_analise else ''} pf.priorizado_por,
         pf.criado_em, pf.atualizado_em, pf.destacada, pf.justificativa_destaque,
         fm.titulo, fm.pilar, fm.descricao,
         ROUND((pf.impacto * pf.impacto) / (pf.esforco + 0.1), 2) as score
@@ -931,7 +1675,7 @@ async def listar_priorizacoes() -> List[Dict[str, Any]]:
     JOIN falhas_mercado fm ON pf.falha_id = fm.id
     ORDER BY pf.destacada DESC, score DESC
     """
-    return await db.fetch_all(query)
+    return [_descomprimir_analise_ia(linha) for linha in await db.fetch_all(query)]
 
 
 async def listar_priorizacoes_sem_analise() -> List[Dict[str, Any]]:
@@ -1093,34 +1837,106 @@ async def atualizar_destaque_priorizacao(falha_id: int, destacada: bool, justifi
 
 # ===== CACHE DE URLs (Jina.ai) =====
 
-async def obter_conteudo_url_cache(url: str) -> Optional[Dict[str, Any]]:
+_SQL_URL_CACHE = """
+    SELECT url, content, title, error, tentativas_erro, cached_at,
+           datetime('now') >= expires_at AS expirado
+    FROM url_content_cache
+"""
+
+
+def _linha_url_cache(linha: Dict[str, Any]) -> Dict[str, Any]:
+    linha["content"] = descomprimir_texto(linha["content"])
+    linha["expirado"] = bool(linha["expirado"])
+    return linha
+
+
+async def obter_conteudo_url_cache(url: str, incluir_expirado: bool = False) -> Optional[Dict[str, Any]]:
     """
     Obtém conteúdo de URL do cache
-    Retorna None se não existir ou estiver expirado
-    """
-    query = """
-    SELECT url, content, title, error, cached_at
-    FROM url_content_cache
-    WHERE url = ? AND datetime('now') < expires_at
+    Retorna None se não existir ou estiver expirado (a menos que incluir_expirado)
+
+    Linhas com error e sem content são o cache negativo de uma URL que falhou.
     """
-    return await db.fetch_one(query, (url,))
+    query = _SQL_URL_CACHE + " WHERE url = ?"
+    if not incluir_expirado:
+        query += " AND datetime('now') < expires_at"
+    linha = await db.fetch_one(query, (url,))
+    return _linha_url_cache(linha) if linha else None
 
 
-async def salvar_conteudo_url_cache(url: str, content: str = None, title: str = None, error: str = None):
+async def obter_conteudos_url_cache(urls: List[str]) -> Dict[str, Dict[str, Any]]:
     """
-    Salva ou atualiza conteúdo de URL no cache
+    Obtém várias URLs do cache de uma vez, incluindo as expiradas (campo expirado)
+
+    Returns:
+        Dict url -> linha do cache (URLs ausentes não aparecem)
     """
+    urls = list(dict.fromkeys(urls))
+    encontradas = {}
+    for inicio in range(0, len(urls), 500):
+        lote = urls[inicio:inicio + 500]
+        linhas = await db.fetch_all(
+            _SQL_URL_CACHE + f" WHERE url IN ({', '.join('?' * len(lote))})", tuple(lote)
+        )
+        for linha in linhas:
+            encontradas[linha["url"]] = _linha_url_cache(linha)
+    return encontradas
+
+
+async def salvar_conteudo_url_cache(
+    url: str,
+    content: str = None,
+    title: str = None,
+    error: str = None,
+    validade_segundos: float = None,
+    tentativas_erro: int = 0
+):
+    """
+    Salva ou atualiza conteúdo de URL no cache (conteúdo comprimido)
+
+    Com error, o conteúdo anterior (se houver) é mantido para ser servido
+    como antigo e a linha vale por validade_segundos (backoff do cache
+    negativo). Sem error, vale por CONTEUDO_CACHE_TTL_DIAS.
+    """
+    if validade_segundos is None:
+        validade_segundos = settings.CONTEUDO_CACHE_TTL_DIAS * 86400
     query = """
-    INSERT INTO url_content_cache (url, content, title, error)
-    VALUES (?, ?, ?, ?)
+    INSERT INTO url_content_cache (url, content, title, error, tentativas_erro, cached_at, expires_at)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, datetime('now', ?))
     ON CONFLICT(url) DO UPDATE SET
-        content = excluded.content,
-        title = excluded.title,
+        content = CASE WHEN excluded.error IS NULL THEN excluded.content ELSE url_content_cache.content END,
+        title = CASE WHEN excluded.error IS NULL THEN excluded.title ELSE url_content_cache.title END,
         error = excluded.error,
-        cached_at = CURRENT_TIMESTAMP,
-        expires_at = datetime('now', '+30 days')
+        tentativas_erro = excluded.tentativas_erro,
+        cached_at = CASE WHEN excluded.error IS NULL THEN CURRENT_TIMESTAMP ELSE url_content_cache.cached_at END,
+        expires_at = excluded.expires_at
     """
-    await db.execute(query, (url, content, title, error))
+    await db.execute(query, (
+        url, comprimir_texto(content), title, error,
+        tentativas_erro if error else 0, f"+{int(validade_segundos)} seconds"
+    ))
+
+
+async def limpar_url_cache_expirado(retencao_dias: int = None) -> int:
+    """
+    Apaga do cache as URLs vencidas há mais de retencao_dias (padrão:
+    CONTEUDO_CACHE_RETENCAO_DIAS) e os erros já vencidos
+
+    Returns:
+        Linhas removidas
+    """
+    retencao = settings.CONTEUDO_CACHE_RETENCAO_DIAS if retencao_dias is None else retencao_dias
+    async with db.get_connection() as conn:
+        cursor = await conn.execute(
+            """
+            DELETE FROM url_content_cache
+            WHERE expires_at < datetime('now', ?)
+               OR (content IS NULL AND expires_at < datetime('now'))
+            """,
+            (f"-{int(retencao)} days",)
+        )
+        await conn.commit()
+        return cursor.rowcount
 
 
 # ===== CACHE DE ANÁLISES DE FONTES (LLM) =====
@@ -1148,7 +1964,10 @@ async def obter_analise_fonte_cache(fonte_hash: str) -> Optional[Dict[str, Any]]
     FROM fontes_analises_cache
     WHERE fonte_hash = ? AND datetime('now') < expires_at
     """
-    return await db.fetch_one(query, (fonte_hash,))
+    linha = await db.fetch_one(query, (fonte_hash,))
+    if linha:
+        linha["analise_llm"] = descomprimir_texto(linha["analise_llm"])
+    return linha
 
 
 async def salvar_analise_fonte_cache(
@@ -1193,14 +2012,20 @@ async def salvar_analise_fonte_cache(
     await db.execute(query, (
         fonte_hash, fonte_id, fonte_url,
         tipo_fonte, tem_implementacao, tem_metricas,
-        analise_llm, modelo_usado
+        comprimir_texto(analise_llm), modelo_usado
     ))
 
 
-async def obter_analises_fontes_lote(fonte_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+async def obter_analises_fontes_lote(
+    fonte_hashes: List[str],
+    com_analise_llm: bool = True
+) -> Dict[str, Dict[str, Any]]:
     """
     Obtém análises de múltiplas fontes de uma vez
     Retorna dict com hash como chave e análise como valor
+
+    Com com_analise_llm=False o JSON completo (analise_llm) não é lido nem
+    descomprimido; só os campos de classificação.
     """
     if not fonte_hashes:
         return {}
@@ -1209,13 +2034,16 @@ async def obter_analises_fontes_lote(fonte_hashes: List[str]) -> Dict[str, Dict[
     query = f"""
     SELECT
         fonte_hash, tipo_fonte, tem_implementacao, tem_metricas,
-        analise_llm, modelo_usado
+        {'analise_llm, ' if com_analise_llm else ''}modelo_usado
     FROM fontes_analises_cache
     WHERE fonte_hash IN ({placeholders})
     AND datetime('now') < expires_at
     """
 
     resultados = await db.fetch_all(query, tuple(fonte_hashes))
+    if com_analise_llm:
+        for r in resultados:
+            r['analise_llm'] = descomprimir_texto(r['analise_llm'])
     return {r['fonte_hash']: dict(r) for r in resultados}
 
 
@@ -1277,6 +2105,73 @@ async def listar_boas_praticas_por_falha(falha_id: int, fase: str = None) -> Lis
         return await db.fetch_all(query, (falha_id,))
 
 
+async def obter_analise_fase2(falha_id: int) -> Optional[Dict[str, Any]]:
+    """Última análise da Fase II da falha (fingerprint das fontes), ou None"""
+    return await db.fetch_one("SELECT * FROM fase2_analises WHERE falha_id = ?", (falha_id,))
+
+
+async def salvar_analise_fase2(
+    falha_id: int,
+    praticas: List[Dict[str, Any]],
+    fingerprint: str,
+    num_fontes: int,
+    modelo: str = None,
+    substituir: bool = True
+) -> int:
+    """
+    Grava as boas práticas da Fase II e o fingerprint das fontes numa única transação
+
+    Args:
+        falha_id: ID da falha de mercado
+        praticas: Práticas extraídas (titulo, descricao, is_sebrae, fonte, confidence_score)
+        fingerprint: Fingerprint dos hashes das fontes analisadas
+        num_fontes: Quantidade de fontes analisadas
+        modelo: Modelo LLM usado
+        substituir: Se True, remove as práticas da Fase II anteriores
+
+    Returns:
+        Total de práticas da Fase II da falha após a gravação
+    """
+    async with db.get_connection() as conn:
+        if substituir:
+            await conn.execute(
+                "DELETE FROM boas_praticas WHERE falha_id = ? AND fase = 'fase_2'", (falha_id,)
+            )
+        await conn.executemany(
+            """
+            INSERT INTO boas_praticas (falha_id, titulo, descricao, is_sebrae, fonte_referencia, fase, confidence_score)
+            VALUES (?, ?, ?, ?, ?, 'fase_2', ?)
+            """,
+            [
+                (
+                    falha_id, pratica.get('titulo'), pratica.get('descricao'),
+                    1 if pratica.get('is_sebrae') else 0, pratica.get('fonte'),
+                    pratica.get('confidence_score', 50)
+                )
+                for pratica in praticas
+            ]
+        )
+        cursor = await conn.execute(
+            "SELECT COUNT(*) FROM boas_praticas WHERE falha_id = ? AND fase = 'fase_2'", (falha_id,)
+        )
+        total = (await cursor.fetchone())[0]
+        await conn.execute(
+            """
+            INSERT INTO fase2_analises (falha_id, fingerprint, modelo, num_fontes, total_praticas, analisado_em)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(falha_id) DO UPDATE SET
+                fingerprint = excluded.fingerprint,
+                modelo = excluded.modelo,
+                num_fontes = excluded.num_fontes,
+                total_praticas = excluded.total_praticas,
+                analisado_em = excluded.analisado_em
+            """,
+            (falha_id, fingerprint, modelo, num_fontes, total)
+        )
+        await conn.commit()
+    return total
+
+
 async def listar_todas_boas_praticas(fase: str = None) -> List[Dict[str, Any]]:
     """
     Lista todas as boas práticas
@@ -1328,6 +2223,68 @@ async def limpar_cache_analises():
     await db.execute(query)
 
 
+# ===== COMPRESSÃO DE COLUNAS GRANDES =====
+
+# Colunas gravadas com comprimir_texto (lidas com descomprimir_texto)
+COLUNAS_COMPRIMIDAS = (
+    ("url_content_cache", "content"),
+    ("fontes_analises_cache", "analise_llm"),
+    ("priorizacoes_falhas", "analise_ia"),
+)
+
+
+async def comprimir_colunas_existentes(lote: int = 500) -> Dict[str, int]:
+    """
+    Comprime as linhas antigas (TEXT) das COLUNAS_COMPRIMIDAS
+
+    Percorre cada tabela por rowid em lotes; cada lote é gravado com um
+    executemany na sua própria transação, então a migração pode ser
+    interrompida e repetida.
+
+    Returns:
+        Linhas comprimidas por "tabela.coluna"
+    """
+    comprimidas = {}
+    for tabela, coluna in COLUNAS_COMPRIMIDAS:
+        total = 0
+        ultimo = 0
+        while True:
+            linhas = await db.fetch_all(
+                f"""
+                SELECT rowid AS id, {coluna} AS valor FROM {tabela}
+                WHERE rowid > ? AND typeof({coluna}) = 'text' AND length({coluna}) >= ?
+                ORDER BY rowid LIMIT ?
+                """,
+                (ultimo, settings.COMPRESSAO_MIN_BYTES // 4, lote)
+            )
+            if not linhas:
+                break
+            ultimo = linhas[-1]["id"]
+            atualizacoes = []
+            for linha in linhas:
+                valor = comprimir_texto(linha["valor"])
+                if isinstance(valor, bytes):
+                    atualizacoes.append((valor, linha["id"]))
+            if atualizacoes:
+                await db.execute_many(f"UPDATE {tabela} SET {coluna} = ? WHERE rowid = ?", atualizacoes)
+                total += len(atualizacoes)
+        comprimidas[f"{tabela}.{coluna}"] = total
+    return comprimidas
+
+
+async def compactar_banco():
+    """
+    Devolve ao sistema o espaço liberado (checkpoint do WAL + VACUUM)
+
+    Reescreve o arquivo inteiro: rode com a aplicação parada.
+    """
+    async with db.get_connection() as conn:
+        await conn.commit()
+        async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+            await cursor.fetchall()
+        await conn.execute("VACUUM")
+
+
 # Script para inicializar o banco
 if __name__ == "__main__":
     import asyncio
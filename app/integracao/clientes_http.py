@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Clientes HTTP compartilhados durante toda a vida da aplicação
+
+Os clientes de integração (perplexity, jina, tavily, serper, exa,
+openrouter, embeddings, busca de conteúdo) pegam seus clientes aqui em vez
+de abrir um httpx.AsyncClient / aiohttp.ClientSession por chamada. Assim as
+conexões ficam abertas entre requisições (keep-alive) e o handshake TLS é
+feito uma vez por conexão, não por chamada.
+
+- httpx: um AsyncClient por serviço, com limite de conexões próprio (cada
+  serviço fala com um host, então o limite é por host) e HTTP/2 quando o
+  pacote h2 está instalado
+- aiohttp: uma ClientSession com TCPConnector (limite por host e cache de DNS)
+
+O timeout continua sendo passado por requisição por quem chama. Os clientes
+são fechados no lifespan da aplicação (fechar_clientes_http); se o event
+loop mudar (scripts com vários asyncio.run, testes) eles são recriados.
+"""
+import asyncio
+from typing import Any, Dict
+
+import aiohttp
+import httpx
+
+from app.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+_clientes: Dict[str, httpx.AsyncClient] = {}
+_sessoes: Dict[str, aiohttp.ClientSession] = {}
+_loop = None
+_stats = {"clientes_criados": 0, "sessoes_criadas": 0, "recriados_por_loop": 0}
+
+
+def _verificar_loop():
+    """Descarta os clientes criados noutro event loop"""
+    global _loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if _loop is not loop:
+        if _loop is not None and (_clientes or _sessoes):
+            _stats["recriados_por_loop"] += 1
+        _clientes.clear()
+        _sessoes.clear()
+        _loop = loop
+
+
+def obter_cliente_http(servico: str) -> httpx.AsyncClient:
+    """
+    Retorna o httpx.AsyncClient compartilhado do serviço
+
+    Args:
+        servico: Nome do serviço (ex.: "tavily", "jina"); cada serviço tem
+            seu próprio pool de conexões
+
+    Returns:
+        Cliente aberto (não feche: é fechado no shutdown)
+    """
+    _verificar_loop()
+    cliente = _clientes.get(servico)
+    if cliente is None or cliente.is_closed:
+        cliente = httpx.AsyncClient(
+            http2=settings.HTTP_HTTP2 and HTTP2_DISPONIVEL,
+            timeout=settings.REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CONEXOES_POR_HOST,
+                max_keepalive_connections=settings.HTTP_CONEXOES_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_SEGUNDOS
+            )
+        )
+        _clientes[servico] = cliente
+        _stats["clientes_criados"] += 1
+    return cliente
+
+
+def obter_sessao_http(servico: str) -> aiohttp.ClientSession:
+    """
+    Retorna a aiohttp.ClientSession compartilhada do serviço
+
+    Returns:
+        Sessão aberta (não feche: é fechada no shutdown)
+    """
+    _verificar_loop()
+    sessao = _sessoes.get(servico)
+    if sessao is None or sessao.closed:
+        sessao = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=0,  # Sem limite global: o limite é por host
+                limit_per_host=settings.HTTP_CONEXOES_POR_HOST,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_SEGUNDOS,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_SEGUNDOS
+            )
+        )
+        _sessoes[servico] = sessao
+        _stats["sessoes_criadas"] += 1
+    return sessao
+
+
+async def fechar_clientes_http():
+    """Fecha todos os clientes e sessões (shutdown da aplicação)"""
+    clientes, sessoes = list(_clientes.values()), list(_sessoes.values())
+    _clientes.clear()
+    _sessoes.clear()
+    for cliente in clientes:
+        try:
+            await cliente.aclose()
+        except Exception as e:
+            print(f"[HTTP] Erro fechando cliente: {e}")
+    for sessao in sessoes:
+        try:
+            await sessao.close()
+        except Exception as e:
+            print(f"[HTTP] Erro fechando sessão: {e}")
+
+
+def get_stats_clientes_http() -> Dict[str, Any]:
+    """Clientes abertos e contadores de criação"""
+    return {
+        **_stats,
+        "http2": settings.HTTP_HTTP2 and HTTP2_DISPONIVEL,
+        "clientes": sorted(_clientes),
+        "sessoes": sorted(_sessoes)
+    }
@@ -7,6 +7,8 @@ Documentação: https://docs.exa.ai/reference
 import httpx
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils.limitador_taxa import obter_limitador
 
 
 class ExaClient:
@@ -44,57 +46,59 @@ class ExaClient:
             Cada item contém: titulo, url, descricao, data_publicacao (opcional)
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Limitar número de resultados
-                num_results = min(max_resultados, 100)
-
-                # Preparar payload para Exa
-                payload = {
-                    "query": query,
-                    "numResults": num_results,
-                    "type": search_type,
-                    "contents": {
-                        "text": True,
-                    }
+            client = obter_cliente_http("exa")
+            # Limitar número de resultados
+            num_results = min(max_resultados, 100)
+
+            # Preparar payload para Exa
+            payload = {
+                "query": query,
+                "numResults": num_results,
+                "type": search_type,
+                "contents": {
+                    "text": True,
                 }
-
-                # Headers com autenticação
-                headers = {
-                    "x-api-key": self.api_key,
-                    "Content-Type": "application/json"
-                }
-
-                # Realizar a requisição
-                response = await client.post(
-                    f"{self.base_url}/search",
-                    json=payload,
-                    headers=headers
-                )
-
-                # Verificar status
-                if response.status_code == 401:
-                    raise Exception("Exa API: Chave da API inválida ou expirada")
-                elif response.status_code == 429:
-                    raise Exception("Exa API: Rate limit atingido")
-                elif response.status_code != 200:
-                    raise Exception(f"Exa API: Erro {response.status_code} - {response.text[:200]}")
-
-                # Parsear resposta
-                data = response.json()
-                results = data.get("results", [])
-
-                # Transformar formato para padronizado
-                formatted_results = []
-                for result in results:
-                    formatted_results.append({
-                        "titulo": result.get("title", ""),
-                        "url": result.get("url", ""),
-                        "descricao": result.get("text", "")[:500],  # Limitar descrição
-                        "data_publicacao": result.get("publishedDate", None),
-                        "fonte": "Exa AI"
-                    })
-
-                return formatted_results
+            }
+
+            # Headers com autenticação
+            headers = {
+                "x-api-key": self.api_key,
+                "Content-Type": "application/json"
+            }
+
+            # Realizar a requisição
+            response = await client.post(
+                f"{self.base_url}/search",
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+
+            # Verificar status
+            if response.status_code == 401:
+                raise Exception("Exa API: Chave da API inválida ou expirada")
+            elif response.status_code == 429:
+                obter_limitador("exa").registrar_retry_after(response.headers.get("Retry-After"))
+                raise Exception("Exa API: Rate limit atingido")
+            elif response.status_code != 200:
+                raise Exception(f"Exa API: Erro {response.status_code} - {response.text[:200]}")
+
+            # Parsear resposta
+            data = response.json()
+            results = data.get("results", [])
+
+            # Transformar formato para padronizado
+            formatted_results = []
+            for result in results:
+                formatted_results.append({
+                    "titulo": result.get("title", ""),
+                    "url": result.get("url", ""),
+                    "descricao": result.get("text", "")[:500],  # Limitar descrição
+                    "data_publicacao": result.get("publishedDate", None),
+                    "fonte": "Exa AI"
+                })
+
+            return formatted_results
 
         except httpx.TimeoutException:
             raise Exception("Exa API: Timeout na requisição")
@@ -119,42 +123,43 @@ class ExaClient:
             Lista de URLs similares
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {
-                    "url": url,
-                    "numResults": min(max_resultados, 100),
-                    "contents": {
-                        "text": True,
-                    }
-                }
-
-                headers = {
-                    "x-api-key": self.api_key,
-                    "Content-Type": "application/json"
+            client = obter_cliente_http("exa")
+            payload = {
+                "url": url,
+                "numResults": min(max_resultados, 100),
+                "contents": {
+                    "text": True,
                 }
-
-                response = await client.post(
-                    f"{self.base_url}/find-similar",
-                    json=payload,
-                    headers=headers
-                )
-
-                if response.status_code != 200:
-                    raise Exception(f"Exa API (similar): Erro {response.status_code}")
-
-                data = response.json()
-                results = data.get("results", [])
-
-                formatted_results = []
-                for result in results:
-                    formatted_results.append({
-                        "titulo": result.get("title", ""),
-                        "url": result.get("url", ""),
-                        "descricao": result.get("text", "")[:500],
-                        "fonte": "Exa AI (Similar)"
-                    })
-
-                return formatted_results
+            }
+
+            headers = {
+                "x-api-key": self.api_key,
+                "Content-Type": "application/json"
+            }
+
+            response = await client.post(
+                f"{self.base_url}/find-similar",
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+
+            if response.status_code != 200:
+                raise Exception(f"Exa API (similar): Erro {response.status_code}")
+
+            data = response.json()
+            results = data.get("results", [])
+
+            formatted_results = []
+            for result in results:
+                formatted_results.append({
+                    "titulo": result.get("title", ""),
+                    "url": result.get("url", ""),
+                    "descricao": result.get("text", "")[:500],
+                    "fonte": "Exa AI (Similar)"
+                })
+
+            return formatted_results
 
         except Exception as e:
             raise Exception(f"Exa API (buscar_similar): {str(e)}")
@@ -8,6 +8,9 @@ from typing import List, Dict, Any, Tuple, Optional
 from urllib.parse import quote
 from datetime import datetime
 
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils.limitador_taxa import obter_limitador
+
 
 class JinaClient:
     """Cliente para busca web e extracao de conteudo via Jina com fallback"""
@@ -64,37 +67,41 @@ class JinaClient:
             return [], True
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Jina search API simples
-                search_query = f"{query} lang:{idioma}"
-                encoded_query = quote(search_query)
-
-                response = await client.get(
-                    f"{self.search_url}/{encoded_query}",
-                    headers={"Authorization": f"Bearer {self.api_key}"}
-                )
-
-                # Verificar erros de degradacao
-                motivo = self._detectar_degradacao(response.status_code)
-                if motivo:
-                    self.degradacao_ativa = True
-                    self.motivo_degradacao = motivo
-                    self.timestamp_degradacao = datetime.now()
-                    print(f"[JINA DEGRADATION ACTIVATED] {motivo}")
-                    return [], True
-
-                if response.status_code == 200:
-                    # Jina retorna em formato estruturado
-                    try:
-                        data = response.json()
-                        resultados = self._parsear_resultados_search(data)
-                    except:
-                        # Se nao for JSON, parsear como texto
-                        resultados = self._parsear_texto_simples(response.text)
-
-                    return resultados[:max_resultados], False
-                else:
-                    raise Exception(f"Jina search error: {response.status_code}")
+            client = obter_cliente_http("jina")
+            # Jina search API simples
+            search_query = f"{query} lang:{idioma}"
+            encoded_query = quote(search_query)
+
+            response = await client.get(
+                f"{self.search_url}/{encoded_query}",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout
+            )
+
+            if response.status_code == 429:
+                obter_limitador("jina").registrar_retry_after(response.headers.get("Retry-After"))
+
+            # Verificar erros de degradacao
+            motivo = self._detectar_degradacao(response.status_code)
+            if motivo:
+                self.degradacao_ativa = True
+                self.motivo_degradacao = motivo
+                self.timestamp_degradacao = datetime.now()
+                print(f"[JINA DEGRADATION ACTIVATED] {motivo}")
+                return [], True
+
+            if response.status_code == 200:
+                # Jina retorna em formato estruturado
+                try:
+                    data = response.json()
+                    resultados = self._parsear_resultados_search(data)
+                except:
+                    # Se nao for JSON, parsear como texto
+                    resultados = self._parsear_texto_simples(response.text)
+
+                return resultados[:max_resultados], False
+            else:
+                raise Exception(f"Jina search error: {response.status_code}")
 
         except Exception as e:
             print(f"Erro em JinaClient.search_web: {e}")
@@ -116,31 +123,35 @@ class JinaClient:
             return "", True
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/readability",
-                    params={"url": url},
-                    headers={"Authorization": f"Bearer {self.api_key}"}
-                )
-
-                # Verificar erros de degradacao
-                motivo = self._detectar_degradacao(response.status_code)
-                if motivo:
-                    self.degradacao_ativa = True
-                    self.motivo_degradacao = motivo
-                    self.timestamp_degradacao = datetime.now()
-                    print(f"[JINA DEGRADATION ACTIVATED] {motivo}")
-                    return "", True
-
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        conteudo = data.get("data", {}).get("content", "")
-                        return conteudo, False
-                    except:
-                        return response.text, False
-                else:
-                    raise Exception(f"Jina readability error: {response.status_code}")
+            client = obter_cliente_http("jina")
+            response = await client.get(
+                f"{self.base_url}/readability",
+                params={"url": url},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout
+            )
+
+            if response.status_code == 429:
+                obter_limitador("jina").registrar_retry_after(response.headers.get("Retry-After"))
+
+            # Verificar erros de degradacao
+            motivo = self._detectar_degradacao(response.status_code)
+            if motivo:
+                self.degradacao_ativa = True
+                self.motivo_degradacao = motivo
+                self.timestamp_degradacao = datetime.now()
+                print(f"[JINA DEGRADATION ACTIVATED] {motivo}")
+                return "", True
+
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                    conteudo = data.get("data", {}).get("content", "")
+                    return conteudo, False
+                except:
+                    return response.text, False
+            else:
+                raise Exception(f"Jina readability error: {response.status_code}")
 
         except Exception as e:
             print(f"Erro em JinaClient.read_url: {e}")
@@ -4,9 +4,17 @@ Cliente OpenRouter para tradução de queries
 Utiliza modelos gratuitos com fallback automático
 """
 import asyncio
+import json
 import aiohttp
-from typing import Optional
+from typing import Dict, Optional
 from app.config import settings
+from app.integracao.clientes_http import obter_sessao_http
+from app.utils.limitador_taxa import obter_limitador
+from app.utils.metricas import medir_chamada_llm
+from app.utils.memoria_traducao import get_memoria_traducao
+
+# Traduções (por resultado e em lote) usam um limitador próprio (ver LIMITES_PROVEDORES)
+LIMITADOR_TRADUCAO = "openrouter_traducao"
 
 
 class OpenRouterClient:
@@ -105,22 +113,27 @@ class OpenRouterClient:
         """
         Inicializa cliente OpenRouter
 
+        As requisições usam a sessão HTTP compartilhada da aplicação
+        (app.integracao.clientes_http), então criar vários clientes não
+        abre novas conexões.
+
         Args:
             api_key: Chave da API (usa settings.OPENROUTER_API_KEY se não fornecido)
         """
         self.api_key = api_key or settings.OPENROUTER_API_KEY
-        self.session: Optional[aiohttp.ClientSession] = None
         self.modelo_atual = 0  # Índice do modelo atual para fallback
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Sessão compartilhada (fechada só no shutdown da aplicação)"""
+        return obter_sessao_http("openrouter")
+
     async def __aenter__(self):
         """Context manager entry"""
-        self.session = aiohttp.ClientSession()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Context manager exit (a sessão compartilhada continua aberta)"""
 
     async def detectar_idioma(
         self,
@@ -342,7 +355,7 @@ Text to analyze and translate:
         # PASSO 2: Tentar traduzir com LLM (com detecção de idioma)
         for tentativa, modelo in enumerate(self.MODELOS_TRADUCAO):
             try:
-                resultado = await self._chamar_modelo(modelo, prompt)
+                resultado = await self._chamar_modelo(modelo, prompt, provedor=LIMITADOR_TRADUCAO)
                 if resultado and resultado.strip():
                     # Tentar parsear JSON
                     import json
@@ -411,12 +424,30 @@ Text to analyze and translate:
         Returns:
             Texto traduzido ou texto original em caso de falha
         """
-        if not self.api_key:
-            print("[WARN] OPENROUTER_API_KEY não configurada, usando fallback")
+        if idioma_origem == idioma_alvo or not texto:
             return texto
 
-        if idioma_origem == idioma_alvo:
-            return texto
+        # Memória de traduções antes do LLM (falhas não são memorizadas)
+        memoria = get_memoria_traducao()
+        if memoria is not None:
+            traducao = await memoria.traduzir(
+                texto, idioma_origem, idioma_alvo,
+                lambda: self._traduzir_texto_llm(texto, idioma_alvo, idioma_origem)
+            )
+        else:
+            traducao = await self._traduzir_texto_llm(texto, idioma_alvo, idioma_origem)
+        return traducao or texto
+
+    async def _traduzir_texto_llm(
+        self,
+        texto: str,
+        idioma_alvo: str,
+        idioma_origem: str
+    ) -> Optional[str]:
+        """Tradução via LLM para traduzir_texto (None se todos os modelos falharem)"""
+        if not self.api_key:
+            print("[WARN] OPENROUTER_API_KEY não configurada, usando fallback")
+            return None
 
         # Mapear código de idioma para nome completo
         nomes_idiomas = {
@@ -447,7 +478,7 @@ Text to translate:
         # Tentar com cada modelo (fallback automático)
         for tentativa, modelo in enumerate(self.MODELOS_GRATUITOS):
             try:
-                resultado = await self._chamar_modelo(modelo, prompt)
+                resultado = await self._chamar_modelo(modelo, prompt, provedor=LIMITADOR_TRADUCAO)
                 if resultado and resultado.strip():
                     print(f"[TRADUÇÃO] ✓ Modelo: {modelo}")
                     return resultado.strip()
@@ -463,7 +494,118 @@ Text to translate:
 
         # Se todas as tentativas falharem, retornar original
         print(f"[TRADUÇÃO] ✗ Todas as tentativas falharam, retornando texto original")
-        return texto
+        return None
+
+    async def traduzir_titulo_descricao(
+        self,
+        titulo: str,
+        descricao: str,
+        idioma_alvo: str,
+        idioma_origem: str = "pt"
+    ) -> Dict[str, str]:
+        """
+        Traduz título e descrição numa única requisição (resposta em JSON)
+
+        Se nenhum modelo devolver um JSON válido, traduz os dois campos
+        separadamente com traduzir_texto.
+
+        Args:
+            titulo: Título a traduzir
+            descricao: Descrição a traduzir (pode ser vazia)
+            idioma_alvo: Código do idioma alvo
+            idioma_origem: Código do idioma origem (padrão: pt)
+
+        Returns:
+            Dict com "titulo" e "descricao" traduzidos (originais em caso de falha)
+        """
+        descricao = descricao or ""
+        if idioma_origem == idioma_alvo:
+            return {"titulo": titulo, "descricao": descricao}
+
+        memoria = get_memoria_traducao()
+        if memoria is not None:
+            memorizadas = await memoria.obter_lote([titulo, descricao], idioma_origem, idioma_alvo)
+            if titulo in memorizadas and (not descricao or descricao in memorizadas):
+                return {"titulo": memorizadas[titulo], "descricao": memorizadas.get(descricao, "")}
+
+        if not self.api_key:
+            print("[WARN] OPENROUTER_API_KEY não configurada, usando fallback")
+            return {"titulo": titulo, "descricao": descricao}
+
+        nomes_idiomas = {
+            "pt": "Portuguese",
+            "en": "English",
+            "es": "Spanish",
+            "fr": "French",
+            "de": "German",
+            "it": "Italian",
+            "ar": "Arabic",
+            "ja": "Japanese",
+            "ko": "Korean",
+            "he": "Hebrew",
+        }
+
+        idioma_origem_nome = nomes_idiomas.get(idioma_origem, idioma_origem)
+        idioma_alvo_nome = nomes_idiomas.get(idioma_alvo, idioma_alvo)
+
+        prompt = f"""Translate the following {idioma_origem_nome} title and description to {idioma_alvo_nome}.
+
+IMPORTANT: Preserve the original capitalization, formatting, and structure of the text.
+Do NOT change uppercase/lowercase letters unless grammatically required in the target language.
+Return ONLY in this exact JSON format (no markdown, no explanation):
+
+{{"titulo": "<translated title>", "descricao": "<translated description>"}}
+
+Title:
+{titulo}
+
+Description:
+{descricao}"""
+
+        for tentativa, modelo in enumerate(self.MODELOS_GRATUITOS):
+            try:
+                resultado = await self._chamar_modelo(
+                    modelo, prompt, max_tokens=1500, provedor=LIMITADOR_TRADUCAO
+                )
+                if not resultado or not resultado.strip():
+                    continue
+
+                resultado_limpo = resultado.strip()
+                if resultado_limpo.startswith("```"):
+                    resultado_limpo = resultado_limpo.split("```")[1]
+                    if resultado_limpo.startswith("json"):
+                        resultado_limpo = resultado_limpo[4:]
+
+                dados = json.loads(resultado_limpo.strip())
+                if isinstance(dados, dict) and dados.get("titulo"):
+                    print(f"[TRADUÇÃO] ✓ Modelo: {modelo} (título + descrição)")
+                    traducao = {
+                        "titulo": str(dados["titulo"]).strip(),
+                        "descricao": str(dados.get("descricao") or "").strip()
+                    }
+                    if memoria is not None:
+                        await memoria.gravar_lote(
+                            [(titulo, traducao["titulo"]), (descricao, traducao["descricao"])],
+                            idioma_origem,
+                            idioma_alvo
+                        )
+                    return traducao
+                print(f"[TRADUÇÃO] ✗ JSON sem título do modelo {modelo}")
+
+            except json.JSONDecodeError:
+                print(f"[TRADUÇÃO] ✗ Falha ao parsear JSON do modelo {modelo}")
+            except Exception as e:
+                print(
+                    f"[TRADUÇÃO] ✗ Tentativa {tentativa + 1}/{len(self.MODELOS_GRATUITOS)} "
+                    f"com {modelo}: {str(e)}"
+                )
+                if tentativa < len(self.MODELOS_GRATUITOS) - 1:
+                    await asyncio.sleep(1.0)
+
+        # Fallback: um campo por requisição
+        titulo_pt = await self.traduzir_texto(titulo, idioma_alvo, idioma_origem)
+        descricao_pt = await self.traduzir_texto(descricao, idioma_alvo, idioma_origem) if descricao else ""
+        return {"titulo": titulo_pt, "descricao": descricao_pt}
 
     async def analisar_fonte(
         self,
@@ -959,6 +1101,18 @@ Response Format (JSON only):
         if not texto or not texto.strip():
             return ""
 
+        memoria = get_memoria_traducao()
+        if memoria is not None:
+            traducao = await memoria.traduzir(
+                texto, idioma_origem, "pt", lambda: self._traduzir_texto_pt_llm(texto, idioma_origem)
+            )
+        else:
+            traducao = await self._traduzir_texto_pt_llm(texto, idioma_origem)
+        # Em caso de erro, retornar texto original
+        return traducao or texto
+
+    async def _traduzir_texto_pt_llm(self, texto: str, idioma_origem: str) -> Optional[str]:
+        """Tradução via LLM para _traduzir_texto (None em caso de erro)"""
         # Mapear idioma para nome legível
         idioma_map = {
             "en": "English", "es": "Spanish", "fr": "French",
@@ -979,12 +1133,11 @@ Text to translate:
         try:
             # Usar modelo rápido e barato para tradução
             modelo = "meta-llama/llama-3.2-3b-instruct:free"
-            traducao = await self._chamar_modelo(modelo, prompt)
+            traducao = await self._chamar_modelo(modelo, prompt, provedor=LIMITADOR_TRADUCAO)
             return traducao.strip()
         except Exception as e:
             print(f"[TRADUÇÃO] ✗ Erro ao traduzir de {idioma_origem}: {str(e)}")
-            # Em caso de erro, retornar texto original
-            return texto
+            return None
 
     def selecionar_modelos_avaliacao(
         self,
@@ -1172,7 +1325,8 @@ Return ONLY a JSON object with:
         modelo: str,
         prompt: str,
         temperature: float = 0.3,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        provedor: str = "openrouter"
     ) -> str:
         """
         Chama um modelo específico da OpenRouter
@@ -1182,13 +1336,11 @@ Return ONLY a JSON object with:
             prompt: Prompt para o modelo
             temperature: Temperatura para geração (0.0-1.0)
             max_tokens: Máximo de tokens na resposta
+            provedor: Limitador (LIMITES_PROVEDORES) que a chamada consome
 
         Returns:
             Resposta do modelo
         """
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "HTTP-Referer": "https://sebrae-politicas.app",
@@ -1204,22 +1356,27 @@ Return ONLY a JSON object with:
             "timeout": 60,  # Aumentado para análises mais longas
         }
 
-        async with self.session.post(
-            f"{self.BASE_URL}/chat/completions",
-            json=data,
-            headers=headers,
-            timeout=aiohttp.ClientTimeout(total=45),
-        ) as resp:
-            if resp.status == 200:
-                resultado = await resp.json()
-                if resultado.get("choices") and len(resultado["choices"]) > 0:
-                    return resultado["choices"][0]["message"]["content"]
-                raise Exception("Resposta vazia do modelo")
-            elif resp.status == 429:
-                raise Exception(f"Rate limit atingido (429)")
-            else:
-                texto_erro = await resp.text()
-                raise Exception(f"HTTP {resp.status}: {texto_erro[:200]}")
+        # Um 429 pausa todas as chamadas do limitador (todos os modelos)
+        limitador = obter_limitador(provedor)
+        async with limitador.reservar():
+            with medir_chamada_llm(modelo):
+                async with self.session.post(
+                    f"{self.BASE_URL}/chat/completions",
+                    json=data,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=45),
+                ) as resp:
+                    if resp.status == 200:
+                        resultado = await resp.json()
+                        if resultado.get("choices") and len(resultado["choices"]) > 0:
+                            return resultado["choices"][0]["message"]["content"]
+                        raise Exception("Resposta vazia do modelo")
+                    elif resp.status == 429:
+                        limitador.registrar_retry_after(resp.headers.get("Retry-After"))
+                        raise Exception(f"Rate limit atingido (429)")
+                    else:
+                        texto_erro = await resp.text()
+                        raise Exception(f"HTTP {resp.status}: {texto_erro[:200]}")
 
 
 # Cliente global para reutilização
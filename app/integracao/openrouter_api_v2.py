@@ -23,6 +23,7 @@ if __name__ == "__main__":
 from app.config import settings
 from app.llm.gerenciador_modelos import obter_gerenciador
 from app.llm.chamador_llm_inteligente import ChamadorLLMInteligente
+from app.utils.metricas import medir_chamada_llm
 
 
 class OpenRouterClientV2:
@@ -164,23 +165,24 @@ class OpenRouterClientV2:
             "timeout": kwargs.get("timeout", 30),
         }
 
-        async with self.session.post(
-            f"{self.BASE_URL}/chat/completions",
-            headers=headers,
-            json=data
-        ) as resp:
-            if resp.status != 200:
-                texto_erro = await resp.text()
-                raise Exception(
-                    f"Erro OpenRouter (status {resp.status}): {texto_erro[:200]}"
-                )
+        with medir_chamada_llm(model_id):
+            async with self.session.post(
+                f"{self.BASE_URL}/chat/completions",
+                headers=headers,
+                json=data
+            ) as resp:
+                if resp.status != 200:
+                    texto_erro = await resp.text()
+                    raise Exception(
+                        f"Erro OpenRouter (status {resp.status}): {texto_erro[:200]}"
+                    )
 
-            resultado = await resp.json()
+                resultado = await resp.json()
 
-            if "choices" not in resultado or not resultado["choices"]:
-                raise Exception("Resposta inválida da OpenRouter (sem choices)")
+                if "choices" not in resultado or not resultado["choices"]:
+                    raise Exception("Resposta inválida da OpenRouter (sem choices)")
 
-            return resultado["choices"][0]["message"]["content"]
+                return resultado["choices"][0]["message"]["content"]
 
     async def traduzir_texto(
         self,
@@ -4,6 +4,8 @@ Cliente para Perplexity AI API
 """
 import httpx
 from typing import List, Dict, Any
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils.limitador_taxa import obter_limitador
 import asyncio
 
 # Mapeamento de códigos de idioma para nomes em inglês (para melhor compreensão)
@@ -52,16 +54,16 @@ class PerplexityClient:
             Lista de resultados com titulo, url, descricao
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
+            client = obter_cliente_http("perplexity")
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
 
-                idioma_nome = self._get_idioma_nome(idioma)
+            idioma_nome = self._get_idioma_nome(idioma)
 
-                # Prompt mais rigoroso para garantir resposta no idioma correto
-                prompt = f"""Search for: {query}
+            # Prompt mais rigoroso para garantir resposta no idioma correto
+            prompt = f"""Search for: {query}
 
 IMPORTANT: Your response MUST be ENTIRELY in {idioma_nome}.
 - Do NOT use any other language
@@ -69,31 +71,34 @@ IMPORTANT: Your response MUST be ENTIRELY in {idioma_nome}.
 - List 5 sources with title and URL
 - Format: Title - URL - Brief description"""
 
-                payload = {
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                }
-
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    json=payload,
-                    headers=headers
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-                    # Parsear resposta e extrair resultados
-                    resultados = self._parsear_resposta(content)
-                    return resultados[:max_resultados]
-                else:
-                    raise Exception(f"Perplexity error: {response.status_code}")
+            payload = {
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            }
+
+            response = await client.post(
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+                # Parsear resposta e extrair resultados
+                resultados = self._parsear_resposta(content)
+                return resultados[:max_resultados]
+            else:
+                if response.status_code == 429:
+                    obter_limitador("perplexity").registrar_retry_after(response.headers.get("Retry-After"))
+                raise Exception(f"Perplexity error: {response.status_code}")
 
         except Exception as e:
             print(f"Erro em PerplexityClient.pesquisar: {e}")
@@ -5,6 +5,8 @@ Google Search com acesso via API
 """
 import httpx
 from typing import List, Dict, Any
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils.limitador_taxa import obter_limitador
 
 
 class SerperClient:
@@ -33,31 +35,34 @@ class SerperClient:
             Lista de resultados com titulo, url, descricao
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {
-                    "X-API-KEY": self.api_key,
-                    "Content-Type": "application/json"
-                }
-
-                payload = {
-                    "q": query,
-                    "num": max_resultados,
-                    "gl": self._get_country_code(idioma),
-                    "hl": idioma
-                }
-
-                response = await client.post(
-                    f"{self.base_url}/search",
-                    json=payload,
-                    headers=headers
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    resultados = self._parsear_resposta(data)
-                    return resultados[:max_resultados]
-                else:
-                    raise Exception(f"Serper error: {response.status_code} - {response.text}")
+            client = obter_cliente_http("serper")
+            headers = {
+                "X-API-KEY": self.api_key,
+                "Content-Type": "application/json"
+            }
+
+            payload = {
+                "q": query,
+                "num": max_resultados,
+                "gl": self._get_country_code(idioma),
+                "hl": idioma
+            }
+
+            response = await client.post(
+                f"{self.base_url}/search",
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                resultados = self._parsear_resposta(data)
+                return resultados[:max_resultados]
+            else:
+                if response.status_code == 429:
+                    obter_limitador("serper").registrar_retry_after(response.headers.get("Retry-After"))
+                raise Exception(f"Serper error: {response.status_code} - {response.text}")
 
         except Exception as e:
             print(f"Erro em SerperClient.pesquisar: {e}")
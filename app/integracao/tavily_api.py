@@ -5,6 +5,8 @@ Usa inteligência artificial para buscar e resumir informações
 """
 import httpx
 from typing import List, Dict, Any
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils.limitador_taxa import obter_limitador
 import asyncio
 
 
@@ -34,26 +36,29 @@ class TavilyClient:
             Lista de resultados com titulo, url, descricao
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {
-                    "api_key": self.api_key,
-                    "query": query,
-                    "include_answer": True,
-                    "max_results": max_resultados,
-                    "topic": "general"
-                }
+            client = obter_cliente_http("tavily")
+            payload = {
+                "api_key": self.api_key,
+                "query": query,
+                "include_answer": True,
+                "max_results": max_resultados,
+                "topic": "general"
+            }
 
-                response = await client.post(
-                    f"{self.base_url}/search",
-                    json=payload
-                )
+            response = await client.post(
+                f"{self.base_url}/search",
+                json=payload,
+                timeout=self.timeout
+            )
 
-                if response.status_code == 200:
-                    data = response.json()
-                    resultados = self._parsear_resposta(data)
-                    return resultados[:max_resultados]
-                else:
-                    raise Exception(f"Tavily error: {response.status_code} - {response.text}")
+            if response.status_code == 200:
+                data = response.json()
+                resultados = self._parsear_resposta(data)
+                return resultados[:max_resultados]
+            else:
+                if response.status_code == 429:
+                    obter_limitador("tavily").registrar_retry_after(response.headers.get("Retry-After"))
+                raise Exception(f"Tavily error: {response.status_code} - {response.text}")
 
         except Exception as e:
             print(f"Erro em TavilyClient.pesquisar: {e}")
@@ -7,6 +7,8 @@ from typing import Optional
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from app.utils.metricas import medir_chamada_llm
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
@@ -47,14 +49,15 @@ class OpenAIClient:
             Texto gerado pelo modelo
         """
         try:
-            response = await self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            with medir_chamada_llm(model):
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
 
             return response.choices[0].message.content
 
@@ -9,12 +9,17 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
 
-from app.config import settings, get_static_path, get_chroma_path
-from app.database import db
+from app.config import settings, get_static_path, get_chroma_path, get_embedding_cache_path
+from app.database import db, limpar_url_cache_expirado
 from app.api import falhas, resultados, pesquisas, health_check, config, vector_search, priorizacoes, knowledge_base, boas_praticas, traducao, analise, traducao_lote
 from app.agente.processador import Processador
+from app.agente import reanalise
+from app.agente import traducao_lote as jobs_traducao
+from app.agente import fase2_lote
 from app.vector.vector_store import get_vector_store
 from app.vector.embeddings import EmbeddingClient
+from app.vector.indexacao_kb import encerrar_executor_extracao
+from app.integracao.clientes_http import fechar_clientes_http
 
 
 # Variaveis globais para controle do worker
@@ -25,10 +30,10 @@ processador_global = None  # Referência global ao processador para pausar/retom
 async def worker_processador():
     """
     Task assincron que processa fila continuamente
-    Roda a cada intervalo (default 30 segundos)
 
-    Utiliza processamento paralelo com até 5 workers simultâneos
-    para acelerar o processamento da fila de pesquisas
+    Utiliza um pool contínuo de até 5 workers: cada worker pega a próxima
+    entrada (reservada por um prefetcher) assim que termina a anterior, e
+    o pool só espera quando a fila está vazia
 
     IMPORTANTE: Inicia em estado PAUSADO. Usuário deve clicar "Pesquisa em Andamento" para começar
     """
@@ -43,7 +48,7 @@ async def worker_processador():
         max_requests_por_minuto=150    # Aumentado de 60 para 150 requests/min
     )
 
-    intervalo = 20  # Reduzido de 30 para 20 segundos entre iterações
+    intervalo = 20  # Espera antes de reiniciar o pool após um erro
 
     print("[WORKER] Iniciado em estado PAUSADO. Clique 'Pesquisa em Andamento' para começar...")
     print("[WORKER] Rate limiting: 0.3s delay, 150 req/min")
@@ -51,17 +56,10 @@ async def worker_processador():
     try:
         while True:
             try:
-                # Processar lote em PARALELO (até 5 buscas simultâneas)
-                entradas_processadas = await processador.processar_em_paralelo(max_por_lote=20)
-
-                # Log de progresso
-                if entradas_processadas > 0:
-                    print(f"[WORKER] Processadas {entradas_processadas} entradas em paralelo")
-
-                # Aguardar antes da proxima iteracao
-                await asyncio.sleep(intervalo)
+                # Pool contínuo (até 5 buscas simultâneas); só retorna em caso de erro
+                await processador.executar_pool()
             except Exception as e:
-                print(f"[WORKER] Erro ao processar lote: {e}")
+                print(f"[WORKER] Erro no pool de processamento: {e}")
                 # Continuar processando mesmo com erros
                 await asyncio.sleep(intervalo)
 
@@ -77,19 +75,32 @@ async def lifespan(app: FastAPI):
 
     # Startup: Inicializar tabelas
     await db.init_tables()
+    removidas = await limpar_url_cache_expirado()
+    if removidas:
+        print(f"[CACHE] {removidas} URLs vencidas removidas de url_content_cache")
     print(f"OK {settings.APP_NAME} iniciado!")
     print(f"DB {db.db_path}")
 
     # Inicializar vector store se habilitado
     if settings.RAG_ENABLED or settings.USAR_VECTOR_DB:
         try:
-            embedding_client = EmbeddingClient(api_key=settings.OPENAI_API_KEY)
+            embedding_client = EmbeddingClient(
+                api_key=settings.OPENAI_API_KEY,
+                cache_path=get_embedding_cache_path(),
+                cache_max_mb=settings.EMBEDDING_CACHE_MAX_MB,
+                cache_memoria_mb=settings.EMBEDDING_CACHE_MEMORIA_MB
+            )
             persist_path = get_chroma_path()
             await get_vector_store(persist_path=persist_path, embedding_client=embedding_client)
             print(f"✓ Vector Store inicializado em {persist_path}")
         except Exception as e:
             print(f"⚠ Aviso: Vector Store não inicializado: {e}")
 
+    # Retomar jobs de reanálise, tradução e Fase II interrompidos (checkpoint no banco)
+    await reanalise.retomar_jobs()
+    await jobs_traducao.retomar_jobs()
+    await fase2_lote.retomar_jobs()
+
     # Iniciar worker em background
     worker_task = asyncio.create_task(worker_processador())
 
@@ -103,6 +114,26 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+    # Gravar resultados ainda no buffer do processador e devolver à fila
+    # as entradas que ele tinha reservado
+    if processador_global:
+        await processador_global.descarregar_resultados()
+        await processador_global.liberar_reservas()
+
+    # Interromper jobs de reanálise, tradução e Fase II (retomados no próximo startup)
+    await reanalise.encerrar()
+    await jobs_traducao.encerrar()
+    await fase2_lote.encerrar()
+
+    # Encerrar pool de processos da indexação da KB
+    encerrar_executor_extracao()
+
+    # Fechar clientes HTTP compartilhados das integrações
+    await fechar_clientes_http()
+
+    # Fechar conexões do pool do banco
+    await db.fechar()
+
     print("Aplicacao encerrada")
 
 
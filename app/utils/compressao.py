@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Compressão de textos grandes guardados no SQLite
+
+Colunas de texto longo (conteúdo completo de páginas, JSON das análises de
+LLM, análises de priorização) são gravadas como BLOB zlib com um dicionário
+pré-definido: os trechos que se repetem entre linhas (chaves JSON, cabeçalho
+do Jina Reader, vocabulário de políticas públicas) já estão no dicionário,
+o que faz diferença justamente nos textos curtos.
+
+- Textos menores que COMPRESSAO_MIN_BYTES, ou que não diminuem, ficam
+  como TEXT.
+- O cabeçalho zlib indica se foi usado dicionário e qual (DICTID =
+  adler32 do dicionário); um dicionário novo entra em _DICIONARIOS sem
+  invalidar as linhas antigas. BLOBs zlib sem dicionário também são lidos.
+- descomprimir_texto devolve strings (linhas antigas/curtas) sem alteração.
+"""
+import zlib
+from typing import Optional, Union
+
+from app.config import settings
+
+# Trechos mais frequentes no fim (o zlib alcança melhor o fim do dicionário)
+_DICIONARIO = "".join([
+    "políticas públicas governo federal estadual municipal programa de apoio financiamento ",
+    "crédito fundo de investimento capital de risco incubadora aceleradora parque tecnológico ",
+    "micro e pequenas empresas MPEs empreendedores empreendedorismo ecossistema de inovação ",
+    "startups Sebrae Brasil inovação tecnologia pesquisa desenvolvimento mercado acesso ",
+    "public policy government program funding venture capital small business innovation ",
+    "Title: URL Source: Published Time: Markdown Content:\n",
+    "https://www. .com.br .gov.br .org ](http  \n\n## ### * [",
+    '"justificativa": "", "analise": "", "recomendacoes": [], "riscos": [], ',
+    '"impacto": {"abrangencia": , "magnitude": , "maturidade": , "multiplicador": , "total": }, ',
+    '"esforco": {"stakeholders": , "investimento": , "tempo": , "estrutural": , "total": }, ',
+    '{"tipo_fonte": "academica", "governamental", "tecnico", "caso_sucesso", "desconhecido", ',
+    '"tem_implementacao": true, false, "tem_metricas": true, false, "confianca": 0.',
+]).encode("utf-8")
+
+_DICIONARIOS = {zlib.adler32(_DICIONARIO): _DICIONARIO}
+
+_FLAG_DICIONARIO = 0x20  # Bit FDICT do segundo byte do cabeçalho zlib
+
+
+def comprimir_texto(texto: Optional[str]) -> Optional[Union[str, bytes]]:
+    """
+    Texto -> BLOB zlib (com dicionário) para gravar no banco
+
+    Returns:
+        BLOB comprimido, ou o próprio texto se for curto/incompressível
+        (None continua None)
+    """
+    if texto is None:
+        return None
+    dados = texto.encode("utf-8")
+    if len(dados) < settings.COMPRESSAO_MIN_BYTES:
+        return texto
+    compressor = zlib.compressobj(settings.COMPRESSAO_NIVEL, zdict=_DICIONARIO)
+    comprimido = compressor.compress(dados) + compressor.flush()
+    return comprimido if len(comprimido) < len(dados) else texto
+
+
+def descomprimir_texto(valor: Optional[Union[str, bytes]]) -> Optional[str]:
+    """BLOB zlib -> texto; TEXT (linhas antigas ou curtas) e None passam direto"""
+    if valor is None or isinstance(valor, str):
+        return valor
+    if len(valor) > 6 and valor[1] & _FLAG_DICIONARIO:
+        dicionario = _DICIONARIOS[int.from_bytes(valor[2:6], "big")]
+        descompressor = zlib.decompressobj(zdict=dicionario)
+        return (descompressor.decompress(valor) + descompressor.flush()).decode("utf-8")
+    return zlib.decompress(valor).decode("utf-8")
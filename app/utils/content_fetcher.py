@@ -1,84 +1,177 @@
 # -*- coding: utf-8 -*-
 """
 Utilitário para buscar e processar conteúdo de URLs e documentos
+
+O conteúdo completo das fontes vem do Jina Reader (r.jina.ai) e fica em
+url_content_cache (comprimido). As buscas passam pelo BuscadorConteudo:
+
+- no máximo CONTEUDO_BUSCAS_SIMULTANEAS buscas ao todo e
+  CONTEUDO_BUSCAS_POR_DOMINIO por domínio de origem
+- pedidos simultâneos da mesma URL compartilham uma única busca
+- o cache vale CONTEUDO_CACHE_TTL_DIAS; depois a URL é buscada de novo e,
+  se a busca falhar, o conteúdo antigo continua sendo servido
+- URLs que falham entram no cache negativo com backoff exponencial
+  (CONTEUDO_ERRO_BACKOFF_MIN, dobrando a cada falha seguida)
 """
+import asyncio
 import httpx
 import re
 from typing import Dict, Any, Optional, List
-from app.database import obter_conteudo_url_cache, salvar_conteudo_url_cache
+from urllib.parse import urlsplit
+from app.config import settings
+from app.database import obter_conteudo_url_cache, obter_conteudos_url_cache, salvar_conteudo_url_cache
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils import metricas
 from app.utils.logger import logger
 
+_HIST_BUSCA = metricas.histograma(
+    "sebrae_conteudo_busca_segundos", "Duração das buscas de conteúdo completo no Jina Reader"
+).rotulada()
+_EVENTOS = metricas.contador(
+    "sebrae_conteudo_eventos_total",
+    "Eventos do buscador de conteúdo (buscas, erros, cache_hits, coalescidas...)",
+    ("evento",)
+)
+_EM_ANDAMENTO = metricas.medidor(
+    "sebrae_conteudo_buscas_em_andamento", "Buscas de conteúdo em andamento"
+).rotulada()
 
-async def fetch_url_content_with_cache(url: str, force_refresh: bool = False) -> Dict[str, Any]:
-    """
-    Busca conteúdo de URL via Jina.ai com cache em banco de dados
 
-    Args:
-        url: URL original a ser buscada
-        force_refresh: Se True, ignora cache e busca novamente
+def calcular_backoff_erro(tentativas: int) -> float:
+    """Segundos até a próxima tentativa de uma URL após `tentativas` falhas seguidas"""
+    espera = settings.CONTEUDO_ERRO_BACKOFF_MIN * 60 * (2 ** max(0, tentativas - 1))
+    return min(espera, settings.CONTEUDO_ERRO_BACKOFF_MAX_HORAS * 3600)
 
-    Returns:
-        Dict com: {url, content, title, error}
-    """
-    try:
-        # Verificar cache primeiro (a menos que force_refresh)
-        if not force_refresh:
-            cached = await obter_conteudo_url_cache(url)
-            if cached and not cached.get('error'):
-                logger.info(f"Usando conteúdo em cache para: {url}")
-                return {
-                    'url': cached['url'],
-                    'content': cached['content'],
-                    'title': cached.get('title'),
-                    'error': None,
-                    'from_cache': True
-                }
-            elif cached and cached.get('error'):
-                logger.warning(f"URL em cache com erro: {url} - {cached['error']}")
-                # Continua para tentar buscar novamente
-
-        # Buscar via Jina.ai
-        jina_url = f"https://r.jina.ai/{url}"
-        logger.info(f"Buscando via Jina.ai: {url}")
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(jina_url)
-            response.raise_for_status()
-
-            content = response.text
-
-            # Tentar extrair título (Jina.ai geralmente inclui no início do conteúdo)
-            title = extract_title_from_content(content) or url
-
-            # Salvar no cache
-            await salvar_conteudo_url_cache(
-                url=url,
-                content=content,
-                title=title,
-                error=None
-            )
 
-            logger.info(f"Conteúdo buscado e cacheado com sucesso: {url}")
+def _resposta_cache(cached: Dict[str, Any], antigo: bool = False) -> Dict[str, Any]:
+    if cached.get('content') is not None:
+        return {
+            'url': cached['url'],
+            'content': cached['content'],
+            'title': cached.get('title'),
+            'error': None,
+            'from_cache': True,
+            **({'stale': True} if antigo else {})
+        }
+    return {
+        'url': cached['url'],
+        'content': None,
+        'title': None,
+        'error': cached.get('error'),
+        'from_cache': True
+    }
+
+
+class BuscadorConteudo:
+    """Busca de URLs via Jina Reader com limites global/por domínio e coalescência"""
+
+    def __init__(self, concorrencia: int, concorrencia_por_dominio: int):
+        """
+        Args:
+            concorrencia: Buscas simultâneas no total
+            concorrencia_por_dominio: Buscas simultâneas por domínio de origem
+        """
+        self.concorrencia = max(1, concorrencia)
+        self.concorrencia_por_dominio = max(1, concorrencia_por_dominio)
+        self._loop = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._dominios: Dict[str, asyncio.Semaphore] = {}
+        self._em_andamento: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "buscas": 0,
+            "erros": 0,
+            "coalescidas": 0,
+            "cache_hits": 0,
+            "cache_negativo_hits": 0,
+            "antigos_servidos": 0
+        }
 
-            return {
-                'url': url,
-                'content': content,
-                'title': title,
-                'error': None,
-                'from_cache': False
-            }
+    def _primitivas(self):
+        # Recria semáforos se o event loop mudar (scripts, testes)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaforo = asyncio.Semaphore(self.concorrencia)
+            self._dominios = {}
+            self._em_andamento = {}
+
+    def _semaforo_dominio(self, url: str) -> asyncio.Semaphore:
+        dominio = urlsplit(url).hostname or ""
+        semaforo = self._dominios.get(dominio)
+        if semaforo is None:
+            semaforo = asyncio.Semaphore(self.concorrencia_por_dominio)
+            self._dominios[dominio] = semaforo
+        return semaforo
+
+    async def buscar(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Busca a URL e atualiza o cache; pedidos simultâneos da mesma URL
+        aguardam a mesma busca
+
+        Args:
+            url: URL original
+            cached: Linha do cache (mesmo expirada), para manter o conteúdo
+                antigo e contar falhas seguidas
+        """
+        self._primitivas()
+        tarefa = self._em_andamento.get(url)
+        if tarefa is None:
+            tarefa = asyncio.create_task(self._buscar(url, cached))
+            self._em_andamento[url] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop(url, None))
+        else:
+            self.stats["coalescidas"] += 1
+        # shield: quem desistir não cancela a busca dos demais
+        return await asyncio.shield(tarefa)
+
+    async def _buscar(self, url: str, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        async with self._semaforo, self._semaforo_dominio(url):
+            self.stats["buscas"] += 1
+            try:
+                logger.info(f"Buscando via Jina.ai: {url}")
+                client = obter_cliente_http("jina_reader")
+                with _HIST_BUSCA.medir():
+                    response = await client.get(f"https://r.jina.ai/{url}", timeout=settings.CONTEUDO_TIMEOUT)
+                response.raise_for_status()
+                content = response.text
+            except httpx.HTTPError as e:
+                return await self._registrar_erro(url, cached, f"Erro HTTP ao buscar URL: {str(e)}")
+            except Exception as e:
+                return await self._registrar_erro(url, cached, f"Erro inesperado ao buscar URL: {str(e)}")
+
+        # Tentar extrair título (Jina.ai geralmente inclui no início do conteúdo)
+        title = extract_title_from_content(content) or url
+        await salvar_conteudo_url_cache(url=url, content=content, title=title, error=None)
+        logger.info(f"Conteúdo buscado e cacheado com sucesso: {url}")
 
-    except httpx.HTTPError as e:
-        error_msg = f"Erro HTTP ao buscar URL: {str(e)}"
-        logger.error(f"{error_msg} - URL: {url}")
+        return {
+            'url': url,
+            'content': content,
+            'title': title,
+            'error': None,
+            'from_cache': False
+        }
 
-        # Salvar erro no cache para não tentar repetidamente
-        await salvar_conteudo_url_cache(
-            url=url,
-            content=None,
-            title=None,
-            error=error_msg
-        )
+    async def _registrar_erro(self, url: str, cached: Optional[Dict[str, Any]], error_msg: str) -> Dict[str, Any]:
+        """Cache negativo com backoff; serve o conteúdo antigo se houver"""
+        self.stats["erros"] += 1
+        tentativas = ((cached or {}).get('tentativas_erro') or 0) + 1
+        espera = calcular_backoff_erro(tentativas)
+        logger.error(f"{error_msg} - URL: {url} (nova tentativa em {espera / 60:.0f} min)")
+
+        try:
+            await salvar_conteudo_url_cache(
+                url=url,
+                error=error_msg,
+                validade_segundos=espera,
+                tentativas_erro=tentativas
+            )
+        except Exception as e:
+            logger.error(f"Erro ao gravar cache negativo de {url}: {e}")
+
+        if cached and cached.get('content') is not None:
+            self.stats["antigos_servidos"] += 1
+            return _resposta_cache(cached, antigo=True)
 
         return {
             'url': url,
@@ -88,6 +181,81 @@ async def fetch_url_content_with_cache(url: str, force_refresh: bool = False) ->
             'from_cache': False
         }
 
+    async def obter(
+        self,
+        url: str,
+        cached: Optional[Dict[str, Any]] = None,
+        force_refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Conteúdo da URL: cache válido (positivo ou negativo) ou nova busca
+
+        Args:
+            url: URL original
+            cached: Linha do cache já consultada (evita nova consulta)
+            force_refresh: Ignora o cache (positivo e negativo)
+        """
+        if cached and not cached.get('expirado') and not force_refresh:
+            if cached.get('content') is not None:
+                self.stats["cache_hits"] += 1
+                logger.info(f"Usando conteúdo em cache para: {url}")
+            else:
+                self.stats["cache_negativo_hits"] += 1
+                logger.warning(f"URL em cache com erro: {url} - {cached.get('error')}")
+            return _resposta_cache(cached)
+        return await self.buscar(url, cached)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do buscador"""
+        return {
+            **self.stats,
+            "em_andamento": len(self._em_andamento),
+            "concorrencia": self.concorrencia,
+            "concorrencia_por_dominio": self.concorrencia_por_dominio
+        }
+
+
+_buscador: Optional[BuscadorConteudo] = None
+
+
+def _coletar_metricas_conteudo():
+    """Contadores do buscador compartilhado no /api/metrics"""
+    if _buscador is None:
+        return
+    for evento, total in _buscador.stats.items():
+        _EVENTOS.rotulada(evento).valor = total
+    _EM_ANDAMENTO.definir(len(_buscador._em_andamento))
+
+
+metricas.registrar_coletor(_coletar_metricas_conteudo)
+
+
+def obter_buscador() -> BuscadorConteudo:
+    """Buscador compartilhado (criado na primeira chamada)"""
+    global _buscador
+    if _buscador is None:
+        _buscador = BuscadorConteudo(
+            settings.CONTEUDO_BUSCAS_SIMULTANEAS,
+            settings.CONTEUDO_BUSCAS_POR_DOMINIO
+        )
+    return _buscador
+
+
+async def fetch_url_content_with_cache(url: str, force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Busca conteúdo de URL via Jina.ai com cache em banco de dados
+
+    Args:
+        url: URL original a ser buscada
+        force_refresh: Se True, ignora cache e busca novamente
+
+    Returns:
+        Dict com: {url, content, title, error, from_cache}
+    """
+    try:
+        cached = await obter_conteudo_url_cache(url, incluir_expirado=True)
+        return await obter_buscador().obter(url, cached, force_refresh=force_refresh)
+
     except Exception as e:
         error_msg = f"Erro inesperado ao buscar URL: {str(e)}"
         logger.error(f"{error_msg} - URL: {url}")
@@ -220,14 +388,36 @@ async def enrich_sources_with_full_content(sources: List[Dict[str, Any]]) -> Lis
             - conteudo_completo: Conteúdo completo (URLs) ou trecho (documentos)
             - conteudo_original: Conteúdo original curto
     """
+    # Conteúdo das URLs: uma consulta ao cache para todas e as buscas que
+    # faltarem em paralelo (limites global/por domínio do buscador)
+    urls = list(dict.fromkeys(
+        fonte['fonte_url'] for fonte in sources
+        if fonte.get('fonte_tipo', 'documento') == 'pesquisa' and fonte.get('fonte_url')
+    ))
+    conteudos: Dict[str, Dict[str, Any]] = {}
+    if urls:
+        try:
+            cache = await obter_conteudos_url_cache(urls)
+        except Exception as e:
+            logger.error(f"Erro ao consultar cache de URLs: {e}")
+            cache = {}
+        buscador = obter_buscador()
+        resultados = await asyncio.gather(
+            *[buscador.obter(url, cache.get(url)) for url in urls],
+            return_exceptions=True
+        )
+        for url, resultado in zip(urls, resultados):
+            if isinstance(resultado, BaseException):
+                resultado = {'url': url, 'content': None, 'title': None, 'error': str(resultado), 'from_cache': False}
+            conteudos[url] = resultado
+
     enriched = []
 
     for fonte in sources:
         fonte_tipo = fonte.get('fonte_tipo', 'documento')
 
         if fonte_tipo == 'pesquisa' and fonte.get('fonte_url'):
-            # Buscar conteúdo completo da URL via Jina.ai
-            url_content = await fetch_url_content_with_cache(fonte['fonte_url'])
+            url_content = conteudos[fonte['fonte_url']]
 
             enriched.append({
                 **fonte,
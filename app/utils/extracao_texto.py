@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Extração de texto de documentos da base de conhecimento
+
+Funções puras (sem FastAPI) para poderem rodar num pool de processos:
+erros são sinalizados com ValueError e convertidos em HTTPException
+pelos endpoints.
+"""
+import io
+
+try:
+    from docx import Document as DocxDocument
+except ImportError:
+    DocxDocument = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+
+def extrair_docx(conteudo: bytes) -> str:
+    """Extrai texto de arquivo DOCX"""
+    if DocxDocument is None:
+        raise ValueError("python-docx não instalado")
+
+    try:
+        doc = DocxDocument(io.BytesIO(conteudo))
+        return "\n".join([para.text for para in doc.paragraphs])
+    except Exception as e:
+        raise ValueError(f"Erro ao extrair DOCX: {str(e)}")
+
+
+def extrair_pdf(conteudo: bytes) -> str:
+    """Extrai texto de arquivo PDF"""
+    if PyPDF2 is None:
+        raise ValueError("PyPDF2 não instalado")
+
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(conteudo))
+        return "".join((page.extract_text() or "") + "\n" for page in pdf_reader.pages)
+    except Exception as e:
+        raise ValueError(f"Erro ao extrair PDF: {str(e)}")
+
+
+def extrair_utf8(conteudo: bytes, formato: str) -> str:
+    """Decodifica arquivos de texto (CSV, Markdown, TXT)"""
+    try:
+        return conteudo.decode('utf-8')
+    except Exception as e:
+        raise ValueError(f"Erro ao extrair {formato}: {str(e)}")
+
+
+def extrair_texto(conteudo: bytes, tipo: str) -> str:
+    """
+    Extrai texto conforme o tipo do arquivo
+
+    Args:
+        conteudo: Bytes do arquivo
+        tipo: 'docx', 'pdf', 'csv', 'md' ou 'txt'
+
+    Returns:
+        Texto extraído
+    """
+    if tipo == 'docx':
+        return extrair_docx(conteudo)
+    if tipo == 'pdf':
+        return extrair_pdf(conteudo)
+    if tipo == 'csv':
+        return extrair_utf8(conteudo, "CSV")
+    if tipo in ('md', 'markdown', 'txt'):
+        return extrair_utf8(conteudo, "Markdown")
+    raise ValueError(f"Tipo de arquivo não suportado: {tipo}")
@@ -7,8 +7,10 @@ Usa OpenRouter para tradução com LLM gratuito (fallback entre modelos)
 import re
 import asyncio
 import aiohttp
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.config import settings
+from app.integracao.clientes_http import obter_sessao_http
+from app.utils.memoria_traducao import get_memoria_traducao
 
 # Model rotation para OpenRouter (free/cheap models com boa qualidade)
 # Modelos testados para tradução com preço baixo/gratuito
@@ -126,64 +128,64 @@ Translated text:"""
 
             print(f"[TRADUÇÃO] Tentando {modelo} ({tentativa + 1}/{len(OPENROUTER_MODELS)})")
 
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-                    "HTTP-Referer": "https://github.com/felipematos/sebraae",
-                    "X-Title": "Sebrae Research",
-                }
-
-                payload = {
-                    "model": modelo,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,  # Tradução deve ser precisa, não criativa
-                    "max_tokens": 500,
-                    "top_p": 0.9,
-                }
-
-                async with session.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 429:  # Rate limit
-                        print(f"[TRADUÇÃO] Rate limit no modelo {modelo}, tentando próximo...")
-                        última_exceção = f"Rate limit (429)"
-                        continue
-
-                    if response.status >= 500:  # Erro servidor
-                        print(f"[TRADUÇÃO] Erro servidor {response.status} no modelo {modelo}, tentando próximo...")
-                        última_exceção = f"Erro servidor ({response.status})"
-                        continue
-
-                    if response.status != 200:
-                        erro_text = await response.text()
-                        print(f"[TRADUÇÃO] Erro HTTP {response.status} no modelo {modelo}")
-                        última_exceção = f"HTTP {response.status}"
-                        continue
-
-                    data = await response.json()
-
-                    # Verificar se há erro na resposta
-                    if "error" in data:
-                        print(f"[TRADUÇÃO] Erro API: {data.get('error', {}).get('message', 'desconhecido')}")
-                        última_exceção = data.get('error', {}).get('message', 'erro desconhecido')
-                        continue
-
-                    # Extrair o texto traduzido
-                    if "choices" in data and len(data["choices"]) > 0:
-                        tradução = data["choices"][0].get("message", {}).get("content", "").strip()
-                        if tradução:
-                            print(f"[TRADUÇÃO] Sucesso com {modelo}")
-                            return tradução
-
-                    print(f"[TRADUÇÃO] Resposta inválida do modelo {modelo}")
-                    última_exceção = "Resposta inválida"
+            session = obter_sessao_http("openrouter")
+            headers = {
+                "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
+                "HTTP-Referer": "https://github.com/felipematos/sebraae",
+                "X-Title": "Sebrae Research",
+            }
+
+            payload = {
+                "model": modelo,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.3,  # Tradução deve ser precisa, não criativa
+                "max_tokens": 500,
+                "top_p": 0.9,
+            }
+
+            async with session.post(
+                "https://openrouter.ai/api/v1/chat/completions",
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 429:  # Rate limit
+                    print(f"[TRADUÇÃO] Rate limit no modelo {modelo}, tentando próximo...")
+                    última_exceção = f"Rate limit (429)"
                     continue
 
+                if response.status >= 500:  # Erro servidor
+                    print(f"[TRADUÇÃO] Erro servidor {response.status} no modelo {modelo}, tentando próximo...")
+                    última_exceção = f"Erro servidor ({response.status})"
+                    continue
+
+                if response.status != 200:
+                    erro_text = await response.text()
+                    print(f"[TRADUÇÃO] Erro HTTP {response.status} no modelo {modelo}")
+                    última_exceção = f"HTTP {response.status}"
+                    continue
+
+                data = await response.json()
+
+                # Verificar se há erro na resposta
+                if "error" in data:
+                    print(f"[TRADUÇÃO] Erro API: {data.get('error', {}).get('message', 'desconhecido')}")
+                    última_exceção = data.get('error', {}).get('message', 'erro desconhecido')
+                    continue
+
+                # Extrair o texto traduzido
+                if "choices" in data and len(data["choices"]) > 0:
+                    tradução = data["choices"][0].get("message", {}).get("content", "").strip()
+                    if tradução:
+                        print(f"[TRADUÇÃO] Sucesso com {modelo}")
+                        return tradução
+
+                print(f"[TRADUÇÃO] Resposta inválida do modelo {modelo}")
+                última_exceção = "Resposta inválida"
+                continue
+
         except asyncio.TimeoutError:
             print(f"[TRADUÇÃO] Timeout no modelo {modelo}")
             última_exceção = "Timeout"
@@ -214,9 +216,10 @@ async def traduzir_query(
     Traduz uma query de um idioma para outro
 
     Prioridade:
-    1. OpenRouter com modelos gratuitos com fallback/rotação (se API disponível)
-    2. Mapeamento de traduções predefinidas
-    3. Retornar original como fallback final
+    1. Memória de traduções (LRU + SQLite)
+    2. OpenRouter com modelos gratuitos com fallback/rotação (se API disponível)
+    3. Mapeamento de traduções predefinidas
+    4. Retornar original como fallback final
 
     Args:
         query: Query a traduzir
@@ -231,18 +234,29 @@ async def traduzir_query(
     if idioma_origem == idioma_alvo:
         return query
 
-    # Tentar OpenRouter primeiro
-    if usar_llm and settings.OPENROUTER_API_KEY:
+    async def traduzir_llm() -> Optional[str]:
+        if not settings.OPENROUTER_API_KEY:
+            return None
         try:
             resultado = await traduzir_com_openrouter(
                 query,
                 idioma_alvo,
                 idioma_origem
             )
-            if resultado and resultado != query:
-                return resultado
         except Exception as e:
             print(f"[WARN] Tradução OpenRouter falhou: {str(e)[:100]}, usando mapeamento")
+            return None
+        return resultado if resultado and resultado != query else None
+
+    # Memória de traduções primeiro, depois OpenRouter (resultado memorizado)
+    if usar_llm:
+        memoria = get_memoria_traducao()
+        if memoria is not None:
+            resultado = await memoria.traduzir(query, idioma_origem, idioma_alvo, traduzir_llm)
+        else:
+            resultado = await traduzir_llm()
+        if resultado:
+            return resultado
 
     # Fallback: Mapping simples de traducoes comuns para idiomas principais
     # (para casos onde OpenRouter não está disponível ou falhou)
@@ -380,12 +394,23 @@ async def gerar_variacoes_query(
     return variacoes[:6]  # Retornar no maximo 6 variacoes
 
 
-async def gerar_queries_multilingues(falha: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def gerar_queries_multilingues(
+    falha: Dict[str, Any],
+    idiomas: Optional[List[str]] = None,
+    semaforo: Optional[asyncio.Semaphore] = None
+) -> List[Dict[str, Any]]:
     """
     Gera queries multilingues para uma falha de mercado
 
+    As traduções (variação x idioma) rodam em paralelo; o resultado mantém
+    a ordem variação -> idioma.
+
     Args:
         falha: Dicionario com id, titulo, descricao, dica_busca
+        idiomas: Idiomas alvo (padrão: settings.IDIOMAS)
+        semaforo: Limita as traduções simultâneas (compartilhável entre
+            falhas geradas ao mesmo tempo); None = FILA_TRADUCOES_SIMULTANEAS
+            só para esta falha
 
     Returns:
         Lista de queries com idioma, variacao e falha_id
@@ -397,40 +422,31 @@ async def gerar_queries_multilingues(falha: Dict[str, Any]) -> List[Dict[str, An
 
     # Gerar variacoes da query
     variacoes = await gerar_variacoes_query(titulo, descricao, dica_busca)
+    semaforo = semaforo or asyncio.Semaphore(settings.FILA_TRADUCOES_SIMULTANEAS)
+
+    async def gerar(num_variacao: int, variacao: str, idioma: str) -> Dict[str, Any]:
+        try:
+            # Traduzir para o idioma alvo (variacoes sao em portugues)
+            async with semaforo:
+                query_traduzida = await traduzir_query(variacao, "pt", idioma)
+        except Exception as e:
+            print(f"Erro traduzindo para {idioma}: {e}")
+            # Fallback: adicionar com prefixo de idioma
+            query_traduzida = f"[{idioma.upper()}] {variacao}"
+
+        return {
+            "falha_id": falha_id,
+            "query": query_traduzida,
+            "idioma": idioma,
+            "variacao": num_variacao,
+            "idioma_nome": MAPA_IDIOMAS_NOMES.get(idioma, idioma)
+        }
 
-    queries_multilingues = []
-
-    # Para cada variacao
-    for num_variacao, variacao in enumerate(variacoes, 1):
-        # Para cada idioma
-        for idioma in settings.IDIOMAS:
-            try:
-                # Traduzir para o idioma alvo
-                query_traduzida = await traduzir_query(
-                    variacao,
-                    "pt",  # Assumir que variacoes sao em portugues
-                    idioma
-                )
-
-                queries_multilingues.append({
-                    "falha_id": falha_id,
-                    "query": query_traduzida,
-                    "idioma": idioma,
-                    "variacao": num_variacao,
-                    "idioma_nome": MAPA_IDIOMAS_NOMES.get(idioma, idioma)
-                })
-            except Exception as e:
-                print(f"Erro traduzindo para {idioma}: {e}")
-                # Fallback: adicionar com prefixo de idioma
-                queries_multilingues.append({
-                    "falha_id": falha_id,
-                    "query": f"[{idioma.upper()}] {variacao}",
-                    "idioma": idioma,
-                    "variacao": num_variacao,
-                    "idioma_nome": MAPA_IDIOMAS_NOMES.get(idioma, idioma)
-                })
-
-    return queries_multilingues
+    return list(await asyncio.gather(*[
+        gerar(num_variacao, variacao, idioma)
+        for num_variacao, variacao in enumerate(variacoes, 1)
+        for idioma in (idiomas or settings.IDIOMAS)
+    ]))
 
 
 async def traduzir_com_claude(
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Limitadores de taxa por provedor (token bucket + orçamento de concorrência)
+
+Cada provedor externo (perplexity, jina, tavily, serper, exa, openrouter,
+embeddings) tem sua cota, então cada um recebe um limitador próprio,
+configurado em settings.LIMITES_PROVEDORES:
+
+    async with obter_limitador("tavily").reservar():
+        resposta = await cliente.pesquisar(...)
+
+- requisicoes_por_minuto / rajada: balde de tokens reabastecido
+  continuamente; uma chamada consome um token e espera quando o balde está
+  vazio (sem listas de timestamps nem atraso fixo)
+- concorrencia: chamadas simultâneas no provedor (semáforo)
+- Um 429 com Retry-After (registrar_retry_after) pausa o provedor inteiro
+  até o prazo indicado; sem o cabeçalho usa LIMITE_RETRY_AFTER_PADRAO
+
+As esperas (vaga de concorrência + token) entram num histograma por
+provedor, exposto por get_stats_limitadores().
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.database import MetricaTempo
+from app.utils import metricas
+
+_HIST_ESPERA = metricas.histograma(
+    "sebrae_limitador_espera_segundos", "Espera por token/vaga no limitador do provedor", ("provedor",)
+)
+_EM_USO = metricas.medidor(
+    "sebrae_limitador_em_uso", "Chamadas em andamento por provedor", ("provedor",)
+)
+_LIMITADAS_429 = metricas.contador(
+    "sebrae_limitador_429_total", "Respostas 429 recebidas por provedor", ("provedor",)
+)
+
+
+class MetricaEspera(MetricaTempo):
+    """Histograma de esperas por limite de taxa (faixas até minutos)"""
+
+    LIMITES_MS = (1, 10, 50, 100, 500, 1000, 5000, 15000, 60000)
+
+
+def extrair_retry_after(valor: Optional[str]) -> Optional[float]:
+    """
+    Converte o cabeçalho Retry-After em segundos
+
+    Aceita segundos ("30") ou data HTTP ("Wed, 21 Oct 2026 07:28:00 GMT").
+
+    Returns:
+        Segundos a esperar, ou None se ausente/inválido
+    """
+    if not valor:
+        return None
+    valor = str(valor).strip()
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class LimitadorProvedor:
+    """Token bucket + semáforo de concorrência de um provedor"""
+
+    def __init__(
+        self,
+        nome: str,
+        requisicoes_por_minuto: float,
+        rajada: int = 1,
+        concorrencia: int = 4
+    ):
+        """
+        Args:
+            nome: Provedor (chave em LIMITES_PROVEDORES)
+            requisicoes_por_minuto: Taxa sustentada (0 = sem limite de taxa)
+            rajada: Tokens acumuláveis (chamadas seguidas sem espera)
+            concorrencia: Chamadas simultâneas permitidas
+        """
+        self.nome = nome
+        self.taxa = requisicoes_por_minuto / 60.0
+        self.rajada = max(1, int(rajada))
+        self.concorrencia = max(1, int(concorrencia))
+        self._tokens = float(self.rajada)
+        self._ultimo = time.monotonic()
+        self._pausado_ate = 0.0
+        self._em_uso = 0
+        self._loop = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.espera = MetricaEspera()
+        self._hist_espera = _HIST_ESPERA.rotulada(nome)
+        self._contador_429 = _LIMITADAS_429.rotulada(nome)
+        self.stats = {
+            "requisicoes": 0,
+            "esperas": 0,
+            "limitadas_429": 0,
+            "segundos_pausado": 0.0
+        }
+
+    def _primitivas(self):
+        # Recria semáforo/lock se o event loop mudar (scripts, testes)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaforo = asyncio.Semaphore(self.concorrencia)
+            self._lock = asyncio.Lock()
+            self._em_uso = 0
+
+    def _reabastecer(self, agora: float):
+        if self.taxa > 0:
+            self._tokens = min(self.rajada, self._tokens + (agora - self._ultimo) * self.taxa)
+        else:
+            self._tokens = float(self.rajada)
+        self._ultimo = agora
+
+    async def _consumir_token(self):
+        # O lock mantém a ordem de chegada: quem espera o token segura a vez
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                if agora < self._pausado_ate:
+                    await asyncio.sleep(self._pausado_ate - agora)
+                    continue
+                self._reabastecer(agora)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.taxa)
+
+    def _registrar_espera(self, esperado: float):
+        self.espera.registrar(esperado)
+        self._hist_espera.registrar(esperado)
+        self.stats["requisicoes"] += 1
+        if esperado >= 0.001:
+            self.stats["esperas"] += 1
+
+    async def aguardar_token(self):
+        """Espera só o token, sem ocupar vaga de concorrência"""
+        self._primitivas()
+        inicio = time.perf_counter()
+        await self._consumir_token()
+        self._registrar_espera(time.perf_counter() - inicio)
+
+    async def adquirir(self):
+        """Espera uma vaga de concorrência e um token (use liberar() depois)"""
+        self._primitivas()
+        inicio = time.perf_counter()
+        await self._semaforo.acquire()
+        try:
+            await self._consumir_token()
+        except BaseException:
+            self._semaforo.release()
+            raise
+        self._registrar_espera(time.perf_counter() - inicio)
+        self._em_uso += 1
+
+    def liberar(self):
+        """Devolve a vaga de concorrência"""
+        self._em_uso -= 1
+        self._semaforo.release()
+
+    @asynccontextmanager
+    async def reservar(self):
+        """Context manager: adquire antes da chamada e libera ao sair"""
+        await self.adquirir()
+        try:
+            yield self
+        finally:
+            self.liberar()
+
+    def registrar_retry_after(self, segundos: Optional[Any] = None):
+        """
+        Pausa o provedor após um 429
+
+        Args:
+            segundos: Valor do Retry-After (segundos ou data HTTP); None usa
+                LIMITE_RETRY_AFTER_PADRAO
+        """
+        espera = extrair_retry_after(segundos) if segundos is not None else None
+        if espera is None:
+            espera = settings.LIMITE_RETRY_AFTER_PADRAO
+        espera = min(espera, settings.LIMITE_RETRY_AFTER_MAX)
+        agora = time.monotonic()
+        self.stats["limitadas_429"] += 1
+        self._contador_429.inc()
+        if agora + espera > self._pausado_ate:
+            self.stats["segundos_pausado"] += agora + espera - max(agora, self._pausado_ate)
+            self._pausado_ate = agora + espera
+        # O balde esvazia: ao fim da pausa as chamadas voltam na taxa sustentada
+        self._tokens = 0.0
+        self._ultimo = max(agora, self._pausado_ate)
+        print(f"[LIMITE] {self.nome}: 429 recebido, pausando por {espera:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do limitador"""
+        restante = self._pausado_ate - time.monotonic()
+        return {
+            **self.stats,
+            "requisicoes_por_minuto": round(self.taxa * 60, 3),
+            "rajada": self.rajada,
+            "concorrencia": self.concorrencia,
+            "em_uso": self._em_uso,
+            "pausado_por_segundos": round(restante, 3) if restante > 0 else 0.0,
+            "espera": self.espera.resumo()
+        }
+
+
+_limitadores: Dict[str, LimitadorProvedor] = {}
+
+
+def obter_limitador(provedor: str) -> LimitadorProvedor:
+    """
+    Retorna o limitador do provedor (criado na primeira chamada)
+
+    Provedores sem entrada em LIMITES_PROVEDORES usam LIMITE_PROVEDOR_PADRAO.
+    """
+    limitador = _limitadores.get(provedor)
+    if limitador is None:
+        config = settings.LIMITES_PROVEDORES.get(provedor, settings.LIMITE_PROVEDOR_PADRAO)
+        limitador = LimitadorProvedor(provedor, **config)
+        _limitadores[provedor] = limitador
+    return limitador
+
+
+def get_stats_limitadores() -> Dict[str, Dict[str, Any]]:
+    """Estatísticas de todos os limitadores criados"""
+    return {nome: limitador.get_stats() for nome, limitador in _limitadores.items()}
+
+
+def _coletar_metricas_limitadores():
+    """Chamadas em andamento de cada limitador (medidor do /api/metrics)"""
+    for nome, limitador in _limitadores.items():
+        _EM_USO.rotulada(nome).definir(limitador._em_uso)
+
+
+metricas.registrar_coletor(_coletar_metricas_limitadores)
+
+
+def resetar_limitadores():
+    """Descarta os limitadores (recriados com a configuração atual)"""
+    _limitadores.clear()
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Memória de traduções compartilhada (SQLite + LRU em processo)
+
+Toda tradução bem-sucedida é gravada na tabela memoria_traducao com chave
+(idioma_origem, idioma_alvo, SHA-256 do texto normalizado). Antes de chamar
+o LLM, os caminhos de tradução (OpenRouterClient.traduzir_texto,
+_traduzir_texto, traduzir_titulo_descricao e, por eles, traduzir_query e
+salvar_resultado) consultam:
+
+    LRU em processo -> tabela memoria_traducao -> LLM
+
+Traduções do mesmo texto pedidas ao mesmo tempo (ex.: workers salvando
+resultados com o mesmo título) compartilham uma única chamada ao LLM.
+Falhas (texto original devolvido como fallback) não são gravadas.
+
+Os scripts síncronos (scripts/traduzir_*.py) usam a mesma tabela através
+de listar_sync/gravar_sync.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.database import SQL_TABELA_MEMORIA_TRADUCAO, db
+
+# Máximo de parâmetros por SELECT ... IN (limite do SQLite antigo: 999)
+_TAMANHO_LOTE_SQL = 500
+
+_SQL_GRAVAR = """
+INSERT INTO memoria_traducao (idioma_origem, idioma_alvo, hash_texto, texto_origem, traducao)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(idioma_origem, idioma_alvo, hash_texto) DO UPDATE SET traducao = excluded.traducao
+"""
+
+Chave = Tuple[str, str, str]
+
+
+def normalizar_texto(texto: str) -> str:
+    """Forma canônica do texto para a chave (NFC, espaços colapsados)"""
+    return " ".join(unicodedata.normalize("NFC", texto).split())
+
+
+def hash_texto(texto: str) -> str:
+    """SHA-256 (hex) do texto normalizado"""
+    return hashlib.sha256(normalizar_texto(texto).encode("utf-8")).hexdigest()
+
+
+class MemoriaTraducao:
+    """Memória de traduções com LRU na frente da tabela SQLite"""
+
+    def __init__(self, database=None, tamanho_lru: Optional[int] = None):
+        """
+        Args:
+            database: Database a usar (padrão: app.database.db)
+            tamanho_lru: Traduções mantidas em memória
+        """
+        self.database = database
+        self.tamanho_lru = tamanho_lru or settings.TRADUCAO_MEMORIA_LRU
+        self._lru: "OrderedDict[Chave, str]" = OrderedDict()
+        self._em_andamento: Dict[Chave, asyncio.Future] = {}
+        self.stats = {
+            "consultas": 0,
+            "acertos_lru": 0,
+            "acertos_banco": 0,
+            "faltas": 0,
+            "traducoes_compartilhadas": 0,
+            "gravacoes": 0,
+            "erros_banco": 0
+        }
+
+    @property
+    def _db(self):
+        return self.database or db
+
+    @staticmethod
+    def chave(texto: str, idioma_origem: str, idioma_alvo: str) -> Chave:
+        return (idioma_origem, idioma_alvo, hash_texto(texto))
+
+    def _guardar_lru(self, chave: Chave, traducao: str):
+        self._lru[chave] = traducao
+        self._lru.move_to_end(chave)
+        if len(self._lru) > self.tamanho_lru:
+            self._lru.popitem(last=False)
+
+    async def obter_lote(
+        self,
+        textos: Iterable[str],
+        idioma_origem: str,
+        idioma_alvo: str
+    ) -> Dict[str, str]:
+        """
+        Busca várias traduções de uma vez (LRU, depois um SELECT por lote)
+
+        Returns:
+            Dict texto -> tradução, só com os textos encontrados
+        """
+        encontrados: Dict[str, str] = {}
+        faltando: Dict[str, List[str]] = {}
+        for texto in dict.fromkeys(textos):
+            if not texto:
+                continue
+            self.stats["consultas"] += 1
+            chave = self.chave(texto, idioma_origem, idioma_alvo)
+            traducao = self._lru.get(chave)
+            if traducao is not None:
+                self._lru.move_to_end(chave)
+                self.stats["acertos_lru"] += 1
+                encontrados[texto] = traducao
+            else:
+                faltando.setdefault(chave[2], []).append(texto)
+
+        hashes = list(faltando)
+        for inicio in range(0, len(hashes), _TAMANHO_LOTE_SQL):
+            parte = hashes[inicio:inicio + _TAMANHO_LOTE_SQL]
+            marcadores = ", ".join("?" * len(parte))
+            try:
+                linhas = await self._db.fetch_all(
+                    f"""
+                    SELECT hash_texto, traducao FROM memoria_traducao
+                    WHERE idioma_origem = ? AND idioma_alvo = ? AND hash_texto IN ({marcadores})
+                    """,
+                    (idioma_origem, idioma_alvo, *parte)
+                )
+            except Exception as e:
+                # Memória indisponível (ex.: tabela ainda não criada): segue sem cache
+                print(f"[MEMORIA TRADUCAO] Erro na consulta: {str(e)[:100]}")
+                self.stats["erros_banco"] += 1
+                continue
+            for linha in linhas:
+                self._guardar_lru((idioma_origem, idioma_alvo, linha["hash_texto"]), linha["traducao"])
+                for texto in faltando[linha["hash_texto"]]:
+                    self.stats["acertos_banco"] += 1
+                    encontrados[texto] = linha["traducao"]
+
+        self.stats["faltas"] += sum(
+            1 for textos_hash in faltando.values() for texto in textos_hash if texto not in encontrados
+        )
+        return encontrados
+
+    async def obter(self, texto: str, idioma_origem: str, idioma_alvo: str) -> Optional[str]:
+        """Tradução memorizada do texto, ou None"""
+        return (await self.obter_lote([texto], idioma_origem, idioma_alvo)).get(texto)
+
+    async def gravar_lote(self, pares: Iterable[Tuple[str, str]], idioma_origem: str, idioma_alvo: str):
+        """Grava pares (texto, tradução) numa transação (a última tradução prevalece)"""
+        linhas = []
+        for texto, traducao in pares:
+            if not texto or not traducao:
+                continue
+            chave = self.chave(texto, idioma_origem, idioma_alvo)
+            self._guardar_lru(chave, traducao)
+            linhas.append((idioma_origem, idioma_alvo, chave[2], texto, traducao))
+        if not linhas:
+            return
+        try:
+            await self._db.execute_many(_SQL_GRAVAR, linhas)
+            self.stats["gravacoes"] += len(linhas)
+        except Exception as e:
+            print(f"[MEMORIA TRADUCAO] Erro ao gravar: {str(e)[:100]}")
+            self.stats["erros_banco"] += 1
+
+    async def gravar(self, texto: str, idioma_origem: str, idioma_alvo: str, traducao: str):
+        """Grava uma tradução"""
+        await self.gravar_lote([(texto, traducao)], idioma_origem, idioma_alvo)
+
+    async def traduzir(
+        self,
+        texto: str,
+        idioma_origem: str,
+        idioma_alvo: str,
+        traduzir: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """
+        Retorna a tradução memorizada ou chama `traduzir` (uma vez por texto)
+
+        Args:
+            traduzir: Corrotina sem argumentos que traduz o texto; deve
+                retornar None em caso de falha (não memorizado)
+
+        Returns:
+            Tradução, ou None se não memorizada e `traduzir` falhou
+        """
+        traducao = await self.obter(texto, idioma_origem, idioma_alvo)
+        if traducao is not None:
+            return traducao
+
+        chave = self.chave(texto, idioma_origem, idioma_alvo)
+        em_andamento = self._em_andamento.get(chave)
+        if em_andamento is not None:
+            self.stats["traducoes_compartilhadas"] += 1
+            # wait() não cancela a tradução compartilhada se este chamador for cancelado
+            await asyncio.wait([em_andamento])
+            return None if em_andamento.cancelled() else em_andamento.result()
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_andamento[chave] = futuro
+        try:
+            traducao = await traduzir()
+            if traducao:
+                await self.gravar(texto, idioma_origem, idioma_alvo, traducao)
+            futuro.set_result(traducao or None)
+            return traducao or None
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as e:
+            futuro.set_exception(e)
+            # Quem aguardava recebe a exceção; evita aviso de exceção não lida
+            futuro.exception()
+            raise
+        finally:
+            self._em_andamento.pop(chave, None)
+
+    def limpar_lru(self):
+        """Esvazia o LRU (a tabela é mantida)"""
+        self._lru.clear()
+
+    def get_stats(self) -> dict:
+        """Estatísticas de acerto da memória"""
+        acertos = self.stats["acertos_lru"] + self.stats["acertos_banco"]
+        return {
+            **self.stats,
+            "itens_lru": len(self._lru),
+            "taxa_acerto": round(acertos / self.stats["consultas"], 4) if self.stats["consultas"] else 0.0
+        }
+
+
+_memoria: Optional[MemoriaTraducao] = None
+
+
+def get_memoria_traducao() -> Optional[MemoriaTraducao]:
+    """Memória de traduções global (None se desativada em settings)"""
+    global _memoria
+    if not settings.TRADUCAO_MEMORIA_ATIVA:
+        return None
+    if _memoria is None:
+        _memoria = MemoriaTraducao()
+    return _memoria
+
+
+# Acesso síncrono para os scripts (sqlite3, sem event loop)
+
+def listar_sync(db_path: Union[str, Path], idioma_origem: str) -> List[Tuple[str, str, str]]:
+    """
+    Traduções memorizadas a partir de um idioma
+
+    Returns:
+        Lista de (idioma_alvo, texto_origem, traducao)
+    """
+    # `with conn` só faz commit/rollback; closing fecha a conexão
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.executescript(SQL_TABELA_MEMORIA_TRADUCAO)
+        return conn.execute(
+            "SELECT idioma_alvo, texto_origem, traducao FROM memoria_traducao WHERE idioma_origem = ?",
+            (idioma_origem,)
+        ).fetchall()
+
+
+def gravar_sync(
+    db_path: Union[str, Path],
+    idioma_origem: str,
+    traducoes: Iterable[Tuple[str, str, str]]
+) -> int:
+    """
+    Grava traduções (idioma_alvo, texto_origem, traducao) numa transação
+
+    Returns:
+        Número de traduções gravadas
+    """
+    linhas = [
+        (idioma_origem, alvo, hash_texto(texto), texto, traducao)
+        for alvo, texto, traducao in traducoes
+        if texto and traducao
+    ]
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.executescript(SQL_TABELA_MEMORIA_TRADUCAO)
+        conn.executemany(_SQL_GRAVAR, linhas)
+    return len(linhas)
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de métricas em processo (contadores, medidores e histogramas)
+
+Os pontos quentes (queries do SQLite, canais de busca, embeddings, chamadas
+de LLM, consultas vetoriais e a fila de pesquisas) registram direto em
+objetos pré-criados no import do módulo; o custo por registro é uma busca
+em dicionário (só para séries com rótulo) e algumas operações aritméticas,
+sem locks nem alocação. A exportação no formato texto do Prometheus
+(GET /api/metrics) é feita só quando alguém consulta.
+
+- Histogramas no estilo HDR: buckets log-lineares (SUBBUCKETS por potência
+  de 2, de RESOLUCAO_S até ~4,5 min), com erro relativo de no máximo
+  1/(2*SUBBUCKETS). Os limites (`le`) de cada bucket são fixos; só buckets
+  já usados são exportados, então o conjunto de séries apenas cresce.
+- Coletores (registrar_coletor) rodam na exportação e convertem em
+  medidores as estatísticas que já existem (limitadores, pool do banco...).
+- Roda no loop asyncio: sem locks (um registro vindo de thread pode, no
+  pior caso, perder um incremento).
+"""
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Menor latência distinguível e número de buckets por potência de 2
+RESOLUCAO_S = 1e-6
+SUBBUCKETS = 4
+_EXPOENTES = 28  # 2^28 µs ≈ 268 s; acima disso vai para +Inf
+_NUM_BUCKETS = _EXPOENTES * SUBBUCKETS
+
+
+def _limite_bucket(indice: int) -> float:
+    """Limite superior (segundos) do bucket `indice`"""
+    expoente, sub = divmod(indice, SUBBUCKETS)
+    return (0.5 + (sub + 1) / (2 * SUBBUCKETS)) * 2.0 ** (expoente + 1) * RESOLUCAO_S
+
+
+_LIMITES = [_limite_bucket(i) for i in range(_NUM_BUCKETS)]
+_LE_INF = 'le="+Inf"'
+
+
+class Contador:
+    """Valor que só cresce"""
+
+    __slots__ = ("valor",)
+
+    def __init__(self):
+        self.valor = 0.0
+
+    def inc(self, quantidade: float = 1.0):
+        self.valor += quantidade
+
+
+class Medidor:
+    """Valor que sobe e desce (tamanho de fila, itens em andamento)"""
+
+    __slots__ = ("valor",)
+
+    def __init__(self):
+        self.valor = 0.0
+
+    def definir(self, valor: float):
+        self.valor = valor
+
+    def inc(self, quantidade: float = 1.0):
+        self.valor += quantidade
+
+    def dec(self, quantidade: float = 1.0):
+        self.valor -= quantidade
+
+
+class _Cronometro:
+    """Context manager que registra no histograma o tempo do bloco"""
+
+    __slots__ = ("histograma", "inicio")
+
+    def __init__(self, histograma: "Histograma"):
+        self.histograma = histograma
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.registrar(time.perf_counter() - self.inicio)
+        return False
+
+
+class Histograma:
+    """Distribuição de latências (segundos) em buckets log-lineares"""
+
+    __slots__ = ("buckets", "contagem", "soma", "maximo")
+
+    def __init__(self):
+        self.buckets = [0] * (_NUM_BUCKETS + 1)  # Último = acima do maior limite
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos: float):
+        self.contagem += 1
+        self.soma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        if segundos <= RESOLUCAO_S:
+            self.buckets[0] += 1
+            return
+        # valor = mantissa * 2^expoente, mantissa em [0.5, 1); limites são inclusivos (le)
+        mantissa, expoente = math.frexp(segundos / RESOLUCAO_S)
+        indice = (expoente - 1) * SUBBUCKETS + math.ceil((mantissa - 0.5) * 2 * SUBBUCKETS) - 1
+        self.buckets[indice if indice < _NUM_BUCKETS else _NUM_BUCKETS] += 1
+
+    def medir(self) -> _Cronometro:
+        """`with histograma.medir():` registra a duração do bloco"""
+        return _Cronometro(self)
+
+    def quantil(self, q: float) -> float:
+        """Limite superior do bucket que contém o quantil `q` (0-1)"""
+        if not self.contagem:
+            return 0.0
+        alvo = q * self.contagem
+        acumulado = 0
+        for indice, quantidade in enumerate(self.buckets):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return min(_LIMITES[indice], self.maximo) if indice < _NUM_BUCKETS else self.maximo
+        return self.maximo
+
+    def resumo(self) -> Dict[str, float]:
+        """Contagem, média e percentis em ms"""
+        return {
+            "contagem": self.contagem,
+            "media_ms": round(self.soma / self.contagem * 1000, 3) if self.contagem else 0.0,
+            "p50_ms": round(self.quantil(0.5) * 1000, 3),
+            "p90_ms": round(self.quantil(0.9) * 1000, 3),
+            "p99_ms": round(self.quantil(0.99) * 1000, 3),
+            "max_ms": round(self.maximo * 1000, 3)
+        }
+
+
+_TIPOS = {"counter": Contador, "gauge": Medidor, "histogram": Histograma}
+
+
+class Familia:
+    """Métrica com nome e rótulos; cada combinação de valores é uma série"""
+
+    def __init__(self, nome: str, tipo: str, ajuda: str, rotulos: Tuple[str, ...]):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._classe = _TIPOS[tipo]
+        self.series: Dict[Tuple[str, ...], object] = {}
+        if not rotulos:
+            self.series[()] = self._classe()
+
+    def rotulada(self, *valores: str):
+        """
+        Série para os valores de rótulo (na ordem de `rotulos`), criada no primeiro uso
+
+        Família sem rótulos: `rotulada()`. Nos pontos quentes guarde a série
+        (ou use valores fixos) para evitar montar a tupla a cada registro.
+        """
+        serie = self.series.get(valores)
+        if serie is None:
+            if len(valores) != len(self.rotulos):
+                raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}")
+            serie = self.series[valores] = self._classe()
+        return serie
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == math.inf:
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+def _formatar_rotulos(nomes: Tuple[str, ...], valores: Tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class RegistroMetricas:
+    """Famílias de métricas da aplicação e coletores chamados na exportação"""
+
+    def __init__(self):
+        self._familias: Dict[str, Familia] = {}
+        self._coletores: List[Callable[[], None]] = []
+
+    def _familia(self, nome: str, tipo: str, ajuda: str, rotulos: Tuple[str, ...]) -> Familia:
+        familia = self._familias.get(nome)
+        if familia is None:
+            familia = self._familias[nome] = Familia(nome, tipo, ajuda, tuple(rotulos))
+        elif familia.tipo != tipo or familia.rotulos != tuple(rotulos):
+            raise ValueError(f"Métrica {nome} já registrada como {familia.tipo}{familia.rotulos}")
+        return familia
+
+    def contador(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()) -> Familia:
+        return self._familia(nome, "counter", ajuda, rotulos)
+
+    def medidor(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()) -> Familia:
+        return self._familia(nome, "gauge", ajuda, rotulos)
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()) -> Familia:
+        return self._familia(nome, "histogram", ajuda, rotulos)
+
+    def registrar_coletor(self, coletor: Callable[[], None]):
+        """Função chamada antes de cada exportação (atualiza medidores)"""
+        if coletor not in self._coletores:
+            self._coletores.append(coletor)
+
+    def obter(self, nome: str) -> Optional[Familia]:
+        return self._familias.get(nome)
+
+    def _coletar(self):
+        for coletor in self._coletores:
+            try:
+                coletor()
+            except Exception as e:
+                print(f"[METRICAS] Erro no coletor {getattr(coletor, '__name__', coletor)}: {e}")
+
+    def exportar_prometheus(self) -> str:
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)"""
+        self._coletar()
+        linhas = []
+        for familia in sorted(self._familias.values(), key=lambda f: f.nome):
+            if not familia.series:
+                continue
+            linhas.append(f"# HELP {familia.nome} {familia.ajuda}")
+            linhas.append(f"# TYPE {familia.nome} {familia.tipo}")
+            for valores, serie in sorted(familia.series.items()):
+                if familia.tipo == "histogram":
+                    linhas.extend(self._linhas_histograma(familia, valores, serie))
+                else:
+                    rotulos = _formatar_rotulos(familia.rotulos, valores)
+                    linhas.append(f"{familia.nome}{rotulos} {_formatar_numero(serie.valor)}")
+        return "\n".join(linhas) + "\n"
+
+    @staticmethod
+    def _linhas_histograma(familia: Familia, valores: Tuple[str, ...], serie: Histograma) -> List[str]:
+        linhas = []
+        acumulado = 0
+        for indice, quantidade in enumerate(serie.buckets[:_NUM_BUCKETS]):
+            if quantidade:
+                acumulado += quantidade
+                le = f'le="{_LIMITES[indice]:.9g}"'
+                linhas.append(
+                    f"{familia.nome}_bucket{_formatar_rotulos(familia.rotulos, valores, le)} {acumulado}"
+                )
+        linhas.append(
+            f"{familia.nome}_bucket{_formatar_rotulos(familia.rotulos, valores, _LE_INF)} {serie.contagem}"
+        )
+        rotulos = _formatar_rotulos(familia.rotulos, valores)
+        linhas.append(f"{familia.nome}_sum{rotulos} {_formatar_numero(serie.soma)}")
+        linhas.append(f"{familia.nome}_count{rotulos} {serie.contagem}")
+        return linhas
+
+    def resumo(self) -> Dict[str, Dict[str, object]]:
+        """Visão JSON: valor de contadores/medidores e percentis dos histogramas"""
+        self._coletar()
+        saida = {}
+        for nome, familia in sorted(self._familias.items()):
+            for valores, serie in familia.series.items():
+                chave = nome + _formatar_rotulos(familia.rotulos, valores)
+                saida[chave] = serie.resumo() if familia.tipo == "histogram" else serie.valor
+        return saida
+
+
+registro = RegistroMetricas()
+contador = registro.contador
+medidor = registro.medidor
+histograma = registro.histograma
+registrar_coletor = registro.registrar_coletor
+
+
+# Chamadas de LLM (vários clientes registram na mesma família)
+_HIST_LLM = histograma("sebrae_llm_chamada_segundos", "Duração das chamadas de LLM por modelo", ("modelo",))
+_CHAMADAS_LLM = contador(
+    "sebrae_llm_chamadas_total", "Chamadas de LLM por modelo e resultado (ok/erro/cancelada)", ("modelo", "resultado")
+)
+
+
+class _ChamadaLLM:
+    """Context manager: tempo e resultado de uma chamada de LLM"""
+
+    __slots__ = ("modelo", "inicio")
+
+    def __init__(self, modelo: str):
+        self.modelo = modelo
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        _HIST_LLM.rotulada(self.modelo).registrar(time.perf_counter() - self.inicio)
+        if tipo is None:
+            resultado = "ok"
+        elif issubclass(tipo, asyncio.CancelledError):
+            resultado = "cancelada"
+        else:
+            resultado = "erro"
+        _CHAMADAS_LLM.rotulada(self.modelo, resultado).inc()
+        return False
+
+
+def medir_chamada_llm(modelo: str) -> _ChamadaLLM:
+    """`with medir_chamada_llm(modelo):` em volta da requisição (sem a espera do limitador)"""
+    return _ChamadaLLM(modelo)
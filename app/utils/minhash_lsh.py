@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Índice MinHash + LSH (banding) para busca de quase-duplicados por Jaccard
+
+Cada conjunto de tokens recebe uma assinatura MinHash de `num_perm` valores;
+a assinatura é dividida em `bandas` faixas de `linhas` valores e cada faixa
+vira uma chave de bucket. Conjuntos que coincidem em pelo menos uma faixa
+são candidatos; a similaridade Jaccard exata é verificada só nesses
+candidatos, então o resultado nunca tem falsos positivos.
+
+A probabilidade de um par com Jaccard J virar candidato é
+1 - (1 - J^linhas)^bandas. As faixas são escolhidas para que, no limiar,
+a chance de perder um par seja menor que `max_falso_negativo`.
+"""
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_PRIMO_MERSENNE = np.uint64((1 << 61) - 1)
+_MASCARA_32 = np.uint64(0xFFFFFFFF)
+
+
+def similaridade_jaccard(tokens1: Set[str], tokens2: Set[str]) -> float:
+    """Jaccard entre dois conjuntos de tokens (0.0 se algum for vazio)"""
+    if not tokens1 or not tokens2:
+        return 0.0
+    intersecao = len(tokens1 & tokens2)
+    return intersecao / (len(tokens1) + len(tokens2) - intersecao)
+
+
+def escolher_bandas(threshold: float, num_perm: int, max_falso_negativo: float = 1e-6) -> Tuple[int, int]:
+    """
+    Escolhe (bandas, linhas) com o maior número de linhas por banda que
+    mantém P(perder par com Jaccard == threshold) <= max_falso_negativo
+
+    Mais linhas por banda = menos candidatos falsos a verificar.
+    """
+    melhor = (num_perm, 1)
+    for linhas in range(1, num_perm + 1):
+        bandas = num_perm // linhas
+        falso_negativo = (1.0 - threshold ** linhas) ** bandas
+        if falso_negativo <= max_falso_negativo:
+            melhor = (bandas, linhas)
+    return melhor
+
+
+class IndiceMinHashLSH:
+    """Índice de conjuntos de tokens com consulta sub-linear por Jaccard"""
+
+    def __init__(
+        self,
+        threshold: float,
+        num_perm: int = 128,
+        max_falso_negativo: float = 1e-6,
+        seed: int = 1
+    ):
+        """
+        Args:
+            threshold: Jaccard mínimo considerado similar
+            num_perm: Tamanho da assinatura MinHash
+            max_falso_negativo: Chance máxima de não encontrar um par no limiar
+            seed: Semente das funções de hash
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bandas, self.linhas = escolher_bandas(threshold, num_perm, max_falso_negativo)
+
+        rng = np.random.default_rng(seed)
+        primo = int(_PRIMO_MERSENNE)
+        self._a = rng.integers(1, primo, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, primo, size=num_perm, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bandas)]
+        self._tokens: Dict[Hashable, FrozenSet[str]] = {}
+
+        self.stats = {"consultas": 0, "candidatos_verificados": 0}
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._tokens
+
+    def tokens(self, chave: Hashable) -> Optional[FrozenSet[str]]:
+        """Conjunto de tokens armazenado para a chave"""
+        return self._tokens.get(chave)
+
+    def assinatura(self, tokens: Iterable[str]) -> np.ndarray:
+        """Assinatura MinHash (num_perm valores de 32 bits)"""
+        valores = np.fromiter(
+            (hash(token) & 0xFFFFFFFF for token in tokens), dtype=np.uint64
+        )
+        if valores.size == 0:
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint64)
+        permutados = (np.outer(self._a, valores) + self._b[:, None]) % _PRIMO_MERSENNE
+        return (permutados & _MASCARA_32).min(axis=1)
+
+    def _chaves_bandas(self, assinatura: np.ndarray) -> List[bytes]:
+        n = self.linhas
+        return [assinatura[i * n:(i + 1) * n].tobytes() for i in range(self.bandas)]
+
+    def adicionar(self, chave: Hashable, tokens: Iterable[str]):
+        """Indexa um conjunto de tokens sob `chave` (conjuntos vazios não são indexados)"""
+        conjunto = frozenset(tokens)
+        if not conjunto or chave in self._tokens:
+            return
+        for buckets, chave_banda in zip(self._buckets, self._chaves_bandas(self.assinatura(conjunto))):
+            buckets.setdefault(chave_banda, []).append(chave)
+        self._tokens[chave] = conjunto
+
+    def candidatos(self, tokens: Set[str]) -> Set[Hashable]:
+        """Chaves que compartilham ao menos uma banda com `tokens`"""
+        if not tokens:
+            return set()
+        encontrados: Set[Hashable] = set()
+        for buckets, chave_banda in zip(self._buckets, self._chaves_bandas(self.assinatura(tokens))):
+            bucket = buckets.get(chave_banda)
+            if bucket:
+                encontrados.update(bucket)
+        return encontrados
+
+    def consultar(self, tokens: Set[str]) -> List[Tuple[Hashable, float]]:
+        """
+        Retorna (chave, jaccard) dos conjuntos com Jaccard >= threshold
+
+        Só os candidatos do LSH têm a similaridade calculada.
+        """
+        self.stats["consultas"] += 1
+        similares = []
+        for chave in self.candidatos(tokens):
+            self.stats["candidatos_verificados"] += 1
+            similaridade = similaridade_jaccard(tokens, self._tokens[chave])
+            if similaridade >= self.threshold:
+                similares.append((chave, similaridade))
+        return similares
+
+    def limpar(self):
+        """Remove todos os conjuntos indexados"""
+        self._buckets = [{} for _ in range(self.bandas)]
+        self._tokens = {}
+
+    def get_stats(self) -> dict:
+        """Estatísticas do índice"""
+        return {
+            **self.stats,
+            "indexados": len(self._tokens),
+            "bandas": self.bandas,
+            "linhas_por_banda": self.linhas,
+            "candidatos_por_consulta": (
+                self.stats["candidatos_verificados"] / self.stats["consultas"]
+                if self.stats["consultas"] else 0.0
+            )
+        }
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Índice aproximado de vizinhos mais próximos (IVF) em NumPy puro
+
+O espaço é particionado em `n_listas` células por k-means; cada vetor fica na
+lista invertida do centróide mais próximo. Uma consulta visita apenas as
+`n_probe` células mais próximas e calcula a distância exata só nesses
+candidatos. `n_probe` é o controle de recall x latência: quanto maior, mais
+próximo da busca exata (n_probe == n_listas equivale à busca exata).
+
+Os vetores de cada célula são mantidos numa cópia contígua (construída sob
+demanda), o que dobra a memória da coleção indexada em troca de buscas sem
+gather de linhas espalhadas.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class IVFIndex:
+    """Índice IVF (inverted file) construído incrementalmente"""
+
+    def __init__(
+        self,
+        n_probe: int = 8,
+        n_listas: Optional[int] = None,
+        min_docs: int = 5000,
+        fator_retreino: float = 4.0,
+        iteracoes_kmeans: int = 10,
+        seed: int = 42
+    ):
+        """
+        Inicializa o índice
+
+        Args:
+            n_probe: Número de células visitadas por consulta (recall x latência)
+            n_listas: Número de células; None = ~sqrt(N) no momento do treino
+            min_docs: Abaixo deste tamanho a coleção usa busca exata
+            fator_retreino: Retreina quando a coleção cresce este fator desde o último treino
+            iteracoes_kmeans: Iterações de Lloyd no treino
+            seed: Semente para amostragem e inicialização dos centróides
+        """
+        self.n_probe = n_probe
+        self.n_listas = n_listas
+        self.min_docs = min_docs
+        self.fator_retreino = fator_retreino
+        self.iteracoes_kmeans = iteracoes_kmeans
+        self.seed = seed
+
+        self.centroides: Optional[np.ndarray] = None
+        self._listas: List[List[int]] = []
+        self._blocos: List[Optional[tuple]] = []  # Cache contíguo por célula
+        self._tamanho_treino = 0
+        self._indexados = 0
+
+    @property
+    def treinado(self) -> bool:
+        """Se o índice já possui centróides"""
+        return self.centroides is not None
+
+    def usar_busca_exata(self, total_docs: int) -> bool:
+        """Indica se a coleção deve cair para busca exata"""
+        return (
+            not self.treinado
+            or total_docs < self.min_docs
+            or self.n_probe >= len(self.centroides)
+        )
+
+    def atualizar(self, matriz: np.ndarray):
+        """
+        Sincroniza o índice com a matriz da coleção (chamado após cada add)
+
+        Treina ao atingir `min_docs`, retreina quando a coleção cresce
+        `fator_retreino` vezes e, no caso comum, apenas atribui as novas
+        linhas às células existentes (custo O(novas linhas × n_listas)).
+        """
+        total = matriz.shape[0]
+        if total < self.min_docs:
+            return
+
+        if not self.treinado or total >= self._tamanho_treino * self.fator_retreino:
+            self._treinar(matriz)
+            return
+
+        if total > self._indexados:
+            self._atribuir(matriz[self._indexados:total], self._indexados)
+            self._indexados = total
+
+    def _treinar(self, matriz: np.ndarray):
+        """Executa k-means numa amostra e reconstrói as listas invertidas"""
+        total = matriz.shape[0]
+        n_listas = self.n_listas or max(1, int(np.sqrt(total)))
+        n_listas = min(n_listas, total)
+
+        rng = np.random.default_rng(self.seed)
+        tamanho_amostra = min(total, n_listas * 64)
+        amostra = np.asarray(matriz[np.sort(rng.choice(total, size=tamanho_amostra, replace=False))])
+        centroides = self._inicializar_kmeans_pp(amostra, n_listas, rng)
+
+        for _ in range(self.iteracoes_kmeans):
+            rotulos = self._mais_proximo(amostra, centroides)
+            somas = np.zeros_like(centroides)
+            np.add.at(somas, rotulos, amostra)
+            contagens = np.bincount(rotulos, minlength=n_listas)
+            ocupadas = contagens > 0
+            centroides[ocupadas] = somas[ocupadas] / contagens[ocupadas, None]
+            # Células vazias recebem pontos aleatórios da amostra
+            vazias = np.flatnonzero(~ocupadas)
+            if vazias.size:
+                centroides[vazias] = amostra[rng.choice(tamanho_amostra, size=vazias.size, replace=False)]
+
+        self.centroides = centroides.astype(np.float32)
+        self._listas = [[] for _ in range(n_listas)]
+        self._blocos = [None] * n_listas
+        self._atribuir(matriz, 0)
+        self._tamanho_treino = total
+        self._indexados = total
+
+    @staticmethod
+    def _inicializar_kmeans_pp(amostra: np.ndarray, n_listas: int, rng) -> np.ndarray:
+        """Sementes k-means++: cada centróide é sorteado com peso na distância² ao mais próximo"""
+        n = amostra.shape[0]
+        normas = np.einsum("ij,ij->i", amostra, amostra)
+        centroides = np.empty((n_listas, amostra.shape[1]), dtype=np.float32)
+        primeiro = rng.integers(n)
+        centroides[0] = amostra[primeiro]
+        dist_min = np.maximum(normas + normas[primeiro] - 2.0 * (amostra @ amostra[primeiro]), 0.0)
+
+        for i in range(1, n_listas):
+            soma = float(dist_min.sum())
+            escolhido = rng.choice(n, p=dist_min / soma) if soma > 0 else rng.integers(n)
+            centroides[i] = amostra[escolhido]
+            dist = normas + normas[escolhido] - 2.0 * (amostra @ amostra[escolhido])
+            np.minimum(dist_min, np.maximum(dist, 0.0), out=dist_min)
+
+        return centroides
+
+    @staticmethod
+    def _mais_proximo(vetores: np.ndarray, centroides: np.ndarray, bloco: int = 8192) -> np.ndarray:
+        """Índice do centróide mais próximo de cada vetor (em blocos para limitar memória)"""
+        normas_c = np.einsum("ij,ij->i", centroides, centroides)
+        rotulos = np.empty(vetores.shape[0], dtype=np.int64)
+        for inicio in range(0, vetores.shape[0], bloco):
+            parte = vetores[inicio:inicio + bloco]
+            # ||x||² é constante por linha e não altera o argmin
+            dist = normas_c[None, :] - 2.0 * (parte @ centroides.T)
+            rotulos[inicio:inicio + bloco] = np.argmin(dist, axis=1)
+        return rotulos
+
+    def _atribuir(self, vetores: np.ndarray, deslocamento: int):
+        """Adiciona linhas (posições a partir de `deslocamento`) às listas"""
+        rotulos = self._mais_proximo(vetores, self.centroides)
+        for posicao, rotulo in enumerate(rotulos.tolist(), start=deslocamento):
+            self._listas[rotulo].append(posicao)
+            self._blocos[rotulo] = None
+
+    def _bloco(self, celula: int, matriz: np.ndarray, normas_sq: np.ndarray):
+        """
+        Posições, vetores e normas da célula em memória contígua
+
+        A cópia é refeita apenas quando a célula recebe novas linhas, de modo
+        que a busca não precisa reunir linhas espalhadas da matriz a cada consulta.
+        """
+        bloco = self._blocos[celula]
+        if bloco is None:
+            posicoes = np.asarray(self._listas[celula], dtype=np.int64)
+            bloco = (posicoes, matriz[posicoes], normas_sq[posicoes])
+            self._blocos[celula] = bloco
+        return bloco
+
+    def buscar(
+        self,
+        consultas: np.ndarray,
+        k: int,
+        matriz: np.ndarray,
+        normas_sq: np.ndarray
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Retorna (posições, distâncias²) dos candidatos de cada consulta
+
+        Visita as `n_probe` células mais próximas; se não somarem `k`
+        candidatos, continua pelas próximas células em ordem de distância.
+        """
+        normas_c = np.einsum("ij,ij->i", self.centroides, self.centroides)
+        dist_c = normas_c[None, :] - 2.0 * (consultas @ self.centroides.T)
+        ordem = np.argsort(dist_c, axis=1)
+
+        resultado = []
+        for consulta, linha in zip(consultas, ordem):
+            norma_q = float(consulta @ consulta)
+            posicoes, distancias = [], []
+            encontrados = 0
+            for visitadas, celula in enumerate(linha.tolist()):
+                if visitadas >= self.n_probe and encontrados >= k:
+                    break
+                pos, vetores, normas = self._bloco(celula, matriz, normas_sq)
+                if not pos.size:
+                    continue
+                dist_sq = vetores @ consulta
+                dist_sq *= -2.0
+                dist_sq += normas
+                dist_sq += norma_q
+                posicoes.append(pos)
+                distancias.append(dist_sq)
+                encontrados += pos.size
+
+            if posicoes:
+                resultado.append((np.concatenate(posicoes), np.concatenate(distancias)))
+            else:
+                resultado.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+        return resultado
+
+    def __getstate__(self) -> dict:
+        """Não serializa o cache de blocos (reconstruído sob demanda)"""
+        state = self.__dict__.copy()
+        state["_blocos"] = [None] * len(self._listas)
+        return state
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do índice"""
+        tamanhos = [len(lista) for lista in self._listas]
+        return {
+            "treinado": self.treinado,
+            "n_listas": len(self._listas),
+            "n_probe": self.n_probe,
+            "min_docs": self.min_docs,
+            "indexados": self._indexados,
+            "maior_lista": max(tamanhos) if tamanhos else 0,
+            "menor_lista": min(tamanhos) if tamanhos else 0
+        }
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de embeddings em dois níveis: memória (LRU) + SQLite em disco
+
+As chaves são (modelo, sha256(texto)) e os vetores são gravados como blobs
+float32. Ambos os níveis são limitados por bytes e descartam as entradas
+menos usadas recentemente. A chave do modelo inclui as dimensões definidas
+em modelos_embedding.py, então trocar o modelo (ou sua configuração)
+invalida o cache: entradas de outros modelos são removidas na abertura.
+
+O objeto se comporta como um dict (texto -> embedding) para o
+EmbeddingClient.
+"""
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Cache LRU de embeddings limitado por bytes, persistente opcionalmente"""
+
+    def __init__(
+        self,
+        modelo: str,
+        caminho: Optional[Path] = None,
+        max_bytes_disco: int = 512 * 1024 * 1024,
+        max_bytes_memoria: int = 64 * 1024 * 1024
+    ):
+        """
+        Args:
+            modelo: Identificador do modelo (ex.: "text-embedding-3-small:1536")
+            caminho: Arquivo SQLite; None mantém só o nível em memória
+            max_bytes_disco: Orçamento de bytes de vetores no disco
+            max_bytes_memoria: Orçamento de bytes de vetores em memória
+        """
+        self.modelo = modelo
+        self.caminho = caminho
+        self.max_bytes_disco = max_bytes_disco
+        self.max_bytes_memoria = max_bytes_memoria
+
+        self._memoria: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes_memoria = 0
+        self._bytes_disco = 0
+        self._itens_disco = 0
+
+        self.stats = {
+            "hits_memoria": 0,
+            "hits_disco": 0,
+            "misses": 0,
+            "evictions_memoria": 0,
+            "evictions_disco": 0,
+            "invalidados_modelo": 0
+        }
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if caminho is not None:
+            self._abrir()
+
+    def _abrir(self):
+        """Abre o SQLite, cria a tabela e remove entradas de outros modelos"""
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                modelo TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vetor BLOB NOT NULL,
+                bytes INTEGER NOT NULL,
+                acessado_em REAL NOT NULL,
+                PRIMARY KEY (modelo, hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_embedding_cache_acesso
+                ON embedding_cache(acessado_em);
+        """)
+
+        cursor = self._conn.execute("DELETE FROM embedding_cache WHERE modelo != ?", (self.modelo,))
+        self.stats["invalidados_modelo"] = cursor.rowcount
+        self._conn.commit()
+
+        row = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM embedding_cache"
+        ).fetchone()
+        self._itens_disco, self._bytes_disco = row[0], row[1]
+
+    @staticmethod
+    def _hash(texto: str) -> str:
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    # ===== Nível em memória =====
+
+    def _guardar_memoria(self, texto: str, vetor: np.ndarray):
+        antigo = self._memoria.pop(texto, None)
+        if antigo is not None:
+            self._bytes_memoria -= antigo.nbytes
+        self._memoria[texto] = vetor
+        self._bytes_memoria += vetor.nbytes
+
+        while self._bytes_memoria > self.max_bytes_memoria and len(self._memoria) > 1:
+            _, removido = self._memoria.popitem(last=False)
+            self._bytes_memoria -= removido.nbytes
+            self.stats["evictions_memoria"] += 1
+
+    def _buscar_memoria(self, texto: str) -> Optional[np.ndarray]:
+        vetor = self._memoria.get(texto)
+        if vetor is not None:
+            self._memoria.move_to_end(texto)
+        return vetor
+
+    # ===== Nível em disco =====
+
+    def _buscar_disco(self, textos: List[str]) -> Dict[str, np.ndarray]:
+        """Busca vários textos no SQLite e atualiza o instante de acesso"""
+        if self._conn is None or not textos:
+            return {}
+
+        por_hash = {self._hash(t): t for t in textos}
+        encontrados = {}
+        hashes = list(por_hash)
+        for inicio in range(0, len(hashes), 500):
+            parte = hashes[inicio:inicio + 500]
+            placeholders = ",".join("?" for _ in parte)
+            rows = self._conn.execute(
+                f"SELECT hash, vetor FROM embedding_cache WHERE modelo = ? AND hash IN ({placeholders})",
+                (self.modelo, *parte)
+            ).fetchall()
+            for hash_texto, blob in rows:
+                encontrados[por_hash[hash_texto]] = np.frombuffer(blob, dtype=np.float32)
+
+        if encontrados:
+            agora = time.time()
+            self._conn.executemany(
+                "UPDATE embedding_cache SET acessado_em = ? WHERE modelo = ? AND hash = ?",
+                [(agora, self.modelo, self._hash(t)) for t in encontrados]
+            )
+            self._conn.commit()
+        return encontrados
+
+    def _gravar_disco(self, itens: Dict[str, np.ndarray]):
+        """Grava vetores no SQLite e aplica o orçamento de bytes"""
+        if self._conn is None or not itens:
+            return
+
+        agora = time.time()
+        registros = [
+            (self.modelo, self._hash(t), v.tobytes(), v.nbytes, agora)
+            for t, v in itens.items()
+        ]
+        for modelo, hash_texto, _, nbytes, _ in registros:
+            row = self._conn.execute(
+                "SELECT bytes FROM embedding_cache WHERE modelo = ? AND hash = ?",
+                (modelo, hash_texto)
+            ).fetchone()
+            if row:
+                self._bytes_disco -= row[0]
+                self._itens_disco -= 1
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (modelo, hash, vetor, bytes, acessado_em) "
+            "VALUES (?, ?, ?, ?, ?)",
+            registros
+        )
+        self._bytes_disco += sum(r[3] for r in registros)
+        self._itens_disco += len(registros)
+
+        if self._bytes_disco > self.max_bytes_disco:
+            self._evict_disco()
+        self._conn.commit()
+
+    def _evict_disco(self):
+        """Remove as entradas menos acessadas até caber em 90% do orçamento"""
+        alvo = int(self.max_bytes_disco * 0.9)
+        while self._bytes_disco > alvo and self._itens_disco > 0:
+            rows = self._conn.execute(
+                "SELECT rowid, bytes FROM embedding_cache ORDER BY acessado_em LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            remover, liberados = [], 0
+            for rowid, nbytes in rows:
+                remover.append((rowid,))
+                liberados += nbytes
+                if self._bytes_disco - liberados <= alvo:
+                    break
+            self._conn.executemany("DELETE FROM embedding_cache WHERE rowid = ?", remover)
+            self._bytes_disco -= liberados
+            self._itens_disco -= len(remover)
+            self.stats["evictions_disco"] += len(remover)
+
+    # ===== API =====
+
+    def get_muitos(self, textos: Iterable[str]) -> Dict[str, List[float]]:
+        """Retorna os embeddings em cache para os textos informados"""
+        resultado, faltando = {}, []
+        for texto in textos:
+            vetor = self._buscar_memoria(texto)
+            if vetor is not None:
+                self.stats["hits_memoria"] += 1
+                resultado[texto] = vetor.tolist()
+            else:
+                faltando.append(texto)
+
+        do_disco = self._buscar_disco(faltando)
+        for texto, vetor in do_disco.items():
+            self.stats["hits_disco"] += 1
+            self._guardar_memoria(texto, vetor)
+            resultado[texto] = vetor.tolist()
+
+        self.stats["misses"] += len(faltando) - len(do_disco)
+        return resultado
+
+    def set_muitos(self, itens: Dict[str, List[float]]):
+        """Guarda vários embeddings nos dois níveis"""
+        vetores = {t: np.asarray(e, dtype=np.float32) for t, e in itens.items()}
+        for texto, vetor in vetores.items():
+            self._guardar_memoria(texto, vetor)
+        self._gravar_disco(vetores)
+
+    def get(self, texto: str, default=None):
+        return self.get_muitos([texto]).get(texto, default)
+
+    def __contains__(self, texto: str) -> bool:
+        return self.get(texto) is not None
+
+    def __getitem__(self, texto: str) -> List[float]:
+        embedding = self.get(texto)
+        if embedding is None:
+            raise KeyError(texto)
+        return embedding
+
+    def __setitem__(self, texto: str, embedding: List[float]):
+        self.set_muitos({texto: embedding})
+
+    def __len__(self) -> int:
+        return self._itens_disco if self._conn is not None else len(self._memoria)
+
+    def clear(self):
+        """Esvazia o nível em memória (o disco sobrevive entre reinícios)"""
+        self._memoria.clear()
+        self._bytes_memoria = 0
+
+    def limpar_disco(self):
+        """Remove também todas as entradas persistidas"""
+        self.clear()
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._conn.commit()
+            self._bytes_disco = 0
+            self._itens_disco = 0
+
+    def get_stats(self) -> dict:
+        """Métricas de uso e ocupação do cache"""
+        consultas = self.stats["hits_memoria"] + self.stats["hits_disco"] + self.stats["misses"]
+        hits = self.stats["hits_memoria"] + self.stats["hits_disco"]
+        return {
+            **self.stats,
+            "hit_rate": hits / consultas if consultas else 0.0,
+            "modelo": self.modelo,
+            "persistente": self._conn is not None,
+            "itens_memoria": len(self._memoria),
+            "bytes_memoria": self._bytes_memoria,
+            "itens_disco": self._itens_disco,
+            "bytes_disco": self._bytes_disco,
+            "max_bytes_memoria": self.max_bytes_memoria,
+            "max_bytes_disco": self.max_bytes_disco
+        }
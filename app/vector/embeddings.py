@@ -4,10 +4,16 @@ Cliente de embeddings para gerar vetores de texto
 Suporta OpenAI e Jina AI
 """
 import asyncio
-from typing import List, Optional
-from openai import AsyncOpenAI
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from openai import AsyncOpenAI, RateLimitError
 import httpx
 
+from app.integracao.clientes_http import obter_cliente_http
+from app.utils import metricas
+from app.utils.limitador_taxa import obter_limitador
+from app.vector.embedding_cache import EmbeddingCache
 from app.vector.modelos_embedding import (
     get_modelo_info,
     get_dimensoes_modelo,
@@ -15,6 +21,16 @@ from app.vector.modelos_embedding import (
     EmbeddingProvider
 )
 
+_HIST_EMBEDDINGS = metricas.histograma(
+    "sebrae_embeddings_requisicao_segundos", "Duração das requisições de embeddings por provedor", ("provedor",)
+)
+_TEXTOS_EMBEDDINGS = metricas.contador(
+    "sebrae_embeddings_textos_total", "Textos enviados para embedding por provedor", ("provedor",)
+)
+_ERROS_EMBEDDINGS = metricas.contador(
+    "sebrae_embeddings_erros_total", "Requisições de embeddings com erro por provedor", ("provedor",)
+)
+
 
 class EmbeddingClient:
     """Cliente para gerar embeddings usando OpenAI ou Jina AI"""
@@ -23,7 +39,10 @@ class EmbeddingClient:
         self,
         api_key: Optional[str] = None,
         model: str = "text-embedding-3-small",
-        jina_api_key: Optional[str] = None
+        jina_api_key: Optional[str] = None,
+        cache_path: Optional[Path] = None,
+        cache_max_mb: int = 512,
+        cache_memoria_mb: int = 64
     ):
         """
         Inicializa cliente de embeddings
@@ -32,23 +51,45 @@ class EmbeddingClient:
             api_key: API key da OpenAI (opcional, usa env var se não fornecido)
             model: Modelo a usar para embeddings
             jina_api_key: API key da Jina AI (opcional, só necessário para modelos Jina)
+            cache_path: Arquivo SQLite do cache persistente (None = só memória)
+            cache_max_mb: Orçamento do cache em disco
+            cache_memoria_mb: Orçamento do nível em memória
         """
         self.model = model
-        self.cache = {}  # Cache simples para evitar requisições duplicadas
+        self.stats_lotes = {
+            "lotes": 0,
+            "lotes_com_erro": 0,
+            "textos_enviados": 0,
+            "cache_hits": 0,
+            "duplicados_ignorados": 0,
+            "tokens_estimados": 0,
+            "tokens_usados": 0,
+            "latencia_total_ms": 0.0,
+            "latencia_max_ms": 0.0,
+            "ultimo_lote_ms": 0.0
+        }
 
         # Detectar provedor do modelo
         self.provider = get_provider_modelo(model)
         self.model_info = get_modelo_info(model)
         self.dimensoes = get_dimensoes_modelo(model)
 
+        # Cache (memória + disco); a chave do modelo inclui as dimensões para
+        # invalidar entradas quando a configuração do modelo muda
+        self.cache = EmbeddingCache(
+            modelo=f"{model}:{self.dimensoes}",
+            caminho=cache_path,
+            max_bytes_disco=cache_max_mb * 1024 * 1024,
+            max_bytes_memoria=cache_memoria_mb * 1024 * 1024
+        )
+
         # Inicializar cliente apropriado
         if self.provider == EmbeddingProvider.OPENAI:
             self.client = AsyncOpenAI(api_key=api_key)
-            self.jina_client = None
             self.jina_api_key = None
         elif self.provider == EmbeddingProvider.JINA:
+            # Requisições Jina usam o cliente HTTP compartilhado da aplicação
             self.client = None
-            self.jina_client = httpx.AsyncClient(timeout=60.0)
             self.jina_api_key = jina_api_key
         else:
             raise ValueError(f"Provedor desconhecido: {self.provider}")
@@ -67,13 +108,13 @@ class EmbeddingClient:
             return [0.0] * self.dimensoes
 
         # Verificar cache
-        if text in self.cache:
-            return self.cache[text]
+        embedding = self.cache.get(text)
+        if embedding is not None:
+            return embedding
 
         try:
             # Truncar texto se necessário (máx ~8000 tokens)
-            max_chars = self.model_info.get("max_tokens", 8191) * 4  # ~4 chars por token
-            text_trunc = text[:max_chars] if len(text) > max_chars else text
+            text_trunc = self._truncar(text)
 
             # Gerar embedding baseado no provedor
             if self.provider == EmbeddingProvider.OPENAI:
@@ -93,12 +134,45 @@ class EmbeddingClient:
             # Retornar embedding zero se falhar
             return [0.0] * self.dimensoes
 
+    async def _criar_embeddings_openai(self, entrada):
+        """Requisição de embeddings à OpenAI sob o limitador de embeddings"""
+        limitador = obter_limitador("embeddings")
+        async with limitador.reservar():
+            _TEXTOS_EMBEDDINGS.rotulada("openai").inc(1 if isinstance(entrada, str) else len(entrada))
+            try:
+                with _HIST_EMBEDDINGS.rotulada("openai").medir():
+                    return await self.client.embeddings.create(input=entrada, model=self.model)
+            except RateLimitError as e:
+                _ERROS_EMBEDDINGS.rotulada("openai").inc()
+                limitador.registrar_retry_after(e.response.headers.get("retry-after"))
+                raise
+            except Exception:
+                _ERROS_EMBEDDINGS.rotulada("openai").inc()
+                raise
+
+    async def _post_jina(self, url: str, headers: Dict[str, str], data: dict) -> httpx.Response:
+        """POST de embeddings à Jina sob o limitador de embeddings"""
+        limitador = obter_limitador("embeddings")
+        async with limitador.reservar():
+            _TEXTOS_EMBEDDINGS.rotulada("jina").inc(len(data.get("input", ())))
+            try:
+                with _HIST_EMBEDDINGS.rotulada("jina").medir():
+                    response = await obter_cliente_http("jina_embeddings").post(
+                        url, headers=headers, json=data, timeout=60.0
+                    )
+            except Exception:
+                _ERROS_EMBEDDINGS.rotulada("jina").inc()
+                raise
+        if response.status_code == 429:
+            limitador.registrar_retry_after(response.headers.get("Retry-After"))
+        if response.is_error:
+            _ERROS_EMBEDDINGS.rotulada("jina").inc()
+        response.raise_for_status()
+        return response
+
     async def _embed_openai(self, text: str) -> List[float]:
         """Gera embedding usando OpenAI"""
-        response = await self.client.embeddings.create(
-            input=text,
-            model=self.model
-        )
+        response = await self._criar_embeddings_openai(text)
         return response.data[0].embedding
 
     async def _embed_jina(self, text: str) -> List[float]:
@@ -116,50 +190,158 @@ class EmbeddingClient:
             "input": [text]
         }
 
-        response = await self.jina_client.post(url, headers=headers, json=data)
-        response.raise_for_status()
+        response = await self._post_jina(url, headers, data)
 
         result = response.json()
         return result["data"][0]["embedding"]
 
+    async def _embed_openai_lote(self, textos: List[str]) -> Tuple[List[List[float]], Optional[int]]:
+        """Gera embeddings de vários textos numa única requisição OpenAI"""
+        response = await self._criar_embeddings_openai(textos)
+        dados = sorted(response.data, key=lambda item: item.index)
+        tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+        return [item.embedding for item in dados], tokens
+
+    async def _embed_jina_lote(self, textos: List[str]) -> Tuple[List[List[float]], Optional[int]]:
+        """Gera embeddings de vários textos numa única requisição Jina"""
+        if not self.jina_api_key:
+            raise ValueError("Jina API key não configurada")
+
+        url = "https://api.jina.ai/v1/embeddings"
+        headers = {
+            "Authorization": f"Bearer {self.jina_api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "model": self.model,
+            "input": textos
+        }
+
+        response = await self._post_jina(url, headers, data)
+
+        result = response.json()
+        dados = sorted(result["data"], key=lambda item: item.get("index", 0))
+        tokens = result.get("usage", {}).get("total_tokens")
+        return [item["embedding"] for item in dados], tokens
+
+    def _truncar(self, text: str) -> str:
+        """Trunca texto ao limite de tokens do modelo (~4 chars por token)"""
+        max_chars = self.model_info.get("max_tokens", 8191) * 4
+        return text[:max_chars] if len(text) > max_chars else text
+
+    def _montar_lotes(self, textos: List[str], batch_size: int, max_tokens_lote: int) -> List[List[str]]:
+        """Agrupa textos em lotes limitados por quantidade e por tokens estimados"""
+        lotes, atual, tokens_atual = [], [], 0
+        for texto in textos:
+            tokens = max(1, len(self._truncar(texto)) // 4)
+            if atual and (len(atual) >= batch_size or tokens_atual + tokens > max_tokens_lote):
+                lotes.append(atual)
+                atual, tokens_atual = [], 0
+            atual.append(texto)
+            tokens_atual += tokens
+        if atual:
+            lotes.append(atual)
+        return lotes
+
+    async def _embed_lote(self, lote: List[str]) -> Dict[str, List[float]]:
+        """Envia um lote e guarda os embeddings no cache (fallback individual em erro)"""
+        truncados = [self._truncar(texto) for texto in lote]
+        inicio = time.perf_counter()
+        try:
+            if self.provider == EmbeddingProvider.OPENAI:
+                embeddings, tokens = await self._embed_openai_lote(truncados)
+            elif self.provider == EmbeddingProvider.JINA:
+                embeddings, tokens = await self._embed_jina_lote(truncados)
+            else:
+                raise ValueError(f"Provedor não suportado: {self.provider}")
+
+            if len(embeddings) != len(lote):
+                raise ValueError(f"Resposta com {len(embeddings)} embeddings para {len(lote)} textos")
+        except Exception as e:
+            print(f"Erro no lote de embeddings ({len(lote)} textos), tentando individualmente: {e}")
+            self.stats_lotes["lotes_com_erro"] += 1
+            individuais = await asyncio.gather(*[self.embed_text(texto) for texto in lote])
+            return dict(zip(lote, individuais))
+
+        latencia_ms = (time.perf_counter() - inicio) * 1000
+        tokens_estimados = sum(max(1, len(t) // 4) for t in truncados)
+        self.stats_lotes["lotes"] += 1
+        self.stats_lotes["textos_enviados"] += len(lote)
+        self.stats_lotes["tokens_estimados"] += tokens_estimados
+        self.stats_lotes["tokens_usados"] += tokens if tokens is not None else tokens_estimados
+        self.stats_lotes["latencia_total_ms"] += latencia_ms
+        self.stats_lotes["latencia_max_ms"] = max(self.stats_lotes["latencia_max_ms"], latencia_ms)
+        self.stats_lotes["ultimo_lote_ms"] = latencia_ms
+
+        gerados = dict(zip(lote, embeddings))
+        self.cache.set_muitos(gerados)
+        return gerados
+
     async def embed_batch(
         self,
         texts: List[str],
-        batch_size: int = 20
+        batch_size: int = 100,
+        max_tokens_lote: int = 100_000,
+        max_concorrencia: int = 4
     ) -> List[List[float]]:
         """
-        Gera embeddings para múltiplos textos em paralelo
+        Gera embeddings para múltiplos textos com requisições multi-input
+
+        Textos repetidos são enviados uma única vez e textos já em cache não
+        são enviados. Os lotes respeitam tanto `batch_size` (itens) quanto
+        `max_tokens_lote` (tokens estimados), e o resultado segue a ordem
+        de `texts`.
 
         Args:
             texts: Lista de textos
-            batch_size: Tamanho do batch para requisições
+            batch_size: Máximo de textos por requisição
+            max_tokens_lote: Máximo de tokens estimados por requisição
+            max_concorrencia: Requisições de lote simultâneas
 
         Returns:
-            Lista de embeddings
+            Lista de embeddings (um por texto de entrada)
         """
-        embeddings = []
+        validos = [texto for texto in texts if texto and texto.strip()]
+        unicos = list(dict.fromkeys(validos))
+        self.stats_lotes["duplicados_ignorados"] += len(validos) - len(unicos)
+
+        resolvidos = self.cache.get_muitos(unicos)
+        self.stats_lotes["cache_hits"] += len(resolvidos)
+        pendentes = [texto for texto in unicos if texto not in resolvidos]
 
-        # Processar em batches para evitar limites de taxa
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        if pendentes:
+            semaforo = asyncio.Semaphore(max_concorrencia)
 
-            # Gerar em paralelo dentro do batch
-            tasks = [self.embed_text(text) for text in batch]
-            batch_embeddings = await asyncio.gather(*tasks)
+            async def enviar(lote: List[str]) -> Dict[str, List[float]]:
+                async with semaforo:
+                    return await self._embed_lote(lote)
 
-            embeddings.extend(batch_embeddings)
+            for gerados in await asyncio.gather(*[
+                enviar(lote) for lote in self._montar_lotes(pendentes, batch_size, max_tokens_lote)
+            ]):
+                resolvidos.update(gerados)
 
-        return embeddings
+        zero = [0.0] * self.dimensoes
+        return [resolvidos.get(texto, zero) for texto in texts]
 
     def clear_cache(self):
-        """Limpa o cache de embeddings"""
+        """Limpa o nível em memória do cache (o cache em disco é preservado)"""
         self.cache.clear()
 
     def get_cache_stats(self) -> dict:
         """Retorna estatísticas do cache"""
+        lotes = self.stats_lotes["lotes"]
+        cache_stats = self.cache.get_stats()
+        bytes_cache = cache_stats["bytes_disco"] if cache_stats["persistente"] else cache_stats["bytes_memoria"]
         return {
             "cached_texts": len(self.cache),
-            "cache_size_mb": sum(len(str(v)) for v in self.cache.values()) / (1024 * 1024)
+            "cache_size_mb": bytes_cache / (1024 * 1024),
+            "cache": cache_stats,
+            "batch": {
+                **self.stats_lotes,
+                "latencia_media_ms": self.stats_lotes["latencia_total_ms"] / lotes if lotes else 0.0,
+                "textos_por_lote": self.stats_lotes["textos_enviados"] / lotes if lotes else 0.0
+            }
         }
 
 
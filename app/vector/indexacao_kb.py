@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline de indexação da base de conhecimento em estágios
+
+    extração (pool de processos) -> chunking (thread) -> embeddings (workers)
+
+- A extração de PDF/DOCX é CPU-bound e roda num ProcessPoolExecutor, sem
+  bloquear o event loop; formatos texto são só decodificados numa thread.
+- create_smart_chunks roda numa thread (asyncio.to_thread).
+- Os chunks são agrupados em lotes e colocados numa fila limitada consumida
+  por um número fixo de workers, que chamam VectorStore.add_texts (um
+  embed_batch multi-input por lote). Com a fila cheia, quem produz lotes
+  espera (backpressure), então vários arquivos simultâneos não acumulam
+  chunks em memória nem disparam requisições sem limite.
+
+Cada chunk leva o hash SHA-256 do arquivo original nos metadados
+("content_hash"), o que permite pular a reindexação de um arquivo
+reenviado sem alterações.
+"""
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.extracao_texto import extrair_texto
+from app.utils.text_chunker import create_smart_chunks
+
+# Tipos cuja extração é CPU-bound (vão para o pool de processos)
+TIPOS_PROCESSO = {"pdf", "docx"}
+
+_executor_extracao: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor_extracao() -> ProcessPoolExecutor:
+    """Retorna o pool de processos de extração (criado sob demanda)"""
+    global _executor_extracao
+    if _executor_extracao is None:
+        _executor_extracao = ProcessPoolExecutor(max_workers=settings.KB_EXTRACAO_PROCESSOS)
+    return _executor_extracao
+
+
+def encerrar_executor_extracao():
+    """Encerra o pool de processos de extração (shutdown da aplicação)"""
+    global _executor_extracao
+    if _executor_extracao is not None:
+        _executor_extracao.shutdown(wait=False, cancel_futures=True)
+        _executor_extracao = None
+
+
+async def extrair_texto_async(conteudo: bytes, tipo: str) -> str:
+    """
+    Extrai texto fora do event loop
+
+    Raises:
+        ValueError: Arquivo inválido ou dependência ausente
+    """
+    global _executor_extracao
+    if tipo not in TIPOS_PROCESSO:
+        return await asyncio.to_thread(extrair_texto, conteudo, tipo)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor_extracao(), extrair_texto, conteudo, tipo)
+    except BrokenProcessPool:
+        # Processo filho morreu (ex.: falta de memória): recria o pool na
+        # próxima extração e conclui esta numa thread
+        print(f"[KB Pipeline] Pool de extração indisponível, usando thread")
+        _executor_extracao = None
+        return await asyncio.to_thread(extrair_texto, conteudo, tipo)
+
+
+def hash_conteudo(conteudo: bytes) -> str:
+    """Hash SHA-256 (hex) dos bytes de um arquivo"""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def dividir_em_chunks(texto: str) -> List[str]:
+    """
+    Divide o texto em chunks para RAG
+
+    - Limpa espaços extras entre letras (problema OCR)
+    - Respeita limites de frases completas
+    - Chunks de 1500 chars com overlap de 300 para continuidade semântica
+    """
+    return create_smart_chunks(text=texto, chunk_size=1500, overlap=300, clean=True)
+
+
+class PipelineIndexacao:
+    """Workers de embedding com fila limitada, compartilháveis entre arquivos"""
+
+    def __init__(
+        self,
+        vector_store,
+        chunks_por_lote: Optional[int] = None,
+        workers: Optional[int] = None,
+        lotes_pendentes: Optional[int] = None
+    ):
+        """
+        Args:
+            vector_store: VectorStore de destino (usa add_texts e salvar)
+            chunks_por_lote: Chunks por chamada a add_texts
+            workers: Lotes sendo embedados simultaneamente
+            lotes_pendentes: Capacidade da fila (backpressure)
+        """
+        self.vector_store = vector_store
+        self.chunks_por_lote = chunks_por_lote or settings.KB_CHUNKS_POR_LOTE
+        self.n_workers = workers or settings.KB_EMBEDDING_WORKERS
+        self.lotes_pendentes = lotes_pendentes or settings.KB_LOTES_PENDENTES
+        self._fila: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.stats = {
+            "arquivos": 0,
+            "chunks": 0,
+            "lotes": 0,
+            "lotes_com_falha": 0
+        }
+
+    async def __aenter__(self):
+        self.iniciar()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.encerrar()
+
+    def iniciar(self):
+        """Cria a fila e inicia os workers de embedding"""
+        if self._workers:
+            return
+        self._fila = asyncio.Queue(maxsize=self.lotes_pendentes)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.n_workers)]
+
+    async def encerrar(self):
+        """Encerra os workers (lotes ainda na fila são cancelados)"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._fila is not None:
+            while not self._fila.empty():
+                *_, futuro = self._fila.get_nowait()
+                futuro.cancel()
+
+    async def _worker(self):
+        """Consome lotes da fila e gera/armazena seus embeddings"""
+        while True:
+            textos, metadatas, ids, futuro = await self._fila.get()
+            try:
+                if futuro.cancelled():
+                    continue
+                ok = await self.vector_store.add_texts(
+                    texts=textos,
+                    metadatas=metadatas,
+                    ids=ids,
+                    save=False  # Salvo uma vez por arquivo, em indexar()
+                )
+                self.stats["lotes"] += 1
+                if not ok:
+                    self.stats["lotes_com_falha"] += 1
+                if not futuro.done():
+                    futuro.set_result(ok)
+            except Exception as e:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            finally:
+                self._fila.task_done()
+
+    async def indexar(
+        self,
+        file_name: str,
+        texto: str,
+        file_type: str,
+        content_hash: Optional[str] = None,
+        progress_callback=None
+    ) -> Optional[List[str]]:
+        """
+        Divide o texto em chunks, gera embeddings em lotes e persiste
+
+        O progresso é reportado de 60% a 90% conforme os lotes terminam.
+
+        Returns:
+            IDs dos chunks indexados, ou None se algum lote falhou
+        """
+        if not self._workers:
+            self.iniciar()
+
+        if progress_callback:
+            await progress_callback({
+                "phase": "indexing",
+                "progress": 55,
+                "detail": "Dividindo texto em chunks"
+            })
+        chunks = await asyncio.to_thread(dividir_em_chunks, texto)
+
+        uploaded_at = datetime.now().isoformat()
+        validos = [(i, chunk) for i, chunk in enumerate(chunks) if chunk.strip()]
+        total_chunks = len(validos)
+        ids = [f"{file_name}_chunk_{i}" for i, _ in validos]
+
+        loop = asyncio.get_running_loop()
+        lotes = []
+        for inicio in range(0, total_chunks, self.chunks_por_lote):
+            parte = validos[inicio:inicio + self.chunks_por_lote]
+            metadatas: List[Dict[str, Any]] = []
+            for i, _ in parte:
+                metadata = {
+                    "source": file_name,
+                    "type": file_type,
+                    "chunk": i,
+                    "uploaded_at": uploaded_at
+                }
+                if content_hash:
+                    metadata["content_hash"] = content_hash
+                metadatas.append(metadata)
+            lotes.append((
+                [chunk for _, chunk in parte],
+                metadatas,
+                [f"{file_name}_chunk_{i}" for i, _ in parte],
+                loop.create_future()
+            ))
+
+        async def produzir():
+            # put() bloqueia com a fila cheia: é aqui que ocorre o backpressure
+            for lote in lotes:
+                await self._fila.put(lote)
+
+        produtor = asyncio.create_task(produzir())
+        ok = True
+        try:
+            feitos = 0
+            for concluido in asyncio.as_completed([lote[3] for lote in lotes]):
+                ok = await concluido and ok
+                feitos += 1
+                if progress_callback:
+                    chunks_feitos = min(feitos * self.chunks_por_lote, total_chunks)
+                    await progress_callback({
+                        "phase": "indexing",
+                        "progress": 60 + int((feitos / len(lotes)) * 30),
+                        "detail": f"Indexando chunk {chunks_feitos}/{total_chunks}"
+                    })
+            await produtor
+        finally:
+            if not produtor.done():
+                produtor.cancel()
+                for *_, futuro in lotes:
+                    futuro.cancel()
+
+        if not ok:
+            return None
+
+        # Persistir uma vez por arquivo (append-only: custo proporcional aos novos chunks)
+        if total_chunks and not self.vector_store.salvar():
+            return None
+
+        self.stats["arquivos"] += 1
+        self.stats["chunks"] += total_chunks
+        return ids
+
+    def get_stats(self) -> dict:
+        """Estatísticas do pipeline"""
+        return {
+            **self.stats,
+            "workers": len(self._workers),
+            "lotes_na_fila": self._fila.qsize() if self._fila is not None else 0,
+            "capacidade_fila": self.lotes_pendentes
+        }
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Persistência append-only das coleções vetoriais
+
+Cada coleção fica num diretório próprio com:
+- vectors.f32: matriz float32 (linha a linha, sem cabeçalho), aberta via mmap
+- norms.f32: ||x||² de cada linha, para não recalcular na carga
+- metadata.jsonl: log com {id, metadata, document} de cada linha, na mesma ordem
+- manifest.json: versão, dimensão e número de linhas confirmadas
+
+Salvar anexa apenas as linhas novas (custo O(novos chunks)); o manifesto é
+gravado por último, de forma atômica, e define quantas linhas são válidas.
+Bytes além desse ponto (escrita interrompida) são descartados na próxima
+gravação.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+FORMATO_VERSAO = 1
+
+
+class ArmazenamentoColecao:
+    """Segmento em disco de uma SimpleVectorCollection"""
+
+    def __init__(self, diretorio: Path):
+        """
+        Args:
+            diretorio: Diretório exclusivo da coleção
+        """
+        self.diretorio = diretorio
+        self.arquivo_vetores = diretorio / "vectors.f32"
+        self.arquivo_normas = diretorio / "norms.f32"
+        self.arquivo_metadados = diretorio / "metadata.jsonl"
+        self.arquivo_manifesto = diretorio / "manifest.json"
+        self.persistidos = 0  # Linhas já confirmadas no manifesto
+        self._dim: Optional[int] = None
+        self._bytes_metadados = 0  # Tamanho válido do log de metadados
+        self._sincronizado = False  # Se o estado em memória reflete o disco
+
+    def existe(self) -> bool:
+        """Se há um manifesto gravado para a coleção"""
+        return self.arquivo_manifesto.exists()
+
+    def carregar(self, colecao):
+        """
+        Carrega o segmento na coleção (vazia) informada
+
+        Vetores e normas são mapeados em memória (somente leitura); só o log
+        de metadados é lido e decodificado.
+        """
+        with open(self.arquivo_manifesto, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+        if manifesto.get("versao") != FORMATO_VERSAO:
+            raise ValueError(
+                f"Versão de formato não suportada em {self.diretorio}: {manifesto.get('versao')}"
+            )
+
+        total = int(manifesto.get("total", 0))
+        self._dim = manifesto.get("dim")
+        self._sincronizado = True
+        if total == 0 or not self._dim:
+            self.persistidos = 0
+            self._bytes_metadados = 0
+            return colecao
+
+        matriz = np.memmap(self.arquivo_vetores, dtype=np.float32, mode="r", shape=(total, self._dim))
+        normas = np.memmap(self.arquivo_normas, dtype=np.float32, mode="r", shape=(total,))
+
+        ids, metadatas, documents = [], [], []
+        with open(self.arquivo_metadados, "rb") as f:
+            for _ in range(total):
+                registro = json.loads(f.readline())
+                ids.append(registro["id"])
+                metadatas.append(registro["metadata"])
+                documents.append(registro["document"])
+            self._bytes_metadados = f.tell()
+
+        colecao.carregar_arrays(matriz, normas, ids, metadatas, documents)
+        self.persistidos = total
+        return colecao
+
+    def anexar(self, colecao) -> int:
+        """
+        Grava em disco as linhas da coleção ainda não persistidas
+
+        Returns:
+            Número de linhas anexadas
+        """
+        if not self._sincronizado and self.existe():
+            # Evita sobrescrever um segmento que não foi carregado (ex.: erro na carga)
+            raise RuntimeError(f"Segmento em {self.diretorio} existe mas não foi carregado")
+
+        total = colecao.count()
+        novos = total - self.persistidos
+        if novos <= 0:
+            return 0
+
+        dim = colecao.dim
+        if self._dim is not None and self._dim != dim:
+            raise ValueError(
+                f"Dimensão em disco ({self._dim}) difere da coleção '{colecao.name}' ({dim})"
+            )
+
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        inicio = self.persistidos
+
+        vetores = np.ascontiguousarray(colecao.embeddings[inicio:total], dtype=np.float32)
+        normas = np.ascontiguousarray(colecao.normas_sq[inicio:total], dtype=np.float32)
+        linhas = "".join(
+            json.dumps(
+                {"id": doc_id, "metadata": metadata, "document": document},
+                ensure_ascii=False
+            ) + "\n"
+            for doc_id, metadata, document in zip(
+                colecao.ids[inicio:total],
+                colecao.metadatas[inicio:total],
+                colecao.documents[inicio:total]
+            )
+        ).encode("utf-8")
+
+        self._anexar_bytes(self.arquivo_vetores, inicio * dim * 4, vetores.tobytes())
+        self._anexar_bytes(self.arquivo_normas, inicio * 4, normas.tobytes())
+        self._anexar_bytes(self.arquivo_metadados, self._bytes_metadados, linhas)
+
+        self._gravar_manifesto(colecao.name, dim, total)
+        self.persistidos = total
+        self._dim = dim
+        self._bytes_metadados += len(linhas)
+        self._sincronizado = True
+        return novos
+
+    @staticmethod
+    def _anexar_bytes(caminho: Path, tamanho_valido: int, dados: bytes):
+        """Descarta bytes após `tamanho_valido` e anexa `dados` com fsync"""
+        with open(caminho, "ab") as f:
+            f.truncate(tamanho_valido)
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _gravar_manifesto(self, nome: str, dim: int, total: int):
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)"""
+        temporario = self.arquivo_manifesto.with_suffix(".json.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"versao": FORMATO_VERSAO, "nome": nome, "dim": dim, "total": total}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo_manifesto)
@@ -1,93 +1,306 @@
 # -*- coding: utf-8 -*-
 """
 Cliente de armazenamento vetorial em-memória para busca semântica
-Implementação leve e simples sem dependências externas como ChromaDB
+Implementação leve baseada em NumPy, sem dependências externas como ChromaDB
 """
 import json
 import pickle
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils import metricas
+from app.vector.ann_index import IVFIndex
 from app.vector.embeddings import EmbeddingClient
+from app.vector.persistencia import ArmazenamentoColecao
+
+_HIST_CONSULTA = metricas.histograma(
+    "sebrae_vetor_consulta_segundos", "Duração das consultas vetoriais por coleção", ("colecao",)
+)
+_CONSULTAS = metricas.contador(
+    "sebrae_vetor_consultas_total", "Embeddings de consulta buscados por coleção", ("colecao",)
+)
 
 
 class SimpleVectorCollection:
-    """Coleção simples de vetores armazenados em memória"""
+    """
+    Coleção simples de vetores armazenados em memória
+
+    Os embeddings ficam numa matriz float32 contígua (uma linha por documento),
+    com listas paralelas de ids, metadados e textos. As buscas usam um único
+    produto matriz-vetor e seleção parcial (argpartition) do top-k.
+    Opcionalmente usa um índice IVF (ver app.vector.ann_index) para visitar
+    apenas parte da coleção em cada busca.
+    """
+
+    # Capacidade inicial da matriz (cresce em potências de 2)
+    CAPACIDADE_INICIAL = 64
+
+    def __init__(self, name: str, indice: Optional[IVFIndex] = None):
+        """
+        Inicializa uma coleção
 
-    def __init__(self, name: str):
-        """Inicializa uma coleção"""
+        Args:
+            name: Nome da coleção
+            indice: Índice ANN opcional; sem ele todas as buscas são exatas
+        """
         self.name = name
-        self.documents = []  # Lista de {id, embedding, metadata, document}
+        self.indice = indice
+        self.ids: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.documents: List[str] = []
         self.metadata_dict = {}  # Para busca rápida por ID
+        self._matrix: Optional[np.ndarray] = None  # (capacidade, dim) float32
+        self._norms_sq: Optional[np.ndarray] = None  # ||x||² de cada linha
+        self._size = 0
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Dimensão dos embeddings da coleção (None se vazia)"""
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Visão (sem cópia) da matriz de embeddings ocupada"""
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    @property
+    def normas_sq(self) -> np.ndarray:
+        """Visão das normas ao quadrado das linhas ocupadas"""
+        if self._norms_sq is None:
+            return np.empty(0, dtype=np.float32)
+        return self._norms_sq[:self._size]
+
+    def carregar_arrays(self, matriz: np.ndarray, normas_sq: np.ndarray, ids: List[str],
+                        metadatas: List[Dict], documents: List[str]):
+        """
+        Substitui o conteúdo da coleção por arrays já prontos
+
+        Usado na carga do disco: `matriz` pode ser um np.memmap somente
+        leitura; a primeira adição posterior copia os dados para a memória.
+        """
+        self._matrix = matriz
+        self._norms_sq = normas_sq
+        self._size = matriz.shape[0]
+        self.ids = list(ids)
+        self.metadatas = list(metadatas)
+        self.documents = list(documents)
+        self.metadata_dict = dict(zip(self.ids, self.metadatas))
+        if self.indice is not None:
+            self.indice.atualizar(self.embeddings)
+
+    def _garantir_capacidade(self, dim: int, extra: int):
+        """Aloca/expande a matriz para comportar mais `extra` linhas"""
+        if self._matrix is None:
+            capacidade = max(self.CAPACIDADE_INICIAL, extra)
+            self._matrix = np.empty((capacidade, dim), dtype=np.float32)
+            self._norms_sq = np.empty(capacidade, dtype=np.float32)
+            return
+
+        if dim != self._matrix.shape[1]:
+            raise ValueError(
+                f"Dimensão incompatível na coleção '{self.name}': "
+                f"esperado {self._matrix.shape[1]}, recebido {dim}"
+            )
+
+        necessario = self._size + extra
+        capacidade = self._matrix.shape[0]
+        if necessario <= capacidade:
+            return
+
+        while capacidade < necessario:
+            capacidade *= 2
+
+        matrix = np.empty((capacidade, dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        norms_sq = np.empty(capacidade, dtype=np.float32)
+        norms_sq[:self._size] = self._norms_sq[:self._size]
+        self._matrix = matrix
+        self._norms_sq = norms_sq
 
     def add(self, ids: List[str], embeddings: List[List[float]],
             metadatas: List[Dict], documents: List[str]):
         """Adiciona documentos à coleção"""
-        for doc_id, embedding, metadata, document in zip(ids, embeddings, metadatas, documents):
-            self.documents.append({
-                "id": doc_id,
-                "embedding": embedding,
-                "metadata": metadata,
-                "document": document
-            })
+        n = min(len(ids), len(embeddings), len(metadatas), len(documents))
+        if n == 0:
+            return
+
+        vetores = np.asarray(embeddings[:n], dtype=np.float32)
+        if vetores.ndim != 2:
+            raise ValueError(f"Embeddings inválidos para a coleção '{self.name}'")
+
+        self._garantir_capacidade(vetores.shape[1], n)
+        self._matrix[self._size:self._size + n] = vetores
+        self._norms_sq[self._size:self._size + n] = np.einsum("ij,ij->i", vetores, vetores)
+        self._size += n
+
+        self.ids.extend(ids[:n])
+        self.metadatas.extend(metadatas[:n])
+        self.documents.extend(documents[:n])
+        for doc_id, metadata in zip(ids[:n], metadatas[:n]):
             self.metadata_dict[doc_id] = metadata
 
-    def query(self, query_embeddings: List[List[float]], n_results: int = 5,
-              include: List[str] = None) -> Dict:
-        """Busca documentos similares usando distância euclidiana"""
-        if not self.documents:
-            return {"metadatas": [[]], "distances": [[]], "documents": [[]], "embeddings": [[]]}
+        if self.indice is not None:
+            self.indice.atualizar(self.embeddings)
+
+    def configurar_indice(self, indice: Optional[IVFIndex]):
+        """Ativa (ou remove, com None) o índice ANN, indexando o conteúdo atual"""
+        self.indice = indice
+        if indice is not None and self._size:
+            indice.atualizar(self.embeddings)
 
-        import math
+    def _distancias(self, consultas: np.ndarray) -> np.ndarray:
+        """
+        Distâncias euclidianas entre cada consulta e todos os documentos
 
-        query_embedding = query_embeddings[0]
-        similarities = []
+        Usa ||q - x||² = ||q||² + ||x||² - 2·q·x, com um único produto matricial.
+        """
+        matrix = self._matrix[:self._size]
+        dist_sq = consultas @ matrix.T
+        dist_sq *= -2.0
+        dist_sq += self._norms_sq[:self._size][None, :]
+        dist_sq += np.einsum("ij,ij->i", consultas, consultas)[:, None]
+        np.maximum(dist_sq, 0.0, out=dist_sq)
+        return np.sqrt(dist_sq, out=dist_sq)
+
+    @staticmethod
+    def _top_k(distancias: np.ndarray, k: int) -> np.ndarray:
+        """Índices dos k menores valores de uma linha, em ordem crescente"""
+        if k >= distancias.shape[0]:
+            return np.argsort(distancias, kind="stable")
+        candidatos = np.argpartition(distancias, k - 1)[:k]
+        return candidatos[np.argsort(distancias[candidatos], kind="stable")]
+
+    def _buscar(self, consultas: np.ndarray, k: int, exato: bool) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Retorna (posições, distâncias) do top-k de cada consulta
 
-        for doc in self.documents:
-            # Calcular distância euclidiana
-            dist = 0
-            for i, (q, d) in enumerate(zip(query_embedding, doc["embedding"])):
-                dist += (q - d) ** 2
-            dist = math.sqrt(dist)
-            similarities.append((doc, dist))
+        Com índice ANN treinado, calcula distâncias exatas apenas nos
+        candidatos das células visitadas; caso contrário, varre a coleção.
+        """
+        if exato or self.indice is None or self.indice.usar_busca_exata(self._size):
+            resultado = []
+            for linha in self._distancias(consultas):
+                indices = self._top_k(linha, k)
+                resultado.append((indices, linha[indices]))
+            return resultado
+
+        resultado = []
+        blocos = self.indice.buscar(consultas, k, self._matrix, self._norms_sq)
+        for candidatos, dist_sq in blocos:
+            linha = np.sqrt(np.maximum(dist_sq, 0.0))
+            locais = self._top_k(linha, min(k, linha.shape[0]))
+            resultado.append((candidatos[locais], linha[locais]))
+        return resultado
 
-        # Ordenar por distância (menor = mais similar)
-        similarities.sort(key=lambda x: x[1])
-        top_results = similarities[:n_results]
+    def query(self, query_embeddings: List[List[float]], n_results: int = 5,
+              include: List[str] = None, exato: bool = False) -> Dict:
+        """
+        Busca documentos similares usando distância euclidiana
+
+        Aceita várias consultas de uma vez: cada lista do resultado tem uma
+        entrada por embedding de `query_embeddings`, na mesma ordem.
+        Com `exato=True` ignora o índice ANN (usado para medir recall).
+        """
+        num_consultas = max(len(query_embeddings), 1)
+        incluir_embeddings = bool(include and "embeddings" in include)
+
+        if self._size == 0 or not query_embeddings or n_results <= 0:
+            return {
+                "metadatas": [[] for _ in range(num_consultas)],
+                "distances": [[] for _ in range(num_consultas)],
+                "documents": [[] for _ in range(num_consultas)],
+                "embeddings": [[] for _ in range(num_consultas)],
+                "ids": [[] for _ in range(num_consultas)]
+            }
+
+        inicio = time.perf_counter()
+        consultas = np.asarray(query_embeddings, dtype=np.float32)
+        if consultas.ndim == 1:
+            consultas = consultas[None, :]
+        if consultas.shape[1] != self.dim:
+            raise ValueError(
+                f"Dimensão da consulta ({consultas.shape[1]}) difere da coleção "
+                f"'{self.name}' ({self.dim})"
+            )
 
-        metadatas = [[doc["metadata"] for doc, _ in top_results]]
-        distances = [[dist for _, dist in top_results]]
-        documents = [[doc["document"] for doc, _ in top_results]]
-        embeddings = [[doc["embedding"] for doc, _ in top_results]] if include and "embeddings" in include else [[]]
+        k = min(n_results, self._size)
 
+        ids, metadatas, distances, documents, embeddings = [], [], [], [], []
+        for indices, dist in self._buscar(consultas, k, exato):
+            ids.append([self.ids[i] for i in indices])
+            metadatas.append([self.metadatas[i] for i in indices])
+            distances.append(dist.astype(float).tolist())
+            documents.append([self.documents[i] for i in indices])
+            embeddings.append(
+                self._matrix[indices].tolist() if incluir_embeddings else []
+            )
+
+        _HIST_CONSULTA.rotulada(self.name).registrar(time.perf_counter() - inicio)
+        _CONSULTAS.rotulada(self.name).inc(len(ids))
         return {
             "metadatas": metadatas,
             "distances": distances,
             "documents": documents,
-            "embeddings": embeddings
+            "embeddings": embeddings,
+            "ids": ids
         }
 
     def get(self, where: Dict = None) -> Dict:
         """Retorna documentos filtrados por metadados"""
         if not where:
-            return {"metadatas": [doc["metadata"] for doc in self.documents]}
+            return {"metadatas": list(self.metadatas)}
 
         # Implementar filtro simples para falha_id
         filtered = []
-        for doc in self.documents:
-            if "falha_id" in where and "$eq" in where["falha_id"]:
-                if doc["metadata"].get("falha_id") == where["falha_id"]["$eq"]:
-                    filtered.append(doc["metadata"])
+        if "falha_id" in where and "$eq" in where["falha_id"]:
+            alvo = where["falha_id"]["$eq"]
+            filtered = [m for m in self.metadatas if m.get("falha_id") == alvo]
 
         return {"metadatas": filtered}
 
     def count(self) -> int:
         """Retorna número de documentos"""
-        return len(self.documents)
+        return self._size
+
+    def __getstate__(self) -> Dict:
+        """Serializa apenas a parte ocupada da matriz"""
+        state = self.__dict__.copy()
+        if self._matrix is not None:
+            state["_matrix"] = np.ascontiguousarray(self._matrix[:self._size])
+            state["_norms_sq"] = np.ascontiguousarray(self._norms_sq[:self._size])
+        return state
+
+    def __setstate__(self, state: Dict):
+        """Restaura coleção, convertendo o formato antigo (lista de dicts)"""
+        if "_matrix" in state:
+            state.setdefault("indice", None)
+            self.__dict__.update(state)
+            return
+
+        # Formato legado: documents = [{id, embedding, metadata, document}]
+        documentos_antigos = state.get("documents") or []
+        self.__init__(state.get("name", ""))
+        if not documentos_antigos:
+            return
+        self.add(
+            ids=[doc["id"] for doc in documentos_antigos],
+            embeddings=[doc["embedding"] for doc in documentos_antigos],
+            metadatas=[doc["metadata"] for doc in documentos_antigos],
+            documents=[doc["document"] for doc in documentos_antigos]
+        )
 
 
 class VectorStore:
     """Gerenciador de banco de dados vetorial simples e leve"""
 
+    COLECOES = ("documents", "resultados", "falhas", "queries")
+
     def __init__(
         self,
         persist_path: Path,
@@ -105,6 +318,9 @@ class VectorStore:
 
         # Criar diretório se não existir
         self.persist_path.mkdir(parents=True, exist_ok=True)
+        self._armazenamentos = {
+            nome: ArmazenamentoColecao(self.persist_path / nome) for nome in self.COLECOES
+        }
 
         # Tentar carregar coleções persistidas
         loaded = self._load_collections()
@@ -123,6 +339,14 @@ class VectorStore:
             self.documents_collection = SimpleVectorCollection("documents")  # Para documentos RAG
             print(f"[VectorStore] Coleções inicializadas vazias em {persist_path}")
 
+        # Índice ANN opcional para a coleção de documentos da KB (a maior)
+        if settings.VECTOR_ANN_ENABLED:
+            self.documents_collection.configurar_indice(IVFIndex(
+                n_probe=settings.VECTOR_ANN_NPROBE,
+                min_docs=settings.VECTOR_ANN_MIN_DOCS
+            ))
+            print(f"[VectorStore] Índice ANN ativo em documents (n_probe={settings.VECTOR_ANN_NPROBE})")
+
     async def add_texts(
         self,
         texts: List[str],
@@ -143,11 +367,8 @@ class VectorStore:
             True se todos foram adicionados com sucesso
         """
         try:
-            # Gerar embeddings para todos os textos
-            embeddings = []
-            for text in texts:
-                embedding = await self.embedding_client.embed_text(text)
-                embeddings.append(embedding)
+            # Gerar embeddings em lote (requisições multi-input)
+            embeddings = await self.embedding_client.embed_batch(texts)
 
             # Adicionar à coleção
             self.documents_collection.add(
@@ -167,6 +388,19 @@ class VectorStore:
             print(f"Erro ao adicionar textos ao VectorStore: {e}")
             return False
 
+    def salvar(self) -> bool:
+        """Persiste as linhas novas (para quem adiciona com save=False)"""
+        return self._save_collections()
+
+    def documento_indexado(self, chunk_id: str, content_hash: str) -> bool:
+        """
+        Verifica se um chunk de documento existe com o hash de conteúdo dado
+
+        Usado para pular a reindexação de arquivos reenviados sem alterações.
+        """
+        metadata = self.documents_collection.metadata_dict.get(chunk_id)
+        return metadata is not None and metadata.get("content_hash") == content_hash
+
     async def add_resultado(
         self,
         resultado: Dict[str, Any],
@@ -540,6 +774,10 @@ class VectorStore:
             "falhas_count": self.falhas_collection.count(),
             "queries_count": self.queries_collection.count(),
             "documents_count": self.documents_collection.count(),
+            "documents_ann_index": (
+                self.documents_collection.indice.get_stats()
+                if self.documents_collection.indice is not None else None
+            ),
             "embedding_cache_stats": self.embedding_client.get_cache_stats()
         }
 
@@ -548,18 +786,20 @@ class VectorStore:
         self.embedding_client.clear_cache()
 
     def _save_collections(self):
-        """Salva coleções em disco usando pickle"""
+        """
+        Persiste em disco as linhas novas de cada coleção
+
+        Formato append-only (ver app.vector.persistencia): o custo é
+        proporcional ao número de linhas adicionadas desde o último save.
+        """
         try:
-            collections_file = self.persist_path / "collections.pkl"
-            data = {
-                "documents": self.documents_collection,
-                "resultados": self.resultados_collection,
-                "falhas": self.falhas_collection,
-                "queries": self.queries_collection
-            }
-            with open(collections_file, 'wb') as f:
-                pickle.dump(data, f)
-            print(f"[VectorStore] Coleções salvas em {collections_file}")
+            anexados = {}
+            for nome in self.COLECOES:
+                anexados[nome] = self._armazenamentos[nome].anexar(self._get_collection(nome))
+
+            if any(anexados.values()):
+                resumo = ", ".join(f"{nome}: +{n}" for nome, n in anexados.items() if n)
+                print(f"[VectorStore] Coleções salvas em {self.persist_path} ({resumo})")
             return True
         except Exception as e:
             print(f"[VectorStore] Erro ao salvar coleções: {e}")
@@ -568,27 +808,54 @@ class VectorStore:
             return False
 
     def _load_collections(self) -> bool:
-        """Carrega coleções do disco usando pickle"""
-        try:
-            collections_file = self.persist_path / "collections.pkl"
-            if not collections_file.exists():
-                return False
-
-            with open(collections_file, 'rb') as f:
-                data = pickle.load(f)
+        """
+        Carrega coleções do disco (vetores via mmap)
 
-            self.documents_collection = data.get("documents", SimpleVectorCollection("documents"))
-            self.resultados_collection = data.get("resultados", SimpleVectorCollection("resultados"))
-            self.falhas_collection = data.get("falhas", SimpleVectorCollection("falhas"))
-            self.queries_collection = data.get("queries", SimpleVectorCollection("queries"))
+        Se só existir o snapshot antigo (collections.pkl), migra para o
+        formato append-only.
+        """
+        try:
+            if any(a.existe() for a in self._armazenamentos.values()):
+                for nome in self.COLECOES:
+                    colecao = SimpleVectorCollection(nome)
+                    armazenamento = self._armazenamentos[nome]
+                    if armazenamento.existe():
+                        armazenamento.carregar(colecao)
+                    setattr(self, f"{nome}_collection", colecao)
+                return True
+
+            if (self.persist_path / "collections.pkl").exists():
+                return self._migrar_pickle()
 
-            return True
+            return False
         except Exception as e:
             print(f"[VectorStore] Erro ao carregar coleções: {e}")
             import traceback
             traceback.print_exc()
             return False
 
+    def _migrar_pickle(self) -> bool:
+        """
+        Converte o snapshot pickle legado para o formato append-only
+
+        O arquivo original é mantido como collections.pkl.migrado.
+        """
+        collections_file = self.persist_path / "collections.pkl"
+        print(f"[VectorStore] Migrando {collections_file} para formato append-only...")
+
+        with open(collections_file, 'rb') as f:
+            data = pickle.load(f)
+
+        for nome in self.COLECOES:
+            setattr(self, f"{nome}_collection", data.get(nome, SimpleVectorCollection(nome)))
+
+        if not self._save_collections():
+            raise RuntimeError("Falha ao gravar coleções migradas")
+
+        collections_file.rename(collections_file.with_suffix(".pkl.migrado"))
+        print(f"[VectorStore] Migração concluída")
+        return True
+
 
 # Singleton global
 _vector_store: Optional[VectorStore] = None
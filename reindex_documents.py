@@ -10,7 +10,7 @@ from pathlib import Path
 # Adicionar diretório pai ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.config import settings, get_chroma_path
+from app.config import settings, get_chroma_path, get_embedding_cache_path
 from app.vector.vector_store import get_vector_store
 from app.vector.embeddings import EmbeddingClient
 from app.api.knowledge_base import DOCS_DIR, extract_text_from_docx, extract_text_from_pdf, extract_text_from_csv, extract_text_from_markdown, store_document_in_vector_db
@@ -21,7 +21,12 @@ async def reindex_all_documents():
     print(f"Iniciando re-indexação de documentos em {DOCS_DIR}")
 
     # Inicializar vector store
-    embedding_client = EmbeddingClient(api_key=settings.OPENAI_API_KEY)
+    embedding_client = EmbeddingClient(
+        api_key=settings.OPENAI_API_KEY,
+        cache_path=get_embedding_cache_path(),
+        cache_max_mb=settings.EMBEDDING_CACHE_MAX_MB,
+        cache_memoria_mb=settings.EMBEDDING_CACHE_MEMORIA_MB
+    )
     persist_path = get_chroma_path()
     vector_store = await get_vector_store(persist_path=persist_path, embedding_client=embedding_client)
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de recall@k do índice ANN (IVF) contra a busca exata
+
+Mede, para cada valor de n_probe, o recall@k e a latência média por consulta
+em comparação com a busca exata. Usa a coleção `documents` persistida, se
+existir, ou dados sintéticos agrupados (simulando chunks da KB).
+
+Uso:
+    python scripts/benchmark_ann_recall.py
+    python scripts/benchmark_ann_recall.py --sintetico --n 50000 --dim 1536 --k 100
+    python scripts/benchmark_ann_recall.py --nprobe 1 2 4 8 16 32
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Adicionar diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.vector.ann_index import IVFIndex
+from app.vector.vector_store import SimpleVectorCollection
+
+
+def gerar_dados_sinteticos(n: int, dim: int, n_clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Gera vetores agrupados em clusters (distribuição parecida com embeddings reais)"""
+    rng = np.random.default_rng(seed)
+    centros = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    rotulos = rng.integers(0, n_clusters, size=n)
+    ruido = rng.normal(scale=0.35, size=(n, dim)).astype(np.float32)
+    return centros[rotulos] + ruido
+
+
+def carregar_colecao_documents() -> np.ndarray:
+    """Carrega os embeddings da coleção `documents` persistida (ou None)"""
+    from app.config import get_chroma_path
+    from app.vector.vector_store import VectorStore
+
+    class _SemEmbeddings:
+        def get_cache_stats(self):
+            return {}
+
+    store = VectorStore(get_chroma_path(), _SemEmbeddings())
+    if store.documents_collection.count() == 0:
+        return None
+    return np.array(store.documents_collection.embeddings)
+
+
+def calcular_recall_at_k(colecao: SimpleVectorCollection, consultas: np.ndarray, k: int) -> float:
+    """Fração dos k vizinhos exatos que a busca aproximada recuperou"""
+    exato = colecao.query(consultas.tolist(), n_results=k, exato=True)["ids"]
+    aproximado = colecao.query(consultas.tolist(), n_results=k)["ids"]
+
+    acertos = sum(len(set(e) & set(a)) for e, a in zip(exato, aproximado))
+    total = sum(len(e) for e in exato)
+    return acertos / total if total else 1.0
+
+
+def medir_latencia(colecao: SimpleVectorCollection, consultas: np.ndarray, k: int, exato: bool) -> float:
+    """Latência média por consulta (ms), uma consulta por chamada como no /chat"""
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        colecao.query([consulta.tolist()], n_results=k, exato=exato)
+    return (time.perf_counter() - inicio) * 1000 / len(consultas)
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark recall@k do índice IVF")
+    parser.add_argument("--sintetico", action="store_true", help="Usar dados sintéticos")
+    parser.add_argument("--n", type=int, default=20000, help="Vetores sintéticos")
+    parser.add_argument("--dim", type=int, default=256, help="Dimensão sintética")
+    parser.add_argument("--k", type=int, default=100, help="k do recall@k")
+    parser.add_argument("--consultas", type=int, default=50, help="Número de consultas")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--nlistas", type=int, default=None, help="Células (padrão ~sqrt(N))")
+    args = parser.parse_args()
+
+    vetores = None if args.sintetico else carregar_colecao_documents()
+    origem = "coleção documents"
+    if vetores is None:
+        vetores = gerar_dados_sinteticos(args.n, args.dim)
+        origem = "sintético"
+
+    rng = np.random.default_rng(1)
+    consultas = vetores[rng.choice(len(vetores), size=args.consultas, replace=False)]
+    consultas = consultas + rng.normal(scale=0.05, size=consultas.shape).astype(np.float32)
+
+    indice = IVFIndex(n_listas=args.nlistas, min_docs=0)
+    colecao = SimpleVectorCollection("benchmark")
+    inicio = time.perf_counter()
+    n = len(vetores)
+    colecao.add(
+        ids=[str(i) for i in range(n)],
+        embeddings=vetores,
+        metadatas=[{}] * n,
+        documents=[""] * n
+    )
+    colecao.configurar_indice(indice)
+    tempo_treino = time.perf_counter() - inicio
+
+    print("=" * 70)
+    print(f"BENCHMARK ANN ({origem}): N={n}, dim={vetores.shape[1]}, k={args.k}")
+    print(f"Células: {len(indice.centroides)} | treino: {tempo_treino:.2f}s")
+    print("=" * 70)
+
+    latencia_exata = medir_latencia(colecao, consultas, args.k, exato=True)
+    print(f"{'n_probe':>8} {'recall@k':>10} {'ms/consulta':>12} {'speedup':>8}")
+    print(f"{'exato':>8} {1.0:>10.3f} {latencia_exata:>12.2f} {1.0:>8.1f}")
+
+    for n_probe in args.nprobe:
+        indice.n_probe = n_probe
+        recall = calcular_recall_at_k(colecao, consultas, args.k)
+        latencia = medir_latencia(colecao, consultas, args.k, exato=False)
+        print(f"{n_probe:>8} {recall:>10.3f} {latencia:>12.2f} {latencia_exata / latencia:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
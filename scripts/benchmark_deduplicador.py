@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do Deduplicador: índice MinHash/LSH x varredura linear
+
+Para cada tamanho N de resultados já vistos, mede a vazão (resultados/s) de
+eh_novo com o índice LSH e estima a da varredura linear original
+(comparação Jaccard com todos os vistos) a partir de algumas consultas.
+Também confere se as duas abordagens concordam nas consultas medidas.
+
+Uso:
+    python scripts/benchmark_deduplicador.py
+    python scripts/benchmark_deduplicador.py --tamanhos 10000 100000 --threshold 0.8
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.agente.deduplicador import Deduplicador, calcular_hash_conteudo, calcular_similaridade
+
+
+def gerar_resultados(n: int, seed: int = 0, taxa_variacao: float = 0.3):
+    """Resultados sintéticos; parte deles são variações de resultados anteriores"""
+    rng = random.Random(seed)
+    vocabulario = [f"palavra{i}" for i in range(20000)]
+    resultados = []
+    for i in range(n):
+        if resultados and rng.random() < taxa_variacao:
+            base = rng.choice(resultados)
+            palavras = (base["titulo"] + " " + base["descricao"]).split()
+            for _ in range(rng.randint(0, 4)):
+                palavras[rng.randrange(len(palavras))] = rng.choice(vocabulario)
+        else:
+            palavras = rng.sample(vocabulario, rng.randint(15, 40))
+        resultados.append({
+            "titulo": " ".join(palavras[:8]),
+            "descricao": " ".join(palavras[8:]),
+            "url": f"https://example.com/{i}"
+        })
+    return resultados
+
+
+def eh_novo_linear(dedup: Deduplicador, resultado: dict) -> bool:
+    """eh_novo original: compara com todos os resultados vistos"""
+    conteudo = f"{resultado.get('titulo', '')} {resultado.get('descricao', '')}"
+    if calcular_hash_conteudo(conteudo) in dedup.hashes_vistos:
+        return False
+    for existente in dedup.hashes_vistos.values():
+        conteudo_existente = f"{existente.get('titulo', '')} {existente.get('descricao', '')}"
+        if calcular_similaridade(conteudo, conteudo_existente) >= dedup.threshold:
+            return False
+    return True
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark do Deduplicador (MinHash/LSH)")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--consultas", type=int, default=2000, help="Consultas medidas com LSH")
+    parser.add_argument("--consultas-linear", type=int, default=20, help="Consultas medidas na varredura linear")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"BENCHMARK DEDUPLICADOR (threshold={args.threshold})")
+    print("=" * 78)
+    print(f"{'vistos':>8} {'carga (res/s)':>14} {'LSH (res/s)':>12} {'linear (res/s)':>15} "
+          f"{'speedup':>8} {'cand/cons':>10} {'concordam':>10}")
+
+    for n in args.tamanhos:
+        dedup = Deduplicador(threshold=args.threshold)
+        resultados = gerar_resultados(n + args.consultas, seed=n)
+        vistos, consultas = resultados[:n], resultados[n:]
+
+        inicio = time.perf_counter()
+        for resultado in vistos:
+            dedup.eh_novo(resultado)
+        vazao_carga = n / (time.perf_counter() - inicio)
+
+        # Consultas sem registrar (mesma base para LSH e linear)
+        antes = dict(dedup._indice.stats)
+        inicio = time.perf_counter()
+        respostas_lsh = []
+        for resultado in consultas:
+            tokens = dedup._tokens(resultado)
+            conteudo = f"{resultado.get('titulo', '')} {resultado.get('descricao', '')}"
+            duplicado = (
+                calcular_hash_conteudo(conteudo) in dedup.hashes_vistos
+                or dedup._buscar_similar(tokens) is not None
+            )
+            respostas_lsh.append(not duplicado)
+        vazao_lsh = len(consultas) / (time.perf_counter() - inicio)
+        candidatos = (
+            (dedup._indice.stats["candidatos_verificados"] - antes["candidatos_verificados"])
+            / max(1, dedup._indice.stats["consultas"] - antes["consultas"])
+        )
+
+        amostra = consultas[:args.consultas_linear]
+        inicio = time.perf_counter()
+        respostas_linear = [eh_novo_linear(dedup, r) for r in amostra]
+        vazao_linear = len(amostra) / (time.perf_counter() - inicio)
+        concordam = sum(a == b for a, b in zip(respostas_linear, respostas_lsh))
+
+        print(f"{len(dedup.hashes_vistos):>8} {vazao_carga:>14.0f} {vazao_lsh:>12.0f} {vazao_linear:>15.1f} "
+              f"{vazao_lsh / vazao_linear:>8.0f} {candidatos:>10.1f} {concordam:>5}/{len(amostra)}")
+
+
+if __name__ == "__main__":
+    main()
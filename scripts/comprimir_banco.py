@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migração única: comprime as colunas de texto grande já gravadas e compacta o banco
+
+Colunas: url_content_cache.content, fontes_analises_cache.analise_llm e
+priorizacoes_falhas.analise_ia (novas gravações já saem comprimidas).
+Rode com a aplicação parada: o VACUUM reescreve o arquivo inteiro.
+
+Uso:
+    python scripts/comprimir_banco.py [--sem-vacuum]
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.config import get_database_path
+from app.database import db, comprimir_colunas_existentes, compactar_banco
+
+
+def tamanho_mb(caminho: Path) -> float:
+    """Tamanho do banco somado ao do WAL, em MB"""
+    arquivos = [caminho, caminho.with_name(caminho.name + "-wal")]
+    return sum(a.stat().st_size for a in arquivos if a.exists()) / (1024 * 1024)
+
+
+async def main(vacuum: bool = True):
+    caminho = get_database_path()
+    antes = tamanho_mb(caminho)
+    print(f"[COMPRIMIR] Banco: {caminho} ({antes:.1f} MB)")
+
+    await db.init_tables()
+    comprimidas = await comprimir_colunas_existentes()
+    for coluna, total in comprimidas.items():
+        print(f"[COMPRIMIR] {coluna}: {total} linhas comprimidas")
+
+    if vacuum:
+        print("[COMPRIMIR] Executando VACUUM...")
+        await compactar_banco()
+
+    await db.fechar()
+    depois = tamanho_mb(caminho)
+    print(f"[COMPRIMIR] Concluído: {antes:.1f} MB -> {depois:.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(vacuum="--sem-vacuum" not in sys.argv))
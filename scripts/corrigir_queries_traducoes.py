@@ -238,7 +238,7 @@ def atualizar_database(
             # Para cada entrada original em português, criar versão traduzida
             for falha_id, ferramenta, prioridade, tentativas, max_tentativas in entradas_pt:
                 cursor.execute("""
-                    INSERT INTO fila_pesquisas
+                    INSERT OR IGNORE INTO fila_pesquisas
                     (falha_id, query, idioma, ferramenta, prioridade, tentativas, max_tentativas, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?, 'pendente')
                 """, (
@@ -250,7 +250,7 @@ def atualizar_database(
                     0,  # Reset tentativas
                     max_tentativas
                 ))
-                queries_inseridas += 1
+                queries_inseridas += cursor.rowcount
 
         total_re_insert += len(mapa_traducoes)
 
@@ -191,7 +191,7 @@ def inserir_queries_traduzidas(
 
                 try:
                     cursor.execute("""
-                        INSERT INTO fila_pesquisas
+                        INSERT OR IGNORE INTO fila_pesquisas
                         (falha_id, query, idioma, ferramenta, prioridade, tentativas, max_tentativas, status)
                         VALUES (?, ?, ?, ?, ?, ?, ?, 'pendente')
                     """, (
@@ -203,7 +203,7 @@ def inserir_queries_traduzidas(
                         0,  # tentativas
                         3   # max_tentativas
                     ))
-                    total_inseridas += 1
+                    total_inseridas += cursor.rowcount
                 except Exception as e:
                     print(f"✗ Erro inserindo: {e}")
 
@@ -13,7 +13,7 @@ from typing import List, Dict, Any
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.config import settings, get_database_path, get_chroma_path
+from app.config import settings, get_database_path, get_chroma_path, get_embedding_cache_path
 from app.vector.embeddings import EmbeddingClient
 from app.vector.vector_store import VectorStore
 
@@ -33,7 +33,10 @@ class MigrationWorker:
         # Inicializar clientes
         self.embedding_client = EmbeddingClient(
             api_key=settings.OPENAI_API_KEY,
-            model=settings.EMBEDDING_MODEL
+            model=settings.EMBEDDING_MODEL,
+            cache_path=get_embedding_cache_path(),
+            cache_max_mb=settings.EMBEDDING_CACHE_MAX_MB,
+            cache_memoria_mb=settings.EMBEDDING_CACHE_MEMORIA_MB
         )
 
         self.vector_store = VectorStore(
@@ -205,7 +205,7 @@ def reinserir_com_traducoes(
             for meta in queries_pt_metadata:
                 if meta['query'] == query_pt:
                     cursor.execute("""
-                        INSERT INTO fila_pesquisas
+                        INSERT OR IGNORE INTO fila_pesquisas
                         (falha_id, query, idioma, ferramenta, prioridade, tentativas, max_tentativas, status)
                         VALUES (?, ?, ?, ?, ?, ?, ?, 'pendente')
                     """, (
@@ -217,7 +217,7 @@ def reinserir_com_traducoes(
                         0,
                         meta['max_tentativas']
                     ))
-                    total_inseridas += 1
+                    total_inseridas += cursor.rowcount
 
     conn.commit()
     conn.close()
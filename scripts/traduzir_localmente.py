@@ -18,7 +18,12 @@ import json
 
 # Configurar caminho do projeto
 PROJECT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from app.utils.memoria_traducao import gravar_sync, listar_sync
+
 DB_PATH = PROJECT_DIR / "falhas_mercado_v1.db"
+# Cache JSON legado (migrado para a memória de traduções)
 CACHE_FILE = PROJECT_DIR / "scripts" / "cache_traducoes_local.json"
 
 # Mapeamento de idiomas para nomes completos
@@ -39,19 +44,33 @@ MODELOS = {
 }
 
 def carregar_cache():
-    """Carrega cache de traduções anterior"""
+    """
+    Carrega traduções PT -> outros idiomas da memória de traduções (SQLite)
+
+    Chaves no formato "idioma:query". Um cache JSON legado, se existir,
+    é mesclado e migrado para a memória.
+    """
+    cache = {
+        f"{alvo}:{texto}": traducao
+        for alvo, texto, traducao in listar_sync(DB_PATH, "pt")
+    }
     if CACHE_FILE.exists():
         try:
             with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                legado = json.load(f)
+            for chave, traducao in legado.items():
+                cache.setdefault(chave, traducao)
         except:
-            return {}
-    return {}
+            pass
+    return cache
 
 def salvar_cache(cache):
-    """Salva cache de traduções"""
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, indent=2, ensure_ascii=False)
+    """Salva as traduções na memória de traduções compartilhada com o app"""
+    gravar_sync(
+        DB_PATH,
+        "pt",
+        [(*chave.split(":", 1), traducao) for chave, traducao in cache.items() if ":" in chave]
+    )
 
 def obter_queries_unicas(idioma):
     """Obtém todas as queries únicas de um idioma"""
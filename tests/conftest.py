@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Configuração compartilhada dos testes
+
+Testes marcados com @pytest.mark.benchmark medem tempo de relógio e só
+rodam com RODAR_BENCHMARKS=1 (fora da suíte padrão, que não pode depender
+da carga da máquina).
+"""
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: medição de desempenho (opt-in com RODAR_BENCHMARKS=1)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RODAR_BENCHMARKS"):
+        return
+    pular = pytest.mark.skip(reason="benchmark: rode com RODAR_BENCHMARKS=1")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(pular)
+
+
+@pytest_asyncio.fixture
+async def banco_app(tmp_path, monkeypatch):
+    """
+    Banco temporário (com pool e tabelas criadas) no lugar do `db` da aplicação
+
+    O `db` é trocado em app.database e nos módulos app.* que o importaram
+    com `from app.database import db`.
+    """
+    import app.database as database_mod
+    from app.database import Database
+
+    original = database_mod.db
+    database = Database(tmp_path / "app.db", usar_pool=True)
+    await database.init_tables()
+    # Colunas de tradução (adicionadas por migração no banco real)
+    await database.execute("ALTER TABLE resultados_pesquisa ADD COLUMN titulo_pt TEXT")
+    await database.execute("ALTER TABLE resultados_pesquisa ADD COLUMN descricao_pt TEXT")
+    for nome, modulo in list(sys.modules.items()):
+        if nome.startswith("app.") and getattr(modulo, "db", None) is original:
+            monkeypatch.setattr(modulo, "db", database)
+    yield database
+    await database.fechar()
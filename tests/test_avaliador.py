@@ -2,9 +2,15 @@
 """
 Testes para avaliador de confianca (confidence scorer)
 """
+import math
+import random
+import time
+
 import pytest
 from app.agente.avaliador import (
     Avaliador,
+    PontuadorRelevancia,
+    _SomaExata,
     calcular_score_relevancia,
     calcular_score_ponderado,
     extrair_palavras_chave
@@ -216,3 +222,205 @@ class TestAvaliador:
         assert len(scores) == 2
         assert all(isinstance(s, float) for s in scores)
         assert all(0.0 <= s <= 1.0 for s in scores)
+
+
+def _metricas_referencia(scores, resultados):
+    """Métricas calculadas como no avaliar_qualidade_conjunto original"""
+    qualidade_geral = sum(scores) / len(scores)
+    piores = sorted(scores)[:max(1, len(scores) // 3)]
+    consistencia = 1.0 - min(1.0, max(scores) - min(scores))
+    return {
+        "qualidade_geral": round(qualidade_geral, 3),
+        "confianca": round(qualidade_geral * 0.7 + consistencia * 0.3, 3),
+        "diversidade": round(min(1.0, len(set(r.get("fonte", "unknown") for r in resultados)) / 5.0), 3),
+        "consistencia": round(consistencia, 3),
+        "melhor_score": round(max(scores), 3),
+        "media_piores": round(sum(piores) / len(piores), 3),
+    }
+
+
+class TestConjuntoAvaliado:
+    """Testes para a avaliação incremental de conjuntos"""
+
+    @pytest.mark.asyncio
+    async def test_incremental_igual_ao_conjunto_completo(self):
+        """Cada resultado é avaliado uma vez e as métricas batem com o cálculo completo"""
+        rng = random.Random(7)
+        palavras = ["credito", "startups", "inovacao", "fomento", "capital", "politica", "mercado"]
+        fontes = ["perplexity", "jina", "tavily", "serper", "blog", "unknown"]
+        resultados = [
+            {
+                "titulo": " ".join(rng.sample(palavras, 3)),
+                "descricao": " ".join(rng.choices(palavras, k=rng.randint(0, 12))),
+                "url": f"https://example.com/{rng.randint(0, 40)}",
+                "fonte": rng.choice(fontes)
+            }
+            for _ in range(120)
+        ]
+
+        avaliador = Avaliador()
+        chamadas = []
+        avaliar_original = avaliador.avaliar
+
+        async def avaliar_contando(resultado, query, usar_rag=False):
+            chamadas.append(resultado)
+            return await avaliar_original(resultado, query, usar_rag=usar_rag)
+
+        avaliador.avaliar = avaliar_contando
+        conjunto = avaliador.novo_conjunto("credito startups")
+        acumulados = []
+
+        for inicio in range(0, len(resultados), 15):
+            novos = resultados[inicio:inicio + 15]
+            antes = len(chamadas)
+            await conjunto.adicionar(novos)
+            acumulados.extend(novos)
+
+            # Só os resultados novos são avaliados
+            assert len(chamadas) - antes == len(novos)
+
+            avaliacao = conjunto.avaliar()
+            completa = await avaliador.avaliar_qualidade_conjunto(acumulados, "credito startups")
+            scores = await Avaliador().avaliar_batch(acumulados, "credito startups")
+
+            assert avaliacao == completa
+            for campo, valor in _metricas_referencia(scores, acumulados).items():
+                assert avaliacao[campo] == valor, campo
+
+    @pytest.mark.asyncio
+    async def test_conjunto_completo_igual_a_formula_original(self):
+        """avaliar_qualidade_conjunto bate com a fórmula original (sum() em ordem)"""
+        rng = random.Random(11)
+        fontes = ["perplexity", "jina", "tavily", "serper", "blog", "unknown"]
+        avaliador = Avaliador()
+
+        for n in list(range(1, 40)) + [97, 250, 1000]:
+            scores = [rng.choice((rng.random(), round(rng.random(), 1), 0.1, 0.7)) for _ in range(n)]
+            resultados = [{"url": f"https://example.com/{i}", "fonte": rng.choice(fontes)} for i in range(n)]
+
+            async def avaliar_batch(resultados, query, scores=scores):
+                return list(scores)
+
+            avaliador.avaliar_batch = avaliar_batch
+            avaliacao = await avaliador.avaliar_qualidade_conjunto(resultados, "q")
+
+            for campo, valor in _metricas_referencia(scores, resultados).items():
+                assert avaliacao[campo] == valor, (n, campo)
+
+    def test_soma_exata_incremental(self):
+        """A soma incremental (com remoções) é a soma exata dos valores, como fsum"""
+        rng = random.Random(3)
+        soma = _SomaExata()
+        valores = []
+        for _ in range(5000):
+            if valores and rng.random() < 0.3:
+                valor = valores.pop(rng.randrange(len(valores)))
+                soma.adicionar(-valor)
+            else:
+                valor = rng.random() * 10 ** rng.randint(-8, 2)
+                valores.append(valor)
+                soma.adicionar(valor)
+            assert soma.valor() == math.fsum(valores)
+        assert len(soma._parciais) < 50
+
+    @pytest.mark.asyncio
+    async def test_conjunto_vazio(self):
+        """Sem resultados, recomenda continuar"""
+        avaliacao = Avaliador().novo_conjunto("q").avaliar()
+        assert avaliacao["qualidade_geral"] == 0.0
+        assert avaliacao["recomendacao"] == "continuar"
+
+
+def _score_relevancia_original(resultado, query, resultado_traduzido=None):
+    """calcular_score_relevancia antes do PontuadorRelevancia (referência)"""
+    if not resultado or not query:
+        return 0.0
+    texto_para_avaliar = resultado_traduzido if resultado_traduzido else resultado
+    palavras_query = extrair_palavras_chave(query)
+    if not palavras_query:
+        return 0.0
+    texto_lower = texto_para_avaliar.lower()
+    query_lower = query.lower()
+    matches = 0
+    matches_parciais = 0
+    for palavra in palavras_query:
+        if palavra in texto_lower:
+            matches += 1
+        else:
+            for palavra_texto in texto_lower.split():
+                if palavra in palavra_texto or palavra_texto in palavra:
+                    matches_parciais += 1
+                    break
+    score_base = (matches / len(palavras_query)) * 0.75
+    bonus_parcial = (matches_parciais / len(palavras_query)) * 0.10
+    bonus_phrase = 0.0
+    if query_lower in texto_lower:
+        bonus_phrase = 0.25
+    elif matches == len(palavras_query):
+        bonus_phrase = 0.15
+    return min(1.0, score_base + bonus_parcial + bonus_phrase)
+
+
+def _corpus_relevancia(n, seed=3):
+    rng = random.Random(seed)
+    vocabulario = [
+        "educação", "educacional", "crédito", "startups", "startup", "inovação", "capital",
+        "de", "para", "fomento", "políticas", "públicas", "mercado", "acesso", "a", "e",
+        "financiamento,", "(inovação)", "edu", "cap", "tecnologia.", "Inovação", "PÚBLICAS"
+    ]
+    queries = [
+        "acesso a crédito para startups",
+        "políticas públicas de inovação",
+        "educação empreendedora",
+        "financiamento de capital de risco",
+        "de a e",
+    ]
+    textos = []
+    for _ in range(n):
+        texto = " ".join(rng.choices(vocabulario, k=rng.randint(0, 40)))
+        traduzido = " ".join(rng.choices(vocabulario, k=rng.randint(1, 20))) if rng.random() < 0.3 else None
+        textos.append((texto, traduzido))
+    return queries, textos
+
+
+class TestPontuadorRelevancia:
+    """Testes para o pontuador de relevância compilado por query"""
+
+    def test_scores_identicos_ao_original(self):
+        """Scores bit a bit iguais aos da implementação anterior"""
+        queries, textos = _corpus_relevancia(2000)
+
+        for query in queries:
+            pontuador = PontuadorRelevancia(query)
+            esperados = [_score_relevancia_original(t, query, tr) for t, tr in textos]
+            assert pontuador.pontuar_lote(textos) == esperados
+
+    @pytest.mark.asyncio
+    async def test_funcao_usa_pontuador(self):
+        """calcular_score_relevancia mantém o contrato (casos vazios incluídos)"""
+        assert await calcular_score_relevancia("", "credito") == 0.0
+        assert await calcular_score_relevancia("credito", "") == 0.0
+        assert await calcular_score_relevancia("texto qualquer", "de a e") == 0.0
+        texto = "Linhas de crédito para startups e acesso a crédito para startups"
+        assert await calcular_score_relevancia(texto, "acesso a crédito para startups") == \
+            _score_relevancia_original(texto, "acesso a crédito para startups")
+
+    @pytest.mark.benchmark
+    def test_micro_benchmark(self):
+        """Micro-benchmark: pontuador compilado x implementação anterior (só informa)"""
+        queries, textos = _corpus_relevancia(3000, seed=11)
+
+        inicio = time.perf_counter()
+        for query in queries:
+            [_score_relevancia_original(t, query, tr) for t, tr in textos]
+        tempo_original = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for query in queries:
+            PontuadorRelevancia(query).pontuar_lote(textos)
+        tempo_compilado = time.perf_counter() - inicio
+
+        total = len(queries) * len(textos)
+        print(f"\n[BENCHMARK] Relevância: original {total / tempo_original:,.0f} textos/s | "
+              f"compilado {total / tempo_compilado:,.0f} textos/s | "
+              f"{tempo_original / tempo_compilado:.1f}x")
@@ -233,3 +233,133 @@ if __name__ == "__main__":
         print(f"✗ Erro em test_calculo_metricas_qualidade: {e}")
 
     print("\n✓ Testes de busca adaptativa completados!")
+
+
+class _CanalFalso:
+    """Cliente de busca com latência fixa que registra cancelamentos"""
+
+    def __init__(self, nome: str, atraso: float, falhar: bool = False):
+        self.nome = nome
+        self.atraso = atraso
+        self.falhar = falhar
+        self.cancelado = False
+
+    async def pesquisar(self, query, idioma="pt", max_resultados=5, **kwargs):
+        try:
+            await asyncio.sleep(self.atraso)
+        except asyncio.CancelledError:
+            self.cancelado = True
+            raise
+        if self.falhar:
+            raise RuntimeError(f"{self.nome} indisponível")
+        return [{"titulo": f"{self.nome} {query}", "descricao": "", "url": f"https://{self.nome}.com"}]
+
+
+class _ConjuntoFalso:
+    """Recomenda parar quando há `parar_com` resultados"""
+
+    def __init__(self, parar_com: int):
+        self.parar_com = parar_com
+        self.resultados = []
+
+    async def adicionar(self, resultados):
+        self.resultados.extend(resultados)
+
+    def avaliar(self):
+        parar = len(self.resultados) >= self.parar_com
+        return {
+            "qualidade_geral": 0.9 if parar else 0.1,
+            "confianca": 0.5,
+            "diversidade": 0.5,
+            "recomendacao": "parar" if parar else "continuar",
+            "motivo": "teste"
+        }
+
+
+class _AvaliadorFalso:
+    def __init__(self, parar_com: int):
+        self.parar_com = parar_com
+
+    def novo_conjunto(self, query):
+        return _ConjuntoFalso(self.parar_com)
+
+
+def _pesquisador_com_canais(monkeypatch, canais, parar_com, paralelos=3, min_buscas=2, max_buscas=8):
+    monkeypatch.setattr(settings, "USAR_BUSCA_ADAPTATIVA", True)
+    monkeypatch.setattr(settings, "BUSCA_ESPECULATIVA", True)
+    monkeypatch.setattr(settings, "BUSCA_ESPECULATIVA_CANAIS", paralelos)
+    monkeypatch.setattr(settings, "MIN_BUSCAS_POR_FALHA", min_buscas)
+    monkeypatch.setattr(settings, "MAX_BUSCAS_POR_FALHA", max_buscas)
+    monkeypatch.setattr(settings, "SEARCH_CHANNELS_ENABLED", {nome: True for nome in canais})
+
+    pesquisador = AgentePesquisador()
+    pesquisador.perplexity_client = canais.get("perplexity")
+    pesquisador.tavily_client = canais.get("tavily")
+    pesquisador.serper_client = canais.get("serper")
+    pesquisador.deep_research_client = canais.get("deep_research")
+    pesquisador.jina_client = None
+    pesquisador.avaliador = _AvaliadorFalso(parar_com)
+    return pesquisador
+
+
+@pytest.mark.asyncio
+async def test_especulativa_cancela_pendentes(monkeypatch):
+    """Canais rodam em paralelo e os lentos são cancelados ao atingir a qualidade"""
+    canais = {
+        "perplexity": _CanalFalso("perplexity", 0.05),
+        "tavily": _CanalFalso("tavily", 0.05),
+        "serper": _CanalFalso("serper", 5.0),
+    }
+    pesquisador = _pesquisador_com_canais(monkeypatch, canais, parar_com=2)
+
+    inicio = asyncio.get_running_loop().time()
+    resultado = await pesquisador.executar_pesquisa_adaptativa("inovação", ferramentas=list(canais))
+    duracao = asyncio.get_running_loop().time() - inicio
+
+    assert resultado["num_buscas"] == 2
+    assert resultado["motivo_parada"].startswith("Qualidade suficiente")
+    assert canais["serper"].cancelado
+    assert duracao < 1.0  # ~max das latências, não a soma (nem o sleep de 1s)
+
+
+@pytest.mark.asyncio
+async def test_especulativa_respeita_min_max(monkeypatch):
+    """Falhas liberam vaga; nunca mais que max_buscas nem parada antes do mínimo"""
+    canais = {
+        "perplexity": _CanalFalso("perplexity", 0.01),
+        "tavily": _CanalFalso("tavily", 0.01, falhar=True),
+        "serper": _CanalFalso("serper", 0.02),
+        "deep_research": _CanalFalso("deep_research", 0.03),
+    }
+    pesquisador = _pesquisador_com_canais(monkeypatch, canais, parar_com=1, paralelos=2, min_buscas=2, max_buscas=2)
+
+    resultado = await pesquisador.executar_pesquisa_adaptativa("inovação", ferramentas=list(canais))
+
+    assert resultado["num_buscas"] == 2
+    assert len(resultado["resultados"]) == 2
+    assert not any(canal.cancelado for canal in canais.values())
+
+
+@pytest.mark.asyncio
+async def test_especulativa_aproveita_lote_concluido(monkeypatch):
+    """Buscas que terminam junto com a que decide parar entram no resultado (não são canceladas)"""
+    class _CanalSincronizado(_CanalFalso):
+        """Termina junto com o outro canal sincronizado (mesmo lote do asyncio.wait)"""
+
+        async def pesquisar(self, query, idioma="pt", max_resultados=5, **kwargs):
+            await barreira.wait()
+            return await super().pesquisar(query, idioma, max_resultados)
+
+    barreira = asyncio.Barrier(2)
+    canais = {
+        "perplexity": _CanalSincronizado("perplexity", 0),
+        "tavily": _CanalSincronizado("tavily", 0),
+        "serper": _CanalFalso("serper", 5.0),
+    }
+    pesquisador = _pesquisador_com_canais(monkeypatch, canais, parar_com=1, min_buscas=1)
+
+    resultado = await pesquisador.executar_pesquisa_adaptativa("inovação", ferramentas=list(canais))
+
+    assert resultado["num_buscas"] == 2
+    assert {r["url"] for r in resultado["resultados"]} == {"https://perplexity.com", "https://tavily.com"}
+    assert not canais["tavily"].cancelado and canais["serper"].cancelado
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para os clientes HTTP compartilhados
+"""
+import pytest
+
+from app.integracao.clientes_http import (
+    fechar_clientes_http,
+    get_stats_clientes_http,
+    obter_cliente_http,
+    obter_sessao_http
+)
+from app.integracao.openrouter_api import OpenRouterClient
+
+
+class TestClientesHttp:
+    """Testes para o registro de clientes HTTP da aplicação"""
+
+    @pytest.mark.asyncio
+    async def test_cliente_reutilizado_por_servico(self):
+        """Cada serviço tem um cliente, reutilizado entre chamadas"""
+        try:
+            tavily = obter_cliente_http("tavily")
+            assert obter_cliente_http("tavily") is tavily
+            assert obter_cliente_http("serper") is not tavily
+            assert {"tavily", "serper"} <= set(get_stats_clientes_http()["clientes"])
+        finally:
+            await fechar_clientes_http()
+
+        assert tavily.is_closed
+        assert obter_cliente_http("tavily") is not tavily
+        await fechar_clientes_http()
+
+    @pytest.mark.asyncio
+    async def test_openrouter_compartilha_sessao(self):
+        """Vários OpenRouterClient usam a mesma sessão, que sobrevive ao context manager"""
+        try:
+            async with OpenRouterClient(api_key="teste") as primeiro:
+                sessao = primeiro.session
+            async with OpenRouterClient(api_key="teste") as segundo:
+                assert segundo.session is sessao
+            assert not sessao.closed
+            assert obter_sessao_http("openrouter") is sessao
+        finally:
+            await fechar_clientes_http()
+
+        assert sessao.closed
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para a busca de conteúdo completo das fontes
+"""
+import asyncio
+from urllib.parse import urlsplit
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import app.database as database_mod
+from app.config import settings
+from app.utils import content_fetcher
+from app.utils.content_fetcher import BuscadorConteudo, enrich_sources_with_full_content, fetch_url_content_with_cache
+
+
+class _ClienteFalso:
+    """Cliente do Jina Reader que conta buscas simultâneas por domínio"""
+
+    def __init__(self):
+        self.urls = []
+        self.falhar = set()
+        self.em_curso = {}
+        self.max_por_dominio = 0
+        self.max_total = 0
+
+    async def get(self, url, timeout=None):
+        original = url.removeprefix("https://r.jina.ai/")
+        dominio = urlsplit(original).hostname
+        self.urls.append(original)
+        self.em_curso[dominio] = self.em_curso.get(dominio, 0) + 1
+        self.max_por_dominio = max(self.max_por_dominio, self.em_curso[dominio])
+        self.max_total = max(self.max_total, sum(self.em_curso.values()))
+        await asyncio.sleep(0.01)
+        self.em_curso[dominio] -= 1
+        request = httpx.Request("GET", url)
+        if original in self.falhar:
+            return httpx.Response(503, request=request)
+        return httpx.Response(200, text=f"Título de {original}\n\n" + "conteúdo " * 200, request=request)
+
+
+@pytest_asyncio.fixture
+async def banco_conteudo(banco_app, monkeypatch):
+    cliente = _ClienteFalso()
+    monkeypatch.setattr(content_fetcher, "obter_cliente_http", lambda servico: cliente)
+    monkeypatch.setattr(content_fetcher, "_buscador", BuscadorConteudo(3, 2))
+    yield banco_app, cliente
+
+
+def _fontes(urls):
+    return [{"fonte_tipo": "pesquisa", "fonte_url": url, "fonte_conteudo": "resumo"} for url in urls]
+
+
+class TestBuscadorConteudo:
+    """Testes para limites, coalescência e cache de URLs"""
+
+    @pytest.mark.asyncio
+    async def test_limites_coalescencia_e_cache(self, banco_conteudo):
+        """Cada URL é buscada uma vez, respeitando os limites, e depois vem do cache comprimido"""
+        database, cliente = banco_conteudo
+        urls = [f"https://a.com/{i}" for i in range(4)] + ["https://b.com/1", "https://c.com/1"]
+
+        enriquecidas = await enrich_sources_with_full_content(_fontes(urls + urls[:2]))
+
+        assert sorted(cliente.urls) == sorted(urls)
+        assert cliente.max_por_dominio == 2 and cliente.max_total == 3
+        assert all(f["conteudo_completo"].startswith("Título de") for f in enriquecidas)
+        assert enriquecidas[0]["url_title"] == "Título de https://a.com/0"
+
+        linha = await database.fetch_one(
+            "SELECT content, typeof(content) AS tipo FROM url_content_cache WHERE url = ?", (urls[0],)
+        )
+        assert linha["tipo"] == "blob" and len(linha["content"]) < len(enriquecidas[0]["conteudo_completo"])
+
+        resultados = await asyncio.gather(*[fetch_url_content_with_cache(urls[1]) for _ in range(3)])
+        assert all(r["from_cache"] for r in resultados)
+        assert len(cliente.urls) == len(urls)
+
+    @pytest.mark.asyncio
+    async def test_cache_negativo_com_backoff(self, banco_conteudo, monkeypatch):
+        """URL com erro não é buscada de novo antes do backoff, que dobra a cada falha"""
+        database, cliente = banco_conteudo
+        monkeypatch.setattr(settings, "CONTEUDO_ERRO_BACKOFF_MIN", 10.0)
+        url = "https://falha.com/x"
+        cliente.falhar.add(url)
+
+        assert (await fetch_url_content_with_cache(url))["error"]
+        negativo = await fetch_url_content_with_cache(url)
+        assert negativo["error"] and negativo["from_cache"]
+        assert cliente.urls == [url]
+
+        await database.execute("UPDATE url_content_cache SET expires_at = datetime('now', '-1 second')")
+        await fetch_url_content_with_cache(url)
+        linha = await database.fetch_one(
+            "SELECT tentativas_erro, (julianday(expires_at) - julianday('now')) * 1440 AS minutos "
+            "FROM url_content_cache WHERE url = ?", (url,)
+        )
+        assert linha["tentativas_erro"] == 2
+        assert 19 < linha["minutos"] <= 20
+
+    @pytest.mark.asyncio
+    async def test_conteudo_vencido_servido_se_atualizacao_falha(self, banco_conteudo):
+        """Depois do TTL a URL é buscada de novo; se falhar, o conteúdo antigo continua valendo"""
+        database, cliente = banco_conteudo
+        url = "https://a.com/velha"
+        original = await fetch_url_content_with_cache(url)
+
+        await database.execute("UPDATE url_content_cache SET expires_at = datetime('now', '-1 second')")
+        cliente.falhar.add(url)
+        atualizado = await fetch_url_content_with_cache(url)
+
+        assert atualizado["content"] == original["content"] and atualizado["stale"]
+        assert len(cliente.urls) == 2
+        assert (await fetch_url_content_with_cache(url))["content"] == original["content"]
+        assert len(cliente.urls) == 2
+
+        removidas = await database_mod.limpar_url_cache_expirado(retencao_dias=0)
+        assert removidas == 0
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o pool de conexões do banco de dados
+"""
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.database import Database, _eh_leitura
+
+
+@pytest_asyncio.fixture
+async def banco(tmp_path):
+    database = Database(tmp_path / "teste.db", usar_pool=True)
+    await database.execute("CREATE TABLE itens (id INTEGER PRIMARY KEY, nome TEXT, valor INTEGER)")
+    yield database
+    await database.fechar()
+
+
+class TestPoolConexoes:
+    """Testes para o modo pool do Database"""
+
+    def test_classificacao_leitura(self):
+        """SELECT/WITH vão para leitura; DML e RETURNING para o escritor"""
+        assert _eh_leitura("  select * from itens")
+        assert _eh_leitura("WITH x AS (SELECT 1) SELECT * FROM x")
+        assert not _eh_leitura("UPDATE itens SET valor = 1 RETURNING id")
+        assert not _eh_leitura("INSERT INTO itens (nome) VALUES ('a')")
+
+    @pytest.mark.asyncio
+    async def test_pragmas_aplicados(self, banco):
+        """Conexões usam WAL e synchronous=NORMAL"""
+        modo = await banco.fetch_one("PRAGMA journal_mode")
+        sincrono = await banco.fetch_one("PRAGMA synchronous")
+
+        assert modo["journal_mode"] == "wal"
+        assert sincrono["synchronous"] == 1  # NORMAL
+
+    @pytest.mark.asyncio
+    async def test_escritas_concorrentes_sem_lock(self, banco):
+        """Escritas e leituras simultâneas não geram 'database is locked'"""
+        async def escrever(i):
+            await banco.execute("INSERT INTO itens (nome, valor) VALUES (?, ?)", (f"item{i}", i))
+
+        async def ler():
+            return await banco.fetch_all("SELECT * FROM itens")
+
+        await asyncio.gather(*[escrever(i) for i in range(50)], *[ler() for _ in range(20)])
+
+        total = await banco.fetch_one("SELECT COUNT(*) AS total FROM itens")
+        assert total["total"] == 50
+        assert len(banco.pool._todas) <= banco.pool.tamanho_leitura + 1
+
+    @pytest.mark.asyncio
+    async def test_returning_e_confirmado(self, banco):
+        """fetch_* com UPDATE ... RETURNING grava a alteração"""
+        await banco.execute_many(
+            "INSERT INTO itens (nome, valor) VALUES (?, ?)", [("a", 1), ("b", 2)]
+        )
+        linhas = await banco.fetch_all("UPDATE itens SET valor = valor + 10 RETURNING nome, valor")
+
+        assert sorted(l["valor"] for l in linhas) == [11, 12]
+        assert (await banco.fetch_one("SELECT SUM(valor) AS s FROM itens"))["s"] == 23
+
+    @pytest.mark.asyncio
+    async def test_erro_nao_deixa_transacao_aberta(self, banco):
+        """Falha numa escrita não contamina as escritas seguintes"""
+        with pytest.raises(Exception):
+            await banco.execute("INSERT INTO tabela_inexistente VALUES (1)")
+        await banco.execute("INSERT INTO itens (nome, valor) VALUES ('ok', 1)")
+
+        assert (await banco.fetch_one("SELECT COUNT(*) AS total FROM itens"))["total"] == 1
+
+    @pytest.mark.asyncio
+    async def test_metricas(self, banco):
+        """Métricas registram espera e latência de leitura e escrita"""
+        await banco.fetch_all("SELECT * FROM itens")
+        metricas = banco.get_metricas()
+
+        assert metricas["pool"] is True
+        assert metricas["consulta_leitura"]["contagem"] >= 1
+        assert metricas["consulta_escrita"]["contagem"] >= 1
+        assert metricas["espera_leitura"]["contagem"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_modo_sem_pool(self, tmp_path):
+        """Sem pool, a API continua funcionando com conexões avulsas"""
+        database = Database(tmp_path / "avulso.db", usar_pool=False)
+        await database.execute("CREATE TABLE t (x INTEGER)")
+        await database.execute("INSERT INTO t VALUES (1)")
+
+        assert await database.fetch_all("SELECT x FROM t") == [{"x": 1}]
+        assert database.get_metricas() == {"pool": False}
+
+
+@pytest_asyncio.fixture
+async def banco_falhas(tmp_path, monkeypatch):
+    import app.database as database_mod
+
+    database = Database(tmp_path / "falhas.db", usar_pool=True)
+    await database.execute(
+        "CREATE TABLE falhas_mercado (id INTEGER PRIMARY KEY, titulo TEXT, pilar TEXT, "
+        "descricao TEXT, dica_busca TEXT)"
+    )
+    await database.init_tables()
+    monkeypatch.setattr(database_mod, "db", database)
+    yield database
+    await database.fechar()
+
+
+class TestResumoFalhas:
+    """Testes para a listagem agregada de falhas"""
+
+    @pytest.mark.asyncio
+    async def test_agregados_sem_multiplicacao_do_join(self, banco_falhas):
+        """Contagens da fila não são multiplicadas pelo número de resultados"""
+        from app.database import listar_falhas_resumo
+
+        await banco_falhas.execute_many(
+            "INSERT INTO falhas_mercado (id, titulo, pilar, descricao, dica_busca) VALUES (?, ?, ?, ?, ?)",
+            [(1, "F1", "Capital", "d", "b"), (2, "F2", "Mercado", "d", "b"), (3, "F3", "Capital", "d", "b")]
+        )
+        scores = [0.9, 0.1, 0.5, 0.7]
+        await banco_falhas.execute_many(
+            "INSERT INTO resultados_pesquisa (falha_id, titulo, fonte_url, idioma, confidence_score, "
+            "ferramenta_origem, hash_conteudo) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, f"r{i}", f"https://x/{i}", "pt" if i % 2 else "en", score, "perplexity", f"h{i}")
+                for i, score in enumerate(scores)
+            ] + [(2, "r9", "https://x/9", "es", 0.42, "jina", "h9")]
+        )
+        await banco_falhas.execute_many(
+            "INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta, status) VALUES (?, ?, ?, ?, ?)",
+            [
+                (1, "q1", "pt", "perplexity", "completa"),
+                (1, "q1", "en", "tavily", "erro"),
+                (1, "q2", "pt", "perplexity", "pendente"),
+                (1, "q3", "pt", "perplexity", "processando"),
+            ]
+        )
+
+        falhas = await listar_falhas_resumo()
+        f1, f2, f3 = falhas
+
+        assert [f["id"] for f in falhas] == [1, 2, 3]
+        assert f1["total_resultados"] == 4
+        assert f1["confidence_medio"] == 0.6  # mediana de [0.1, 0.5, 0.7, 0.9]
+        assert (f1["searches_completed"], f1["searches_in_progress"], f1["searches_pending"]) == (2, 1, 1)
+        assert f1["total_buscas_enfileiradas"] == 4
+        assert f1["num_ferramentas"] == 2
+        assert f1["num_idiomas"] == 2
+        assert f1["num_queries_processadas"] == 3
+        assert f2["confidence_medio"] == 0.42 and f2["total_buscas_enfileiradas"] == 0
+        assert f3["total_resultados"] == 0 and f3["confidence_medio"] == 0.0 and f3["num_ferramentas"] == 0
+
+        capital = await listar_falhas_resumo(skip=1, limit=5, pilar="Capital")
+        assert [f["id"] for f in capital] == [3]
+
+
+@pytest_asyncio.fixture
+async def banco_fila(tmp_path, monkeypatch):
+    import app.database as database_mod
+
+    # Sem pool: cada chamada abre sua conexão, como processos separados
+    database = Database(tmp_path / "fila.db", usar_pool=False)
+    await database.init_tables()
+    await database.execute("PRAGMA journal_mode=WAL")
+    await database.execute_many(
+        "INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta, prioridade) VALUES (?, ?, ?, ?, ?)",
+        [(1, f"query {i}", "pt", "perplexity", 1 if i % 10 == 0 else 0) for i in range(40)]
+    )
+    monkeypatch.setattr(database_mod, "db", database)
+    yield database
+    await database.fechar()
+
+
+class TestReservaFila:
+    """Testes para a reserva atômica de entradas com lease"""
+
+    @pytest.mark.asyncio
+    async def test_reservas_simultaneas_nao_se_sobrepoem(self, banco_fila):
+        """Workers concorrentes recebem entradas distintas, por prioridade"""
+        from app.database import reservar_entradas_fila
+
+        lotes = await asyncio.gather(*[reservar_entradas_fila(f"w{i}", 7) for i in range(6)])
+
+        ids = [entrada["id"] for lote in lotes for entrada in lote]
+        assert len(ids) == len(set(ids)) == 40
+        assert all(entrada["worker_id"] == f"w{i}" for i, lote in enumerate(lotes) for entrada in lote)
+        assert all(entrada["status"] == "processando" and entrada["tentativas"] == 1 for lote in lotes for entrada in lote)
+        assert await reservar_entradas_fila("w9", 5) == []
+
+        plano = await banco_fila.fetch_all(
+            "EXPLAIN QUERY PLAN SELECT id FROM fila_pesquisas WHERE status = 'pendente' "
+            "ORDER BY prioridade DESC, id LIMIT 5"
+        )
+        assert any("idx_fila_reserva" in linha["detail"] for linha in plano)
+
+    @pytest.mark.asyncio
+    async def test_prioridade_e_lease_expirado(self, banco_fila):
+        """Maior prioridade primeiro; lease vencido volta à fila e o dono antigo não conclui"""
+        from app.database import finalizar_entrada_fila, renovar_leases_fila, reservar_entradas_fila
+
+        primeiras = await reservar_entradas_fila("w1", 5)
+        assert [e["prioridade"] for e in primeiras] == [1, 1, 1, 1, 0]
+        assert [e["id"] for e in primeiras[:4]] == sorted(e["id"] for e in primeiras[:4])
+
+        await banco_fila.execute(
+            "UPDATE fila_pesquisas SET lease_expira_em = datetime('now', '-1 seconds') WHERE worker_id = 'w1'"
+        )
+        assert await renovar_leases_fila([e["id"] for e in primeiras], "w2") == 0
+
+        retomadas = await reservar_entradas_fila("w2", 5)
+        assert [e["id"] for e in retomadas] == [e["id"] for e in primeiras]
+        assert all(e["tentativas"] == 2 for e in retomadas)
+
+        assert not await finalizar_entrada_fila(primeiras[0]["id"], "completa", "w1")
+        assert await finalizar_entrada_fila(primeiras[0]["id"], "completa", "w2")
+        linha = await banco_fila.fetch_one("SELECT * FROM fila_pesquisas WHERE id = ?", (primeiras[0]["id"],))
+        assert linha["status"] == "completa" and linha["worker_id"] is None
+
+    @pytest.mark.asyncio
+    async def test_migracao_e_liberacao(self, tmp_path, monkeypatch):
+        """Banco antigo ganha as colunas de lease; liberar devolve só as do worker"""
+        import app.database as database_mod
+        from app.database import liberar_entradas_fila, reservar_entradas_fila
+
+        database = Database(tmp_path / "antigo.db", usar_pool=False)
+        await database.execute(
+            "CREATE TABLE fila_pesquisas (id INTEGER PRIMARY KEY AUTOINCREMENT, falha_id INTEGER NOT NULL, "
+            "query TEXT NOT NULL, idioma TEXT NOT NULL, ferramenta TEXT NOT NULL, prioridade INTEGER DEFAULT 0, "
+            "tentativas INTEGER DEFAULT 0, max_tentativas INTEGER DEFAULT 3, status TEXT DEFAULT 'pendente', "
+            "criado_em DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        await database.execute_many(
+            "INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta) VALUES (1, ?, 'pt', 'jina')",
+            [(f"q{i}",) for i in range(4)]
+        )
+        await database.init_tables()
+        monkeypatch.setattr(database_mod, "db", database)
+
+        await reservar_entradas_fila("w1", 2)
+        await reservar_entradas_fila("w2", 2)
+        assert await liberar_entradas_fila("w1") == 2
+
+        linhas = await database.fetch_all("SELECT status, worker_id, tentativas FROM fila_pesquisas ORDER BY id")
+        assert [l["status"] for l in linhas] == ["pendente", "pendente", "processando", "processando"]
+        assert [l["tentativas"] for l in linhas] == [0, 0, 1, 1]
+
+
+class TestFilaEmLote:
+    """Testes para a inserção em lote com entradas únicas na fila"""
+
+    @pytest.mark.asyncio
+    async def test_lote_ignora_repetidas(self, banco_fila):
+        """Entradas já na fila ou repetidas no lote não são duplicadas"""
+        from app.database import inserir_fila_pesquisas_lote, listar_chaves_fila
+
+        entradas = [
+            {"falha_id": 1, "query": "query 0", "idioma": "pt", "ferramenta": "perplexity"},
+            {"falha_id": 1, "query": "query 0", "idioma": "pt", "ferramenta": "tavily"},
+            {"falha_id": 1, "query": "nova", "idioma": "en", "ferramenta": "tavily"},
+            {"falha_id": 1, "query": "nova", "idioma": "es", "ferramenta": "tavily"},
+        ]
+
+        assert await inserir_fila_pesquisas_lote(entradas) == 2
+        assert await inserir_fila_pesquisas_lote(entradas) == 0
+        chaves = await listar_chaves_fila(1)
+        assert len(chaves) == 42
+        assert {("query 0", "tavily"), ("nova", "tavily")} <= chaves
+
+    @pytest.mark.asyncio
+    async def test_migracao_remove_repetidas(self, tmp_path):
+        """Banco antigo com entradas repetidas mantém a mais antiga e ganha o índice único"""
+        database = Database(tmp_path / "antigo.db", usar_pool=False)
+        await database.execute(
+            "CREATE TABLE fila_pesquisas (id INTEGER PRIMARY KEY AUTOINCREMENT, falha_id INTEGER NOT NULL, "
+            "query TEXT NOT NULL, idioma TEXT NOT NULL, ferramenta TEXT NOT NULL, prioridade INTEGER DEFAULT 0, "
+            "tentativas INTEGER DEFAULT 0, max_tentativas INTEGER DEFAULT 3, status TEXT DEFAULT 'pendente', "
+            "criado_em DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        await database.execute_many(
+            "INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta, status) VALUES (1, ?, 'pt', 'jina', ?)",
+            [("q1", "completa"), ("q1", "pendente"), ("q2", "pendente"), ("q1", "erro")]
+        )
+
+        await database.init_tables()
+        await database.init_tables()
+
+        linhas = await database.fetch_all("SELECT id, query, status FROM fila_pesquisas ORDER BY id")
+        assert [(l["id"], l["query"], l["status"]) for l in linhas] == [(1, "q1", "completa"), (3, "q2", "pendente")]
+        indice = await database.fetch_one(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_fila_unica'"
+        )
+        assert "UNIQUE" in indice["sql"]
+
+
+class TestColunasComprimidas:
+    """Testes para a compressão de colunas de texto grande"""
+
+    @pytest.mark.asyncio
+    async def test_gravacao_e_leitura_transparentes(self, banco_app):
+        """Os helpers gravam BLOB comprimido e devolvem o texto original"""
+        import json
+        from app.database import (
+            obter_analise_fonte_cache,
+            obter_analises_fontes_lote,
+            salvar_analise_fonte_cache
+        )
+
+        analise = json.dumps({
+            "tipo_fonte": "governamental", "tem_implementacao": True, "tem_metricas": False,
+            "confianca": 0.8, "justificativa": "Programa federal de crédito para micro e pequenas empresas"
+        })
+        await salvar_analise_fonte_cache("h1", tipo_fonte="governamental", analise_llm=analise)
+
+        linha = await banco_app.fetch_one(
+            "SELECT typeof(analise_llm) AS tipo, length(analise_llm) AS tamanho FROM fontes_analises_cache"
+        )
+        assert linha["tipo"] == "blob" and linha["tamanho"] < len(analise) / 2
+        assert (await obter_analise_fonte_cache("h1"))["analise_llm"] == analise
+        assert (await obter_analises_fontes_lote(["h1"]))["h1"]["analise_llm"] == analise
+        assert "analise_llm" not in (await obter_analises_fontes_lote(["h1"], com_analise_llm=False))["h1"]
+
+    @pytest.mark.asyncio
+    async def test_migracao_comprime_linhas_antigas(self, banco_app):
+        """Linhas TEXT antigas são comprimidas; curtas continuam TEXT e tudo segue legível"""
+        from app.database import (
+            compactar_banco,
+            comprimir_colunas_existentes,
+            obter_conteudo_url_cache
+        )
+
+        longo = "Title: Programa de inovação\n\n" + "Conteúdo da página sobre políticas públicas. " * 100
+        await banco_app.execute_many(
+            "INSERT INTO url_content_cache (url, content) VALUES (?, ?)",
+            [("https://a.com/longo", longo), ("https://a.com/curto", "curto")]
+        )
+
+        comprimidas = await comprimir_colunas_existentes(lote=1)
+        assert comprimidas["url_content_cache.content"] == 1
+        assert await comprimir_colunas_existentes() == {
+            "url_content_cache.content": 0,
+            "fontes_analises_cache.analise_llm": 0,
+            "priorizacoes_falhas.analise_ia": 0
+        }
+        await compactar_banco()
+
+        tipos = await banco_app.fetch_all(
+            "SELECT url, typeof(content) AS tipo FROM url_content_cache ORDER BY url"
+        )
+        assert [t["tipo"] for t in tipos] == ["text", "blob"]
+        assert (await obter_conteudo_url_cache("https://a.com/longo"))["content"] == longo
+        assert (await obter_conteudo_url_cache("https://a.com/curto"))["content"] == "curto"
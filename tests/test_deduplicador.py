@@ -255,3 +255,87 @@ class TestDeduplicador:
         assert len(resultados_processados) <= len(resultados)
         # Primeiro resultado intacto
         assert resultados_processados[0]["titulo"] == "Credito para startups"
+
+
+def _corpus_com_quase_duplicados(n: int, seed: int = 3):
+    """Resultados sintéticos com ~30% de variações de resultados anteriores"""
+    import random
+
+    rng = random.Random(seed)
+    vocabulario = [f"termo{i}" for i in range(400)]
+    resultados = []
+    for i in range(n):
+        if resultados and rng.random() < 0.3:
+            base = rng.choice(resultados)
+            palavras = (base["titulo"] + " " + base["descricao"]).split()
+            # Troca 0 a 3 palavras: Jaccard em torno do threshold
+            for _ in range(rng.randint(0, 3)):
+                palavras[rng.randrange(len(palavras))] = rng.choice(vocabulario)
+        else:
+            palavras = rng.sample(vocabulario, rng.randint(8, 20))
+        resultados.append({
+            "titulo": " ".join(palavras[:5]),
+            "descricao": " ".join(palavras[5:]),
+            "url": f"https://example.com/{i}",
+            "score": 0.5
+        })
+    return resultados
+
+
+def _processar_linear(resultados, threshold):
+    """Referência: varredura linear original (comparação com todos os vistos)"""
+    vistos, contador, saidas = {}, {}, []
+    for resultado in resultados:
+        copia = resultado.copy()
+        conteudo = f"{resultado.get('titulo', '')} {resultado.get('descricao', '')}"
+        hash_conteudo = calcular_hash_conteudo(conteudo)
+        alvo = hash_conteudo if hash_conteudo in contador else None
+        if alvo is None:
+            for hash_existente, existente in vistos.items():
+                conteudo_existente = f"{existente.get('titulo', '')} {existente.get('descricao', '')}"
+                if calcular_similaridade(conteudo, conteudo_existente) >= threshold:
+                    alvo = hash_existente
+                    break
+        if alvo is None:
+            vistos[hash_conteudo] = copia
+            contador[hash_conteudo] = 1
+        else:
+            contador[alvo] += 1
+            copia["score"] = min(1.0, copia["score"] + min(0.3, contador[alvo] * 0.05))
+        saidas.append(copia)
+    return saidas, contador
+
+
+class TestDeduplicadorIndiceLSH:
+    """Testes para a busca de similares via MinHash/LSH"""
+
+    @pytest.mark.parametrize("threshold", [0.5, 0.8])
+    def test_equivalente_a_varredura_linear(self, threshold):
+        """Mesmos duplicados, scores e contadores que a comparação com todos"""
+        resultados = _corpus_com_quase_duplicados(300)
+        dedup = Deduplicador(threshold=threshold)
+
+        saidas = [dedup.processar(r) for r in resultados]
+        esperadas, contador = _processar_linear(resultados, threshold)
+
+        assert [s["score"] for s in saidas] == [e["score"] for e in esperadas]
+        assert dedup.contador_hashes == contador
+
+    def test_verifica_apenas_candidatos(self):
+        """Cada consulta compara com uma fração pequena dos vistos"""
+        resultados = _corpus_com_quase_duplicados(2000)
+        dedup = Deduplicador(threshold=0.8)
+        for resultado in resultados:
+            dedup.eh_novo(resultado)
+
+        stats = dedup.get_estatisticas()["indice_lsh"]
+        assert stats["candidatos_por_consulta"] < 0.05 * len(dedup.hashes_vistos)
+
+    def test_threshold_alterado_reconstroi_indice(self):
+        """Alterar threshold depois de criar mantém a semântica"""
+        dedup = Deduplicador(threshold=0.9)
+        dedup.eh_novo({"titulo": "a b c d", "descricao": "e f g h"})
+        dedup.threshold = 0.5
+
+        # Jaccard 6/10 = 0.6 >= 0.5
+        assert dedup.eh_novo({"titulo": "a b c d", "descricao": "e f x y"}) is False
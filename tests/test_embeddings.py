@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o cliente de embeddings (requisições em lote)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.vector.embeddings import EmbeddingClient
+
+
+class _EmbeddingsAPIFalsa:
+    """Simula client.embeddings da OpenAI, registrando cada requisição"""
+
+    def __init__(self, falhar_lotes: bool = False):
+        self.chamadas = []
+        self.falhar_lotes = falhar_lotes
+
+    async def create(self, input, model):
+        entradas = input if isinstance(input, list) else [input]
+        self.chamadas.append(entradas)
+        if self.falhar_lotes and isinstance(input, list) and len(input) > 1:
+            raise RuntimeError("lote rejeitado")
+        # Devolve fora de ordem para testar o mapeamento por index
+        dados = [
+            SimpleNamespace(index=i, embedding=[float(len(t)), float(i)])
+            for i, t in enumerate(entradas)
+        ]
+        return SimpleNamespace(
+            data=list(reversed(dados)),
+            usage=SimpleNamespace(total_tokens=sum(len(t) for t in entradas))
+        )
+
+
+def _cliente(api: _EmbeddingsAPIFalsa) -> EmbeddingClient:
+    cliente = EmbeddingClient(api_key="teste")
+    cliente.client = SimpleNamespace(embeddings=api)
+    return cliente
+
+
+class TestEmbedBatch:
+    """Testes para embed_batch com requisições multi-input"""
+
+    @pytest.mark.asyncio
+    async def test_uma_requisicao_por_lote(self):
+        """Textos vão numa única requisição e voltam na ordem de entrada"""
+        api = _EmbeddingsAPIFalsa()
+        cliente = _cliente(api)
+        textos = ["a", "bb", "ccc"]
+
+        resultado = await cliente.embed_batch(textos)
+
+        assert len(api.chamadas) == 1
+        assert [e[0] for e in resultado] == [1.0, 2.0, 3.0]
+
+    @pytest.mark.asyncio
+    async def test_deduplica_e_usa_cache(self):
+        """Repetidos e textos em cache não são reenviados"""
+        api = _EmbeddingsAPIFalsa()
+        cliente = _cliente(api)
+        cliente.cache["ja"] = [9.0, 9.0]
+
+        resultado = await cliente.embed_batch(["x", "ja", "x", "y", ""])
+
+        assert api.chamadas == [["x", "y"]]
+        assert resultado[0] == resultado[2]
+        assert resultado[1] == [9.0, 9.0]
+        assert resultado[4] == [0.0] * cliente.dimensoes
+        stats = cliente.get_cache_stats()["batch"]
+        assert stats["cache_hits"] == 1
+        assert stats["duplicados_ignorados"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lotes_por_itens_e_tokens(self):
+        """Lotes respeitam o limite de itens e de tokens estimados"""
+        api = _EmbeddingsAPIFalsa()
+        cliente = _cliente(api)
+
+        await cliente.embed_batch([f"t{i}" for i in range(25)], batch_size=10)
+        assert [len(c) for c in api.chamadas] == [10, 10, 5]
+
+        api.chamadas.clear()
+        grandes = ["x" * 400 + str(i) for i in range(6)]  # ~100 tokens cada
+        await cliente.embed_batch(grandes, max_tokens_lote=250)
+        assert [len(c) for c in api.chamadas] == [2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_metricas_de_lote(self):
+        """Latência e tokens por lote aparecem em get_cache_stats"""
+        cliente = _cliente(_EmbeddingsAPIFalsa())
+
+        await cliente.embed_batch(["abcd", "efgh"])
+        stats = cliente.get_cache_stats()["batch"]
+
+        assert stats["lotes"] == 1
+        assert stats["textos_enviados"] == 2
+        assert stats["tokens_usados"] == 8
+        assert stats["latencia_media_ms"] >= 0.0
+
+    @pytest.mark.asyncio
+    async def test_fallback_individual_quando_lote_falha(self):
+        """Se o lote falha, cada texto é tentado individualmente"""
+        api = _EmbeddingsAPIFalsa(falhar_lotes=True)
+        cliente = _cliente(api)
+
+        resultado = await cliente.embed_batch(["um", "dois"])
+
+        assert [e[0] for e in resultado] == [2.0, 4.0]
+        assert cliente.get_cache_stats()["batch"]["lotes_com_erro"] == 1
+
+
+class TestEmbeddingCache:
+    """Testes para o cache persistente de embeddings"""
+
+    def test_persiste_entre_instancias(self, tmp_path):
+        """Entradas gravadas sobrevivem a um reinício"""
+        from app.vector.embedding_cache import EmbeddingCache
+
+        caminho = tmp_path / "cache.db"
+        cache = EmbeddingCache("modelo:2", caminho)
+        cache["texto"] = [0.5, 1.5]
+
+        reaberto = EmbeddingCache("modelo:2", caminho)
+        assert reaberto.get("texto") == [0.5, 1.5]
+        assert reaberto.get_stats()["hits_disco"] == 1
+
+    def test_troca_de_modelo_invalida(self, tmp_path):
+        """Abrir com outro modelo descarta as entradas antigas"""
+        from app.vector.embedding_cache import EmbeddingCache
+
+        caminho = tmp_path / "cache.db"
+        EmbeddingCache("modelo-a:2", caminho)["texto"] = [1.0, 2.0]
+
+        outro = EmbeddingCache("modelo-b:3", caminho)
+        assert outro.get("texto") is None
+        assert outro.get_stats()["invalidados_modelo"] == 1
+        assert len(outro) == 0
+
+    def test_eviction_por_bytes_no_disco(self, tmp_path):
+        """O disco respeita o orçamento descartando os menos acessados"""
+        from app.vector.embedding_cache import EmbeddingCache
+
+        # Cada vetor de 4 floats ocupa 16 bytes; orçamento para ~5 vetores
+        cache = EmbeddingCache("m:4", tmp_path / "cache.db", max_bytes_disco=80, max_bytes_memoria=1)
+        for i in range(10):
+            cache[f"t{i}"] = [float(i)] * 4
+
+        stats = cache.get_stats()
+        assert stats["bytes_disco"] <= 80
+        assert stats["evictions_disco"] > 0
+        assert cache.get("t9") == [9.0] * 4
+        assert cache.get("t0") is None
+
+    def test_eviction_em_memoria(self):
+        """O nível em memória é LRU limitado por bytes"""
+        from app.vector.embedding_cache import EmbeddingCache
+
+        cache = EmbeddingCache("m:4", None, max_bytes_memoria=48)
+        cache["a"] = [1.0] * 4
+        cache["b"] = [2.0] * 4
+        cache["c"] = [3.0] * 4
+        assert cache.get("a") is not None  # "a" passa a ser o mais recente
+        cache["d"] = [4.0] * 4
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get_stats()["evictions_memoria"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cliente_reaproveita_cache_em_disco(self, tmp_path):
+        """Um novo cliente não reenvia textos já embedados em outra execução"""
+        api = _EmbeddingsAPIFalsa()
+        primeiro = EmbeddingClient(api_key="teste", cache_path=tmp_path / "cache.db")
+        primeiro.client = SimpleNamespace(embeddings=api)
+        await primeiro.embed_batch(["a", "b"])
+
+        segundo = EmbeddingClient(api_key="teste", cache_path=tmp_path / "cache.db")
+        segundo.client = SimpleNamespace(embeddings=api)
+        resultado = await segundo.embed_batch(["a", "b", "c"])
+
+        assert api.chamadas == [["a", "b"], ["c"]]
+        assert [e[0] for e in resultado] == [1.0, 1.0, 1.0]
+        assert segundo.get_cache_stats()["cache"]["hits_disco"] == 2
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o job da Fase II em lote
+"""
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.agente import fase2_lote
+from app.config import settings
+
+
+class _AnalisadorFalso:
+    """Analisador que conta chamadas e análises simultâneas"""
+
+    def __init__(self):
+        self.chamadas = []
+        self.em_curso = 0
+        self.max_simultaneas = 0
+
+    async def analisar_boas_praticas(self, falha, fontes, modelo=None, usar_openrouter=True):
+        self.chamadas.append(falha["id"])
+        self.em_curso += 1
+        self.max_simultaneas = max(self.max_simultaneas, self.em_curso)
+        await asyncio.sleep(0.02)
+        self.em_curso -= 1
+        return [{"titulo": f"Prática {falha['id']}.{i}", "fonte": fontes[0]["fonte_url"]} for i in range(2)]
+
+
+@pytest_asyncio.fixture
+async def banco_fase2(banco_app, monkeypatch):
+    database = banco_app
+    # falhas_mercado e colunas de destaque vêm do banco real
+    await database.execute(
+        "CREATE TABLE falhas_mercado (id INTEGER PRIMARY KEY, titulo TEXT, pilar TEXT, "
+        "descricao TEXT, dica_busca TEXT)"
+    )
+    await database.execute("ALTER TABLE priorizacoes_falhas ADD COLUMN destacada BOOLEAN DEFAULT 0")
+    await database.execute("ALTER TABLE priorizacoes_falhas ADD COLUMN justificativa_destaque TEXT")
+    await database.execute_many(
+        "INSERT INTO falhas_mercado (id, titulo, pilar, descricao) VALUES (?, ?, 'Crédito', 'Descrição')",
+        [(i, f"Falha {i}") for i in range(1, 6)]
+    )
+    await database.execute_many(
+        "INSERT INTO priorizacoes_falhas (falha_id, destacada) VALUES (?, ?)",
+        [(i, 1 if i <= 4 else 0) for i in range(1, 6)]
+    )
+    await database.execute_many(
+        "INSERT INTO resultados_pesquisa (falha_id, titulo, descricao, fonte_url, idioma, query, "
+        "confidence_score, ferramenta_origem, hash_conteudo) VALUES (?, ?, 'Descrição', ?, 'pt', 'q', 0.5, 'jina', ?)",
+        [(i, f"Fonte {i}.{j}", f"https://example.com/{i}/{j}", f"h{i}.{j}") for i in range(1, 6) for j in range(3)]
+    )
+
+    analisador = _AnalisadorFalso()
+
+    async def sem_conteudo(fontes):
+        return fontes
+
+    monkeypatch.setattr(fase2_lote, "_analisador", analisador)
+    monkeypatch.setattr(fase2_lote, "enrich_sources_with_full_content", sem_conteudo)
+    monkeypatch.setattr(fase2_lote.jobs, "jobs", {})
+    monkeypatch.setattr(settings, "FASE2_FALHAS_SIMULTANEAS", 2)
+    yield database, analisador
+    await fase2_lote.encerrar()
+
+
+class TestJobFase2:
+    """Testes para o job em background da Fase II"""
+
+    @pytest.mark.asyncio
+    async def test_falhas_em_paralelo_com_eventos(self, banco_fase2):
+        """Falhas destacadas são analisadas com paralelismo limitado e publicam progresso"""
+        database, analisador = banco_fase2
+
+        job_id = await fase2_lote.criar_job()
+        fila = fase2_lote.assinar(job_id)
+        await fase2_lote.jobs.tarefas[job_id]
+
+        assert sorted(analisador.chamadas) == [1, 2, 3, 4]
+        assert analisador.max_simultaneas == 2
+
+        eventos = []
+        while not fila.empty():
+            eventos.append(fila.get_nowait())
+        assert [e["status"] for e in eventos if e["tipo"] == "falha"].count("concluida") == 4
+        assert eventos[-1]["tipo"] == "fim" and eventos[-1]["progresso"] == 100
+
+        status = await fase2_lote.obter_status(job_id)
+        assert status["status"] == "concluido"
+        assert (status["processadas"], status["reaproveitadas"], status["com_erro"]) == (4, 0, 0)
+        praticas = await database.fetch_all("SELECT falha_id FROM boas_praticas WHERE fase = 'fase_2'")
+        assert len(praticas) == 8
+
+    @pytest.mark.asyncio
+    async def test_reaproveita_fontes_inalteradas(self, banco_fase2):
+        """Sem reprocessar, só falhas com fontes novas voltam ao LLM (e substituem as práticas)"""
+        database, analisador = banco_fase2
+        await fase2_lote.jobs.tarefas[await fase2_lote.criar_job()]
+        analisador.chamadas.clear()
+
+        await database.execute(
+            "INSERT INTO resultados_pesquisa (falha_id, titulo, fonte_url, idioma, query, hash_conteudo) "
+            "VALUES (2, 'Fonte nova', 'https://example.com/nova', 'pt', 'q', 'nova')"
+        )
+        job_id = await fase2_lote.criar_job()
+        await fase2_lote.jobs.tarefas[job_id]
+
+        assert analisador.chamadas == [2]
+        status = await fase2_lote.obter_status(job_id)
+        assert (status["processadas"], status["reaproveitadas"]) == (1, 3)
+        praticas = await database.fetch_one(
+            "SELECT COUNT(*) AS total FROM boas_praticas WHERE falha_id = 2 AND fase = 'fase_2'"
+        )
+        assert praticas["total"] == 2
+
+        await fase2_lote.jobs.tarefas[await fase2_lote.criar_job(reprocessar=True)]
+        assert len(analisador.chamadas) == 5
+
+    @pytest.mark.asyncio
+    async def test_sem_analise_registrada_mantem_praticas(self, banco_fase2):
+        """Sem registro em fase2_analises, o lote não apaga práticas existentes"""
+        database, analisador = banco_fase2
+        await database.execute(
+            "INSERT INTO boas_praticas (falha_id, titulo, fase) VALUES (1, 'Prática manual', 'fase_2')"
+        )
+
+        await fase2_lote.jobs.tarefas[await fase2_lote.criar_job()]
+
+        praticas = await database.fetch_all(
+            "SELECT titulo FROM boas_praticas WHERE falha_id = 1 AND fase = 'fase_2' ORDER BY id"
+        )
+        assert [p["titulo"] for p in praticas] == ["Prática manual", "Prática 1.0", "Prática 1.1"]
+
+    @pytest.mark.asyncio
+    async def test_outro_modelo_nao_reaproveita(self, banco_fase2):
+        """Práticas geradas por outro modelo não são reaproveitadas"""
+        database, analisador = banco_fase2
+        await fase2_lote.jobs.tarefas[await fase2_lote.criar_job()]
+        analisador.chamadas.clear()
+
+        job_id = await fase2_lote.criar_job(modelo="openai/gpt-4o-mini")
+        await fase2_lote.jobs.tarefas[job_id]
+
+        assert sorted(analisador.chamadas) == [1, 2, 3, 4]
+        status = await fase2_lote.obter_status(job_id)
+        assert (status["processadas"], status["reaproveitadas"]) == (4, 0)
+        analises = await database.fetch_all("SELECT DISTINCT modelo FROM fase2_analises")
+        assert [a["modelo"] for a in analises] == ["openai/gpt-4o-mini"]
+
+    @pytest.mark.asyncio
+    async def test_retoma_falhas_pendentes(self, banco_fase2):
+        """Job interrompido continua só com as falhas ainda pendentes"""
+        database, analisador = banco_fase2
+        await database.execute(
+            "INSERT INTO fase2_jobs (job_id, status, total, processadas) VALUES ('antigo', 'processando', 3, 1)"
+        )
+        await database.execute_many(
+            "INSERT INTO fase2_jobs_falhas (job_id, falha_id, titulo, status) VALUES ('antigo', ?, ?, ?)",
+            [(1, "Falha 1", "concluida"), (2, "Falha 2", "pendente"), (3, "Falha 3", "pendente")]
+        )
+
+        assert await fase2_lote.retomar_jobs() == ["antigo"]
+        await fase2_lote.jobs.tarefas["antigo"]
+
+        assert sorted(analisador.chamadas) == [2, 3]
+        checkpoint = await database.fetch_one("SELECT * FROM fase2_jobs WHERE job_id = 'antigo'")
+        assert checkpoint["status"] == "concluido" and checkpoint["processadas"] == 3
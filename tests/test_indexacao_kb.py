@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o pipeline de indexação da base de conhecimento
+"""
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from app.vector.indexacao_kb import PipelineIndexacao, extrair_texto_async, hash_conteudo
+from app.vector.vector_store import VectorStore
+
+
+class _EmbeddingContador:
+    """Cliente de embeddings determinístico que conta textos embedados"""
+
+    dimensoes = 8
+
+    def __init__(self, atraso: float = 0.0):
+        self.atraso = atraso
+        self.textos_embedados = 0
+        self.simultaneos = 0
+        self.max_simultaneos = 0
+
+    async def embed_batch(self, texts):
+        self.simultaneos += 1
+        self.max_simultaneos = max(self.max_simultaneos, self.simultaneos)
+        try:
+            await asyncio.sleep(self.atraso)
+            self.textos_embedados += len(texts)
+            return [
+                np.random.default_rng(abs(hash(t)) % (2 ** 32)).normal(size=self.dimensoes).tolist()
+                for t in texts
+            ]
+        finally:
+            self.simultaneos -= 1
+
+    def get_cache_stats(self):
+        return {}
+
+    def clear_cache(self):
+        pass
+
+
+def _texto_longo(paragrafos: int) -> str:
+    return " ".join(
+        f"Paragrafo {i} sobre politicas publicas de inovacao e acesso a capital." for i in range(paragrafos)
+    )
+
+
+class TestPipelineIndexacao:
+    """Testes para os estágios chunking -> embeddings em lote"""
+
+    @pytest.mark.asyncio
+    async def test_indexa_em_lotes_e_persiste(self, tmp_path):
+        """Chunks são embedados em lotes, com hash nos metadados, e salvos"""
+        cliente = _EmbeddingContador()
+        store = VectorStore(tmp_path, cliente)
+
+        async with PipelineIndexacao(store, chunks_por_lote=2, workers=2, lotes_pendentes=1) as pipeline:
+            ids = await pipeline.indexar("doc.txt", _texto_longo(200), "txt", content_hash="abc")
+
+        assert ids and len(ids) == store.documents_collection.count()
+        assert pipeline.stats["lotes"] == (len(ids) + 1) // 2
+        assert store.documento_indexado(ids[0], "abc")
+        assert not store.documento_indexado(ids[0], "outro")
+
+        recarregado = VectorStore(tmp_path, cliente)
+        assert recarregado.documents_collection.count() == len(ids)
+
+    @pytest.mark.asyncio
+    async def test_concorrencia_limitada_pelos_workers(self, tmp_path):
+        """Vários arquivos simultâneos nunca excedem o número de workers"""
+        cliente = _EmbeddingContador(atraso=0.01)
+        store = VectorStore(tmp_path, cliente)
+
+        async with PipelineIndexacao(store, chunks_por_lote=1, workers=3, lotes_pendentes=2) as pipeline:
+            resultados = await asyncio.gather(*[
+                pipeline.indexar(f"doc{i}.txt", _texto_longo(80), "txt") for i in range(4)
+            ])
+
+        assert all(resultados)
+        assert cliente.max_simultaneos <= 3
+        assert store.documents_collection.count() == sum(len(ids) for ids in resultados)
+
+    @pytest.mark.asyncio
+    async def test_extracao_texto_e_erro(self):
+        """Texto é decodificado; PDF inválido gera ValueError vindo do pool"""
+        assert await extrair_texto_async("olá".encode("utf-8"), "txt") == "olá"
+        with pytest.raises(ValueError):
+            await extrair_texto_async(b"nao e um pdf", "pdf")
+
+
+class TestReenvioInalterado:
+    """Testes para pular a reindexação de arquivos com mesmo conteúdo"""
+
+    @pytest.mark.asyncio
+    async def test_reenvio_nao_gera_embeddings(self, tmp_path, monkeypatch):
+        """Segundo upload do mesmo arquivo não chama a API de embeddings"""
+        from app.api import knowledge_base
+
+        cliente = _EmbeddingContador()
+        store = VectorStore(tmp_path / "vetores", cliente)
+
+        async def _get_store():
+            return store
+
+        docs = tmp_path / "documentos"
+        docs.mkdir()
+        monkeypatch.setattr(knowledge_base, "DOCS_DIR", docs)
+        monkeypatch.setattr(knowledge_base, "METADATA_FILE", docs / "documentos_metadata.json")
+        monkeypatch.setattr(knowledge_base, "get_vector_store", _get_store)
+
+        conteudo = _texto_longo(60).encode("utf-8")
+
+        def _upload():
+            return UploadFile(
+                io.BytesIO(conteudo),
+                filename="relatorio.txt",
+                headers=Headers({"content-type": "text/plain"})
+            )
+
+        primeiro = await knowledge_base.process_single_file(_upload(), "overwrite")
+        embedados = cliente.textos_embedados
+        total = store.documents_collection.count()
+
+        segundo = await knowledge_base.process_single_file(_upload(), "overwrite")
+
+        assert primeiro["status"] == "success" and primeiro["reindexado"]
+        assert segundo["status"] == "success" and not segundo["reindexado"]
+        assert embedados > 0
+        assert cliente.textos_embedados == embedados
+        assert store.documents_collection.count() == total
+        assert knowledge_base.load_metadata()["relatorio.txt"]["indice"]["content_hash"] == hash_conteudo(conteudo)
+
+    @pytest.mark.asyncio
+    async def test_copias_simultaneas_com_nomes_distintos(self, tmp_path, monkeypatch):
+        """Uploads simultâneos em modo cópia reservam nomes diferentes e não se sobrescrevem"""
+        from app.api import knowledge_base
+
+        store = VectorStore(tmp_path / "vetores", _EmbeddingContador(atraso=0.01))
+
+        async def _get_store():
+            return store
+
+        docs = tmp_path / "documentos"
+        docs.mkdir()
+        (docs / "relatorio.txt").write_text("original")
+        monkeypatch.setattr(knowledge_base, "DOCS_DIR", docs)
+        monkeypatch.setattr(knowledge_base, "METADATA_FILE", docs / "documentos_metadata.json")
+        monkeypatch.setattr(knowledge_base, "get_vector_store", _get_store)
+
+        conteudos = [_texto_longo(20 + i).encode("utf-8") for i in range(3)]
+        resultados = await asyncio.gather(*[
+            knowledge_base.process_single_file(
+                UploadFile(io.BytesIO(c), filename="relatorio.txt", headers=Headers({"content-type": "text/plain"})),
+                "copy"
+            )
+            for c in conteudos
+        ])
+
+        nomes = [r["nome"] for r in resultados]
+        assert sorted(nomes) == ["relatorio (1).txt", "relatorio (2).txt", "relatorio (3).txt"]
+        assert (docs / "relatorio.txt").read_text() == "original"
+        assert sorted((docs / n).read_bytes() for n in nomes) == sorted(conteudos)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para os limitadores de taxa por provedor
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.utils import limitador_taxa
+from app.utils.limitador_taxa import LimitadorProvedor, extrair_retry_after, obter_limitador
+
+
+class TestLimitadorProvedor:
+    """Testes para o token bucket e o orçamento de concorrência"""
+
+    @pytest.mark.asyncio
+    async def test_rajada_imediata_depois_taxa(self):
+        """A rajada passa sem espera; as chamadas seguintes seguem a taxa"""
+        limitador = LimitadorProvedor("teste", requisicoes_por_minuto=600, rajada=3, concorrencia=10)
+
+        inicio = time.monotonic()
+        for _ in range(3):
+            await limitador.aguardar_token()
+        assert time.monotonic() - inicio < 0.05
+
+        for _ in range(2):
+            await limitador.aguardar_token()
+        # 10 tokens/s: mais 2 chamadas levam ~0.2s
+        assert time.monotonic() - inicio >= 0.15
+        stats = limitador.get_stats()
+        assert stats["requisicoes"] == 5
+        assert stats["esperas"] >= 2
+        assert stats["espera"]["contagem"] == 5
+
+    @pytest.mark.asyncio
+    async def test_concorrencia_limitada(self):
+        """Nunca há mais chamadas simultâneas que o orçamento do provedor"""
+        limitador = LimitadorProvedor("teste", requisicoes_por_minuto=0, rajada=1, concorrencia=2)
+        simultaneos = []
+        em_curso = 0
+
+        async def chamada():
+            nonlocal em_curso
+            async with limitador.reservar():
+                em_curso += 1
+                simultaneos.append(em_curso)
+                await asyncio.sleep(0.01)
+                em_curso -= 1
+
+        await asyncio.gather(*[chamada() for _ in range(6)])
+
+        assert max(simultaneos) == 2
+        assert limitador.get_stats()["em_uso"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pausa_o_provedor(self):
+        """Um 429 com Retry-After segura as próximas chamadas até o prazo"""
+        limitador = LimitadorProvedor("teste", requisicoes_por_minuto=6000, rajada=5, concorrencia=5)
+        limitador.registrar_retry_after("0.2")
+
+        inicio = time.monotonic()
+        async with limitador.reservar():
+            pass
+
+        assert time.monotonic() - inicio >= 0.18
+        stats = limitador.get_stats()
+        assert stats["limitadas_429"] == 1
+        assert stats["espera"]["histograma"]["<=500ms"] == 1
+
+    def test_extrair_retry_after(self):
+        """Aceita segundos e data HTTP; valores inválidos viram None"""
+        assert extrair_retry_after("12") == 12.0
+        assert extrair_retry_after(None) is None
+        assert extrair_retry_after("amanhã") is None
+        assert extrair_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestRegistroLimitadores:
+    """Testes para o registro de limitadores por provedor"""
+
+    def test_configuracao_por_provedor(self, monkeypatch):
+        """Cada provedor usa sua configuração; desconhecidos usam o padrão"""
+        monkeypatch.setattr(limitador_taxa, "_limitadores", {})
+        monkeypatch.setattr(settings, "LIMITES_PROVEDORES", {
+            "tavily": {"requisicoes_por_minuto": 120, "rajada": 4, "concorrencia": 2}
+        })
+
+        tavily = obter_limitador("tavily")
+        assert obter_limitador("tavily") is tavily
+        assert (tavily.taxa, tavily.rajada, tavily.concorrencia) == (2.0, 4, 2)
+
+        outro = obter_limitador("outro")
+        assert outro.concorrencia == settings.LIMITE_PROVEDOR_PADRAO["concorrencia"]
+        assert set(limitador_taxa.get_stats_limitadores()) == {"tavily", "outro"}
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para a memória de traduções (LRU + SQLite)
+"""
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.config import settings
+from app.database import Database
+from app.integracao.openrouter_api import OpenRouterClient
+from app.utils import memoria_traducao
+from app.utils.memoria_traducao import MemoriaTraducao, gravar_sync, listar_sync
+
+
+@pytest_asyncio.fixture
+async def banco_memoria(tmp_path):
+    database = Database(tmp_path / "memoria.db", usar_pool=True)
+    await database.init_tables()
+    yield database
+    await database.fechar()
+
+
+class TestMemoriaTraducao:
+    """Testes para consulta, gravação e deduplicação de traduções"""
+
+    @pytest.mark.asyncio
+    async def test_lru_banco_e_lote(self, banco_memoria):
+        """Traduções gravadas voltam do LRU e, num processo novo, do banco em lote"""
+        memoria = MemoriaTraducao(banco_memoria, tamanho_lru=10)
+        await memoria.gravar_lote(
+            [("access to credit", "acesso a crédito"), ("tax policy", "política tributária")], "en", "pt"
+        )
+
+        assert await memoria.obter("access  to\ncredit", "en", "pt") == "acesso a crédito"
+        assert await memoria.obter("access to credit", "en", "es") is None
+        assert memoria.stats["acertos_lru"] == 1
+
+        nova = MemoriaTraducao(banco_memoria, tamanho_lru=10)
+        encontrados = await nova.obter_lote(["access to credit", "tax policy", "startup"], "en", "pt")
+        assert encontrados == {"access to credit": "acesso a crédito", "tax policy": "política tributária"}
+        stats = nova.get_stats()
+        assert stats["acertos_banco"] == 2 and stats["faltas"] == 1
+        assert stats["taxa_acerto"] == round(2 / 3, 4)
+
+    @pytest.mark.asyncio
+    async def test_traducao_unica_e_falha_nao_memorizada(self, banco_memoria):
+        """Pedidos simultâneos do mesmo texto chamam o LLM uma vez; falhas não ficam gravadas"""
+        memoria = MemoriaTraducao(banco_memoria)
+        chamadas = []
+
+        async def traduzir():
+            chamadas.append(1)
+            await asyncio.sleep(0.01)
+            return "mercado"
+
+        resultados = await asyncio.gather(*[memoria.traduzir("market", "en", "pt", traduzir) for _ in range(5)])
+        assert resultados == ["mercado"] * 5
+        assert len(chamadas) == 1
+        assert await memoria.traduzir("market", "en", "pt", traduzir) == "mercado"
+        assert len(chamadas) == 1
+
+        async def falhar():
+            return None
+
+        assert await memoria.traduzir("barrier", "en", "pt", falhar) is None
+        assert await MemoriaTraducao(banco_memoria).obter("barrier", "en", "pt") is None
+
+    @pytest.mark.asyncio
+    async def test_scripts_compartilham_tabela(self, banco_memoria, tmp_path):
+        """Traduções gravadas pelos scripts (sqlite3) são vistas pelo app e vice-versa"""
+        gravar_sync(tmp_path / "memoria.db", "pt", [("en", "falta de crédito", "lack of credit")])
+        memoria = MemoriaTraducao(banco_memoria)
+        assert await memoria.obter("falta de crédito", "pt", "en") == "lack of credit"
+
+        await memoria.gravar("regulação", "pt", "es", "regulación")
+        assert ("es", "regulação", "regulación") in listar_sync(tmp_path / "memoria.db", "pt")
+
+    @pytest.mark.asyncio
+    async def test_cliente_consulta_memoria_antes_do_llm(self, banco_memoria, monkeypatch):
+        """OpenRouterClient.traduzir_texto só chama o LLM na primeira vez"""
+        memoria = MemoriaTraducao(banco_memoria)
+        monkeypatch.setattr(memoria_traducao, "_memoria", memoria)
+        monkeypatch.setattr(settings, "TRADUCAO_MEMORIA_ATIVA", True)
+
+        cliente = OpenRouterClient(api_key="teste")
+        chamadas = []
+
+        async def chamar_modelo(modelo, prompt, **kwargs):
+            chamadas.append(modelo)
+            return "Acesso a capital"
+
+        monkeypatch.setattr(cliente, "_chamar_modelo", chamar_modelo)
+
+        for _ in range(3):
+            assert await cliente.traduzir_texto("Access to capital", "pt", "en") == "Acesso a capital"
+        assert len(chamadas) == 1
+        assert await cliente._traduzir_texto("Access to capital", "en") == "Acesso a capital"
+        assert len(chamadas) == 1
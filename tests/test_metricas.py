@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o registro de métricas e o endpoint /api/metrics
+"""
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import health_check
+from app.database import Database
+from app.utils import metricas
+from app.utils.metricas import Histograma, RegistroMetricas
+
+
+class TestHistograma:
+    """Testes para os buckets log-lineares"""
+
+    def test_quantis_com_erro_relativo_limitado(self):
+        """Percentis ficam a no máximo 1/(2*SUBBUCKETS) acima do valor real"""
+        histograma = Histograma()
+        valores = [i / 1000 for i in range(1, 1001)]  # 1 ms .. 1 s
+        for valor in valores:
+            histograma.registrar(valor)
+
+        for q, real in ((0.5, 0.5), (0.9, 0.9), (0.99, 0.99)):
+            estimado = histograma.quantil(q)
+            assert real <= estimado <= real * (1 + 1 / (2 * metricas.SUBBUCKETS)) + 1e-9
+        assert histograma.contagem == 1000 and histograma.maximo == 1.0
+        assert histograma.resumo()["p50_ms"] >= 500
+
+    def test_limite_inclusivo_e_excedente(self):
+        """Valor igual ao limite fica no bucket; acima do maior limite vai para +Inf"""
+        histograma = Histograma()
+        limite = metricas._LIMITES[10]
+        histograma.registrar(limite)
+        histograma.registrar(1e6)
+        assert histograma.buckets[10] == 1
+        assert histograma.buckets[-1] == 1
+
+    @pytest.mark.benchmark
+    def test_overhead_de_registro(self):
+        """Registrar (com cronômetro) custa poucos µs: desprezível perto de uma query ou busca"""
+        serie = RegistroMetricas().histograma("teste_segundos", "Teste", ("tipo",)).rotulada("a")
+        repeticoes = 50_000
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            with serie.medir():
+                pass
+        por_registro = (time.perf_counter() - inicio) / repeticoes
+        assert por_registro < 20e-6
+
+
+class TestExportacaoPrometheus:
+    """Testes para o formato texto do Prometheus"""
+
+    def test_formato_texto(self):
+        """HELP/TYPE, buckets cumulativos, +Inf = count e rótulos escapados"""
+        registro = RegistroMetricas()
+        latencia = registro.histograma("app_latencia_segundos", "Latência", ("canal",))
+        registro.contador("app_total", "Total", ("canal",)).rotulada('a"b').inc(3)
+        for valor in (0.001, 0.002, 0.5):
+            latencia.rotulada("jina").registrar(valor)
+        medidor = registro.medidor("app_fila", "Fila").rotulada()
+        registro.registrar_coletor(lambda: medidor.definir(7))
+
+        texto = registro.exportar_prometheus()
+        linhas = texto.splitlines()
+
+        assert "# TYPE app_latencia_segundos histogram" in linhas
+        assert 'app_total{canal="a\\"b"} 3' in linhas
+        assert "app_fila 7" in linhas
+        buckets = [l for l in linhas if l.startswith('app_latencia_segundos_bucket{canal="jina"')]
+        contagens = [int(l.rsplit(" ", 1)[1]) for l in buckets]
+        assert contagens == sorted(contagens) and contagens[-1] == 3
+        assert buckets[-1].startswith('app_latencia_segundos_bucket{canal="jina",le="+Inf"}')
+        assert 'app_latencia_segundos_count{canal="jina"} 3' in linhas
+        assert texto.endswith("\n")
+
+    def test_familia_reaproveitada_ou_conflitante(self):
+        """Mesmo nome e rótulos devolvem a mesma família; tipo diferente é erro"""
+        registro = RegistroMetricas()
+        familia = registro.contador("app_total", "Total", ("canal",))
+        assert registro.contador("app_total", "Total", ("canal",)) is familia
+        with pytest.raises(ValueError):
+            registro.medidor("app_total", "Total", ("canal",))
+        with pytest.raises(ValueError):
+            familia.rotulada("a", "b")
+
+
+class TestMetricasAplicacao:
+    """Testes para os pontos instrumentados e o endpoint"""
+
+    @pytest.mark.asyncio
+    async def test_queries_registradas_e_endpoint(self, tmp_path):
+        """Queries do banco entram no histograma exposto em /api/metrics"""
+        leitura = metricas.registro.obter("sebrae_db_consulta_segundos").rotulada("leitura")
+        antes = leitura.contagem
+
+        database = Database(tmp_path / "metricas.db", usar_pool=True)
+        await database.init_tables()
+        for _ in range(3):
+            await database.fetch_one("SELECT 1 AS um")
+        await database.fechar()
+        assert leitura.contagem >= antes + 3
+
+        app = FastAPI()
+        app.include_router(health_check.router, prefix="/api")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+            resposta = await cliente.get("/api/metrics")
+            resumo = await cliente.get("/api/metrics/resumo")
+
+        assert resposta.status_code == 200
+        assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE sebrae_db_consulta_segundos histogram" in resposta.text
+        assert f'sebrae_db_consulta_segundos_count{{tipo="leitura"}} {leitura.contagem}' in resposta.text
+        assert resumo.json()['sebrae_db_consulta_segundos{tipo="leitura"}']["contagem"] == leitura.contagem
@@ -171,3 +171,70 @@ class TestAgentePesquisador:
         # Isso testa que nao vai lancar erro ao carregar config
         agente = AgentePesquisador()
         assert agente is not None
+
+
+class TestPopularFilaEmLote:
+    """Testes para a população da fila em lote"""
+
+    @pytest.mark.asyncio
+    async def test_traducoes_paralelas_e_sem_repetidas(self, agente, tmp_path, monkeypatch):
+        """Traduções respeitam o limite simultâneo e repopular não duplica entradas"""
+        import asyncio
+        import app.database as database_mod
+        from app.config import settings
+        from app.database import Database
+        from app.utils import idiomas
+
+        database = Database(tmp_path / "fila.db", usar_pool=False)
+        await database.init_tables()
+        monkeypatch.setattr(database_mod, "db", database)
+        monkeypatch.setattr(settings, "FILA_TRADUCOES_SIMULTANEAS", 3)
+
+        em_curso = 0
+        simultaneas = []
+
+        async def traduzir_falso(texto, origem, destino):
+            nonlocal em_curso
+            em_curso += 1
+            simultaneas.append(em_curso)
+            await asyncio.sleep(0.01)
+            em_curso -= 1
+            return f"{destino}: {texto}"
+
+        monkeypatch.setattr(idiomas, "traduzir_query", traduzir_falso)
+
+        falhas = [
+            {"id": i, "titulo": f"Falha {i}", "descricao": "Descricao", "dica_busca": "credito"}
+            for i in (1, 2)
+        ]
+        total = await agente.popular_fila(
+            falhas=falhas, ferramentas_filtro=["jina", "tavily"], idiomas_filtro=["en", "es"]
+        )
+
+        linhas = await database.fetch_all("SELECT falha_id, query, ferramenta FROM fila_pesquisas")
+        assert total == len(linhas) > 0
+        assert {linha["ferramenta"] for linha in linhas} == {"jina", "tavily"}
+        assert max(simultaneas) == 3
+
+        assert await agente.popular_fila(
+            falhas=falhas, ferramentas_filtro=["jina", "tavily"], idiomas_filtro=["en", "es"]
+        ) == 0
+        await database.fechar()
+
+    @pytest.mark.asyncio
+    async def test_limite_conta_so_entradas_novas(self, agente, banco_app):
+        """limite_queries vale para entradas inseridas, não para as que já estavam na fila"""
+        falhas = [
+            {"id": i, "titulo": f"Falha {i}", "descricao": "Descricao", "dica_busca": "credito"}
+            for i in (1, 2)
+        ]
+        primeira = await agente.popular_fila(falhas=falhas[:1], ferramentas_filtro=["jina"], idiomas_filtro=["pt"])
+        assert primeira > 3
+
+        total = await agente.popular_fila(
+            falhas=falhas, ferramentas_filtro=["jina"], idiomas_filtro=["pt"], limite_queries=3
+        )
+
+        assert total == 3
+        novas = await banco_app.fetch_one("SELECT COUNT(*) AS total FROM fila_pesquisas WHERE falha_id = 2")
+        assert novas["total"] == 3
@@ -2,7 +2,10 @@
 """
 Testes para worker processador de fila
 """
+import asyncio
+
 import pytest
+import pytest_asyncio
 from app.agente.processador import Processador
 
 
@@ -177,3 +180,177 @@ class TestProcessador:
 
         resultado = processador.validar_entrada(entrada_invalida)
         assert resultado is False
+
+
+def _dados_resultado(i: int, hash_conteudo: str = None) -> dict:
+    return {
+        "falha_id": 1,
+        "titulo": f"Resultado {i}",
+        "descricao": "Descricao",
+        "fonte_url": f"https://example.com/{i}",
+        "fonte_tipo": "web",
+        "idioma": "pt",
+        "query": "credito",
+        "confidence_score": 0.5,
+        "ferramenta_origem": "jina",
+        "hash_conteudo": hash_conteudo or f"hash{i}"
+    }
+
+
+@pytest_asyncio.fixture
+async def banco_resultados(tmp_path, monkeypatch):
+    """Banco temporário com a tabela resultados_pesquisa"""
+    import app.database as database
+
+    banco = database.Database(tmp_path / "resultados.db", usar_pool=True)
+    await banco.execute("""
+        CREATE TABLE resultados_pesquisa (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            falha_id INTEGER NOT NULL, titulo TEXT NOT NULL, descricao TEXT,
+            fonte_url TEXT NOT NULL, fonte_tipo TEXT, pais_origem TEXT, idioma TEXT,
+            query TEXT, confidence_score REAL, ferramenta_origem TEXT,
+            hash_conteudo TEXT UNIQUE, url_valida BOOLEAN,
+            titulo_pt TEXT, descricao_pt TEXT, titulo_en TEXT, descricao_en TEXT
+        )
+    """)
+    monkeypatch.setattr(database, "db", banco)
+    yield banco
+    await banco.fechar()
+
+
+class TestBufferResultados:
+    """Testes para a gravação em lote dos resultados"""
+
+    @pytest.mark.asyncio
+    async def test_grava_em_lote_e_ignora_duplicados(self, banco_resultados):
+        """Hash duplicado (no banco ou no lote) é ignorado; o primeiro vence"""
+        from app.database import insert_resultado
+        from app.agente.buffer_resultados import BufferResultados
+
+        await insert_resultado(_dados_resultado(0))
+        buffer = BufferResultados(max_itens=100, intervalo=0.01)
+
+        gravados = await asyncio.gather(
+            buffer.salvar(_dados_resultado(0)),
+            buffer.salvar(_dados_resultado(1)),
+            buffer.salvar(_dados_resultado(2)),
+            buffer.salvar({**_dados_resultado(3), "hash_conteudo": "hash1"})
+        )
+
+        assert gravados == [False, True, True, False]
+        assert buffer.stats["gravacoes"] == 1
+        linhas = await banco_resultados.fetch_all(
+            "SELECT titulo FROM resultados_pesquisa ORDER BY id"
+        )
+        assert [l["titulo"] for l in linhas] == ["Resultado 0", "Resultado 1", "Resultado 2"]
+
+    @pytest.mark.asyncio
+    async def test_linha_invalida_nao_perde_lote(self, banco_resultados):
+        """Uma linha que viola NOT NULL não impede a gravação das demais"""
+        from app.agente.buffer_resultados import BufferResultados
+
+        buffer = BufferResultados(max_itens=3, intervalo=10)
+        gravados = await asyncio.gather(
+            buffer.salvar(_dados_resultado(1)),
+            buffer.salvar({**_dados_resultado(2), "titulo": None}),
+            buffer.salvar(_dados_resultado(3))
+        )
+
+        assert gravados == [True, False, True]
+
+    @pytest.mark.asyncio
+    async def test_fechar_grava_pendentes(self, banco_resultados):
+        """Pausa/shutdown grava o que está no buffer sem esperar o intervalo"""
+        from app.agente.buffer_resultados import BufferResultados
+
+        buffer = BufferResultados(max_itens=100, intervalo=60)
+        futuros = [buffer.adicionar(_dados_resultado(i)) for i in range(5)]
+
+        assert await buffer.fechar() == 5
+        assert all(f.result() for f in futuros)
+        assert len(buffer) == 0
+
+
+@pytest_asyncio.fixture
+async def fila_pool(banco_app):
+    await banco_app.execute_many(
+        "INSERT INTO fila_pesquisas (falha_id, query, idioma, ferramenta) VALUES (1, ?, 'pt', 'jina')",
+        [(f"query {i}",) for i in range(12)]
+    )
+    yield banco_app
+
+
+class TestPoolContinuo:
+    """Testes para o modo pool (workers alimentados por prefetcher)"""
+
+    @pytest.mark.asyncio
+    async def test_entrada_lenta_nao_bloqueia_demais(self, fila_pool, processador):
+        """Enquanto uma entrada demora, os outros slots consomem o resto da fila"""
+        processador.configurar_rate_limiting(delay_minimo=0.0, max_requests_por_minuto=10_000)
+        processados = []
+        simultaneos = {"atual": 0, "max": 0}
+
+        async def processar_entrada(entrada):
+            simultaneos["atual"] += 1
+            simultaneos["max"] = max(simultaneos["max"], simultaneos["atual"])
+            try:
+                await asyncio.sleep(0.3 if entrada["query"] == "query 0" else 0.01)
+                processados.append(entrada["id"])
+                await processador.marcar_como_processada(entrada["id"])
+                return True
+            finally:
+                simultaneos["atual"] -= 1
+
+        processador.processar_entrada = processar_entrada
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        total = await processador.executar_pool(parar_quando_vazia=True)
+        decorrido = loop.time() - inicio
+
+        assert total == 12 and len(set(processados)) == 12
+        # A entrada lenta termina por último; as outras 11 passaram pelo segundo slot
+        assert processados[-1] == 1
+        assert decorrido < 0.3 + 0.15
+        assert simultaneos["max"] <= 2
+
+        restantes = await fila_pool.fetch_one(
+            "SELECT COUNT(*) AS total FROM fila_pesquisas WHERE status != 'completa'"
+        )
+        assert restantes["total"] == 0
+        metricas = processador.get_metricas_pool()
+        assert metricas["ocupados"] == 0 and metricas["fila_local"] == 0 and metricas["reservadas"] == 0
+        assert 0.5 < metricas["utilizacao_media"] <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_pausa_libera_so_fila_local(self, fila_pool, processador):
+        """Ao pausar, só as entradas à espera de um worker voltam a 'pendente'"""
+        processador.configurar_rate_limiting(delay_minimo=0.0, max_requests_por_minuto=10_000)
+        em_curso = []
+        continuar = asyncio.Event()
+
+        async def processar_entrada(entrada):
+            em_curso.append(entrada["id"])
+            await continuar.wait()
+            await processador.marcar_como_processada(entrada["id"])
+            return True
+
+        processador.processar_entrada = processar_entrada
+        pool = asyncio.create_task(processador.executar_pool(parar_quando_vazia=True))
+        while len(em_curso) < 2 or processador.get_metricas_pool()["fila_local"] < 2:
+            await asyncio.sleep(0.01)
+
+        processador.ativo = False
+        assert await processador.liberar_fila_local() == 2
+
+        linhas = await fila_pool.fetch_all("SELECT id, status, worker_id FROM fila_pesquisas")
+        processando = {l["id"] for l in linhas if l["status"] == "processando"}
+        assert processando == set(em_curso)
+        assert all(l["worker_id"] == processador.worker_id for l in linhas if l["id"] in processando)
+        assert sum(l["status"] == "pendente" for l in linhas) == 10
+
+        continuar.set()
+        assert await pool == 2
+        completas = await fila_pool.fetch_one(
+            "SELECT COUNT(*) AS total FROM fila_pesquisas WHERE status = 'completa'"
+        )
+        assert completas["total"] == 2
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o job de reanálise de resultados
+"""
+import pytest
+import pytest_asyncio
+
+from app.agente import reanalise
+from app.agente.avaliador import Avaliador
+from app.config import settings
+
+
+@pytest_asyncio.fixture
+async def banco_reanalise(banco_app, monkeypatch):
+    await banco_app.execute_many(
+        "INSERT INTO resultados_pesquisa (falha_id, titulo, descricao, fonte_url, idioma, query, "
+        "confidence_score, ferramenta_origem, hash_conteudo) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                1, f"Crédito para startups no Brasil {i}", "Programa de acesso a crédito " * (i % 4),
+                f"https://example.com/{i}", "pt", "acesso a crédito para startups", 0.0, "perplexity", f"h{i}"
+            )
+            for i in range(23)
+        ]
+    )
+    monkeypatch.setattr(settings, "REANALISE_PAGINA", 5)
+    monkeypatch.setattr(settings, "REANALISE_PROCESSOS", 2)
+    monkeypatch.setattr(reanalise.jobs, "jobs", {})
+    yield banco_app
+    await reanalise.encerrar()
+
+
+async def _scores(database):
+    linhas = await database.fetch_all("SELECT id, confidence_score FROM resultados_pesquisa ORDER BY id")
+    return {linha["id"]: linha["confidence_score"] for linha in linhas}
+
+
+async def _scores_esperados(database):
+    linhas = await database.fetch_all(
+        "SELECT *, ferramenta_origem AS fonte FROM resultados_pesquisa ORDER BY id"
+    )
+    return {
+        linha["id"]: await Avaliador().avaliar(linha, linha["query"], num_ocorrencias=linha["num_ocorrencias"])
+        for linha in linhas
+    }
+
+
+class TestJobReanalise:
+    """Testes para o job paginado com checkpoint"""
+
+    @pytest.mark.asyncio
+    async def test_job_heuristico_em_paginas(self, banco_reanalise):
+        """Todas as páginas são pontuadas no pool e o checkpoint fica concluído"""
+        esperados = await _scores_esperados(banco_reanalise)
+
+        job_id = await reanalise.criar_job(avaliar_profundamente=False, modo_avaliacao="gratuito")
+        await reanalise.jobs.tarefas[job_id]
+
+        obtidos = await _scores(banco_reanalise)
+        assert obtidos == esperados
+        status = await reanalise.obter_status(job_id)
+        assert status["status"] == "concluido"
+        assert status["processados"] == 23 and status["scores_atualizados"] == 23
+
+        checkpoint = await banco_reanalise.fetch_one("SELECT * FROM reanalise_jobs WHERE job_id = ?", (job_id,))
+        assert checkpoint["status"] == "concluido"
+        assert checkpoint["ultimo_id"] == max(esperados)
+
+    @pytest.mark.asyncio
+    async def test_retoma_do_checkpoint(self, banco_reanalise):
+        """Job interrompido continua após o último id gravado"""
+        esperados = await _scores_esperados(banco_reanalise)
+        ids = sorted(esperados)
+        corte = ids[9]
+        await banco_reanalise.execute(
+            "INSERT INTO reanalise_jobs (job_id, status, modo_avaliacao, total, processados, ultimo_id) "
+            "VALUES ('job-1', 'processando', 'gratuito', 23, 10, ?)",
+            (corte,)
+        )
+
+        assert await reanalise.retomar_jobs() == ["job-1"]
+        await reanalise.jobs.tarefas["job-1"]
+
+        scores = await _scores(banco_reanalise)
+        assert all(scores[i] == 0.0 for i in ids[:10])
+        assert all(scores[i] == esperados[i] for i in ids[10:])
+
+        status = await reanalise.obter_status("job-1")
+        assert status["status"] == "concluido"
+        assert status["processados"] == 23
+        assert status["scores_atualizados"] == 13
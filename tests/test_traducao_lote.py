@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o job persistente de tradução em lote
+"""
+import pytest
+import pytest_asyncio
+
+from app.agente import traducao_lote
+from app.config import settings
+
+
+class _ClienteFalso:
+    """OpenRouterClient falso que registra sessões e requisições"""
+
+    sessoes = 0
+    requisicoes = []
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+
+    async def __aenter__(self):
+        _ClienteFalso.sessoes += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def traduzir_titulo_descricao(self, titulo, descricao, idioma_alvo, idioma_origem="pt"):
+        _ClienteFalso.requisicoes.append((titulo, descricao, idioma_origem))
+        return {"titulo": f"PT {titulo}", "descricao": f"PT {descricao}" if descricao else ""}
+
+
+@pytest_asyncio.fixture
+async def banco_traducao(banco_app, monkeypatch):
+    # 24 resultados em inglês com apenas 8 textos distintos, mais 3 em português
+    linhas = [
+        (1, f"Startup credit {i % 8}", f"Access to capital {i % 8}", f"https://example.com/{i}", "en", f"h{i}")
+        for i in range(24)
+    ] + [
+        (1, f"Crédito {i}", "Programa", f"https://example.com.br/{i}", "pt", f"pt{i}")
+        for i in range(3)
+    ]
+    await banco_app.execute_many(
+        "INSERT INTO resultados_pesquisa (falha_id, titulo, descricao, fonte_url, idioma, hash_conteudo) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        linhas
+    )
+    _ClienteFalso.sessoes = 0
+    _ClienteFalso.requisicoes = []
+    monkeypatch.setattr(traducao_lote, "OpenRouterClient", _ClienteFalso)
+    monkeypatch.setattr(settings, "TRADUCAO_LOTE_PAGINA", 5)
+    monkeypatch.setattr(traducao_lote.jobs, "jobs", {})
+    yield banco_app
+    await traducao_lote.encerrar()
+
+
+class TestJobTraducaoLote:
+    """Testes para o job paginado com checkpoint e deduplicação"""
+
+    @pytest.mark.asyncio
+    async def test_traduz_com_sessao_unica_e_dedup(self, banco_traducao):
+        """Uma sessão por job e uma requisição por texto distinto"""
+        job_id = await traducao_lote.criar_job("pendentes", max_concurrent=3)
+        await traducao_lote.jobs.tarefas[job_id]
+
+        assert _ClienteFalso.sessoes == 1
+        assert len(_ClienteFalso.requisicoes) == 8
+
+        linhas = await banco_traducao.fetch_all(
+            "SELECT titulo, descricao, titulo_pt, descricao_pt FROM resultados_pesquisa WHERE idioma = 'en'"
+        )
+        assert all(l["titulo_pt"] == f"PT {l['titulo']}" for l in linhas)
+        assert all(l["descricao_pt"] == f"PT {l['descricao']}" for l in linhas)
+        nao_traduzidas = await banco_traducao.fetch_one(
+            "SELECT COUNT(*) AS total FROM resultados_pesquisa WHERE idioma = 'pt' AND titulo_pt IS NOT NULL"
+        )
+        assert nao_traduzidas["total"] == 0
+
+        status = await traducao_lote.obter_status(job_id)
+        assert status["status"] == "concluido"
+        assert status["processados"] == 24 and status["traduzidas"] == 24
+        assert status["reaproveitadas"] == 16
+
+        checkpoint = await banco_traducao.fetch_one("SELECT * FROM traducao_jobs WHERE job_id = ?", (job_id,))
+        assert checkpoint["status"] == "concluido" and checkpoint["traduzidas"] == 24
+
+    @pytest.mark.asyncio
+    async def test_retoma_do_checkpoint(self, banco_traducao):
+        """Job interrompido continua após o último id gravado"""
+        ids = [l["id"] for l in await banco_traducao.fetch_all(
+            "SELECT id FROM resultados_pesquisa WHERE idioma = 'en' ORDER BY id"
+        )]
+        corte = ids[9]
+        await banco_traducao.execute(
+            "INSERT INTO traducao_jobs (job_id, status, tipo, total, processados, traduzidas, ultimo_id) "
+            "VALUES ('job-1', 'processando', 'pendentes', 24, 10, 10, ?)",
+            (corte,)
+        )
+
+        assert await traducao_lote.retomar_jobs() == ["job-1"]
+        await traducao_lote.jobs.tarefas["job-1"]
+
+        linhas = await banco_traducao.fetch_all(
+            "SELECT id, titulo_pt FROM resultados_pesquisa WHERE idioma = 'en' ORDER BY id"
+        )
+        assert all(l["titulo_pt"] is None for l in linhas[:10])
+        assert all(l["titulo_pt"] for l in linhas[10:])
+
+        status = await traducao_lote.obter_status("job-1")
+        assert status["status"] == "concluido"
+        assert status["processados"] == 24 and status["traduzidas"] == 24
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o armazenamento vetorial em memória
+"""
+import math
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from app.vector.ann_index import IVFIndex
+from app.vector.vector_store import SimpleVectorCollection
+
+
+def _vetores_aleatorios(n: int, dim: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(n)]
+
+
+def _busca_exata(vetores, consulta, k):
+    """Referência: distância euclidiana com loop Python (implementação antiga)"""
+    distancias = [
+        (i, math.sqrt(sum((q - d) ** 2 for q, d in zip(consulta, v))))
+        for i, v in enumerate(vetores)
+    ]
+    distancias.sort(key=lambda x: x[1])
+    return distancias[:k]
+
+
+def _colecao(vetores, name="teste"):
+    colecao = SimpleVectorCollection(name)
+    colecao.add(
+        ids=[f"doc_{i}" for i in range(len(vetores))],
+        embeddings=vetores,
+        metadatas=[{"falha_id": i % 3, "pos": i} for i in range(len(vetores))],
+        documents=[f"texto {i}" for i in range(len(vetores))]
+    )
+    return colecao
+
+
+class TestSimpleVectorCollection:
+    """Testes para busca vetorial com NumPy"""
+
+    def test_colecao_vazia(self):
+        """Coleção vazia retorna listas vazias"""
+        colecao = SimpleVectorCollection("vazia")
+        resultado = colecao.query(query_embeddings=[[0.1, 0.2]], n_results=5)
+
+        assert colecao.count() == 0
+        assert resultado["metadatas"] == [[]]
+        assert resultado["distances"] == [[]]
+
+    def test_query_igual_busca_exata(self):
+        """Top-k coincide com a busca exata por loop"""
+        vetores = _vetores_aleatorios(300, 16)
+        colecao = _colecao(vetores)
+        consulta = _vetores_aleatorios(1, 16, seed=7)[0]
+
+        resultado = colecao.query(query_embeddings=[consulta], n_results=10)
+        esperado = _busca_exata(vetores, consulta, 10)
+
+        assert [m["pos"] for m in resultado["metadatas"][0]] == [i for i, _ in esperado]
+        for obtida, (_, referencia) in zip(resultado["distances"][0], esperado):
+            assert obtida == pytest.approx(referencia, abs=1e-4)
+
+    def test_query_em_lote(self):
+        """Várias consultas retornam uma lista de resultados por consulta"""
+        vetores = _vetores_aleatorios(100, 8)
+        colecao = _colecao(vetores)
+        consultas = _vetores_aleatorios(4, 8, seed=3)
+
+        resultado = colecao.query(query_embeddings=consultas, n_results=5)
+
+        assert len(resultado["metadatas"]) == 4
+        for consulta, metadatas in zip(consultas, resultado["metadatas"]):
+            esperado = _busca_exata(vetores, consulta, 5)
+            assert [m["pos"] for m in metadatas] == [i for i, _ in esperado]
+
+    def test_n_results_maior_que_colecao(self):
+        """Pedir mais resultados que documentos retorna todos, ordenados"""
+        colecao = _colecao(_vetores_aleatorios(3, 4))
+        resultado = colecao.query(query_embeddings=[[0, 0, 0, 0]], n_results=10)
+
+        assert len(resultado["documents"][0]) == 3
+        assert resultado["distances"][0] == sorted(resultado["distances"][0])
+
+    def test_include_embeddings(self):
+        """Embeddings só retornam quando solicitados"""
+        colecao = _colecao(_vetores_aleatorios(5, 4))
+
+        sem = colecao.query(query_embeddings=[[0, 0, 0, 0]], n_results=2)
+        com = colecao.query(query_embeddings=[[0, 0, 0, 0]], n_results=2, include=["embeddings"])
+
+        assert sem["embeddings"] == [[]]
+        assert len(com["embeddings"][0]) == 2
+        assert len(com["embeddings"][0][0]) == 4
+
+    def test_add_incremental_expande_matriz(self):
+        """Adições sucessivas ultrapassam a capacidade inicial"""
+        colecao = SimpleVectorCollection("incremental")
+        vetores = _vetores_aleatorios(200, 4)
+        for i, vetor in enumerate(vetores):
+            colecao.add([f"id_{i}"], [vetor], [{"pos": i}], [f"t{i}"])
+
+        assert colecao.count() == 200
+        assert colecao.embeddings.dtype == np.float32
+        assert colecao.embeddings.shape == (200, 4)
+
+    def test_dimensao_incompativel(self):
+        """Embeddings com dimensão diferente são rejeitados"""
+        colecao = _colecao(_vetores_aleatorios(2, 4))
+
+        with pytest.raises(ValueError):
+            colecao.add(["x"], [[0.0, 1.0]], [{}], ["x"])
+
+    def test_get_filtra_por_falha(self):
+        """Filtro por falha_id continua funcionando"""
+        colecao = _colecao(_vetores_aleatorios(9, 4))
+        resultado = colecao.get(where={"falha_id": {"$eq": 1}})
+
+        assert len(resultado["metadatas"]) == 3
+        assert all(m["falha_id"] == 1 for m in resultado["metadatas"])
+
+    def test_pickle_roundtrip(self):
+        """Coleção sobrevive a pickle (formato atual)"""
+        colecao = _colecao(_vetores_aleatorios(10, 4))
+        restaurada = pickle.loads(pickle.dumps(colecao))
+
+        assert restaurada.count() == 10
+        assert restaurada.ids == colecao.ids
+        np.testing.assert_array_equal(restaurada.embeddings, colecao.embeddings)
+
+    def test_carrega_formato_legado(self):
+        """Pickle antigo (lista de dicts) é convertido para matriz"""
+        legado = SimpleVectorCollection.__new__(SimpleVectorCollection)
+        legado.__setstate__({
+            "name": "legado",
+            "documents": [
+                {"id": "a", "embedding": [1.0, 0.0], "metadata": {"falha_id": 1}, "document": "A"},
+                {"id": "b", "embedding": [0.0, 1.0], "metadata": {"falha_id": 2}, "document": "B"},
+            ],
+            "metadata_dict": {}
+        })
+
+        assert legado.count() == 2
+        resultado = legado.query(query_embeddings=[[0.9, 0.1]], n_results=1)
+        assert resultado["documents"] == [["A"]]
+
+
+def _clusters(n: int, dim: int, n_clusters: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centros = rng.normal(size=(n_clusters, dim))
+    return (centros[rng.integers(0, n_clusters, size=n)] + rng.normal(scale=0.3, size=(n, dim))).astype(np.float32)
+
+
+class TestIndiceANN:
+    """Testes para o índice IVF opcional"""
+
+    def test_abaixo_do_minimo_usa_busca_exata(self):
+        """Coleções pequenas não treinam o índice"""
+        indice = IVFIndex(min_docs=1000)
+        colecao = SimpleVectorCollection("pequena", indice=indice)
+        colecao.add([str(i) for i in range(50)], _clusters(50, 8).tolist(), [{}] * 50, [""] * 50)
+
+        assert not indice.treinado
+        assert indice.usar_busca_exata(colecao.count())
+
+    def test_treina_incrementalmente(self):
+        """O índice treina ao atingir min_docs e indexa adições seguintes"""
+        indice = IVFIndex(min_docs=500, n_probe=2)
+        colecao = SimpleVectorCollection("incremental", indice=indice)
+        vetores = _clusters(1200, 8)
+        for inicio in range(0, 1200, 100):
+            bloco = vetores[inicio:inicio + 100]
+            colecao.add([str(i) for i in range(inicio, inicio + 100)], bloco.tolist(), [{}] * 100, [""] * 100)
+
+        stats = indice.get_stats()
+        assert indice.treinado
+        assert stats["indexados"] == 1200
+        assert sum(len(lista) for lista in indice._listas) == 1200
+
+    def test_recall_alto_com_nprobe(self):
+        """Recall@10 contra a busca exata fica alto com poucos n_probe"""
+        vetores = _clusters(3000, 16)
+        indice = IVFIndex(min_docs=100, n_probe=4)
+        colecao = SimpleVectorCollection("recall", indice=indice)
+        colecao.add([str(i) for i in range(3000)], vetores, [{}] * 3000, [""] * 3000)
+        consultas = vetores[:20] + 0.01
+
+        exato = colecao.query(consultas.tolist(), n_results=10, exato=True)["ids"]
+        aproximado = colecao.query(consultas.tolist(), n_results=10)["ids"]
+        acertos = sum(len(set(e) & set(a)) for e, a in zip(exato, aproximado))
+
+        assert acertos / 200 >= 0.9
+
+    def test_distancias_aproximadas_sao_exatas_para_candidatos(self):
+        """Distâncias retornadas pelo caminho ANN são as distâncias reais"""
+        vetores = _clusters(800, 8)
+        colecao = SimpleVectorCollection("dist", indice=IVFIndex(min_docs=100, n_probe=3))
+        colecao.add([str(i) for i in range(800)], vetores, [{}] * 800, [""] * 800)
+
+        consulta = vetores[5]
+        resultado = colecao.query([consulta.tolist()], n_results=5)
+        for doc_id, distancia in zip(resultado["ids"][0], resultado["distances"][0]):
+            real = float(np.linalg.norm(vetores[int(doc_id)] - consulta))
+            assert distancia == pytest.approx(real, abs=1e-3)
+
+
+class _EmbeddingFalso:
+    """Cliente de embeddings determinístico para testes"""
+
+    dimensoes = 8
+
+    async def embed_text(self, text: str):
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        return rng.normal(size=self.dimensoes).tolist()
+
+    async def embed_batch(self, texts):
+        return [await self.embed_text(t) for t in texts]
+
+    def get_cache_stats(self):
+        return {}
+
+    def clear_cache(self):
+        pass
+
+
+class TestPersistenciaAppendOnly:
+    """Testes para o formato em disco append-only com mmap"""
+
+    @pytest.mark.asyncio
+    async def test_salvar_e_recarregar(self, tmp_path):
+        """Coleções recarregadas respondem igual às originais"""
+        from app.vector.vector_store import VectorStore
+
+        store = VectorStore(tmp_path, _EmbeddingFalso())
+        textos = [f"chunk {i}" for i in range(30)]
+        await store.add_texts(textos, [{"i": i} for i in range(30)], [f"id{i}" for i in range(30)])
+
+        recarregado = VectorStore(tmp_path, _EmbeddingFalso())
+        colecao = recarregado.documents_collection
+
+        assert colecao.count() == 30
+        assert isinstance(colecao.embeddings, np.memmap)
+        assert colecao.ids == store.documents_collection.ids
+        esperado = await store.similarity_search("chunk 3", k=5)
+        obtido = await recarregado.similarity_search("chunk 3", k=5)
+        assert [d["metadata"] for d in obtido] == [d["metadata"] for d in esperado]
+
+    @pytest.mark.asyncio
+    async def test_save_anexa_apenas_novos(self, tmp_path):
+        """Cada save grava só as linhas novas"""
+        from app.vector.vector_store import VectorStore
+
+        store = VectorStore(tmp_path, _EmbeddingFalso())
+        await store.add_texts(["a", "b"], [{}, {}], ["a", "b"])
+        arquivo = tmp_path / "documents" / "vectors.f32"
+        assert arquivo.stat().st_size == 2 * 8 * 4
+
+        await store.add_texts(["c"], [{}], ["c"])
+        assert arquivo.stat().st_size == 3 * 8 * 4
+
+        # Adicionar após recarregar (matriz em mmap) também anexa
+        recarregado = VectorStore(tmp_path, _EmbeddingFalso())
+        await recarregado.add_texts(["d"], [{"x": 1}], ["d"])
+        assert arquivo.stat().st_size == 4 * 8 * 4
+        assert VectorStore(tmp_path, _EmbeddingFalso()).documents_collection.ids == ["a", "b", "c", "d"]
+
+    def test_descarta_escrita_incompleta(self, tmp_path):
+        """Bytes após o total do manifesto são ignorados e sobrescritos"""
+        from app.vector.persistencia import ArmazenamentoColecao
+
+        colecao = _colecao(_vetores_aleatorios(4, 4))
+        ArmazenamentoColecao(tmp_path / "c").anexar(colecao)
+        with open(tmp_path / "c" / "vectors.f32", "ab") as f:
+            f.write(b"\x00" * 7)  # Escrita interrompida
+
+        armazenamento = ArmazenamentoColecao(tmp_path / "c")
+        recarregada = armazenamento.carregar(SimpleVectorCollection("teste"))
+        recarregada.add(["novo"], [[1.0, 2.0, 3.0, 4.0]], [{}], ["novo"])
+        armazenamento.anexar(recarregada)
+
+        final = ArmazenamentoColecao(tmp_path / "c").carregar(SimpleVectorCollection("teste"))
+        assert final.count() == 5
+        np.testing.assert_array_equal(final.embeddings[4], [1.0, 2.0, 3.0, 4.0])
+
+    def test_migra_pickle_legado(self, tmp_path):
+        """collections.pkl existente é convertido e renomeado"""
+        from app.vector.vector_store import VectorStore
+
+        colecao = _colecao(_vetores_aleatorios(6, 8), name="documents")
+        with open(tmp_path / "collections.pkl", "wb") as f:
+            pickle.dump({"documents": colecao}, f)
+
+        store = VectorStore(tmp_path, _EmbeddingFalso())
+
+        assert store.documents_collection.count() == 6
+        assert not (tmp_path / "collections.pkl").exists()
+        assert (tmp_path / "collections.pkl.migrado").exists()
+        assert VectorStore(tmp_path, _EmbeddingFalso()).documents_collection.count() == 6